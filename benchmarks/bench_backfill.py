@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Backfill Benchmark
+Backfills --series synthetic series (daily, business-day and monthly) over
+--years years from in-process stub providers with request latency and a
+per-provider rate limit.
+
+- sequential (one worker) against parallel (--workers) wall time
+- resume: a run where a share of chunks fail (as if the job were killed),
+  then a restart; the files must match the clean run byte for byte
+- rerun: planning a finished backfill may only revisit the recheck window
+  (RECHECK_PERIODS) at the end of each series
+- late publication: a monthly value published after a run is fetched by the
+  next run
+- revision: a recent value that changed upstream (today's bar stored before
+  the close) is replaced by the next run
+
+Usage:
+    python benchmarks/bench_backfill.py [--series 36] [--years 8] [--workers 8]
+"""
+
+import argparse
+import filecmp
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import date
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BASE_DIR)
+from pushes.backfill import Checkpoint, HistoryProvider, Series, plan, run, settled_day
+from pushes.history_store import HistoryFile, date_to_day, day_to_date
+from pushes.rate_limit import TokenBucket
+
+LATENCY = 0.05  # seconds per request
+
+
+class StubProvider(HistoryProvider):
+    def __init__(self, name, frequency, chunk_days, max_workers, rate_per_minute, fail_rate=0.0):
+        self.name = name
+        self.frequency = frequency
+        self.chunk_days = chunk_days
+        self.max_workers = max_workers
+        self.bucket = TokenBucket(name, rate_per_minute, max_workers)
+        self.fail_rate = fail_rate
+        self.random = random.Random(42)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.published_until = None  # last day with published samples, if not all are out yet
+        self.revision = 0.0  # added to every price, as if the provider had revised its data
+
+    def fetch(self, symbol, first_day, last_day):
+        self.bucket.acquire()
+        with self.lock:
+            self.requests += 1
+            fail = self.random.random() < self.fail_rate
+        time.sleep(LATENCY)
+        if fail:
+            raise ConnectionError('stub: connection reset')
+        if self.published_until is not None:
+            last_day = min(last_day, self.published_until)
+        days = [d for d in range(first_day, last_day + 1) if self.has_sample(d)]
+        seed = sum(map(ord, symbol))
+        return days, [100.0 + seed + (d % 97) * 0.5 + self.revision for d in days]
+
+    def has_sample(self, day):
+        if self.frequency == 'daily':
+            return True
+        if self.frequency == 'business':
+            return day_to_date(day).weekday() < 5
+        return day_to_date(day).day == 1  # monthly
+
+
+def make_providers(fail_rate=0.0):
+    return {
+        'crypto': StubProvider('crypto', 'daily', 365, 4, 6000, fail_rate),
+        'quotes': StubProvider('quotes', 'business', 5 * 365, 2, 3000, fail_rate),
+        'econ': StubProvider('econ', 'monthly', 20 * 365, 2, 3000, fail_rate)
+    }
+
+
+def make_series(n, directory, start):
+    kinds = [('crypto', 'daily'), ('quotes', 'business'), ('econ', 'monthly')]
+    return [
+        Series(f"S{i:03d}", kinds[i % 3][0], f"SYM{i:03d}", os.path.join(directory, f"S{i:03d}.bin"),
+               kinds[i % 3][1], start)
+        for i in range(n)
+    ]
+
+
+def backfill(directory, n, start, end_day, workers, fail_rate=0.0):
+    providers = make_providers(fail_rate)
+    checkpoint = Checkpoint(os.path.join(directory, 'checkpoint.json'))
+    chunks = plan(make_series(n, directory, start), providers, checkpoint, end_day)
+    began = time.perf_counter()
+    done, failed, added = run(chunks, providers, checkpoint, workers, end_day)
+    return len(chunks), done, failed, added, time.perf_counter() - began
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Backfill planner and runner benchmark')
+    parser.add_argument('--series', type=int, default=36)
+    parser.add_argument('--years', type=int, default=8)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--fail-rate', type=float, default=0.3, help='Share of chunks failing in the resume test')
+    args = parser.parse_args()
+
+    end_day = date_to_day(date(2025, 6, 30))
+    start = date.fromordinal(day_to_date(end_day).toordinal() - 365 * args.years).isoformat()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dirs = {name: os.path.join(tmp, name) for name in ('sequential', 'parallel', 'resumed')}
+        for path in dirs.values():
+            os.makedirs(path)
+
+        chunks, _, _, added, seq_s = backfill(dirs['sequential'], args.series, start, end_day, 1)
+        _, _, _, _, par_s = backfill(dirs['parallel'], args.series, start, end_day, args.workers)
+        print(f"{args.series} series x {args.years} years: {chunks} chunks, {added} days stored")
+        print(f"sequential (1 worker)  {seq_s:7.2f}s")
+        print(f"parallel ({args.workers} workers)  {par_s:7.2f}s  ({seq_s / par_s:.1f}x)")
+
+        # Interrupted run, then restarts until complete
+        first = backfill(dirs['resumed'], args.series, start, end_day, args.workers, args.fail_rate)
+        restarts, remaining = 0, first[2]
+        while remaining and restarts < 10:
+            restarts += 1
+            remaining = backfill(dirs['resumed'], args.series, start, end_day, args.workers)[2]
+        names = [f"S{i:03d}.bin" for i in range(args.series)]
+        match, mismatch, errors = filecmp.cmpfiles(dirs['parallel'], dirs['resumed'], names, shallow=False)
+        print(f"resume: {first[2]} of {first[0]} chunks failed, complete after {restarts} restart(s); "
+              f"{len(match)}/{len(names)} files identical to the clean run")
+
+        # A rerun only revisits each series' unsettled newest days
+        rerun = plan(make_series(args.series, dirs['parallel'], start), make_providers(),
+                     Checkpoint(os.path.join(dirs['parallel'], 'checkpoint.json')), end_day)
+        stale = [chunk for chunk in rerun if chunk.first_day <= settled_day(chunk.series, end_day)]
+        print(f"rerun: {len(rerun)} chunks planned, {len(stale)} reaching past the recheck window")
+
+        # Observations published after a run are picked up by the next one
+        late_dir = os.path.join(tmp, 'late')
+        os.makedirs(late_dir)
+        providers = make_providers()
+        providers['econ'].published_until = end_day - 40  # the newest monthly value is not out yet
+        series = [s for s in make_series(3, late_dir, start) if s.frequency == 'monthly']
+        checkpoint = Checkpoint(os.path.join(late_dir, 'checkpoint.json'))
+        run(plan(series, providers, checkpoint, end_day), providers, checkpoint, args.workers, end_day)
+        before = HistoryFile(series[0].path).days[-1]
+        providers['econ'].published_until = None
+        run(plan(series, providers, checkpoint, end_day), providers, checkpoint, args.workers, end_day)
+        after = HistoryFile(series[0].path).days[-1]
+        print(f"late publication: newest stored {day_to_date(before)}, after the next run {day_to_date(after)}")
+
+        # A changed recent value replaces the stored one; settled history is not refetched
+        revised_dir = os.path.join(tmp, 'revised')
+        os.makedirs(revised_dir)
+        providers = make_providers()
+        series = make_series(3, revised_dir, start)
+        checkpoint = Checkpoint(os.path.join(revised_dir, 'checkpoint.json'))
+        run(plan(series, providers, checkpoint, end_day), providers, checkpoint, args.workers, end_day)
+        old = [HistoryFile(s.path).records['price'][[0, -1]].tolist() for s in series]
+        for provider in providers.values():
+            provider.revision = 1.0
+        run(plan(series, providers, checkpoint, end_day), providers, checkpoint, args.workers, end_day)
+        new = [HistoryFile(s.path).records['price'][[0, -1]].tolist() for s in series]
+        revised = all(n[1] == o[1] + 1.0 and n[0] == o[0] for o, n in zip(old, new))
+        print(f"revision: newest values {'replaced' if revised else 'NOT replaced'} "
+              f"({[o[1] for o in old]} -> {[n[1] for n in new]}), oldest kept")
+
+    sys.exit(1 if mismatch or errors or remaining or stale or after <= before or not revised else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Calendar Category Index Benchmark
+Classifies a synthetic calendar of --events releases (default 20k) and compares:
+
+- classification: the old per-category `any(term in name ...)` scans against
+  the single compiled CategoryMatcher
+- per request: the old path (parse the whole JSON file, scan every name)
+  against calendar store lookups (category page query, category counts)
+
+Also checks that the matcher's primary category agrees with the old first-match
+rules on every event; exits non-zero if it does not.
+
+Usage:
+    python benchmarks/bench_calendar_index.py [--events 20000] [--requests 200]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BASE_DIR)
+from pushes.calendar_store import CalendarStore, CATEGORY_RULES, MATCHER, LEGACY_JSON_PATH
+
+FILLER = ['Monthly', 'Weekly', 'Regional', 'Survey', 'Report', 'Index', 'Data', 'Release', 'Statistics', 'Outlook']
+
+
+def legacy_categorize(name):
+    """The rules as app.py applied them before the index: first matching list wins"""
+    name = name.lower()
+    for category, terms in CATEGORY_RULES:
+        if any(term in name for term in terms):
+            return category
+    return 'other'
+
+
+def make_events(n, seed=11):
+    with open(LEGACY_JSON_PATH, 'r') as f:
+        base_names = [event['name'] for event in json.load(f)['events']]
+    rng = random.Random(seed)
+    start = date.today() - timedelta(days=30)
+    events = []
+    for i in range(n):
+        name = f"{rng.choice(base_names)} {' '.join(rng.sample(FILLER, 2))}"
+        events.append({
+            'date': (start + timedelta(days=i % 120)).isoformat(),
+            'release_id': i,
+            'name': name,
+            'press_release': bool(i % 2),
+            'link': f"https://example.org/release/{i}",
+            'notes': 'x' * rng.randint(0, 600)
+        })
+    return events
+
+
+def timed(fn, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Calendar category index benchmark')
+    parser.add_argument('--events', type=int, default=20000)
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    events = make_events(args.events)
+    names = [event['name'] for event in events]
+
+    legacy_s, legacy = timed(lambda: [legacy_categorize(name) for name in names])
+    matcher_s, matched = timed(lambda: [MATCHER.categories(name) for name in names])
+    mismatches = sum(1 for old, new in zip(legacy, matched) if old != new[0])
+    multi = sum(1 for categories in matched if len(categories) > 1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, 'economic_calendar.json')
+        with open(json_path, 'w') as f:
+            json.dump({'events': events}, f, indent=2)
+
+        store = CalendarStore(os.path.join(tmp, 'calendar.db'), seed_json=None)
+        ingest_s, _ = timed(lambda: store.upsert_events(events))
+
+        def legacy_request():
+            # Old chat/calendar path: parse everything, then scan names
+            with open(json_path, 'r') as f:
+                data = json.load(f)
+            return [e for e in data['events'] if legacy_categorize(e['name']) == 'inflation'][:200]
+
+        old_request_s, _ = timed(legacy_request, max(1, args.requests // 20))
+        query_s, _ = timed(lambda: store.query(category='inflation', limit=200, include_notes=False), args.requests)
+        counts_s, counts = timed(store.category_counts, args.requests)
+
+    print(f"{args.events:,} events ({multi:,} in more than one category)")
+    print(f"classify  legacy substring scans   {legacy_s * 1000:10.1f} ms  (primary category only)")
+    print(f"classify  compiled matcher         {matcher_s * 1000:10.1f} ms  (all categories)")
+    print(f"ingest    upsert + index           {ingest_s * 1000:10.1f} ms")
+    print(f"request   legacy parse + scan      {old_request_s * 1000:10.2f} ms")
+    print(f"request   indexed category page    {query_s * 1000:10.2f} ms")
+    print(f"request   category counts          {counts_s * 1000:10.2f} ms  {counts}")
+    print(f"primary category mismatches vs legacy rules: {mismatches}")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Chat Sessions Benchmark
+Plays --conversations conversations of --turns exchanges through two
+ChatSessionStore instances on one database (two server workers, requests
+alternating between them) and reports:
+
+- history tokens per turn, against resending the whole transcript
+- latency of history() + append() per turn
+- each worker's cache size against its memory budget
+- TTL expiry, with a fake clock moved past the TTL
+- a follow-up to an expired conversation before the periodic sweep has
+  deleted it, which must start the conversation afresh
+
+Usage:
+    python benchmarks/bench_chat_sessions.py [--conversations 2000] [--turns 30]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BASE_DIR)
+sys.path.insert(0, os.path.join(BASE_DIR, 'marketinfo-app', 'backend'))
+from chat_sessions import ChatSessionStore, estimate_tokens
+
+WORDS = ('bitcoin yields inflation cpi spy nasdaq volatility rally selloff treasury fed cut hike '
+         'liquidity support resistance momentum earnings dollar gold oil').split()
+
+
+def sentence(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize() + '.'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Chat session store benchmark')
+    parser.add_argument('--conversations', type=int, default=2000)
+    parser.add_argument('--turns', type=int, default=30)
+    parser.add_argument('--budget', type=int, default=1500, help='History token budget')
+    parser.add_argument('--max-mb', type=float, default=4, help='Per-worker cache budget')
+    args = parser.parse_args()
+
+    rng = random.Random(5)
+    now = [1_700_000_000.0]
+    clock = lambda: now[0]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'chat.db')
+        workers = [ChatSessionStore(path, ttl=3600, max_bytes=int(args.max_mb * 1024 * 1024),
+                                    token_budget=args.budget, clock=clock) for _ in range(2)]
+        ids = [ChatSessionStore.new_id() for _ in range(args.conversations)]
+        transcript_tokens = {cid: 0 for cid in ids}
+        history_tokens, full_tokens, latencies = [], [], []
+        broken = 0
+
+        for turn in range(args.turns):
+            for i, cid in enumerate(ids):
+                store = workers[(i + turn) % 2]
+                question = sentence(rng, rng.randint(8, 30))
+                answer = ' '.join(sentence(rng, rng.randint(10, 25)) for _ in range(rng.randint(3, 8)))
+                start = time.perf_counter()
+                history = store.history(cid)
+                session = store.append(cid, question, answer)
+                latencies.append(time.perf_counter() - start)
+                if turn and not history:
+                    broken += 1  # a follow-up that lost its conversation
+                history_tokens.append(sum(estimate_tokens(m['content']) for m in history))
+                full_tokens.append(transcript_tokens[cid])
+                transcript_tokens[cid] += estimate_tokens(question) + estimate_tokens(answer)
+                now[0] += 0.01
+
+        stats = [w.stats() for w in workers]
+        now[0] += 3601
+        workers[0].sweep(force=True)
+        expired = sum(1 for cid in ids[:100] if workers[1].get(cid) is None)
+
+        # Expired, but the next sweep is not due yet: the follow-up replaces the old row
+        store = ChatSessionStore(os.path.join(tmp, 'ttl.db'), ttl=10, clock=clock)
+        store.append(ids[0], 'First question.', 'First answer.')
+        now[0] += 5
+        store.sweep(force=True)
+        now[0] += 6
+        try:
+            session = store.append(ids[0], 'Follow-up.', 'Answer.')
+            restarted = len(session.turns) == 2 and store.history(ids[0])[0]['content'] == 'Follow-up.'
+        except RuntimeError:
+            restarted = False
+
+    latencies.sort()
+    n = len(latencies)
+    last = slice(-args.conversations, None)
+    print(f"{args.conversations} conversations x {args.turns} turns, budget {args.budget} tokens")
+    print(f"history tokens on the last turn: mean {sum(history_tokens[last]) / args.conversations:.0f}, "
+          f"max {max(history_tokens[last])}; full transcript mean {sum(full_tokens[last]) / args.conversations:.0f}")
+    print(f"history + append per turn: p50 {latencies[n // 2] * 1000:.2f} ms, p99 {latencies[int(n * 0.99)] * 1000:.2f} ms")
+    for i, s in enumerate(stats):
+        print(f"worker {i}: {s['cached_sessions']} sessions cached, {s['cached_bytes'] / 1024 / 1024:.2f} MB "
+              f"of {args.max_mb} MB")
+    print(f"follow-ups that lost their history: {broken}; expired after TTL: {expired}/100")
+    print(f"follow-up to an expired, unswept conversation: {'restarted' if restarted else 'FAILED'}")
+    ok = (not broken and expired == 100 and restarted and max(history_tokens) <= args.budget
+          and all(s['cached_bytes'] <= args.max_mb * 1024 * 1024 for s in stats))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
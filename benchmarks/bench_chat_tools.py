@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Chat Tools Benchmark
+Sends the same question through /api/chat in context mode (every dataset in
+the system prompt) and tools mode, with a ScriptedLLM standing in for Groq,
+over synthetic price histories of growing length. Reports the prompt tokens
+each mode sends (estimated at four characters per token, summed over all
+rounds) and checks that the tool results reached the model. Context mode
+sends its summaries and calendar JSON whatever the question; tools mode sends
+the fixed prompt, the tool schemas and only the results the model asked for.
+
+Usage:
+    python benchmarks/bench_chat_tools.py [--sizes 365,3650,36500]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BASE_DIR)
+sys.path.insert(0, os.path.join(BASE_DIR, 'marketinfo-app', 'backend'))
+import app as backend
+from chat_tools import ScriptedLLM
+
+QUESTION = "How has BTC done over the last 90 days, and when is the next CPI release?"
+
+
+def write_csv(path, days):
+    end = date(2025, 6, 30)
+    rows = [f"{(end - timedelta(days=days - 1 - i)).strftime('%d/%m/%Y')},{30000 + i * 0.5:.2f}" for i in range(days)]
+    path.write_text('date,price\n' + '\n'.join(rows) + '\n')
+
+
+def ask(mode, llm):
+    backend.get_llm_client = lambda: llm
+    start = time.perf_counter()
+    response = backend.app.test_client().post('/api/chat', json={'message': QUESTION, 'mode': mode})
+    elapsed = (time.perf_counter() - start) * 1000
+    body = response.get_json()
+    if response.status_code != 200:
+        raise SystemExit(f"{mode}: HTTP {response.status_code} {body}")
+    tokens = sum(len(json.dumps(r['messages'])) + len(json.dumps(r.get('tools', []))) for r in llm.requests) // 4
+    return tokens, elapsed, body
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Prompt size of context-mode and tool-mode chat')
+    parser.add_argument('--sizes', default='365,3650,36500', help='Days of history per symbol')
+    args = parser.parse_args()
+
+    print(f"{'days':>7} {'context tokens':>15} {'tools tokens':>13} {'tool calls':>11} {'tools ms':>9}")
+    ok = True
+    with tempfile.TemporaryDirectory() as tmp:
+        data = Path(tmp)
+        backend.CLI_CHARTS_DATA = data
+        backend.PUSHES_HISTORY_DATA = backend.PUSHES_DERIVED_DATA = data / 'none'
+        for days in (int(n) for n in args.sizes.split(',')):
+            for symbol in ('BTC', 'ETH', 'SOL'):
+                write_csv(data / f"{symbol}.csv", days)
+
+            context_tokens, _, _ = ask('context', ScriptedLLM(['BTC is up.']))
+            script = ScriptedLLM([
+                [('get_price_stats', {'symbol': 'BTC', 'range': '90d'}),
+                 ('search_calendar', {'query': 'consumer price index'})],
+                'BTC is up; CPI is released next week.'
+            ])
+            tools_tokens, tools_ms, body = ask('tools', script)
+            tool_messages = [m for m in script.requests[-1]['messages'] if m['role'] == 'tool']
+            stats = json.loads(tool_messages[0]['content'])
+            ok &= stats.get('points') == 91 and all(call['ok'] for call in body['tool_calls'])
+            print(f"{days:>7} {context_tokens:>15} {tools_tokens:>13} {len(body['tool_calls']):>11} {tools_ms:>9.1f}")
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
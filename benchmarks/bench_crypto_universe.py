@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Crypto Universe Benchmark
+Fetches prices and histories for a synthetic universe of --coins coins from a
+local CoinGecko stub. The stub adds latency, rejects /simple/price requests
+with more than --max-ids ids (414) and enforces its own rate limit (429).
+
+- prices: one request per coin (measured on 50 coins and scaled), one request
+  for every id, and CoinGeckoClient's concurrent chunks
+- backfill: a market_chart request per coin from a client budgeted at --rate
+  requests/minute, while a second client on the same budget file (as the
+  price scraper in another process would be) polls prices. The stub's limit
+  is the same rate, so any 429 means the shared budget was overdrawn.
+
+Usage:
+    python benchmarks/bench_crypto_universe.py [--coins 500] [--rate 1200]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BASE_DIR)
+from pushes.coingecko import CoinGeckoClient
+from pushes.config import Config
+from pushes.rate_limit import TokenBucket
+
+PRICE_LATENCY = 0.08  # seconds per /simple/price request
+PRICE_LATENCY_PER_ID = 0.0002
+CHART_LATENCY = 0.03
+
+
+class StubState:
+    def __init__(self, rate_per_minute, burst, max_ids):
+        self.limiter = TokenBucket('stub', rate_per_minute, burst)
+        self.max_ids = max_ids
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.throttled = 0
+        self.rejected = 0
+
+
+def make_handler(state):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, body, headers=()):
+            raw = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(raw)))
+            for name, value in headers:
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(raw)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            with state.lock:
+                state.requests += 1
+            if not state.limiter.try_acquire():
+                with state.lock:
+                    state.throttled += 1
+                return self._send(429, {'error': 'rate limited'}, [('Retry-After', '1')])
+
+            if url.path.endswith('/simple/price'):
+                ids = query.get('ids', [''])[0].split(',')
+                if len(ids) > state.max_ids:
+                    with state.lock:
+                        state.rejected += 1
+                    return self._send(414, {'error': 'too many ids'})
+                time.sleep(PRICE_LATENCY + PRICE_LATENCY_PER_ID * len(ids))
+                return self._send(200, {
+                    coin_id: {'usd': 1.0 + i, 'usd_market_cap': 1e9, 'usd_24h_vol': 1e7, 'usd_24h_change': 0.5}
+                    for i, coin_id in enumerate(ids)
+                })
+            if url.path.endswith('/market_chart'):
+                time.sleep(CHART_LATENCY)
+                now = int(time.time() * 1000)
+                return self._send(200, {'prices': [[now - d * 86400000, 100.0 + d] for d in range(30, -1, -1)]})
+            return self._send(404, {'error': 'not found'})
+
+    return Handler
+
+
+class StubConfig(Config):
+    COINGECKO_API_KEY = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Crypto universe fetch benchmark against a CoinGecko stub')
+    parser.add_argument('--coins', type=int, default=500)
+    parser.add_argument('--max-ids', type=int, default=250, help='Stub limit on ids per /simple/price request')
+    parser.add_argument('--rate', type=float, default=1200, help='Requests per minute, client budget and stub limit')
+    parser.add_argument('--workers', type=int, default=8)
+    args = parser.parse_args()
+
+    universe = {f"C{i:04d}": f"coin-{i:04d}" for i in range(args.coins)}
+    state = StubState(args.rate * 10, 50, args.max_ids)  # generous while measuring price fetches
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(state))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    StubConfig.COINGECKO_BASE_URL = f"http://127.0.0.1:{server.server_address[1]}"
+    StubConfig.COINGECKO_MAX_IDS_PER_REQUEST = args.max_ids
+    StubConfig.COINGECKO_MAX_WORKERS = args.workers
+
+    with tempfile.TemporaryDirectory() as tmp:
+        budget_path = os.path.join(tmp, 'coingecko.json')
+
+        def client(rate=args.rate * 10, burst=50):
+            return CoinGeckoClient(StubConfig, bucket=TokenBucket('coingecko', rate, burst, budget_path))
+
+        # Prices: per coin (scaled from a sample), all ids at once, chunked
+        sample = dict(list(universe.items())[:50])
+        price_client = client()
+        start = time.perf_counter()
+        for symbol, coin_id in sample.items():
+            price_client.simple_prices({symbol: coin_id})
+        per_coin_s = (time.perf_counter() - start) * len(universe) / len(sample)
+
+        start = time.perf_counter()
+        try:
+            price_client.get('/simple/price', {'ids': ','.join(universe.values()), 'vs_currencies': 'usd'})
+            single = f"{(time.perf_counter() - start) * 1000:.0f} ms"
+        except Exception as e:
+            single = f"failed ({getattr(e.response, 'status_code', e)})"
+
+        start = time.perf_counter()
+        table = price_client.simple_prices(universe)
+        chunked_s = time.perf_counter() - start
+
+        # Backfill plus a concurrent price poller, both on one budget file, against a strict stub
+        os.unlink(budget_path)
+        state.limiter = TokenBucket('stub', args.rate, 10)
+        state.requests = state.throttled = 0
+        backfill_client = client(args.rate, 5)
+        poller_client = client(args.rate, 5)
+        stop = threading.Event()
+        polls = []
+
+        def poll_prices():
+            while not stop.is_set():
+                poller_client.simple_prices(universe)
+                polls.append(1)
+
+        poller = threading.Thread(target=poll_prices)
+        poller.start()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.workers) as executor:
+            charts = list(executor.map(backfill_client.market_chart, universe.values()))
+        backfill_s = time.perf_counter() - start
+        stop.set()
+        poller.join()
+        total_requests, throttled = state.requests, state.throttled
+
+    server.shutdown()
+    achieved = total_requests / backfill_s * 60
+    print(f"{args.coins} coins, stub limit {args.max_ids} ids/request, budget {args.rate:.0f} requests/min")
+    print(f"prices  one request per coin     {per_coin_s * 1000:10.0f} ms  (scaled from {len(sample)} coins)")
+    print(f"prices  one request, all ids     {single:>10}")
+    print(f"prices  chunked + concurrent     {chunked_s * 1000:10.0f} ms  ({len(table)} rows, "
+          f"{-(-args.coins // args.max_ids)} requests)")
+    print(f"backfill {len(charts)} histories + {len(polls)} price polls in {backfill_s:.1f}s: "
+          f"{achieved:.0f} requests/min, {throttled} throttled by the stub")
+    sys.exit(1 if throttled or len(table) != args.coins else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Derived Metrics Benchmark
+Refreshes every derived metric over --years years of synthetic stored series
+(daily crypto, business-day equities and yields, monthly CPI and retail
+sales) and reports:
+
+- cold: nothing cached
+- warm: nothing changed, every metric served from the cache
+- one input: a day appended to SPY; only the metrics that read SPY rerun
+
+The rolling correlation is checked against a plain per-window computation.
+
+Usage:
+    python benchmarks/bench_derived_metrics.py [--years 20]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BASE_DIR)
+from pushes.derived_metrics import METRICS, DerivedMetricsEngine, TimeSeries, rolling_corr
+from pushes.history_store import append_history, date_to_day, write_history
+
+
+def synthetic(rng, days, start, vol):
+    return start * np.exp(np.cumsum(rng.normal(0, vol, len(days))))
+
+
+def write_inputs(directory, years):
+    rng = np.random.default_rng(7)
+    end = date_to_day(date(2025, 6, 30))
+    daily = np.arange(end - 365 * years, end + 1, dtype=np.int64)
+    business = daily[(daily + 3) % 7 < 5]  # epoch day 0 was a Thursday
+    monthly = np.unique(daily.astype('datetime64[D]').astype('datetime64[M]')).astype('datetime64[D]').astype(np.int64)
+    inputs = {
+        'BTC': (daily, synthetic(rng, daily, 5000, 0.035)),
+        'ETH': (daily, synthetic(rng, daily, 300, 0.045)),
+        'SPY': (business, synthetic(rng, business, 250, 0.011)),
+        'QQQ': (business, synthetic(rng, business, 180, 0.014)),
+        'GOLD': (business, synthetic(rng, business, 1300, 0.009)),
+        'DGS10': (business, 3 + np.cumsum(rng.normal(0, 0.03, len(business)))),
+        'CPIAUCSL': (monthly, synthetic(rng, monthly, 250, 0.003)),
+        'RSAFS': (monthly, synthetic(rng, monthly, 450000, 0.006)),
+    }
+    for name, (days, values) in inputs.items():
+        write_history(os.path.join(directory, f"{name}.bin"), days, values)
+    return inputs
+
+
+def check_corr(inputs, window=30):
+    btc = TimeSeries(*inputs['BTC'])
+    spy = TimeSeries(*inputs['SPY'])
+    fast = rolling_corr(btc, spy, window)
+    common, ia, ib = np.intersect1d(btc.days, spy.days, return_indices=True)
+    x, y = np.diff(np.log(btc.values[ia])), np.diff(np.log(spy.values[ib]))
+    slow = [np.corrcoef(x[i - window:i], y[i - window:i])[0, 1] for i in range(window, len(x) + 1)]
+    return float(np.max(np.abs(fast.values - np.array(slow))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Derived metrics refresh benchmark')
+    parser.add_argument('--years', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        inputs_dir = os.path.join(tmp, 'history')
+        os.makedirs(inputs_dir)
+        inputs = write_inputs(inputs_dir, args.years)
+
+        def resolve(name):
+            path = os.path.join(inputs_dir, f"{name}.bin")
+            return path if os.path.exists(path) else None
+
+        engine = DerivedMetricsEngine(output_dir=os.path.join(tmp, 'derived'), resolve=resolve)
+        results = []
+        for label in ('cold', 'warm', 'one input'):
+            if label == 'one input':
+                days, values = inputs['SPY']
+                append_history(resolve('SPY'), [int(days[-1]) + 3], [float(values[-1]) * 1.01])
+            start = time.perf_counter()
+            status = engine.run()
+            elapsed = time.perf_counter() - start
+            computed = sorted(name for name, s in status.items() if s == 'computed')
+            results.append((label, elapsed, computed))
+
+    spy_readers = sorted(name for name, m in METRICS.items() if 'SPY' in m.inputs)
+    error = check_corr(inputs)
+    print(f"{len(METRICS)} metrics over {args.years} years of inputs")
+    for label, elapsed, computed in results:
+        print(f"{label:<10} {elapsed * 1000:8.1f} ms  {len(computed)} recomputed {', '.join(computed)}")
+    print(f"rolling correlation max abs error vs per-window corrcoef: {error:.2e}")
+    ok = (len(results[0][2]) == len(METRICS) and not results[1][2] and results[2][2] == spy_readers and error < 1e-9)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+History Reader Benchmark
+Times the stdlib csv parser against pandas on synthetic `date,price` files of
+40, 10k and 1M rows (the size of today's files, a few decades of daily data,
+and a long intraday series), plus the old pd.read_csv + to_dict('records')
+request path for reference.
+
+With --write, stores the file size from which pandas wins in
+marketinfo-app/backend/history_calibration.json; the backend reads it at startup
+to pick the parser per file.
+
+Usage:
+    python benchmarks/bench_history_reader.py [--sizes 40,10000,1000000] [--repeat 5] [--write]
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND_DIR = os.path.join(BASE_DIR, 'marketinfo-app', 'backend')
+sys.path.append(BASE_DIR)
+sys.path.append(BACKEND_DIR)
+import history_reader
+from history_reader import parse_csv, parse_pandas
+
+
+def make_csv(rows, seed=7):
+    rng = random.Random(seed)
+    start = date(1970, 1, 1)
+    price = 100.0
+    lines = ['date,price']
+    for i in range(rows):
+        price *= math.exp(rng.gauss(0, 0.02))
+        lines.append(f"{(start + timedelta(days=i % 36500)).strftime('%d/%m/%Y')},{price!r}")
+    return ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+def best_time(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def legacy_request_path(raw):
+    import io
+    import pandas as pd
+    return pd.read_csv(io.BytesIO(raw)).to_dict('records')
+
+
+def run(sizes, repeat):
+    parse_pandas(make_csv(10))  # import pandas outside the timed region
+    results = []
+    for rows in sizes:
+        raw = make_csv(rows)
+        # Fewer repeats for the big file keep the run short without changing the winner
+        n = repeat if rows < 500_000 else max(1, repeat // 2)
+        results.append({
+            'rows': rows,
+            'bytes': len(raw),
+            'csv_ms': best_time(lambda: parse_csv(raw), n) * 1000,
+            'pandas_ms': best_time(lambda: parse_pandas(raw), n) * 1000,
+            'csv_records_ms': best_time(lambda: parse_csv(raw).records(), n) * 1000,
+            'legacy_records_ms': best_time(lambda: legacy_request_path(raw), n) * 1000
+        })
+    return results
+
+
+def pandas_threshold(results):
+    """
+    Smallest file size from which pandas stays faster
+
+    The crossover lies between the largest size csv wins and the next size; the
+    geometric midpoint splits that gap without assuming linear scaling.
+    """
+    threshold = None
+    for previous, current in zip([None] + results, results):
+        if current['pandas_ms'] < current['csv_ms']:
+            if threshold is None:
+                threshold = current['bytes'] if previous is None else int(math.sqrt(previous['bytes'] * current['bytes']))
+        else:
+            threshold = None
+    return threshold
+
+
+def main():
+    parser = argparse.ArgumentParser(description='stdlib csv vs pandas for price history files')
+    parser.add_argument('--sizes', default='40,10000,1000000', help='Comma-separated row counts')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--write', action='store_true', help='Store the measured crossover for the backend')
+    args = parser.parse_args()
+
+    results = run([int(s) for s in args.sizes.split(',')], args.repeat)
+    print(f"{'rows':>10}{'bytes':>12}{'csv ms':>10}{'pandas ms':>11}{'winner':>8}"
+          f"{'csv+records':>13}{'pandas+to_dict':>16}")
+    for r in results:
+        winner = 'pandas' if r['pandas_ms'] < r['csv_ms'] else 'csv'
+        print(f"{r['rows']:>10,}{r['bytes']:>12,}{r['csv_ms']:>10.3f}{r['pandas_ms']:>11.3f}{winner:>8}"
+              f"{r['csv_records_ms']:>13.3f}{r['legacy_records_ms']:>16.3f}")
+
+    threshold = pandas_threshold(results)
+    print(f"pandas_min_bytes: {threshold if threshold is not None else 'never (csv wins at every size)'}")
+
+    if args.write:
+        calibration = {
+            'pandas_min_bytes': threshold,
+            'measured': [{k: round(v, 3) if isinstance(v, float) else v for k, v in r.items()} for r in results]
+        }
+        with open(history_reader.CALIBRATION_FILE, 'w') as f:
+            json.dump(calibration, f, indent=2)
+            f.write('\n')
+        print(f"Wrote {history_reader.CALIBRATION_FILE}")
+
+
+if __name__ == '__main__':
+    main()
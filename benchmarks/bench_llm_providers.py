@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+LLM Providers Benchmark
+Sends --requests chat requests from --clients threads through each provider
+and reports latency, request and token throughput, upstream calls and the
+HTTP connections opened:
+
+- stub: the deterministic provider, simulating a server that takes
+  --latency-ms per call plus --item-ms per completion, with and without
+  micro-batching (--window-ms)
+- openai: the OpenAI-compatible provider against a local HTTP server with
+  the same simulated cost, to check connection reuse
+- any of --providers groq,openai configured in the environment, to compare
+  real backends (one identical prompt set per provider)
+
+Usage:
+    python benchmarks/bench_llm_providers.py [--requests 200] [--clients 32] [--providers groq]
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BASE_DIR)
+sys.path.insert(0, os.path.join(BASE_DIR, 'marketinfo-app', 'backend'))
+from llm_providers import OpenAICompatibleProvider, StubProvider, provider_from_env
+
+QUESTIONS = [
+    "What is BTC doing today?", "When is the next CPI release?", "How did SPY close?",
+    "Is the yield curve still inverted?", "What moved ETH this week?", "Summarize the macro calendar.",
+]
+
+
+def local_server(latency_ms):
+    """An OpenAI-compatible server on a free port; returns (server, set of client ports seen)"""
+    ports = set()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_POST(self):
+            ports.add(self.client_address[1])
+            body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+            time.sleep(latency_ms / 1000)
+            question = body['messages'][-1]['content']
+            payload = json.dumps({
+                'model': body['model'],
+                'choices': [{'index': 0, 'finish_reason': 'stop',
+                             'message': {'role': 'assistant', 'content': f"Local answer: {question}"}}],
+                'usage': {'prompt_tokens': len(json.dumps(body['messages'])) // 4, 'completion_tokens': 12}
+            }).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, ports
+
+
+def drive(provider, requests, clients):
+    def one(i):
+        start = time.perf_counter()
+        provider.chat.completions.create(messages=[
+            {'role': 'system', 'content': 'You are MarketInfo AI.'},
+            {'role': 'user', 'content': f"{QUESTIONS[i % len(QUESTIONS)]} (#{i})"}
+        ], temperature=0.3, max_tokens=300)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        latencies = sorted(pool.map(one, range(requests)))
+    return time.perf_counter() - start, latencies
+
+
+def report(label, provider, elapsed, latencies, extra=''):
+    stats = provider.stats()
+    n = len(latencies)
+    print(f"{label:<26} {latencies[n // 2] * 1000:>8.0f} {latencies[int(n * 0.95)] * 1000:>8.0f} "
+          f"{n / elapsed:>8.1f} {stats['completion_tokens'] / elapsed:>9.0f} {stats['calls']:>7} {extra}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Chat model provider benchmark')
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--concurrency', type=int, default=4, help='Upstream calls in flight per provider')
+    parser.add_argument('--latency-ms', type=float, default=200)
+    parser.add_argument('--item-ms', type=float, default=5)
+    parser.add_argument('--window-ms', type=float, default=20)
+    parser.add_argument('--providers', default='', help='Comma-separated real providers to include (groq, openai)')
+    args = parser.parse_args()
+
+    print(f"{args.requests} requests from {args.clients} clients, {args.concurrency} upstream calls in flight")
+    print(f"{'provider':<26} {'p50 ms':>8} {'p95 ms':>8} {'req/s':>8} {'tokens/s':>9} {'calls':>7}")
+
+    stub = StubProvider(latency_ms=args.latency_ms, item_ms=args.item_ms, max_concurrency=args.concurrency)
+    elapsed, latencies = drive(stub, args.requests, args.clients)
+    report('stub', stub, elapsed, latencies)
+    unbatched = args.requests / elapsed
+
+    batched = StubProvider(latency_ms=args.latency_ms, item_ms=args.item_ms, max_concurrency=args.concurrency,
+                           batch_window_ms=args.window_ms)
+    elapsed, latencies = drive(batched, args.requests, args.clients)
+    report(f"stub, {args.window_ms:g} ms batches", batched, elapsed, latencies)
+    speedup = args.requests / elapsed / unbatched
+
+    server, ports = local_server(args.latency_ms)
+    local = OpenAICompatibleProvider(f"http://127.0.0.1:{server.server_port}/v1", model='local',
+                                     max_concurrency=args.concurrency)
+    elapsed, latencies = drive(local, args.requests, args.clients)
+    report('openai (local server)', local, elapsed, latencies, f"{len(ports)} connections")
+    server.shutdown()
+
+    for name in filter(None, args.providers.split(',')):
+        provider = provider_from_env(name)
+        elapsed, latencies = drive(provider, args.requests, args.clients)
+        report(f"{name} {provider.model}", provider, elapsed, latencies)
+
+    print(f"micro-batching: {speedup:.1f}x requests/s")
+    sys.exit(0 if speedup > 1 and len(ports) <= args.concurrency else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+News Impact Benchmark
+Runs the news impact pipeline over --messages synthetic headlines (a third of
+them mention an asset) and two years of synthetic daily prices, then times a
+streaming update with --increment more messages.
+
+Usage:
+    python benchmarks/bench_news_impact.py [--messages 50000] [--increment 200]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BASE_DIR)
+from pushes.history_store import write_history, date_to_day
+from pushes.news_impact import ImpactPipeline
+from pushes.news_store import NewsStore
+
+CHANNELS = ['remarks', 'WatcherGuru', 'coinmarket', 'SolidIntelX', 'startups', 'investigations', 'bricsnews']
+HEADLINES = [
+    '**JUST IN:** Bitcoin ETF inflows hit a record',
+    'Ethereum developers schedule the next upgrade',
+    '$SOL rallies as Solana network activity climbs',
+    'BREAKING: Fed leaves interest rates unchanged',
+    'Oil rises after OPEC announces production cuts',
+    'US unemployment claims fall to a three-month low',
+]
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+DAYS = 730
+
+
+def make_messages(n, start, span_seconds, first=0):
+    """n messages spread evenly over span_seconds from start; ids continue from `first`"""
+    rng = random.Random(first)
+    messages = []
+    for i in range(first, first + n):
+        posted = start + timedelta(seconds=(i - first) * span_seconds // n)
+        messages.append({
+            'channel': CHANNELS[i % len(CHANNELS)],
+            'id': 1 + i // len(CHANNELS),
+            'date': str(posted.replace(microsecond=0)),
+            'text': f"{rng.choice(HEADLINES)} ({i})\n\n@Channel",
+            'sender_id': -1
+        })
+    return messages
+
+
+def write_prices(directory):
+    rng = random.Random(7)
+    first_day = date_to_day(START)
+    for asset, price in (('BTC', 40000.0), ('ETH', 2200.0), ('SOL', 90.0)):
+        prices = []
+        for _ in range(DAYS):
+            price *= 1 + rng.gauss(0, 0.03)
+            prices.append(price)
+        write_history(os.path.join(directory, f"{asset}.bin"), range(first_day, first_day + DAYS), prices)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='News impact pipeline benchmark')
+    parser.add_argument('--messages', type=int, default=50000)
+    parser.add_argument('--increment', type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write_prices(tmp)
+        store = NewsStore(os.path.join(tmp, 'news'))
+        store.append(make_messages(args.messages, START, DAYS * 86400))
+        output = os.path.join(tmp, 'impact.json')
+
+        pipeline = ImpactPipeline(store, series_dir=tmp, snapshot_path=os.path.join(tmp, 'none.json'))
+        start = time.perf_counter()
+        pipeline.update(output)
+        batch_s = time.perf_counter() - start
+        rows = len(pipeline)
+
+        # The newest hour: the streaming case, most returns not yet observable
+        store.append(make_messages(args.increment, START + timedelta(days=DAYS - 1), 3600, first=args.messages))
+        start = time.perf_counter()
+        added = pipeline.update(output)
+        stream_s = time.perf_counter() - start
+
+        with open(output, 'r') as f:
+            table = json.load(f)
+        size_mb = os.path.getsize(output) / 1e6
+
+    print(f"{args.messages:,} messages -> {rows:,} tagged rows, {len(table['buckets']):,} buckets ({size_mb:.1f} MB table)")
+    print(f"batch build                     {batch_s * 1000:10.0f} ms")
+    print(f"streaming update (+{args.increment} msgs, +{added} rows) {stream_s * 1000:6.0f} ms")
+    print(f"per-asset summary: {table['assets']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+News Store Benchmark
+Cost of saving one bot run (--new messages across 7 channels) as the stored
+history grows, for the old news.json path (load everything, rebuild the key
+set, rewrite the file) and the append-only NewsStore (open, dedupe against
+the cursor index, append).
+
+Usage:
+    python benchmarks/bench_news_store.py [--sizes 1000,10000,100000] [--new 35]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BASE_DIR)
+from pushes.news_store import NewsStore, message_key
+
+CHANNELS = ['remarks', 'WatcherGuru', 'coinmarket', 'SolidIntelX', 'startups', 'investigations', 'bricsnews']
+
+
+def make_messages(n, first_id=1):
+    return [
+        {
+            'channel': CHANNELS[i % len(CHANNELS)],
+            'id': first_id + i // len(CHANNELS),
+            'date': '2025-07-01 12:00:00+00:00',
+            'text': f"**JUST IN:** synthetic headline number {i} about rates, oil and bitcoin.\n\n@Channel",
+            'sender_id': -1000000000000 - i % len(CHANNELS)
+        }
+        for i in range(n)
+    ]
+
+
+def legacy_run(path, fetched):
+    with open(path, 'r', encoding='utf-8') as f:
+        existing = json.load(f)
+    keys = set(message_key(m) for m in existing)
+    for msg in fetched:
+        if message_key(msg) not in keys:
+            existing.append(msg)
+            keys.add(message_key(msg))
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(existing, f, indent=2, ensure_ascii=False)
+
+
+def store_run(directory, fetched):
+    store = NewsStore(directory)
+    store.append(fetched)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='News store benchmark')
+    parser.add_argument('--sizes', default='1000,10000,100000')
+    parser.add_argument('--new', type=int, default=35, help='New messages per run')
+    args = parser.parse_args()
+
+    print(f"{'history':>10} {'news.json ms':>14} {'news.jsonl ms':>14}")
+    for size in [int(s) for s in args.sizes.split(',')]:
+        history = make_messages(size)
+        # Each run refetches the newest message per channel (a duplicate) plus --new messages
+        next_id = history[-1]['id'] + 1
+        fetched = history[-len(CHANNELS):] + make_messages(args.new, next_id)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            legacy_path = os.path.join(tmp, 'legacy.json')
+            with open(legacy_path, 'w', encoding='utf-8') as f:
+                json.dump(history, f)
+            start = time.perf_counter()
+            legacy_run(legacy_path, fetched)
+            legacy_s = time.perf_counter() - start
+
+            store_dir = os.path.join(tmp, 'store')
+            NewsStore(store_dir).append(history)
+            start = time.perf_counter()
+            store_run(store_dir, fetched)
+            store_s = time.perf_counter() - start
+            assert NewsStore(store_dir).count() == size + args.new
+
+        print(f"{size:>10,} {legacy_s * 1000:>14.1f} {store_s * 1000:>14.2f}")
+
+
+if __name__ == '__main__':
+    main()
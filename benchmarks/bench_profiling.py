@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Request Profiling Benchmark
+The cost of the opt-in profiler (marketinfo-app/backend/profiling.py):
+
+- disabled: what every unprofiled request pays, i.e. the profile hook's
+  header and query check plus a phase() call per marked phase
+- enabled: request latency with no profiler, the sampler and cProfile, for
+  a cached price history, a calendar page and /api/chat (stub model)
+
+Exits 1 if the disabled path costs more than --budget-us per request.
+
+Usage:
+    python benchmarks/bench_profiling.py [--requests 200] [--budget-us 10]
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, 'marketinfo-app', 'backend'))
+
+ENDPOINTS = [
+    ('GET', '/api/crypto/prices/BTC', None),
+    ('GET', '/api/calendar/economic', None),
+    ('POST', '/api/chat', {'message': 'How has BTC moved this month?'}),
+]
+# Phases a request marks at most (chat in context mode)
+PHASES_PER_REQUEST = 6
+
+
+def per_call_ns(run, calls):
+    """Nanoseconds per call of run, less the cost of calling an empty function"""
+    def elapsed(fn):
+        start = time.perf_counter_ns()
+        for _ in range(calls):
+            fn()
+        return time.perf_counter_ns() - start
+    return max(0.0, (elapsed(run) - elapsed(lambda: None)) / calls)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Request profiler overhead')
+    parser.add_argument('--requests', type=int, default=200, help='Requests per endpoint and mode')
+    parser.add_argument('--budget-us', type=float, default=10, help='Allowed disabled-path cost per request')
+    args = parser.parse_args()
+
+    os.environ.setdefault('LLM_PROVIDER', 'stub')
+    os.environ['PROFILE_DIR'] = tempfile.mkdtemp(prefix='marketinfo-profiles-')
+    import app as backend
+    from profiling import phase
+
+    def noop_phase():
+        with phase('load'):
+            pass
+
+    phase_ns = per_call_ns(noop_phase, 200000)
+    with backend.app.test_request_context('/api/crypto/prices/BTC?start=2025-06-01'):
+        from flask import request
+        hook_ns = per_call_ns(lambda: backend.PROFILER.start(request), 200000)
+    disabled_us = (hook_ns + PHASES_PER_REQUEST * phase_ns) / 1000
+    print(f"disabled: hook {hook_ns:.0f} ns, phase {phase_ns:.0f} ns -> "
+          f"{disabled_us:.2f} us per request (budget {args.budget_us:g} us)")
+
+    client = backend.app.test_client()
+    print(f"{'endpoint':<28} {'off ms':>8} {'sample ms':>10} {'cprofile ms':>12}")
+    for method, path, body in ENDPOINTS:
+        row = []
+        for headers in ({}, {'X-Profile': 'sample'}, {'X-Profile': 'cprofile'}):
+            samples = []
+            client.open(path, method=method, json=body, headers=headers)  # warm up
+            for _ in range(args.requests):
+                start = time.perf_counter()
+                response = client.open(path, method=method, json=body, headers=headers)
+                samples.append((time.perf_counter() - start) * 1000)
+                if response.status_code != 200:
+                    sys.exit(f"{method} {path}: HTTP {response.status_code}")
+            row.append(statistics.median(samples))
+        print(f"{method + ' ' + path:<28} {row[0]:>8.2f} {row[1]:>10.2f} {row[2]:>12.2f}")
+    print(f"{len(backend.PROFILER.list(limit=10 ** 6))} profiles kept (PROFILE_MAX_FILES)")
+    shutil.rmtree(backend.PROFILER.directory, ignore_errors=True)
+
+    sys.exit(0 if disabled_us <= args.budget_us else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Risk Engine Benchmark
+Rolling covariance over --series synthetic series and --years years of
+business days, window --window:
+
+- full: np.cov over the whole window recomputed every day
+- incremental: the sliding Welford update used by risk_engine.py
+- daily update: RiskEngine picking up one new day from its saved state,
+  checked against a rebuild from scratch
+
+Usage:
+    python benchmarks/bench_risk_engine.py [--series 24] [--years 10] [--window 60]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BASE_DIR)
+from pushes.history_store import append_history, write_history
+from pushes.risk_engine import RiskEngine, RollingCovariance, business_days, correlation
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rolling covariance benchmark')
+    parser.add_argument('--series', type=int, default=24)
+    parser.add_argument('--years', type=int, default=10)
+    parser.add_argument('--window', type=int, default=60)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(3)
+    k, window = args.series, args.window
+    days = business_days(20000, 20000 + 365 * args.years)
+    factor = rng.normal(0, 0.01, len(days))
+    moves = factor[:, None] * rng.uniform(0.2, 2.0, k) + rng.normal(0, 0.01, (len(days), k))
+    moves[: len(days) // 3, k - 1] = np.nan  # one series starts late
+
+    start = time.perf_counter()
+    for t in range(window, len(days) + 1):
+        block = moves[t - window:t]
+        block = block[:, np.isfinite(block).all(axis=0)]
+        full = np.cov(block, rowvar=False)
+    full_s = time.perf_counter() - start
+
+    cov = RollingCovariance(k, window)
+    start = time.perf_counter()
+    for row in moves:
+        cov.push(row)
+    incremental_s = time.perf_counter() - start
+    error = float(np.max(np.abs(cov.covariance() - full)))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        names = [f"S{i:02d}" for i in range(k - 1)] + ['SPY']
+        prices = 100 * np.exp(np.nancumsum(moves, axis=0))
+        series = []
+        for i, name in enumerate(names):
+            path = os.path.join(tmp, f"{name}.bin")
+            ok = np.isfinite(moves[:, i])
+            write_history(path, days[ok][:-1], prices[ok, i][:-1])
+            series.append((name, path, 'log'))
+
+        incremental = RiskEngine(series, window, output_dir=os.path.join(tmp, 'incremental'))
+        incremental.update()
+        for i, (_, path, _) in enumerate(series):
+            append_history(path, days[-1:], prices[-1:, i])
+        start = time.perf_counter()
+        processed = incremental.update()
+        update_ms = (time.perf_counter() - start) * 1000
+
+        fresh = RiskEngine(series, window, output_dir=os.path.join(tmp, 'fresh'))
+        start = time.perf_counter()
+        fresh.update()
+        rebuild_ms = (time.perf_counter() - start) * 1000
+        with open(incremental.output_path) as f:
+            a = json.load(f)
+        with open(fresh.output_path) as f:
+            b = json.load(f)
+        drift = float(np.nanmax(np.abs(np.array(a['correlation'], dtype=float) - np.array(b['correlation'], dtype=float))))
+
+    corr = correlation(cov.covariance())
+    print(f"{k} series x {len(days)} days, window {window}")
+    print(f"full recompute per day    {full_s * 1000:8.1f} ms")
+    print(f"incremental (Welford)     {incremental_s * 1000:8.1f} ms  ({full_s / incremental_s:.1f}x), "
+          f"max covariance error {error:.1e}, mean corr {np.mean(corr[np.triu_indices(len(corr), 1)]):.2f}")
+    print(f"engine: new day in {update_ms:.1f} ms ({processed} day), rebuild from scratch {rebuild_ms:.1f} ms, "
+          f"max correlation difference {drift:.1e}")
+    sys.exit(0 if error < 1e-12 and drift < 1e-5 and processed == 1 else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Scaling Benchmark
+Latency and memory of every backend endpoint and data pipeline against the
+size of the data, using synthetic data sets from synth.py. The full size is
+--symbols symbols x --years years of daily prices, --events calendar events
+and --messages news messages; each --scales point multiplies the symbol,
+event and message counts by its factor (the history length stays fixed).
+
+Each point runs in a fresh process, which generates its data set into a
+temporary directory, points the backend at it (synth.env()) and measures:
+
+- pipelines: building the calendar store from the fetcher's JSON (upsert)
+  and refreshing it, building the search index, the news impact table, and
+  the market-data context the chat prompt is built from
+- endpoints: each read endpoint and /api/chat (stub model, context mode),
+  after one warm-up request
+
+Latency is the median of --repeat runs; memory is the peak Python
+allocation during one more run under tracemalloc, so it does not slow the
+timed runs. The growth column is the log-log slope of latency against the
+scale factor: about 1 for linear, 0 for size-independent.
+
+Usage:
+    python benchmarks/bench_scaling.py [--scales 0.01,0.1,1] [--symbols 100] [--years 10]
+        [--events 100000] [--messages 100000] [--repeat 3] [--output curves.json]
+"""
+
+import argparse
+import json
+import math
+import os
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+import synth
+
+ENDPOINTS = [
+    '/api/health',
+    '/api/data/overview',
+    '/api/pushes/crypto',
+    '/api/pushes/macro',
+    '/api/crypto/prices',
+    '/api/crypto/prices/BTC',
+    '/api/crypto/prices/BTC?start=2025-01-01',
+    '/api/calendar/economic',
+    '/api/calendar/economic?category=inflation&page_size=1000',
+    '/api/search?q=consumer+price+index',
+    '/api/news/impact?asset=BTC',
+    '/metrics',
+]
+CHAT_QUESTION = 'How has BTC moved this month, and when is the next CPI release?'
+
+
+def measure(run, repeat):
+    """(median ms over `repeat` runs, peak MB of one run under tracemalloc)"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        samples.append((time.perf_counter() - start) * 1000)
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'ms': round(statistics.median(samples), 2), 'peak_mb': round(peak / 2 ** 20, 2)}
+
+
+def run_point(scale, args, workdir):
+    """Generate one data set and measure everything against it; runs in its own process"""
+    counts = {
+        'symbols': max(3, round(args.symbols * scale)),
+        'events': max(1, round(args.events * scale)),
+        'messages': max(1, round(args.messages * scale)),
+    }
+    data_dir = os.path.join(workdir, 'data')
+    info = synth.generate(data_dir, counts['symbols'], args.years, counts['events'], counts['messages'],
+                          seed=args.seed)
+    paths = info['paths']
+    # Must be set before the backend imports its configuration
+    os.environ.update(synth.env(data_dir))
+    os.environ.update({
+        'GROQ_API_KEY': '', 'LLM_PROVIDER': 'stub',
+        'METRICS_DIR': os.path.join(workdir, 'metrics'),
+        'SHARED_CACHE_DIR': os.path.join(workdir, 'shared_cache'),
+        'CHAT_SESSION_DB': os.path.join(workdir, 'chat.db'),
+    })
+
+    sys.path.append(BASE_DIR)
+    from pushes.calendar_store import CalendarStore
+    from pushes.news_impact import ImpactPipeline
+    from pushes.news_store import NewsStore
+    from pushes.search_index import SearchIndex
+
+    with open(paths['calendar_json']) as f:
+        events = json.load(f)['events']
+    results = {}
+    builds = iter(range(10 ** 6))
+
+    def fresh(name):
+        return os.path.join(workdir, f"{name}-{next(builds)}.db")
+
+    results['pipeline.calendar_build'] = measure(lambda: CalendarStore(fresh('calendar'), seed_json=paths['calendar_json']),
+                                                 args.repeat)
+    store = CalendarStore(paths['calendar_db'], seed_json=paths['calendar_json'])
+    results['pipeline.calendar_upsert'] = measure(lambda: store.upsert_events(events), args.repeat)
+
+    def build_index():
+        index = SearchIndex(fresh('search'))
+        index.sync_calendar(store)
+        index.sync_news(NewsStore(paths['news']))
+        index.optimize()
+    results['pipeline.search_index'] = measure(build_index, args.repeat)  # the backend builds its own on first use
+
+    impact_path = os.path.join(paths['pushes'], 'impact_data', 'impact.json')
+    crypto_path = os.path.join(paths['pushes'], 'crypto_data', 'latest.json')
+    results['pipeline.news_impact'] = measure(
+        lambda: ImpactPipeline(NewsStore(paths['news']), series_dir=paths['history'],
+                               snapshot_path=crypto_path).update(impact_path),
+        args.repeat)
+
+    sys.path.insert(0, os.path.join(BASE_DIR, 'marketinfo-app', 'backend'))
+    import app as backend
+    results['pipeline.market_context'] = measure(
+        lambda: backend.summarize_market_data(backend.get_current_market_data()), args.repeat)
+
+    client = backend.app.test_client()
+
+    def request(method, path, **kwargs):
+        def run():
+            response = client.open(path, method=method, **kwargs)
+            if response.status_code != 200:
+                raise SystemExit(f"{method} {path}: HTTP {response.status_code} {response.get_data(as_text=True)[:200]}")
+            return response
+        return run
+
+    for path in ENDPOINTS:
+        run = request('GET', path)
+        size = len(run().get_data())  # warm caches and lazily opened stores
+        results[f"GET {path}"] = {**measure(run, args.repeat), 'kb': round(size / 1024, 1)}
+    run = request('POST', '/api/chat', json={'message': CHAT_QUESTION, 'mode': 'context'})
+    run()
+    results['POST /api/chat'] = measure(run, args.repeat)
+
+    return {
+        'scale': scale,
+        **counts,
+        'days': info['days'],
+        'data_mb': round(info['bytes'] / 1e6, 1),
+        'generate_s': info['seconds'],
+        'max_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'results': results
+    }
+
+
+def growth(points, name):
+    """Log-log slope of latency against scale between the smallest and largest point"""
+    first, last = points[0], points[-1]
+    a, b = first['results'][name]['ms'], last['results'][name]['ms']
+    if first['scale'] == last['scale'] or a <= 0 or b <= 0:
+        return None
+    return math.log(b / a) / math.log(last['scale'] / first['scale'])
+
+
+def report(points):
+    header = ''.join(f"{p['symbols']:>6}s/{p['events']:>6}e" for p in points)
+    print(f"{'':<62}{header}{'growth':>8}")
+    print(f"{'data set (MB) / max RSS (MB)':<62}"
+          + ''.join(f"{p['data_mb']:>8.1f}/{p['max_rss_mb']:>6.0f}" for p in points))
+    for name in points[0]['results']:
+        slope = growth(points, name)
+        cells = ''.join(f"{p['results'][name]['ms']:>8.1f}ms" + ' ' * 5 for p in points)
+        print(f"{name:<62}{cells}{slope if slope is None else format(slope, '.2f'):>8}")
+        cells = ''.join(f"{p['results'][name]['peak_mb']:>8.1f}MB" + ' ' * 5 for p in points)
+        print(f"{'  peak memory':<62}{cells}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Endpoint and pipeline scaling on synthetic data')
+    parser.add_argument('--scales', default='0.01,0.1,1', help='Comma-separated fractions of the full size')
+    parser.add_argument('--symbols', type=int, default=100)
+    parser.add_argument('--years', type=float, default=10)
+    parser.add_argument('--events', type=int, default=100000)
+    parser.add_argument('--messages', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Write the curves as JSON here')
+    parser.add_argument('--point', type=float, help=argparse.SUPPRESS)  # internal: measure one point
+    args = parser.parse_args()
+
+    if args.point is not None:
+        workdir = tempfile.mkdtemp(prefix='marketinfo-scaling-')
+        try:
+            point = run_point(args.point, args, workdir)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+        sys.stdout.write('\n' + json.dumps(point) + '\n')
+        return
+
+    points = []
+    for scale in sorted(float(s) for s in args.scales.split(',') if s):
+        command = [sys.executable, os.path.abspath(__file__), '--point', str(scale),
+                   '--symbols', str(args.symbols), '--years', str(args.years), '--events', str(args.events),
+                   '--messages', str(args.messages), '--repeat', str(args.repeat), '--seed', str(args.seed)]
+        print(f"scale {scale:g} ...", flush=True)
+        result = subprocess.run(command, capture_output=True, text=True)
+        if result.returncode != 0:
+            sys.stderr.write(result.stdout + result.stderr)
+            sys.exit(f"scale {scale:g} failed")
+        points.append(json.loads(result.stdout.strip().rsplit('\n', 1)[-1]))
+
+    print(f"{args.years:g} years of daily prices; columns are symbols/events, messages scale like events")
+    report(points)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'settings': vars(args), 'points': points}, f, indent=2)
+        print(f"Curves written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Search Index Benchmark
+Builds a search index of --docs synthetic calendar notes and news messages,
+then reports incremental ingest cost and query latency percentiles for top-k
+BM25 searches. Query cost grows with how many documents a term appears in, so
+the p99 is set by the most common words.
+
+Usage:
+    python benchmarks/bench_search.py [--docs 50000] [--queries 500] [-k 10]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BASE_DIR)
+from pushes.search_index import SearchIndex
+
+# Market words followed by a long tail of rare terms, drawn with Zipf weights like real text
+BASE_VOCABULARY = (
+    'federal reserve interest rate inflation treasury yield bitcoin ethereum solana etf '
+    'employment payrolls unemployment consumer price index retail sales housing starts '
+    'gdp growth recession tariff sanctions oil gas crude opec dollar euro yen gold '
+    'liquidity balance sheet quantitative tightening rally selloff volatility futures '
+    'earnings guidance semiconductor ai regulation sec stablecoin mining hashrate halving'
+).split()
+VOCABULARY = BASE_VOCABULARY + [f"term{i}" for i in range(20000)]
+WEIGHTS = [1 / (rank + 1) for rank in range(len(VOCABULARY))]
+
+
+def make_documents(n, seed=5):
+    rng = random.Random(seed)
+    docs = []
+    for i in range(n):
+        source = 'news' if i % 3 else 'calendar'
+        words = rng.choices(VOCABULARY, WEIGHTS, k=rng.randint(15, 120))
+        docs.append({
+            'source': source,
+            'key': str(i),
+            'title': ' '.join(words[:6]).title(),
+            'body': ' '.join(words),
+            'date': f"2025-{1 + i % 12:02d}-{1 + i % 28:02d}",
+            'url': ''
+        })
+    return docs
+
+
+def percentile(sorted_values, pct):
+    return sorted_values[min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Full-text search index benchmark')
+    parser.add_argument('--docs', type=int, default=50000)
+    parser.add_argument('--queries', type=int, default=500)
+    parser.add_argument('-k', type=int, default=10)
+    args = parser.parse_args()
+
+    docs = make_documents(args.docs)
+    rng = random.Random(9)
+    with tempfile.TemporaryDirectory() as tmp:
+        index = SearchIndex(os.path.join(tmp, 'search.db'))
+
+        start = time.perf_counter()
+        index.add_documents(docs)
+        index.optimize()
+        build_s = time.perf_counter() - start
+
+        # A later run: 1% new documents, the rest unchanged and skipped by the upsert
+        increment = make_documents(args.docs // 100, seed=6)
+        for i, doc in enumerate(increment):
+            doc['key'] = f"new-{i}"
+        start = time.perf_counter()
+        changed = index.add_documents(docs + increment)
+        incremental_s = time.perf_counter() - start
+
+        latencies = []
+        for _ in range(args.queries):
+            query = ' '.join(rng.choices(VOCABULARY, WEIGHTS, k=rng.randint(1, 3)))
+            start = time.perf_counter()
+            index.search(query, args.k)
+            latencies.append(time.perf_counter() - start)
+        latencies.sort()
+
+    print(f"{args.docs:,} documents")
+    print(f"initial build            {build_s * 1000:10.0f} ms")
+    print(f"incremental (+{len(increment):,} docs) {incremental_s * 1000:10.0f} ms  ({changed:,} rows written)")
+    print(f"query top-{args.k:<3} p50 {percentile(latencies, 50) * 1000:8.2f} ms   "
+          f"p99 {percentile(latencies, 99) * 1000:8.2f} ms   max {latencies[-1] * 1000:8.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Snapshot Model Benchmark
+Compares encode/decode throughput and resident memory of the typed snapshot
+models against the plain nested dicts the scrapers used to pass around.
+
+Usage:
+    python benchmarks/bench_snapshot_models.py [--iterations 20000] [--copies 5000]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BASE_DIR)
+from pushes.snapshot_models import (
+    CryptoSnapshot, MacroSnapshot, encode_snapshot, decode_crypto_snapshot, decode_macro_snapshot
+)
+
+FIXTURES = {
+    'crypto': (os.path.join(BASE_DIR, 'pushes', 'crypto_data', 'latest.json'), CryptoSnapshot, decode_crypto_snapshot),
+    'macro': (os.path.join(BASE_DIR, 'pushes', 'macro_data', 'latest.json'), MacroSnapshot, decode_macro_snapshot),
+}
+
+
+def ops_per_sec(fn, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return iterations / (time.perf_counter() - start)
+
+
+def retained_bytes(build, copies):
+    """Bytes still allocated after building `copies` objects"""
+    tracemalloc.start()
+    kept = [build() for _ in range(copies)]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return current
+
+
+def run(iterations, copies):
+    results = {}
+    for name, (path, model, decode) in FIXTURES.items():
+        with open(path, 'rb') as f:
+            raw_legacy = f.read()
+
+        # Current on-disk files may still hold ISO timestamps; benchmark both sides on the
+        # same content, dicts in their legacy shape and models in their integer-timestamp shape.
+        legacy_dict = json.loads(raw_legacy)
+        snapshot = model.from_dict(legacy_dict)
+        raw_model = encode_snapshot(snapshot)
+
+        results[name] = {
+            'dict_decode_ops': ops_per_sec(lambda: json.loads(raw_legacy), iterations),
+            'model_decode_ops': ops_per_sec(lambda: decode(raw_model), iterations),
+            'dict_encode_ops': ops_per_sec(lambda: json.dumps(legacy_dict, indent=2, default=str), iterations),
+            'model_encode_ops': ops_per_sec(lambda: encode_snapshot(snapshot), iterations),
+            'dict_bytes_per_copy': retained_bytes(lambda: json.loads(raw_legacy), copies) / copies,
+            'model_bytes_per_copy': retained_bytes(lambda: decode(raw_model), copies) / copies,
+            'dict_payload_bytes': len(json.dumps(legacy_dict, indent=2, default=str)),
+            'model_payload_bytes': len(raw_model),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark snapshot models against plain dicts')
+    parser.add_argument('--iterations', type=int, default=20000)
+    parser.add_argument('--copies', type=int, default=5000)
+    parser.add_argument('--json', action='store_true', help='Print machine-readable results')
+    args = parser.parse_args()
+
+    results = run(args.iterations, args.copies)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    for name, r in results.items():
+        print(f"{name} snapshot")
+        print(f"  decode   dict {r['dict_decode_ops']:>10,.0f} ops/s | model (validated) {r['model_decode_ops']:>10,.0f} ops/s")
+        print(f"  encode   dict {r['dict_encode_ops']:>10,.0f} ops/s | model             {r['model_encode_ops']:>10,.0f} ops/s")
+        print(f"  memory   dict {r['dict_bytes_per_copy']:>10,.0f} B/copy | model             {r['model_bytes_per_copy']:>10,.0f} B/copy")
+        print(f"  payload  dict {r['dict_payload_bytes']:>10,} B      | model             {r['model_payload_bytes']:>10,} B")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Cold Start Benchmark
+Measures import time of the backend and the scraper entry points with
+`python -X importtime` and fails if any of them exceeds its budget or pulls in a
+heavy dependency it should only load on demand.
+
+Each target runs in a fresh interpreter from a scratch working directory (the
+scrapers create data directories and log files where they start). The reported
+time is the best of --repeat runs, counting only modules imported after
+interpreter startup.
+
+Usage:
+    python benchmarks/bench_startup.py [--repeat 5] [--scale 1.0] [--json]
+
+--scale multiplies every budget, for slower CI machines.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PUSHES_DIR = os.path.join(BASE_DIR, 'pushes')
+BACKEND_DIR = os.path.join(BASE_DIR, 'marketinfo-app', 'backend')
+
+HEAVY_MODULES = ('pandas', 'numpy', 'yfinance', 'fredapi', 'groq')
+
+# Budgets are roughly 2x the measured import time on a 1-vCPU container.
+# Before lazy loading: backend ~975 ms, orchestrator ~760 ms.
+TARGETS = [
+    {
+        'name': 'crypto_scraper',
+        'path': PUSHES_DIR,
+        'code': 'import crypto_scraper; crypto_scraper.CryptoScraper()',
+        'budget_ms': 250,
+        'forbidden': HEAVY_MODULES
+    },
+    {
+        'name': 'macro_scraper',
+        'path': PUSHES_DIR,
+        'code': 'import macro_scraper',
+        'budget_ms': 350,
+        'forbidden': HEAVY_MODULES
+    },
+    {
+        'name': 'orchestrator --mode crypto',
+        'path': PUSHES_DIR,
+        'code': 'import main; main.MarketDataOrchestrator().crypto_scraper',
+        'budget_ms': 350,
+        'forbidden': HEAVY_MODULES
+    },
+    {
+        'name': 'backend app',
+        'path': BACKEND_DIR,
+        'code': 'import app',
+        'budget_ms': 500,
+        'forbidden': HEAVY_MODULES
+    },
+]
+
+
+def parse_importtime(stderr):
+    """Return [(module, cumulative_us, is_top_level)] from -X importtime output"""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        # Nesting is shown by indentation; top-level imports have a single leading space
+        entries.append((name.strip(), int(cumulative), not name[1:].startswith(' ')))
+    return entries
+
+
+def startup_modules():
+    """Modules the bare interpreter imports before running any code"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'pass'], capture_output=True, text=True)
+    return {name for name, _, _ in parse_importtime(result.stderr)}
+
+
+def run_target(target, baseline, workdir):
+    probe = f"; import sys, json; print(json.dumps([m for m in {list(target['forbidden'])!r} if m in sys.modules]))"
+    env = dict(os.environ, PYTHONPATH=target['path'])
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', target['code'] + probe],
+        cwd=workdir, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"{target['name']} failed to start:\n{result.stderr[-2000:]}")
+
+    import_us = sum(us for name, us, top in parse_importtime(result.stderr) if top and name not in baseline)
+    loaded = json.loads(result.stdout.strip().splitlines()[-1])
+    return import_us / 1000, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Import-time budget check for backend and scrapers')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--scale', type=float, default=1.0, help='Multiply every budget (slow machines)')
+    parser.add_argument('--json', action='store_true', help='Print machine-readable results')
+    args = parser.parse_args()
+
+    baseline = startup_modules()
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for target in TARGETS:
+            runs = [run_target(target, baseline, workdir) for _ in range(args.repeat)]
+            best_ms = min(ms for ms, _ in runs)
+            loaded = runs[-1][1]
+            budget_ms = target['budget_ms'] * args.scale
+            results.append({
+                'target': target['name'],
+                'import_ms': round(best_ms, 1),
+                'budget_ms': budget_ms,
+                'heavy_modules_loaded': loaded,
+                'ok': best_ms <= budget_ms and not loaded
+            })
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'target':<30}{'import ms':>12}{'budget ms':>12}  heavy modules")
+        for r in results:
+            status = '' if r['ok'] else '  <-- REGRESSION'
+            print(f"{r['target']:<30}{r['import_ms']:>12.1f}{r['budget_ms']:>12.0f}  "
+                  f"{', '.join(r['heavy_modules_loaded']) or '-'}{status}")
+
+    sys.exit(0 if all(r['ok'] for r in results) else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+Benchmark Harness
+Repeatable end-to-end benchmarks with no live upstreams. Every scraper talks
+to stub servers replaying benchmarks/fixtures/ (see stub_upstreams.py), with
+the latency, jitter and error rate given here, and everything the run writes
+goes to a temporary directory.
+
+Suites:
+- scrapers: the crypto, macro and calendar scrapers; time per stage (from
+  their stage metrics), per run and per upstream request
+- backend: each read endpoint under concurrent keep-alive load
+  (load_test.py's clients against an in-process server), serving what the
+  scrapers produced
+- chat: building the market-data context, and /api/chat in context mode
+  (stub model) and tool mode (scripted tool calls)
+
+Results are written as JSON (--output). Given --baseline, each result is
+compared with the baseline's; a change beyond --tolerance in the wrong
+direction is a regression and makes the exit status 1, for CI.
+
+Usage:
+    python benchmarks/harness.py [--suites scrapers,backend,chat] [--repeat 5]
+        [--latency-ms 20] [--jitter-ms 5] [--error-rate 0] [--seconds 1]
+        [--output results.json] [--baseline baseline.json] [--tolerance 0.3]
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+import stub_upstreams
+
+SCRAPER_STAGES = {
+    'crypto': ('fetch', 'transform', 'write'),
+    'macro': ('fetch', 'transform', 'write'),
+    'calendar': ('fetch', 'write'),
+}
+# Endpoints that call live upstreams themselves (the watchlist asks Yahoo) are left out
+BACKEND_ENDPOINTS = [
+    '/api/health',
+    '/api/pushes/crypto',
+    '/api/pushes/macro',
+    '/api/calendar/economic',
+    '/api/crypto/prices/BTC',
+    '/api/crypto/prices',
+    '/api/data/overview',
+]
+CHAT_QUESTION = "How has BTC done over the last 90 days, and when is the next CPI release?"
+
+
+class Results:
+    """
+    Named measurements: the median of the samples is the value compared with
+    baselines. Results with gate=False (tail latencies) are reported but never
+    fail a comparison.
+    """
+
+    def __init__(self):
+        self.entries = {}
+
+    def add(self, name, samples, unit='ms', better='lower', gate=True):
+        samples = [round(float(s), 4) for s in (samples if isinstance(samples, (list, tuple)) else [samples])]
+        self.entries[name] = {
+            'value': round(statistics.median(samples), 4),
+            'unit': unit,
+            'better': better,
+            'gate': gate,
+            'samples': samples
+        }
+
+
+def _series(registries, name):
+    """(label values) -> value of one metric, summed over registries"""
+    out = {}
+    for registry in registries:
+        for key, value in registry.to_dict().get(name, {'series': []})['series']:
+            key = tuple(key)
+            if isinstance(value, dict):  # histogram
+                total, count = out.get(key, (0.0, 0))
+                out[key] = (total + value['sum'], count + value['count'])
+            else:
+                out[key] = out.get(key, 0) + value
+    return out
+
+
+def _delta(after, before):
+    out = {}
+    for key, (total, count) in after.items():
+        prev_total, prev_count = before.get(key, (0.0, 0))
+        if count > prev_count:
+            out[key] = (total - prev_total, count - prev_count)
+    return out
+
+
+def run_scrapers(results, repeat, workdir):
+    """Run each scraper `repeat` times against the stub upstreams"""
+    sys.path.insert(0, os.path.join(BASE_DIR, 'pushes'))
+    sys.path.append(os.path.join(BASE_DIR, 'calendar'))
+    import metrics
+    from crypto_scraper import CryptoScraper
+    from macro_scraper import MacroScraper
+    from economic_calendar import EconomicCalendarFetcher
+
+    # The scrapers and the calendar fetcher all import metrics from pushes/
+    registries = (metrics.REGISTRY,)
+
+    jobs = {
+        'crypto': lambda: CryptoScraper().run(),
+        'macro': lambda: MacroScraper().run(),
+        'calendar': lambda: EconomicCalendarFetcher().run(),
+    }
+    stage_samples = {(job, stage): [] for job, stages in SCRAPER_STAGES.items() for stage in stages}
+    upstream_before = _series(registries, metrics.UPSTREAM_LATENCY)
+    errors_before = _series(registries, metrics.UPSTREAM_ERRORS)
+
+    cwd = os.getcwd()
+    os.chdir(workdir)  # the scrapers write crypto_data/ and macro_data/ relative to the working directory
+    try:
+        for job, run in jobs.items():
+            totals = []
+            for _ in range(repeat):
+                before = _series(registries, metrics.STAGE_LATENCY)
+                start = time.perf_counter()
+                if not run():
+                    raise SystemExit(f"{job} scraper failed against the fixtures")
+                totals.append((time.perf_counter() - start) * 1000)
+                for (scraper, stage), (seconds, _) in _delta(_series(registries, metrics.STAGE_LATENCY),
+                                                             before).items():
+                    stage_samples[(scraper, stage)].append(seconds * 1000)
+            results.add(f"scraper.{job}.total_ms", totals)
+    finally:
+        os.chdir(cwd)
+
+    for (job, stage), samples in stage_samples.items():
+        if samples:
+            results.add(f"scraper.{job}.{stage}_ms", samples)
+    for (source,), (seconds, count) in sorted(_delta(_series(registries, metrics.UPSTREAM_LATENCY),
+                                                     upstream_before).items()):
+        results.add(f"upstream.{source}.mean_ms", seconds / count * 1000)
+        results.add(f"upstream.{source}.requests", count, unit='count')
+    for (source,), count in sorted(_series(registries, metrics.UPSTREAM_ERRORS).items()):
+        if count > errors_before.get((source,), 0):
+            results.add(f"upstream.{source}.errors", count - errors_before.get((source,), 0), unit='count')
+
+
+def _backend():
+    sys.path.insert(0, os.path.join(BASE_DIR, 'marketinfo-app', 'backend'))
+    import app as backend
+    return backend
+
+
+def run_backend(results, seconds, concurrency, repeat):
+    """Load each read endpoint of an in-process server, `repeat` rounds of `seconds` each"""
+    from werkzeug.serving import make_server
+    import load_test
+
+    backend = _backend()
+    server = make_server('127.0.0.1', 0, backend.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}"
+    try:
+        for path in BACKEND_ENDPOINTS:
+            load_test.run_endpoint(url, path, 1, 0.2)  # warm caches and lazily opened stores
+            rows = [load_test.run_endpoint(url, path, concurrency, seconds) for _ in range(repeat)]
+            if any(row['errors'] for row in rows):
+                raise SystemExit(f"{path}: {sum(row['errors'] for row in rows)} errors under load")
+            results.add(f"backend.{path}.req_per_sec", [row['req_per_sec'] for row in rows], unit='req/s', better='higher')
+            results.add(f"backend.{path}.p50_ms", [row['p50_ms'] for row in rows])
+            results.add(f"backend.{path}.p99_ms", [row['p99_ms'] for row in rows], gate=False)
+    finally:
+        server.shutdown()
+
+
+def run_chat(results, repeat):
+    """Chat preparation, and /api/chat with the stub model (context) and scripted tool calls (tools)"""
+    backend = _backend()
+    from chat_tools import ScriptedLLM
+
+    client = backend.app.test_client()
+    llm = backend.get_llm_client()
+
+    def ask(mode):
+        start = time.perf_counter()
+        response = client.post('/api/chat', json={'message': CHAT_QUESTION, 'mode': mode})
+        if response.status_code != 200:
+            raise SystemExit(f"/api/chat ({mode}): HTTP {response.status_code} {response.get_json()}")
+        return (time.perf_counter() - start) * 1000
+
+    ask('context')  # opens the search index and the session store
+    prep, context = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        backend.summarize_market_data(backend.get_current_market_data())
+        prep.append((time.perf_counter() - start) * 1000)
+        context.append(ask('context'))
+    prompt_tokens = llm.stats()['prompt_tokens'] / llm.stats()['completions']
+
+    tools = []
+    get_llm_client = backend.get_llm_client
+    try:
+        for _ in range(repeat):
+            script = ScriptedLLM([
+                [('get_price_stats', {'symbol': 'BTC', 'range': '90d'}),
+                 ('search_calendar', {'query': 'consumer price index'})],
+                'BTC is up; CPI is released next week.'
+            ])
+            backend.get_llm_client = lambda: script
+            tools.append(ask('tools'))
+    finally:
+        backend.get_llm_client = get_llm_client
+
+    results.add('chat.context_prep_ms', prep)
+    results.add('chat.context_request_ms', context)
+    results.add('chat.context_prompt_tokens', prompt_tokens, unit='tokens')
+    results.add('chat.tools_request_ms', tools)
+
+
+def compare(current, baseline, tolerance, noise_ms):
+    """
+    Rows of (name, baseline, current, change, verdict) for results present in both runs
+
+    A result regresses when it moves more than `tolerance` (a fraction) in its
+    worse direction; millisecond results must also move by more than noise_ms.
+    """
+    rows = []
+    for name, entry in sorted(current.items()):
+        base = baseline.get(name)
+        if base is None:
+            continue
+        old, new = base['value'], entry['value']
+        change = (new - old) / old if old else 0.0
+        worse = change > tolerance if entry['better'] == 'lower' else change < -tolerance
+        if worse and entry['unit'] == 'ms' and abs(new - old) <= noise_ms:
+            worse = False
+        better = change < -tolerance if entry['better'] == 'lower' else change > tolerance
+        if worse and not entry.get('gate', True):
+            rows.append((name, old, new, change, 'slower (not gated)'))
+            continue
+        rows.append((name, old, new, change, 'REGRESSION' if worse else 'improved' if better else 'ok'))
+    return rows
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks against recorded upstream fixtures')
+    parser.add_argument('--suites', default='scrapers,backend,chat')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per scraper, backend endpoint and chat measurement')
+    parser.add_argument('--latency-ms', type=float, default=20, help='Latency added by every stub upstream')
+    parser.add_argument('--jitter-ms', type=float, default=5)
+    parser.add_argument('--error-rate', type=float, default=0, help='Share of upstream requests that fail')
+    parser.add_argument('--error-status', type=int, default=503)
+    parser.add_argument('--upstream', action='append', default=[], metavar='NAME:LATENCY_MS[:ERROR_RATE]',
+                        help='Per-upstream override, e.g. fred:150:0.1')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--seconds', type=float, default=1, help='Load duration per backend endpoint and round')
+    parser.add_argument('--concurrency', type=int, default=8, help='Concurrent backend clients')
+    parser.add_argument('--output', help='Write the results JSON here')
+    parser.add_argument('--baseline', help='Results JSON to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.3, help='Allowed relative change before a regression')
+    parser.add_argument('--noise-ms', type=float, default=0.5, help='Millisecond changes ignored as noise')
+    args = parser.parse_args()
+    suites = [s for s in args.suites.split(',') if s]
+
+    overrides = {}
+    for spec in args.upstream:
+        name, latency, *rate = spec.split(':')
+        overrides[name] = {'latency_ms': float(latency), **({'error_rate': float(rate[0])} if rate else {})}
+    servers = stub_upstreams.start_all(args.latency_ms, args.jitter_ms, args.error_rate, args.error_status,
+                                       args.seed, overrides)
+
+    workdir = tempfile.mkdtemp(prefix='marketinfo-bench-')
+    # Must be set before the scrapers and the backend import their configuration
+    os.environ.update(stub_upstreams.env(servers))
+    os.environ.update({
+        'COINGECKO_API_KEY': '', 'POLYGON_API_KEY': 'fixture', 'FRED_API_KEY': 'fixture',
+        'GROQ_API_KEY': '', 'LLM_PROVIDER': 'stub',
+        'MACRO_QUOTE_PROVIDERS': 'polygon', 'TREASURY_10Y_SOURCE': 'fred',
+        'COINGECKO_RATE_PER_MINUTE': '1000000', 'COINGECKO_BURST': '1000', 'FRED_RELEASE_DELAY': '0',
+        'PUSHES_DATA_DIR': workdir,
+        'METRICS_DIR': os.path.join(workdir, 'metrics'),
+        'RATE_LIMIT_DIR': os.path.join(workdir, 'rate_limits'),
+        'CALENDAR_DB_PATH': os.path.join(workdir, 'calendar.db'),
+        'SEARCH_DB_PATH': os.path.join(workdir, 'search.db'),
+        'SHARED_CACHE_DIR': os.path.join(workdir, 'shared_cache'),
+        'CHAT_SESSION_DB': os.path.join(workdir, 'chat.db'),
+        'NEWS_EXPORT_DIR': os.path.join(workdir, 'news'),
+    })
+
+    results = Results()
+    started = time.perf_counter()
+    try:
+        # The backend and chat suites serve what the scrapers wrote, so the scrapers always run
+        run_scrapers(results, args.repeat if 'scrapers' in suites else 1, workdir)
+        if 'scrapers' not in suites:
+            results.entries.clear()
+        if 'backend' in suites:
+            run_backend(results, args.seconds, args.concurrency, args.repeat)
+        if 'chat' in suites:
+            run_chat(results, args.repeat)
+    finally:
+        for server in servers.values():
+            server.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        'schema': 1,
+        'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'settings': {
+            'suites': suites, 'repeat': args.repeat, 'latency_ms': args.latency_ms, 'jitter_ms': args.jitter_ms,
+            'error_rate': args.error_rate, 'error_status': args.error_status, 'upstream': args.upstream,
+            'seed': args.seed, 'seconds': args.seconds, 'concurrency': args.concurrency
+        },
+        'upstreams': {name: {'requests': s.requests, 'injected_errors': s.errors} for name, s in servers.items()},
+        'elapsed_s': round(time.perf_counter() - started, 2),
+        'results': results.entries
+    }
+
+    width = max(len(name) for name in results.entries)
+    for name, entry in results.entries.items():
+        print(f"{name:<{width}}  {entry['value']:>12.2f} {entry['unit']}")
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('settings', {}).get('latency_ms') != args.latency_ms:
+            print(f"warning: baseline was recorded with --latency-ms {baseline['settings'].get('latency_ms')}")
+        rows = compare(results.entries, baseline['results'], args.tolerance, args.noise_ms)
+        print(f"\ncompared with {args.baseline} (commit {baseline.get('commit')}), tolerance {args.tolerance:.0%}")
+        for name, old, new, change, verdict in rows:
+            if verdict != 'ok':
+                print(f"{name:<{width}}  {old:>12.2f} -> {new:>12.2f}  {change:+7.1%}  {verdict}")
+        regressions = [row[0] for row in rows if row[4] == 'REGRESSION']
+        report['comparison'] = {
+            'baseline_commit': baseline.get('commit'),
+            'tolerance': args.tolerance,
+            'rows': [{'name': n, 'baseline': o, 'current': c, 'change': round(ch, 4), 'verdict': v}
+                     for n, o, c, ch, v in rows],
+            'regressions': regressions
+        }
+        print(f"{len(regressions)} regressions in {len(rows)} compared results")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+            f.write('\n')
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
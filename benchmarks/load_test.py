@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Backend Load Test
+Hammers each read endpoint with keep-alive connections from concurrent
+client threads and reports throughput and latency percentiles.
+
+Usage:
+    python benchmarks/load_test.py [--url http://127.0.0.1:5001] [--concurrency 16] [--seconds 10] [--json]
+
+Start the server first, e.g. the production mode:
+    cd marketinfo-app/backend && WEB_WORKERS=4 gunicorn -c gunicorn.conf.py wsgi:app
+"""
+
+import argparse
+import http.client
+import json
+import threading
+import time
+from urllib.parse import urlparse
+
+ENDPOINTS = [
+    '/api/health',
+    '/api/pushes/crypto',
+    '/api/pushes/macro',
+    '/api/calendar/economic',
+    '/api/crypto/prices/BTC',
+    '/api/crypto/prices',
+    '/api/data/overview',
+    '/api/stocks/watchlist?symbols=SPY,QQQ,VIX',
+]
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def client(host, port, path, deadline, latencies, errors):
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            conn.request('GET', path)
+            response = conn.getresponse()
+            response.read()
+            if response.status >= 400:
+                errors.append(response.status)
+            latencies.append(time.perf_counter() - start)
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(str(e))
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=30)
+    conn.close()
+
+
+def run_endpoint(url, path, concurrency, seconds):
+    parsed = urlparse(url)
+    latencies, errors = [], []
+    deadline = time.perf_counter() + seconds
+    threads = [
+        threading.Thread(target=client, args=(parsed.hostname, parsed.port or 80, path, deadline, latencies, errors))
+        for _ in range(concurrency)
+    ]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'endpoint': path,
+        'requests': len(latencies),
+        'errors': len(errors),
+        'req_per_sec': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the MarketInfo backend')
+    parser.add_argument('--url', default='http://127.0.0.1:5001')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--endpoint', action='append', help='Endpoint path (repeatable); defaults to all read endpoints')
+    parser.add_argument('--json', action='store_true', help='Print machine-readable results')
+    args = parser.parse_args()
+
+    results = [run_endpoint(args.url, path, args.concurrency, args.seconds) for path in (args.endpoint or ENDPOINTS)]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'endpoint':<45}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for r in results:
+        print(f"{r['endpoint']:<45}{r['req_per_sec']:>10,.1f}{r['p50_ms']:>10.2f}{r['p99_ms']:>10.2f}{r['errors']:>8}")
+
+
+if __name__ == '__main__':
+    main()
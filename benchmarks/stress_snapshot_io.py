@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Snapshot I/O Stress Test
+Runs concurrent writer and reader processes against one snapshot file and
+counts torn reads (unparseable JSON or a payload whose checksum does not match).
+
+Writers alternate between small and large payloads so a non-atomic writer is
+caught mid-write. Exits non-zero if the atomic writer produced any torn read.
+
+Usage:
+    python benchmarks/stress_snapshot_io.py [--seconds 5] [--writers 2] [--readers 4] [--compare-naive]
+"""
+
+import argparse
+import hashlib
+import json
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BASE_DIR)
+from pushes.snapshot_io import SnapshotReader, write_json_atomic, read_generation
+
+
+def make_payload(writer_id, seq):
+    # Alternate ~1 KB and ~400 KB bodies
+    size = 1_000 if seq % 2 else 400_000
+    body = f"{writer_id}:{seq}:" + ('x' * size)
+    return {
+        'writer': writer_id,
+        'seq': seq,
+        'body': body,
+        'checksum': hashlib.sha1(body.encode()).hexdigest()
+    }
+
+
+def naive_write(path, payload):
+    with open(path, 'w') as f:
+        json.dump(payload, f)
+
+
+def writer(path, writer_id, deadline, atomic, counter):
+    seq = 0
+    while time.time() < deadline:
+        payload = make_payload(writer_id, seq)
+        if atomic:
+            write_json_atomic(path, payload, indent=None)
+        else:
+            naive_write(path, payload)
+        seq += 1
+    with counter.get_lock():
+        counter.value += seq
+
+
+def is_intact(payload):
+    return hashlib.sha1(payload['body'].encode()).hexdigest() == payload['checksum']
+
+
+def reader(path, deadline, use_cached_reader, reads, torn):
+    cached = SnapshotReader(path)
+    n = bad = 0
+    while time.time() < deadline:
+        try:
+            if use_cached_reader:
+                payload = cached.read()
+            else:
+                # What the backend used to do on every request
+                with open(path, 'r') as f:
+                    payload = json.load(f)
+            if not is_intact(payload):
+                bad += 1
+        except ValueError:
+            bad += 1
+        except FileNotFoundError:
+            pass
+        n += 1
+    with reads.get_lock():
+        reads.value += n
+    with torn.get_lock():
+        torn.value += bad
+
+
+def run(seconds, writers, readers, atomic):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'latest.json')
+        if atomic:
+            write_json_atomic(path, make_payload(-1, 0), indent=None)
+        else:
+            naive_write(path, make_payload(-1, 0))
+
+        writes, reads, torn = mp.Value('i', 0), mp.Value('i', 0), mp.Value('i', 0)
+        deadline = time.time() + seconds
+        procs = [mp.Process(target=writer, args=(path, i, deadline, atomic, writes)) for i in range(writers)]
+        # Half the readers use plain open()+json.load, half use the cached SnapshotReader
+        procs += [mp.Process(target=reader, args=(path, deadline, i % 2 == 1, reads, torn)) for i in range(readers)]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join()
+
+        return {
+            'mode': 'atomic' if atomic else 'naive',
+            'writes': writes.value,
+            'reads': reads.value,
+            'torn_reads': torn.value,
+            'final_generation': read_generation(path)
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Concurrent writer/reader stress test for snapshot files')
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--compare-naive', action='store_true', help='Also run in-place open(w) writes for comparison')
+    args = parser.parse_args()
+
+    results = [run(args.seconds, args.writers, args.readers, atomic=True)]
+    if args.compare_naive:
+        results.append(run(args.seconds, args.writers, args.readers, atomic=False))
+
+    for r in results:
+        print(f"{r['mode']:>6}: {r['writes']:>7,} writes | {r['reads']:>8,} reads | "
+              f"{r['torn_reads']:>6,} torn reads | generation {r['final_generation']}")
+
+    sys.exit(1 if results[0]['torn_reads'] else 0)
+
+
+if __name__ == '__main__':
+    main()
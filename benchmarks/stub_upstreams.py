@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Stub Upstreams
+Local HTTP servers that replay recorded upstream responses from
+benchmarks/fixtures/ for CoinGecko, blockchain.info, alternative.me,
+Polygon and FRED, with configurable latency, jitter and injected errors.
+Each upstream gets its own server; env() gives the variables that point
+the scrapers at them (COINGECKO_BASE_URL, POLYGON_BASE_URL, ...).
+
+The fixtures are recorded from the committed snapshots
+(pushes/crypto_data/latest.json, pushes/macro_data/latest.json and
+calendar/data/economic_calendar.json), re-shaped into each API's response
+format. Yahoo Finance (yfinance has no configurable endpoint) and Telegram
+(MTProto) are not replayed.
+
+Usage:
+    python benchmarks/stub_upstreams.py record         # rewrite benchmarks/fixtures/ from the snapshots
+    python benchmarks/stub_upstreams.py serve [--latency-ms 50] [--error-rate 0.05]
+"""
+
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from xml.sax.saxutils import quoteattr
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def _load(*parts):
+    with open(os.path.join(FIXTURES_DIR, *parts)) as f:
+        return f.read()
+
+
+def _epoch_s(iso):
+    return int(datetime.fromisoformat(iso).replace(tzinfo=timezone.utc).timestamp())
+
+
+def _months_back(day, n):
+    month = day.year * 12 + day.month - 1 - n
+    return date(month // 12, month % 12 + 1, 1)
+
+
+def _observations_xml(observations):
+    rows = ''.join(f"  <observation realtime_start=\"2025-07-03\" realtime_end=\"2025-07-03\" "
+                   f"date={quoteattr(d)} value={quoteattr(v)}/>\n" for d, v in observations)
+    return (f"<?xml version=\"1.0\" encoding=\"utf-8\" ?>\n<observations realtime_start=\"2025-07-03\" "
+            f"realtime_end=\"2025-07-03\" units=\"lin\" count=\"{len(observations)}\">\n{rows}</observations>\n")
+
+
+def record():
+    """Rewrite benchmarks/fixtures/ from the committed snapshots"""
+    with open(os.path.join(BASE_DIR, 'pushes', 'crypto_data', 'latest.json')) as f:
+        crypto = json.load(f)
+    with open(os.path.join(BASE_DIR, 'pushes', 'macro_data', 'latest.json')) as f:
+        macro = json.load(f)
+    with open(os.path.join(BASE_DIR, 'pushes', 'crypto_universe.json')) as f:
+        universe = json.load(f)
+    with open(os.path.join(BASE_DIR, 'calendar', 'data', 'economic_calendar.json')) as f:
+        calendar = json.load(f)
+
+    files = {}
+    files['coingecko/simple_price.json'] = {
+        universe[symbol]: {
+            'usd': quote['price_usd'],
+            'usd_market_cap': quote['market_cap'],
+            'usd_24h_vol': quote['volume_24h'],
+            'usd_24h_change': quote['change_24h'],
+            'last_updated_at': _epoch_s(quote['timestamp'])
+        }
+        for symbol, quote in crypto['crypto_prices'].items() if symbol in universe
+    }
+    btc = crypto['hash_rates']['BTC']
+    files['blockchain/stats.json'] = {
+        'hash_rate': btc['hash_rate_th_s'] * 1e12,
+        'difficulty': btc['difficulty'],
+        'timestamp': _epoch_s(btc['timestamp']) * 1000
+    }
+    fng = crypto['fear_greed_index']
+    files['alternative_me/fng.json'] = {
+        'name': 'Fear and Greed Index',
+        'data': [{'value': str(fng['value']), 'value_classification': fng['value_classification'],
+                  'timestamp': str(_epoch_s(fng['timestamp'])), 'time_until_update': '3600'}],
+        'metadata': {'error': None}
+    }
+    for name, quote in macro['market_indices'].items():
+        if 'polygon_timestamp' not in quote:
+            continue
+        t = quote['polygon_timestamp']
+        files[f"polygon/{quote['symbol']}.json"] = {
+            'ticker': quote['symbol'], 'status': 'OK', 'adjusted': True, 'resultsCount': 2,
+            'results': [
+                {'o': quote['previous_close'], 'h': quote['previous_close'], 'l': quote['previous_close'],
+                 'c': quote['previous_close'], 'v': quote['polygon_volume'], 't': t - 86_400_000},
+                {'o': quote['polygon_open'], 'h': quote['polygon_high'], 'l': quote['polygon_low'],
+                 'c': quote['polygon_close'], 'v': quote['polygon_volume'], 't': t}
+            ]
+        }
+
+    # FRED observations as recorded: the scraper asks for `limit` rows from the start of the series
+    consumer, rates = macro['consumer_data'], macro['interest_rates']
+    for series, key in (('CPIAUCSL', 'cpi'), ('RSAFS', 'retail_sales')):
+        latest = consumer[key]
+        last = date.fromisoformat(latest['date'])
+        first_value = latest['value'] / (1 + latest['change_yoy'] / 100)
+        previous = latest['value'] / (1 + latest['change_mom'] / 100)
+        values = [first_value + (previous - first_value) * i / 11 for i in range(12)] + [latest['value']]
+        files[f"fred/observations/{series}.xml"] = _observations_xml(
+            [(_months_back(last, 12 - i).isoformat(), f"{v:.3f}") for i, v in enumerate(values)])
+    for series, record_ in (('FEDFUNDS', rates['fed_funds_rate']), ('UNRATE', consumer['unemployment_rate']),
+                            ('FPCPITOTLZGUSA', consumer['inflation_rate'])):
+        files[f"fred/observations/{series}.xml"] = _observations_xml([(record_['date'], repr(record_['rate_percent']))])
+    us10yr = rates['us10yr']
+    files['fred/observations/DGS10.xml'] = _observations_xml([
+        ((date.fromisoformat(us10yr['timestamp'][:10]) - timedelta(days=1)).isoformat(),
+         f"{us10yr['yield_percent'] - us10yr['change']:.2f}"),
+        (us10yr['timestamp'][:10], f"{us10yr['yield_percent']:.2f}")
+    ])
+
+    events = calendar['events']
+    files['fred/releases_dates.json'] = {
+        'realtime_start': events[0]['date'], 'realtime_end': events[-1]['date'], 'order_by': 'release_date',
+        'count': len(events), 'offset': 0, 'limit': 1000,
+        'release_dates': [{'release_id': e['release_id'], 'release_name': e['name'], 'date': e['date']} for e in events]
+    }
+    files['fred/releases.json'] = {
+        str(e['release_id']): {'id': e['release_id'], 'realtime_start': e['date'], 'realtime_end': e['date'],
+                               'name': e['name'], 'press_release': e['press_release'], 'link': e['link'],
+                               'notes': e['notes']}
+        for e in events
+    }
+
+    for name, content in sorted(files.items()):
+        path = os.path.join(FIXTURES_DIR, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(content if isinstance(content, str) else json.dumps(content, indent=2) + '\n')
+    return sorted(files)
+
+
+def _json(body):
+    return 200, 'application/json', body
+
+
+def coingecko_routes():
+    prices = json.loads(_load('coingecko', 'simple_price.json'))
+
+    def route(path, query):
+        if path.endswith('/simple/price'):
+            ids = query.get('ids', [''])[0].split(',')
+            return _json(json.dumps({coin_id: prices[coin_id] for coin_id in ids if coin_id in prices}))
+        return None
+    return route
+
+
+def file_route(suffix, *parts):
+    body = _load(*parts)
+    return lambda path, query: _json(body) if path.rstrip('/').endswith(suffix) else None
+
+
+def polygon_routes():
+    bodies = {name[:-5]: _load('polygon', name) for name in os.listdir(os.path.join(FIXTURES_DIR, 'polygon'))}
+
+    def route(path, query):
+        parts = path.split('/')
+        if '/v2/aggs/ticker/' in path and parts[4] in bodies:
+            return _json(bodies[parts[4]])
+        return None
+    return route
+
+
+def fred_routes():
+    observations_dir = os.path.join(FIXTURES_DIR, 'fred', 'observations')
+    observations = {name[:-4]: _load('fred', 'observations', name) for name in os.listdir(observations_dir)}
+    release_dates = _load('fred', 'releases_dates.json')
+    releases = json.loads(_load('fred', 'releases.json'))
+
+    def route(path, query):
+        if path.endswith('/series/observations'):
+            body = observations.get(query.get('series_id', [''])[0])
+            if body is None:
+                return 400, 'text/xml', '<error code="400" message="Bad Request. The series does not exist."/>'
+            limit = int(query.get('limit', ['0'])[0] or 0)
+            if limit:
+                lines = body.splitlines(keepends=True)
+                rows = [line for line in lines if line.startswith('  <observation')]
+                body = ''.join(line for line in lines if line not in rows[limit:])
+            return 200, 'text/xml', body
+        if path.endswith('/releases/dates'):
+            return _json(release_dates)
+        if path.endswith('/release'):
+            release = releases.get(query.get('release_id', [''])[0])
+            return _json(json.dumps({'releases': [release] if release else []}))
+        return None
+    return route
+
+
+UPSTREAMS = {
+    # name: (route factory, environment variable, path the variable points at)
+    'coingecko': (coingecko_routes, 'COINGECKO_BASE_URL', '/api/v3'),
+    'blockchain_info': (lambda: file_route('/stats', 'blockchain', 'stats.json'), 'BLOCKCHAIN_STATS_URL', '/stats'),
+    'alternative_me': (lambda: file_route('/fng', 'alternative_me', 'fng.json'), 'FEAR_GREED_URL', '/fng/'),
+    'polygon': (polygon_routes, 'POLYGON_BASE_URL', ''),
+    'fred': (fred_routes, 'FRED_BASE_URL', '/fred'),
+}
+
+
+class StubServer:
+    """
+    One upstream replayed on 127.0.0.1
+
+    Args:
+        name (str): Key of UPSTREAMS
+        latency_ms (float): Added to every response
+        jitter_ms (float): Uniform extra latency in [0, jitter_ms)
+        error_rate (float): Share of requests answered with error_status
+        error_status (int): Status of injected errors (429 comes with Retry-After: 0)
+        seed (int): Makes the jitter and the choice of failing requests repeatable
+    """
+
+    def __init__(self, name, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0, error_status=503, seed=0):
+        factory, self.env_var, self.path = UPSTREAMS[name]
+        self.name = name
+        self.route = factory()
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self._rng = random.Random(f"{seed}:{name}")
+        self._lock = threading.Lock()
+        self.requests = self.errors = 0
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._server.server_port}{self.path}"
+
+    def _draw(self):
+        with self._lock:
+            self.requests += 1
+            fail = self._rng.random() < self.error_rate
+            delay = self.latency_ms + (self._rng.random() * self.jitter_ms if self.jitter_ms else 0)
+            if fail:
+                self.errors += 1
+        return fail, delay / 1000
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                fail, delay = stub._draw()
+                if delay:
+                    time.sleep(delay)
+                headers = {}
+                if fail:
+                    status, content_type, body = stub.error_status, 'application/json', '{"error":"injected"}'
+                    if status == 429:
+                        headers['Retry-After'] = '0'
+                else:
+                    answer = stub.route(url.path, parse_qs(url.query))
+                    status, content_type, body = answer or (404, 'application/json', '{"error":"no fixture"}')
+                payload = body.encode()
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(payload)))
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def start_all(latency_ms=0.0, jitter_ms=0.0, error_rate=0.0, error_status=503, seed=0, overrides=None):
+    """
+    Start a stub server per upstream
+
+    Args:
+        overrides (dict): Upstream name -> dict of StubServer arguments replacing the defaults
+
+    Returns:
+        dict: Upstream name -> StubServer
+    """
+    servers = {}
+    for name in UPSTREAMS:
+        options = dict(latency_ms=latency_ms, jitter_ms=jitter_ms, error_rate=error_rate,
+                       error_status=error_status, seed=seed)
+        options.update((overrides or {}).get(name, {}))
+        servers[name] = StubServer(name, **options).start()
+    return servers
+
+
+def env(servers):
+    """Environment variables pointing the scrapers at the stub servers"""
+    return {server.env_var: server.url for server in servers.values()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay recorded upstream responses')
+    parser.add_argument('command', choices=('record', 'serve'))
+    parser.add_argument('--latency-ms', type=float, default=0)
+    parser.add_argument('--jitter-ms', type=float, default=0)
+    parser.add_argument('--error-rate', type=float, default=0)
+    parser.add_argument('--error-status', type=int, default=503)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        for name in record():
+            print(f"wrote benchmarks/fixtures/{name}")
+        return
+
+    servers = start_all(args.latency_ms, args.jitter_ms, args.error_rate, args.error_status, args.seed)
+    for key, value in env(servers).items():
+        print(f"export {key}={value}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        for server in servers.values():
+            server.stop()
+
+
+if __name__ == '__main__':
+    main()
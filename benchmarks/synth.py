@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+"""
+Synthetic Market Data
+Writes realistic synthetic data at any scale, in the formats the scrapers,
+the news exporter and cli-charts produce, so pipelines and endpoints can be
+measured at sizes the checked-in data never reaches:
+
+- cli-charts/data/<SYM>.csv (and .bin with --binary): daily prices for
+  --symbols symbols over --years years, from geometric Brownian motion with
+  per-symbol drift and volatility. BTC, ETH and SOL come first, so the news
+  impact pipeline finds its assets
+- pushes/crypto_data/latest.json and pushes/macro_data/latest.json: a crypto
+  quote per symbol, and an index quote per --indices (SPY, QQQ and VIX first)
+  plus the usual rates and consumer series
+- calendar/economic_calendar.json: --events calendar events in the legacy
+  fetcher format (up to --per-day releases a day, about half with notes)
+- news/news.jsonl: --messages Telegram messages across the channels, spread
+  over the price history, a third of them mentioning an asset
+
+The same --seed always writes the same data. Point the backend at the output
+with CLI_CHARTS_DATA_DIR, PUSHES_DATA_DIR, CALENDAR_DB_PATH and NEWS_EXPORT_DIR
+(see env()); the calendar store is built from the JSON file with
+CalendarStore(path, seed_json=...), like a fetcher's first run.
+
+Usage:
+    python benchmarks/synth.py OUTPUT_DIR [--symbols 100] [--years 10] [--events 100000]
+        [--messages 100000] [--indices 3] [--per-day 40] [--binary] [--seed 0]
+"""
+
+import argparse
+import os
+import string
+import sys
+import time
+from datetime import date, datetime, time as dtime, timedelta, timezone
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BASE_DIR)
+from pushes.history_store import EPOCH_ORDINAL, days_to_strings, write_history
+from pushes.news_store import NewsStore
+from pushes.snapshot_io import write_csv_atomic, write_json_atomic
+from pushes.snapshot_models import CryptoSnapshot, MacroSnapshot
+
+# The date of the checked-in snapshots
+END_DATE = date(2025, 7, 2)
+
+# Symbol -> (latest price, annual drift, annual volatility); the rest get random ones
+KNOWN_SYMBOLS = {'BTC': (108000.0, 0.5, 0.6), 'ETH': (2500.0, 0.4, 0.8), 'SOL': (150.0, 0.6, 1.0)}
+KNOWN_INDICES = [
+    ('sp500', 'SPY', 620.0, 0.18), ('nasdaq100', 'QQQ', 550.0, 0.22), ('vix', '^VIX', 16.6, 0.9)
+]
+
+# Release names as FRED publishes them, covering every calendar category
+RELEASES = [
+    'Consumer Price Index', 'Employment Situation', 'FOMC Press Release', 'H.15 Selected Interest Rates',
+    'Producer Price Index', 'Job Openings and Labor Turnover Survey', 'Treasury International Capital',
+    'Dow Jones Averages', 'S&P Dow Jones Indices', 'Coinbase Cryptocurrencies', 'Nikkei Indexes',
+    'Secured Overnight Financing Rate Data', 'Federal Funds Data', 'Unemployment Insurance Weekly Claims',
+    'Personal Income and Outlays', 'Gross Domestic Product', 'Industrial Production and Capacity Utilization',
+    'Advance Monthly Sales for Retail and Food Services', 'Import and Export Price Indexes',
+    'Brave-Butters-Kelley Indexes', 'Housing Vacancies and Homeownership', 'New Residential Construction',
+    'Weekly U.S. Retail Gasoline Prices', 'AMERIBOR Benchmark Rates', 'Commercial Paper',
+    'Summary of Economic Projections', 'State Employment and Unemployment', 'Daily Treasury Par Yield Curve Rates',
+]
+REGIONS = ['Northeast', 'Midwest', 'South', 'West', 'New England', 'Mountain', 'Pacific', 'District']
+NOTE_WORDS = (
+    'index measures monthly quarterly change prices paid consumers producers goods services seasonally adjusted '
+    'survey data release estimates revised employment payrolls wages hours inflation rate interest treasury '
+    'yields market liquidity federal reserve bank research economic activity regional output demand supply '
+    'household business sector trade exports imports housing starts permits sales inventories energy food'
+).split()
+
+CHANNELS = ['remarks', 'WatcherGuru', 'coinmarket', 'SolidIntelX', 'startups', 'investigations', 'bricsnews']
+ASSET_HEADLINES = [
+    '**JUST IN:** Bitcoin ETF inflows hit {n} million dollars',
+    'Ethereum developers schedule the next upgrade for block {n}',
+    '$SOL rallies {n}% as Solana network activity climbs',
+    'BTC miners sold {n} coins this week',
+    'ETH staking deposits pass {n} thousand validators',
+]
+OTHER_HEADLINES = [
+    'BREAKING: Fed leaves interest rates unchanged at {n} bps',
+    'Oil rises {n}% after OPEC announces production cuts',
+    'US unemployment claims fall to {n} thousand',
+    '${sym} lists on {n} new exchanges',
+    'Treasury auction draws {n} billion in bids',
+]
+
+
+def symbol_names(count, rng):
+    """BTC, ETH and SOL, then unique random tickers"""
+    names = list(KNOWN_SYMBOLS)[:count]
+    seen = set(names)
+    letters = np.array(list(string.ascii_uppercase))
+    while len(names) < count:
+        name = ''.join(rng.choice(letters, size=int(rng.integers(3, 6))))
+        if name not in seen:
+            seen.add(name)
+            names.append(name)
+    return names
+
+
+def price_paths(count, days, first, drift, vol, rng):
+    """Daily GBM paths, shape (count, days)"""
+    dt = 1 / 365
+    shocks = rng.standard_normal((count, days - 1))
+    steps = (drift - vol ** 2 / 2)[:, None] * dt + vol[:, None] * np.sqrt(dt) * shocks
+    log_paths = np.concatenate([np.zeros((count, 1)), np.cumsum(steps, axis=1)], axis=1)
+    return first[:, None] * np.exp(log_paths)
+
+
+def write_histories(directory, symbols, years, rng, binary=False, end=END_DATE):
+    """
+    One daily history per symbol
+
+    Returns:
+        dict: Symbol -> (epoch days, prices)
+    """
+    os.makedirs(directory, exist_ok=True)
+    length = max(2, int(round(years * 365)))
+    first_day = end.toordinal() - EPOCH_ORDINAL - length + 1
+    days = np.arange(first_day, first_day + length, dtype=np.int64)
+    dates = days_to_strings(days)
+
+    params = [KNOWN_SYMBOLS.get(s) or (float(10 ** rng.uniform(-2, 4)), float(rng.normal(0.1, 0.3)),
+                                       float(rng.uniform(0.3, 1.2))) for s in symbols]
+    latest, drift, vol = (np.array(column) for column in zip(*params))
+    # Scale each path to end at its latest price, so BTC, ETH and SOL look like today's
+    paths = price_paths(len(symbols), length, np.ones(len(symbols)), drift, vol, rng)
+    paths *= (latest / paths[:, -1])[:, None]
+
+    histories = {}
+    for symbol, prices in zip(symbols, paths):
+        write_csv_atomic(os.path.join(directory, f"{symbol}.csv"), ['date', 'price'], zip(dates, prices.tolist()))
+        if binary:
+            write_history(os.path.join(directory, f"{symbol}.bin"), days, prices)
+        histories[symbol] = (days, prices)
+    return histories
+
+
+def _stamp(day, offset_seconds=0):
+    moment = datetime.combine(day, dtime(2, 18, 51)) + timedelta(seconds=offset_seconds)
+    return moment.isoformat()
+
+
+def crypto_snapshot(histories, rng, end=END_DATE):
+    """A crypto scraper snapshot with a quote per history"""
+    prices = {}
+    for symbol, (_, series) in histories.items():
+        price, previous = float(series[-1]), float(series[-2])
+        supply = float(10 ** rng.uniform(6, 10))
+        prices[symbol] = {
+            'price_usd': round(price, 8 if price < 1 else 2),
+            'market_cap': price * supply,
+            'volume_24h': price * supply * float(rng.uniform(0.005, 0.1)),
+            'change_24h': (price / previous - 1) * 100,
+            'timestamp': _stamp(end, len(prices) * 0.001)
+        }
+    value = int(rng.integers(5, 96))
+    snapshot = {
+        'crypto_prices': prices,
+        'hash_rates': {'BTC': {'hash_rate_th_s': float(rng.uniform(0.5, 1.5)),
+                               'difficulty': int(rng.integers(10 ** 14, 2 * 10 ** 14)), 'timestamp': _stamp(end, 1)}},
+        'fear_greed_index': {
+            'value': value,
+            'value_classification': ('Extreme Fear' if value < 25 else 'Fear' if value < 45 else 'Neutral'
+                                     if value < 55 else 'Greed' if value < 75 else 'Extreme Greed'),
+            'timestamp': _stamp(end, 2)
+        },
+        'timestamp': _stamp(end, 2),
+        'data_type': 'crypto'
+    }
+    CryptoSnapshot.from_dict(snapshot)  # the backend must accept what we write
+    return snapshot
+
+
+def macro_snapshot(count, rng, end=END_DATE):
+    """A macro scraper snapshot with `count` index quotes"""
+    indices = list(KNOWN_INDICES[:count])
+    tickers = symbol_names(count + 3, rng)[3:]
+    while len(indices) < count:
+        ticker = tickers[len(indices)]
+        indices.append((ticker.lower(), ticker, float(10 ** rng.uniform(1, 3.5)), float(rng.uniform(0.1, 0.5))))
+
+    quotes = {}
+    for key, symbol, price, vol in indices:
+        previous = price / (1 + float(rng.normal(0, vol / np.sqrt(252))))
+        low, high = sorted((previous, price))
+        quotes[key] = {
+            'symbol': symbol, 'price': round(price, 2), 'open': round(previous, 2),
+            'high': round(high * (1 + float(rng.uniform(0, 0.005))), 2),
+            'low': round(low * (1 - float(rng.uniform(0, 0.005))), 2),
+            'volume': 0 if symbol.startswith('^') else int(rng.integers(10 ** 6, 10 ** 8)),
+            'change': price - previous, 'change_percent': (price / previous - 1) * 100,
+            'previous_close': previous, 'timestamp': _stamp(end, 3 + len(quotes) * 0.01),
+            'data_date': end.isoformat()
+        }
+    stamp = _stamp(end, 6)
+    snapshot = {
+        'market_indices': quotes,
+        'interest_rates': {
+            'us10yr': {'yield_percent': float(rng.uniform(3.5, 5)), 'change': float(rng.normal(0, 0.03)),
+                       'timestamp': stamp},
+            'fed_funds_rate': {'rate_percent': 4.33, 'date': end.replace(day=1).isoformat(), 'timestamp': stamp,
+                               'source': 'FRED'}
+        },
+        'consumer_data': {
+            'cpi': {'value': 320.58, 'change_mom': 0.08, 'change_yoy': 2.38,
+                    'date': end.replace(day=1).isoformat(), 'timestamp': stamp, 'source': 'FRED'},
+            'retail_sales': {'value': 715400.0, 'change_mom': -0.9, 'change_yoy': 3.3,
+                             'date': end.replace(day=1).isoformat(), 'timestamp': stamp, 'source': 'FRED'},
+            'unemployment_rate': {'rate_percent': 4.2, 'date': end.replace(day=1).isoformat(), 'timestamp': stamp,
+                                  'source': 'FRED'},
+            'inflation_rate': {'rate_percent': 2.9, 'date': end.replace(month=1, day=1).isoformat(),
+                               'timestamp': stamp, 'source': 'FRED'}
+        },
+        'timestamp': stamp,
+        'data_type': 'macro'
+    }
+    MacroSnapshot.from_dict(snapshot)
+    return snapshot
+
+
+def _notes(rng):
+    if rng.random() < 0.5:
+        return ''
+    sentences = []
+    for _ in range(int(rng.integers(1, 5))):
+        words = list(rng.choice(NOTE_WORDS, size=int(rng.integers(8, 25))))
+        sentences.append(' '.join(words).capitalize() + '.')
+    return ' '.join(sentences)
+
+
+def calendar_events(count, rng, per_day=40, end=END_DATE):
+    """
+    Calendar events ending a month after `end`, newest releases on the last days
+
+    Each release id keeps one name and its notes, as FRED's do; no (date,
+    release_id) pair repeats.
+    """
+    releases = max(per_day, 50, count // 200)
+    names = [RELEASES[i % len(RELEASES)] + (f" ({REGIONS[i // len(RELEASES) % len(REGIONS)]} "
+                                             f"{i // (len(RELEASES) * len(REGIONS)) + 1})"
+                                             if i >= len(RELEASES) else '')
+             for i in range(releases)]
+    notes = [_notes(rng) for _ in range(releases)]
+    press = rng.random(releases) < 0.6
+
+    days = -(-count // per_day)
+    last = end + timedelta(days=30)
+    events = []
+    for offset in range(days):
+        day = (last - timedelta(days=days - 1 - offset)).isoformat()
+        size = min(per_day, count - len(events))
+        for release_id in sorted(rng.choice(releases, size=size, replace=False).tolist()):
+            events.append({
+                'date': day,
+                'release_id': release_id + 1,
+                'name': names[release_id],
+                'press_release': bool(press[release_id]),
+                'link': f"https://fred.stlouisfed.org/release?rid={release_id + 1}",
+                'notes': notes[release_id]
+            })
+    return events
+
+
+def write_calendar(path, events, end=END_DATE):
+    """The legacy calendar JSON the store seeds itself from"""
+    write_json_atomic(path, {
+        'updated_at': _stamp(end),
+        'events_count': len(events),
+        'new_events_count': len(events),
+        'cached_events_count': len(events),
+        'events': events
+    })
+
+
+def news_messages(count, rng, symbols, start_day, end_day):
+    """Messages spread over the history, in posting order, ids ascending per channel"""
+    start = datetime.combine(date.fromordinal(int(start_day) + EPOCH_ORDINAL), dtime(), timezone.utc)
+    span = (int(end_day) - int(start_day) + 1) * 86400
+    seconds = np.sort(rng.integers(0, span, size=count))
+    channels = rng.integers(0, len(CHANNELS), size=count)
+    mentions = rng.random(count) < 1 / 3
+    numbers = rng.integers(1, 1000, size=count)
+    others = symbols[3:] or ['ARB']
+
+    ids = {channel: int(rng.integers(1000, 100000)) for channel in CHANNELS}
+    messages = []
+    for second, channel, mention, n in zip(seconds.tolist(), channels.tolist(), mentions.tolist(), numbers.tolist()):
+        channel = CHANNELS[channel]
+        ids[channel] += 1
+        templates = ASSET_HEADLINES if mention else OTHER_HEADLINES
+        headline = templates[n % len(templates)].format(n=n, sym=others[n % len(others)])
+        body = ' '.join(rng.choice(NOTE_WORDS, size=int(rng.integers(0, 30))).tolist())
+        messages.append({
+            'channel': channel,
+            'id': ids[channel],
+            'date': str(start + timedelta(seconds=second)),
+            'text': f"{headline}\n\n{body}".strip(),
+            'sender_id': int(rng.integers(10 ** 9, 10 ** 10))
+        })
+    return messages
+
+
+def generate(output, symbols=3, years=1.0, events=65, messages=1000, indices=3, binary=False, seed=0, per_day=40):
+    """
+    Write a complete synthetic data set under `output`
+
+    Returns:
+        dict: What was written (counts, paths and seconds taken)
+    """
+    rng = np.random.default_rng(seed)
+    started = time.perf_counter()
+    paths = layout(output)
+
+    names = symbol_names(symbols, rng)
+    histories = write_histories(paths['history'], names, years, rng, binary)
+    write_json_atomic(os.path.join(paths['pushes'], 'crypto_data', 'latest.json'), crypto_snapshot(histories, rng))
+    write_json_atomic(os.path.join(paths['pushes'], 'macro_data', 'latest.json'), macro_snapshot(indices, rng))
+    write_calendar(paths['calendar_json'], calendar_events(events, rng, per_day))
+
+    days, _ = histories[names[0]]
+    store = NewsStore(paths['news'])
+    if store.count() == 0:
+        store.append(news_messages(messages, rng, names, days[0], days[-1]))
+
+    return {
+        'symbols': symbols, 'days': len(days), 'events': events, 'messages': messages, 'indices': indices,
+        'bytes': sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(output) for f in files),
+        'seconds': round(time.perf_counter() - started, 2),
+        'paths': paths
+    }
+
+
+def layout(output):
+    """Where generate() puts each data set"""
+    output = os.path.abspath(output)
+    return {
+        'history': os.path.join(output, 'cli-charts', 'data'),
+        'pushes': os.path.join(output, 'pushes'),
+        'calendar_json': os.path.join(output, 'calendar', 'economic_calendar.json'),
+        'calendar_db': os.path.join(output, 'calendar', 'economic_calendar.db'),
+        'search_db': os.path.join(output, 'search', 'search.db'),
+        'news': os.path.join(output, 'news'),
+    }
+
+
+def env(output):
+    """Environment that points the backend and the pipelines at a generated data set"""
+    paths = layout(output)
+    return {
+        'CLI_CHARTS_DATA_DIR': paths['history'],
+        'PUSHES_DATA_DIR': paths['pushes'],
+        'CALENDAR_DB_PATH': paths['calendar_db'],
+        'SEARCH_DB_PATH': paths['search_db'],
+        'NEWS_EXPORT_DIR': paths['news'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate synthetic market data at scale')
+    parser.add_argument('output')
+    parser.add_argument('--symbols', type=int, default=100)
+    parser.add_argument('--years', type=float, default=10)
+    parser.add_argument('--events', type=int, default=100000)
+    parser.add_argument('--messages', type=int, default=100000)
+    parser.add_argument('--indices', type=int, default=3, help='Index quotes in the macro snapshot')
+    parser.add_argument('--per-day', type=int, default=40, help='Most calendar events on one day')
+    parser.add_argument('--binary', action='store_true', help='Also write .bin histories beside the CSVs')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    info = generate(args.output, args.symbols, args.years, args.events, args.messages, args.indices,
+                    args.binary, args.seed, args.per_day)
+    print(f"{info['symbols']} symbols x {info['days']} days, {info['events']} events, {info['messages']} messages, "
+          f"{info['indices']} indices: {info['bytes'] / 1e6:.1f} MB in {info['seconds']}s -> {args.output}")
+    for name, value in env(args.output).items():
+        print(f"export {name}={value}")
+
+
+if __name__ == '__main__':
+    main()
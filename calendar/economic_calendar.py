@@ -1,11 +1,10 @@
 #!/usr/bin/env python3
 """
 Economic Calendar Data Fetcher
-Fetches upcoming economic calendar events and saves them to a JSON file
+Fetches upcoming economic calendar events and upserts them into the calendar store
 """
 
 import os
-import json
 import requests
 import logging
 from datetime import datetime, timedelta
@@ -13,9 +12,13 @@ import sys
 import time
 from dotenv import load_dotenv
 
-# Add the parent directory to the path so we can import from pushes
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from pushes.config import Config
+# Import from pushes/ the way the scrapers there do, so the orchestrator (which
+# runs this fetcher in-process) and the fetcher share one metrics registry
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'pushes'))
+from config import Config
+from calendar_store import CalendarStore
+from search_index import SearchIndex, calendar_document
+from metrics import upstream_timer, stage_timer, flush_metrics
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -54,7 +57,7 @@ class EconomicCalendarFetcher:
             end_date = (datetime.now() + timedelta(days=days_ahead)).strftime('%Y-%m-%d')
             
             # FRED API endpoint for releases
-            url = "https://api.stlouisfed.org/fred/releases/dates"
+            url = f"{self.config.FRED_BASE_URL}/releases/dates"
             
             params = {
                 'api_key': self.fred_api_key,
@@ -64,7 +67,8 @@ class EconomicCalendarFetcher:
                 'limit': 1000,  # Maximum allowed by FRED API
             }
             
-            response = requests.get(url, params=params)
+            with upstream_timer('fred'):
+                response = requests.get(url, params=params)
             
             if response.status_code != 200:
                 logger.error(f"Failed to fetch economic releases: {response.status_code} - {response.text}")
@@ -94,7 +98,7 @@ class EconomicCalendarFetcher:
                     calendar_events.append(event)
                 
                 # Respect rate limits
-                time.sleep(0.5)
+                time.sleep(self.config.FRED_RELEASE_DELAY)
             
             # Sort by date
             calendar_events.sort(key=lambda x: x['date'])
@@ -117,7 +121,7 @@ class EconomicCalendarFetcher:
             dict: Release information
         """
         try:
-            url = "https://api.stlouisfed.org/fred/release"
+            url = f"{self.config.FRED_BASE_URL}/release"
             
             params = {
                 'api_key': self.fred_api_key,
@@ -125,7 +129,8 @@ class EconomicCalendarFetcher:
                 'release_id': release_id
             }
             
-            response = requests.get(url, params=params)
+            with upstream_timer('fred'):
+                response = requests.get(url, params=params)
             
             if response.status_code != 200:
                 logger.error(f"Failed to fetch release info for ID {release_id}: {response.status_code}")
@@ -138,115 +143,28 @@ class EconomicCalendarFetcher:
             logger.error(f"Error fetching release info for ID {release_id}: {e}")
             return {}
     
-    def load_existing_events(self, filename):
+    def save_events(self, calendar_events, max_days_old=90):
         """
-        Load existing events from the JSON file
-        
-        Args:
-            filename (str): Path to the JSON file
-            
-        Returns:
-            list: List of existing events, empty list if file doesn't exist or is invalid
-        """
-        try:
-            if os.path.exists(filename):
-                with open(filename, 'r') as f:
-                    data = json.load(f)
-                    existing_events = data.get('events', [])
-                    logger.info(f"Loaded {len(existing_events)} existing events from {filename}")
-                    return existing_events
-            else:
-                logger.info(f"No existing file found at {filename}, starting fresh")
-                return []
-        except Exception as e:
-            logger.error(f"Error loading existing events from {filename}: {e}")
-            return []
-    
-    def merge_events(self, existing_events, new_events, max_days_old=90):
-        """
-        Merge new events with existing events, removing duplicates and old events
-        
-        Args:
-            existing_events (list): Previously cached events
-            new_events (list): Newly fetched events
-            max_days_old (int): Maximum days to keep old events (default 90 days)
-            
-        Returns:
-            list: Merged and deduplicated events
-        """
-        try:
-            # Calculate cutoff date for old events
-            cutoff_date = (datetime.now() - timedelta(days=max_days_old)).strftime('%Y-%m-%d')
-            
-            # Create a set to track unique events (using date + release_id as key)
-            event_keys = set()
-            merged_events = []
-            
-            # Add new events first (they take priority)
-            for event in new_events:
-                key = (event.get('date'), event.get('release_id'))
-                if key not in event_keys:
-                    event_keys.add(key)
-                    merged_events.append(event)
-            
-            # Add existing events that aren't duplicates and aren't too old
-            for event in existing_events:
-                key = (event.get('date'), event.get('release_id'))
-                event_date = event.get('date', '')
-                
-                # Skip if duplicate or too old
-                if key in event_keys or event_date < cutoff_date:
-                    continue
-                
-                event_keys.add(key)
-                merged_events.append(event)
-            
-            # Sort by date
-            merged_events.sort(key=lambda x: x.get('date', ''))
-            
-            logger.info(f"Merged events: {len(new_events)} new + {len(existing_events)} existing = {len(merged_events)} total (removed {len(existing_events) + len(new_events) - len(merged_events)} duplicates/old events)")
-            return merged_events
-            
-        except Exception as e:
-            logger.error(f"Error merging events: {e}")
-            # Fallback to just new events if merge fails
-            return new_events
-    
-    def save_to_json(self, calendar_events, filename=None):
-        """
-        Save calendar events to a JSON file, merging with existing events
+        Upsert calendar events into the calendar store and drop old ones
         
         Args:
             calendar_events (list): List of newly fetched economic calendar events
-            filename (str): Output filename (defaults to data/economic_calendar.json)
+            max_days_old (int): Maximum days to keep old events (default 90 days)
         """
         try:
-            if filename is None:
-                # Save to data directory in the calendar folder
-                script_dir = os.path.dirname(os.path.abspath(__file__))
-                filename = os.path.join(script_dir, 'data', 'economic_calendar.json')
-            
-            # Load existing events
-            existing_events = self.load_existing_events(filename)
-            
-            # Merge new events with existing ones
-            merged_events = self.merge_events(existing_events, calendar_events)
-            
-            output = {
-                'updated_at': datetime.now().isoformat(),
-                'events_count': len(merged_events),
-                'new_events_count': len(calendar_events),
-                'cached_events_count': len(existing_events),
-                'events': merged_events
-            }
+            store = CalendarStore()
+            written = store.upsert_events(calendar_events)
+            removed = store.prune(max_days_old)
             
-            with open(filename, 'w') as f:
-                json.dump(output, f, indent=2)
+            logger.info(f"Saved {written} events to {store.path} ({store.count()} total, removed {removed} old events)")
             
-            logger.info(f"Successfully saved {len(merged_events)} total events to {filename} ({len(calendar_events)} new, {len(existing_events)} previously cached)")
+            # Release notes become searchable as they arrive (pruned events stay searchable)
+            indexed = SearchIndex().add_documents([calendar_document(event) for event in calendar_events
+                                                   if event.get('date') and event.get('release_id') is not None])
+            logger.info(f"Search index: {indexed} new or changed calendar documents")
             
         except Exception as e:
-            logger.error(f"Error saving calendar events to {filename}: {e}")
+            logger.error(f"Error saving calendar events: {e}")
     
     def run(self, days_ahead=30):
         """
@@ -256,10 +174,12 @@ class EconomicCalendarFetcher:
             days_ahead (int): Number of days ahead to fetch events for
         """
         logger.info(f"Fetching economic calendar events for the next {days_ahead} days")
-        events = self.fetch_economic_releases(days_ahead)
+        with stage_timer('calendar', 'fetch'):
+            events = self.fetch_economic_releases(days_ahead)
         
         if events:
-            self.save_to_json(events)
+            with stage_timer('calendar', 'write'):
+                self.save_events(events)
             return True
         else:
             logger.warning("No economic calendar events found")
@@ -280,6 +200,7 @@ def main():
         # Run the fetcher
         fetcher = EconomicCalendarFetcher()
         success = fetcher.run(days_ahead=args.days)
+        flush_metrics('calendar')
         
         if success:
             print(f"Successfully fetched economic calendar events for the next {args.days} days")
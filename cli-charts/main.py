@@ -1,14 +1,23 @@
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 import plotext as plt
 import os
+import sys
 import csv
 
-cryptos = {
-    "BTC": "bitcoin",
-    "ETH": "ethereum",
-    "SOL": "solana"
-}
+# Shared snapshot writer, config and CoinGecko client live with the scrapers in pushes/
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pushes.snapshot_io import write_csv_atomic
+from pushes.config import Config
+from pushes.coingecko import CoinGeckoClient
+
+# Histories are kept for the whole crypto universe; the chart shows a few of them
+cryptos = Config.CRYPTO_IDS
+PLOT_SYMBOLS = ["BTC", "ETH", "SOL"]
+
+# Same request budget as the price scraper, so running both stays within CoinGecko's limit
+client = CoinGeckoClient()
 
 DATA_DIR = "data"
 if not os.path.exists(DATA_DIR):
@@ -40,13 +49,8 @@ def get_crypto_data(symbol, coingecko_id):
     if not all_prices or all_prices[-1][0].date() < end_date.date():
         print(f"Fetching new data for {symbol}...")
         # CoinGecko's free API gives daily data, we fetch last 30 days and filter what's new
-        url = f"https://api.coingecko.com/api/v3/coins/{coingecko_id}/market_chart"
-        params = { "vs_currency": "usd", "days": "30", "interval": "daily" }
-        
         try:
-            response = requests.get(url, params=params)
-            response.raise_for_status()
-            data = response.json().get("prices", [])
+            data = client.market_chart(coingecko_id, days=30)
             
             new_prices = []
             for ts, price in data:
@@ -62,11 +66,19 @@ def get_crypto_data(symbol, coingecko_id):
                 
                 all_prices.sort(key=lambda x: x[0])
 
-                with open(filename, "w", newline="") as f:
-                    writer = csv.writer(f)
-                    writer.writerow(["date", "price"])
-                    for date, price in all_prices:
-                        writer.writerow([date.strftime('%d/%m/%Y'), price])
+                write_csv_atomic(
+                    filename,
+                    ["date", "price"],
+                    [[date.strftime('%d/%m/%Y'), price] for date, price in all_prices]
+                )
+                
+                # Keep a converted binary history in step by appending, not rewriting
+                bin_filename = os.path.join(DATA_DIR, f"{symbol}.bin")
+                if os.path.exists(bin_filename):
+                    from pushes.history_store import append_history, date_to_day
+                    latest_by_day = {date_to_day(date): price for date, price in sorted(new_prices)}
+                    days = sorted(latest_by_day)
+                    append_history(bin_filename, days, [latest_by_day[day] for day in days])
         except requests.exceptions.RequestException as e:
             print(f"Failed to fetch data for {symbol}: {e}")
 
@@ -77,8 +89,14 @@ def get_crypto_data(symbol, coingecko_id):
 all_dates = None
 all_prices_dict = {}
 
-for symbol, coingecko_id in cryptos.items():
-    price_data = get_crypto_data(symbol, coingecko_id)
+# Fetch every coin concurrently; the shared rate limiter paces the requests
+with ThreadPoolExecutor(max_workers=Config.COINGECKO_MAX_WORKERS) as executor:
+    histories = dict(zip(cryptos, executor.map(get_crypto_data, cryptos.keys(), cryptos.values())))
+
+plot_symbols = [symbol for symbol in PLOT_SYMBOLS if histories.get(symbol)] or [s for s in histories if histories[s]][:3]
+
+for symbol in plot_symbols:
+    price_data = histories[symbol]
     if price_data:
         dates = [date.strftime('%d/%m/%Y') for date, _ in price_data]
         price_values = [price for _, price in price_data]
@@ -107,11 +125,11 @@ if all_dates:
     plt.canvas_color("white")
     plt.axes_color("white")
     
-    # Create a figure with 3 rows and 1 column for subplots
-    plt.subplots(3, 1)
+    # Create a figure with one row per plotted coin
+    plt.subplots(len(plot_symbols), 1)
 
     colors = ["red", "blue", "green"]
-    symbols = list(cryptos.keys())
+    symbols = plot_symbols
 
     for i in range(len(symbols)):
         symbol = symbols[i]
@@ -1,81 +1,267 @@
-from flask import Flask, jsonify, request
+from flask import Flask, jsonify, request, g, Response
 from flask_cors import CORS
-import pandas as pd
+import atexit
 import json
 import os
+import sys
+import threading
+import time
 from pathlib import Path
-from groq import Groq
 from dotenv import load_dotenv
 from datetime import datetime, timedelta
 
+# The Groq SDK dominates import time; it is loaded on first use
+# (wsgi.py preloads them before forking production workers)
+
 # Load environment variables
 load_dotenv()
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
-# Initialize Groq client (with error handling)
-groq_client = None
-try:
-    groq_api_key = os.getenv('GROQ_API_KEY')
-    if groq_api_key and groq_api_key != 'your_groq_api_key_here':
-        # Initialize Groq client with explicit parameters only
-        groq_client = Groq(
-            api_key=groq_api_key,
-            # Remove any potential proxy-related parameters
-        )
-        print("✅ Groq client initialized successfully")
-    else:
-        print("⚠️  Groq API key not configured. Chat functionality will be disabled.")
-except Exception as e:
-    print(f"⚠️  Failed to initialize Groq client: {e}")
-    print("Chat functionality will be disabled.")
-    # Try alternative initialization without any extra parameters
-    try:
-        groq_api_key = os.getenv('GROQ_API_KEY')
-        if groq_api_key and groq_api_key != 'your_groq_api_key_here':
-            import groq
-            groq_client = groq.Groq(api_key=groq_api_key)
-            print("✅ Groq client initialized successfully (fallback method)")
-    except Exception as e2:
-        print(f"⚠️  Fallback initialization also failed: {e2}")
-
 # Base paths to data directories (relative to main marketinfo project root)
 # The backend is in marketinfo-app/backend/, so we need to go up 2 levels to reach the main marketinfo directory
 BASE_DIR = Path(__file__).parent.parent.parent
-CLI_CHARTS_DATA = BASE_DIR / "cli-charts" / "data"
-PUSHES_CRYPTO_DATA = BASE_DIR / "pushes" / "crypto_data"
-PUSHES_MACRO_DATA = BASE_DIR / "pushes" / "macro_data"
+# CLI_CHARTS_DATA_DIR and PUSHES_DATA_DIR serve data from elsewhere (e.g. benchmarks/harness.py, synth.py)
+CLI_CHARTS_DATA = Path(os.getenv('CLI_CHARTS_DATA_DIR') or BASE_DIR / "cli-charts" / "data")
+PUSHES_DATA = Path(os.getenv('PUSHES_DATA_DIR') or BASE_DIR / "pushes")
+PUSHES_CRYPTO_DATA = PUSHES_DATA / "crypto_data"
+PUSHES_MACRO_DATA = PUSHES_DATA / "macro_data"
+PUSHES_IMPACT_DATA = PUSHES_DATA / "impact_data"
+PUSHES_DERIVED_DATA = PUSHES_DATA / "derived_data"
+PUSHES_HISTORY_DATA = PUSHES_DATA / "history_data"
+PUSHES_RISK_DATA = PUSHES_DATA / "risk_data"
 CALENDAR_DATA = BASE_DIR / "calendar" / "data"
+# Calendar requests without from/to get the releases around today, not the oldest on record
+CALENDAR_DAYS_BACK = int(os.getenv('CALENDAR_DAYS_BACK', '30'))
+CALENDAR_DAYS_AHEAD = int(os.getenv('CALENDAR_DAYS_AHEAD', '90'))
 
-def _categorize_releases(events):
-    """Categorize economic releases by type for better analysis"""
-    categories = {
-        "federal_reserve": [],
-        "interest_rates": [],
-        "employment": [],
-        "inflation": [],
-        "market_indices": [],
-        "crypto": [],
-        "other": []
+# The snapshot schema and atomic snapshot reader are shared with the scrapers in pushes/
+sys.path.append(str(BASE_DIR))
+from pushes.snapshot_models import CryptoSnapshot, MacroSnapshot, SnapshotValidationError, now_ms
+from pushes.snapshot_io import SnapshotReader
+from pushes.metrics import REGISTRY, load_metrics_files, write_worker_metrics
+from pushes.calendar_store import CalendarStore, CATEGORIES, categorize_release
+from pushes.search_index import SearchIndex
+from quote_engine import QuoteEngine, valid_symbol
+from shared_cache import SharedSnapshotCache
+from history_reader import read_history, read_history_range, history_source, last_date
+from chat_tools import ChatToolbox, run_tool_chat
+from chat_sessions import ChatSessionStore, extractive_summary, llm_summarizer
+from llm_providers import configured_provider, provider_from_env
+from profiling import PhaseJSONProvider, RequestProfiler, phase, trusted
+
+_llm_client = None
+_llm_lock = threading.Lock()
+
+def get_llm_client():
+    """The chat model provider (LLM_PROVIDER: groq, openai or stub), built on first use; None when not configured"""
+    global _llm_client
+    if _llm_client is None and configured_provider():
+        with _llm_lock:
+            if _llm_client is None:
+                try:
+                    _llm_client = provider_from_env()
+                    print(f"✅ Chat model: {_llm_client.name} {_llm_client.model}")
+                except Exception as e:
+                    print(f"⚠️  Failed to initialize chat model: {e}")
+    return _llm_client
+
+if not configured_provider():
+    print("⚠️  No chat model configured (set GROQ_API_KEY, or LLM_BASE_URL for a local model). Chat functionality will be disabled.")
+
+# Cached readers: each file is parsed once per generation, never while half-written
+CRYPTO_READER = SnapshotReader(PUSHES_CRYPTO_DATA / "latest.json", loader=lambda raw: CryptoSnapshot.from_dict(json.loads(raw)))
+MACRO_READER = SnapshotReader(PUSHES_MACRO_DATA / "latest.json", loader=lambda raw: MacroSnapshot.from_dict(json.loads(raw)))
+IMPACT_READER = SnapshotReader(PUSHES_IMPACT_DATA / "impact.json")
+DERIVED_READER = SnapshotReader(PUSHES_DERIVED_DATA / "manifest.json")
+RISK_READER = SnapshotReader(PUSHES_RISK_DATA / "risk.json")
+
+# Encoded response bodies shared by all server workers through mmap
+SHARED_CACHE = SharedSnapshotCache()
+
+def _compact_json(obj):
+    return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+def _json_body(body):
+    """Response for a pre-encoded JSON body"""
+    return Response(bytes(body), mimetype='application/json')
+
+_calendar_store = None
+_calendar_store_lock = threading.Lock()
+
+def get_calendar_store():
+    """The calendar store, opened on first use (imports the legacy JSON file if the store is empty)"""
+    global _calendar_store
+    if _calendar_store is None:
+        with _calendar_store_lock:
+            if _calendar_store is None:
+                _calendar_store = CalendarStore()
+    return _calendar_store
+
+_chat_sessions = None
+_chat_sessions_lock = threading.Lock()
+
+def get_chat_sessions():
+    """The conversation store, opened on first use in each worker"""
+    global _chat_sessions
+    if _chat_sessions is None:
+        with _chat_sessions_lock:
+            if _chat_sessions is None:
+                summarizer = extractive_summary
+                if os.getenv('CHAT_SUMMARIZER') == 'llm' and get_llm_client():
+                    summarizer = llm_summarizer(get_llm_client(), get_llm_client().model)
+                _chat_sessions = ChatSessionStore(summarizer=summarizer)
+    return _chat_sessions
+
+_search_index = None
+_search_index_lock = threading.Lock()
+
+def get_search_index():
+    """The full-text index, opened on first use (built from the calendar store and news store if empty)"""
+    global _search_index
+    if _search_index is None:
+        with _search_index_lock:
+            if _search_index is None:
+                index = SearchIndex()
+                if index.count() == 0:
+                    index.sync_calendar(get_calendar_store())
+                    index.sync_news()
+                    index.optimize()
+                _search_index = index
+    return _search_index
+
+# Watchlist quotes, refreshed in bulk by one worker and shared through the cache directory
+QUOTE_ENGINE = QuoteEngine.from_env(SHARED_CACHE.cache_dir)
+WATCHLIST_MAX_REQUEST = 200  # symbols per watchlist request
+
+def load_crypto_snapshot():
+    """Load and validate the latest crypto snapshot (None if missing or invalid)"""
+    if not CRYPTO_READER.exists():
+        return None
+    try:
+        return CRYPTO_READER.read()
+    except (SnapshotValidationError, ValueError) as e:
+        print(f"Invalid crypto snapshot: {e}")
+        return None
+
+def load_macro_snapshot():
+    """Load and validate the latest macro snapshot (None if missing or invalid)"""
+    if not MACRO_READER.exists():
+        return None
+    try:
+        return MACRO_READER.read()
+    except (SnapshotValidationError, ValueError) as e:
+        print(f"Invalid macro snapshot: {e}")
+        return None
+
+def _series_path(name):
+    """History file of a stored series (cli-charts crypto, backfilled or derived), or None"""
+    if not name.replace('_', '').isalnum():
+        return None
+    for path in (CLI_CHARTS_DATA / f"{name}.csv", PUSHES_HISTORY_DATA / f"{name}.bin", PUSHES_DERIVED_DATA / f"{name}.bin"):
+        if os.path.exists(history_source(path)):
+            return path
+    return None
+
+def _series_history(name, start=None, end=None):
+    path = _series_path(name)
+    return read_history_range(path, start, end) if path else None
+
+def _series_last_date(name):
+    path = _series_path(name)
+    return last_date(path) if path else None
+
+def _series_names():
+    names = {path.stem for path in CLI_CHARTS_DATA.glob("*.csv")}
+    for directory in (CLI_CHARTS_DATA, PUSHES_HISTORY_DATA, PUSHES_DERIVED_DATA):
+        names.update(path.stem for path in directory.glob("*.bin"))
+    return sorted(names)
+
+# Tools for the tool-calling chat mode, answered from the same readers as the API
+CHAT_TOOLBOX = ChatToolbox(
+    price_history=_series_history,
+    last_date=_series_last_date,
+    series_names=_series_names,
+    snapshots=lambda: (load_crypto_snapshot(), load_macro_snapshot()),
+    calendar_store=get_calendar_store,
+    search_index=get_search_index
+)
+
+# Request latency per route, recorded for every response
+HTTP_LATENCY = REGISTRY.histogram('marketinfo_http_request_seconds', 'Backend request latency', ('route', 'method', 'status'))
+
+# Each worker process writes a snapshot of REGISTRY at most this often (and on
+# exit); /metrics merges the snapshots of all workers
+METRICS_FLUSH_SECONDS = float(os.getenv('METRICS_FLUSH_SECONDS', '5'))
+_metrics_flushed_at = 0.0
+
+def flush_worker_metrics(force=False):
+    """Write this worker's metrics snapshot if the last one is older than METRICS_FLUSH_SECONDS"""
+    global _metrics_flushed_at
+    now = time.monotonic()
+    if not force and now - _metrics_flushed_at < METRICS_FLUSH_SECONDS:
+        return
+    _metrics_flushed_at = now
+    try:
+        write_worker_metrics('backend')
+    except OSError as e:
+        print(f"Could not write worker metrics: {e}")
+
+atexit.register(flush_worker_metrics, force=True)
+
+@app.before_request
+def _start_request_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def _record_request_latency(response):
+    start = g.get('request_start')
+    if start is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        HTTP_LATENCY.observe(time.perf_counter() - start, route=route, method=request.method, status=response.status_code)
+    flush_worker_metrics()
+    return response
+
+# Opt-in profiling of single requests (X-Profile: sample | cprofile from trusted clients, see profiling.py)
+PROFILER = RequestProfiler()
+app.json = PhaseJSONProvider(app)
+
+@app.before_request
+def _start_profile():
+    g.profile = PROFILER.start(request)
+
+@app.after_request
+def _finish_profile(response):
+    return PROFILER.finish(g.get('profile'), response)
+
+@app.teardown_request
+def _abandon_profile(_):
+    PROFILER.abandon(g.get('profile'))
+
+def _snapshot_files():
+    """Dataset name -> file whose age the /metrics endpoint reports"""
+    files = {
+        "crypto": PUSHES_CRYPTO_DATA / "latest.json",
+        "macro": PUSHES_MACRO_DATA / "latest.json",
+        "combined": BASE_DIR / "pushes" / "combined_data" / "latest.json",
+        "calendar": CALENDAR_DATA / "economic_calendar.db"
     }
+    for csv_file in CLI_CHARTS_DATA.glob("*.csv"):
+        files[f"history_{csv_file.stem}"] = csv_file
+    return files
+
+def _record_dict(record):
+    """Wire-format dict of a snapshot record, or None"""
+    return record.to_dict() if record is not None else None
+
+def _categorize_releases(events):
+    """Group release names by the categories the calendar store indexed them under"""
+    categories = {category: [] for category in CATEGORIES}
     
     for event in events:
-        name = event.get("name", "").lower()
-        if any(term in name for term in ["fomc", "federal funds", "fed"]):
-            categories["federal_reserve"].append(event["name"])
-        elif any(term in name for term in ["interest rate", "treasury", "sofr", "ameribor"]):
-            categories["interest_rates"].append(event["name"])
-        elif any(term in name for term in ["employment", "unemployment", "jobs"]):
-            categories["employment"].append(event["name"])
-        elif any(term in name for term in ["cpi", "inflation", "price"]):
-            categories["inflation"].append(event["name"])
-        elif any(term in name for term in ["dow jones", "nikkei", "s&p"]):
-            categories["market_indices"].append(event["name"])
-        elif any(term in name for term in ["crypto", "coinbase", "bitcoin"]):
-            categories["crypto"].append(event["name"])
-        else:
-            categories["other"].append(event["name"])
+        for category in event.get("categories") or [categorize_release(event.get("name", ""))]:
+            categories[category].append(event["name"])
     
     # Remove empty categories
     return {k: v for k, v in categories.items() if v}
@@ -88,37 +274,39 @@ def get_current_market_data():
         "economic_calendar": None,     # calendar/data/economic_calendar.json
         "historical_crypto": {},       # cli-charts/data/*.csv
         "data_overview": {},
-        "all_visualization_data": {}   # Complete data used by frontend charts
+        "cross_asset_risk": None,      # pushes/risk_data/risk.json
+        "all_visualization_data": {},  # Complete data used by frontend charts
+        "snapshots": {}                # Typed CryptoSnapshot / MacroSnapshot
     }
     
     try:
         # 1. REAL-TIME CRYPTO DATA (used by crypto charts)
-        crypto_file = PUSHES_CRYPTO_DATA / "latest.json"
-        if crypto_file.exists():
-            with open(crypto_file, 'r') as f:
-                market_data["real_time_crypto"] = json.load(f)
+        crypto = load_crypto_snapshot()
+        if crypto:
+            market_data["snapshots"]["crypto"] = crypto
+            market_data["real_time_crypto"] = crypto.to_dict()
         
         # 2. REAL-TIME MACRO DATA (used by market indices, economic indicators)
-        macro_file = PUSHES_MACRO_DATA / "latest.json"
-        if macro_file.exists():
-            with open(macro_file, 'r') as f:
-                market_data["real_time_macro"] = json.load(f)
+        macro = load_macro_snapshot()
+        if macro:
+            market_data["snapshots"]["macro"] = macro
+            market_data["real_time_macro"] = macro.to_dict()
         
         # Get economic releases data
-        calendar_file = CALENDAR_DATA / "economic_calendar.json"
-        if calendar_file.exists():
-            with open(calendar_file, 'r') as f:
-                calendar_data = json.load(f)
-                # Include recent economic releases for analysis
-                if isinstance(calendar_data.get("events"), list):
-                    market_data["economic_calendar"] = {
-                        "updated_at": calendar_data.get("updated_at"),
-                        "total_events": calendar_data.get("events_count", 0),
-                        "recent_releases": calendar_data["events"][:15],  # Last 15 releases for context
-                        "key_categories": _categorize_releases(calendar_data["events"][:15])
-                    }
-                else:
-                    market_data["economic_calendar"] = calendar_data
+        calendar_store = get_calendar_store()
+        recent_releases, total_events = calendar_store.query(limit=15)  # First 15 releases by date for context
+        if total_events:
+            market_data["economic_calendar"] = {
+                "updated_at": calendar_store.meta().get("updated_at"),
+                "total_events": total_events,
+                "recent_releases": recent_releases,
+                "key_categories": _categorize_releases(recent_releases),
+                "category_counts": calendar_store.category_counts()  # whole calendar, from the index
+            }
+        
+        # Cross-asset correlation, beta and volatility (pushes/risk_engine.py)
+        if RISK_READER.exists():
+            market_data["cross_asset_risk"] = RISK_READER.read()
         
         # 3. HISTORICAL CRYPTO DATA (used by CryptoChart component)
         crypto_symbols = []
@@ -127,13 +315,13 @@ def get_current_market_data():
             symbol = csv_file.stem
             crypto_symbols.append(symbol)
             try:
-                df = pd.read_csv(csv_file)
                 # Get complete historical data for charts
-                all_data = df.to_dict('records')
+                history = read_history(csv_file)
+                all_data = history.records()
                 
                 # Calculate comprehensive statistical analysis
                 if len(all_data) >= 2:
-                    prices = [d['price'] for d in all_data]
+                    prices = history.prices
                     latest_price = all_data[-1]['price']
                     week_ago_price = all_data[-7]['price'] if len(all_data) >= 7 else all_data[0]['price']
                     week_change = ((latest_price - week_ago_price) / week_ago_price) * 100
@@ -192,25 +380,25 @@ def get_current_market_data():
                 # Data for market indices components  
                 "market_indices": {
                     "real_time_data": market_data["real_time_macro"],
-                    "spy_data": market_data["real_time_macro"].get("market_indices", {}).get("sp500") if market_data["real_time_macro"] else None,
-                    "qqq_data": market_data["real_time_macro"].get("market_indices", {}).get("nasdaq100") if market_data["real_time_macro"] else None,
-                    "vix_data": market_data["real_time_macro"].get("market_indices", {}).get("vix") if market_data["real_time_macro"] else None
+                    "spy_data": _record_dict(macro.market_indices.get("sp500")) if macro else None,
+                    "qqq_data": _record_dict(macro.market_indices.get("nasdaq100")) if macro else None,
+                    "vix_data": _record_dict(macro.market_indices.get("vix")) if macro else None
                 },
                 
                 # Data for economic components
                 "economic_indicators": {
-                    "interest_rates": market_data["real_time_macro"].get("interest_rates") if market_data["real_time_macro"] else None,
-                    "consumer_data": market_data["real_time_macro"].get("consumer_data") if market_data["real_time_macro"] else None,
-                    "unemployment": market_data["real_time_macro"].get("consumer_data", {}).get("unemployment_rate") if market_data["real_time_macro"] else None,
-                    "cpi": market_data["real_time_macro"].get("consumer_data", {}).get("cpi") if market_data["real_time_macro"] else None,
-                    "retail_sales": market_data["real_time_macro"].get("consumer_data", {}).get("retail_sales") if market_data["real_time_macro"] else None
+                    "interest_rates": market_data["real_time_macro"]["interest_rates"] if macro else None,
+                    "consumer_data": market_data["real_time_macro"]["consumer_data"] if macro else None,
+                    "unemployment": _record_dict(macro.consumer_data.get("unemployment_rate")) if macro else None,
+                    "cpi": _record_dict(macro.consumer_data.get("cpi")) if macro else None,
+                    "retail_sales": _record_dict(macro.consumer_data.get("retail_sales")) if macro else None
                 },
                 
                 # Data for calendar component
                 "economic_calendar": market_data["economic_calendar"],
                 
                 # Fear & Greed data
-                "fear_greed": market_data["real_time_crypto"].get("fear_greed_index") if market_data["real_time_crypto"] else None
+                "fear_greed": crypto.fear_greed_index if crypto else None
             }
             
             # Data overview stats
@@ -236,64 +424,44 @@ def summarize_market_data(market_data):
     """Create a concise summary of ALL visualization data for the LLM context"""
     summary = []
     
+    snapshots = market_data.get("snapshots", {})
+    
     # Real-time crypto data summary
-    if market_data.get("real_time_crypto"):
-        crypto = market_data["real_time_crypto"]
-        if crypto.get("crypto_prices"):
-            btc_data = crypto["crypto_prices"].get("BTC", {})
-            eth_data = crypto["crypto_prices"].get("ETH", {})
-            sol_data = crypto["crypto_prices"].get("SOL", {})
-            
-            btc_price = btc_data.get("price_usd", "N/A")
-            eth_price = eth_data.get("price_usd", "N/A")
-            sol_price = sol_data.get("price_usd", "N/A")
-            
-            if btc_price != "N/A":
-                btc_change = btc_data.get("change_24h", 0)
-                summary.append(f"BTC: ${btc_price:,.0f} ({btc_change:+.2f}%)")
-            if eth_price != "N/A":
-                eth_change = eth_data.get("change_24h", 0)
-                summary.append(f"ETH: ${eth_price:,.2f} ({eth_change:+.2f}%)")
-            if sol_price != "N/A":
-                sol_change = sol_data.get("change_24h", 0)
-                summary.append(f"SOL: ${sol_price:,.2f} ({sol_change:+.2f}%)")
-        
-        if crypto.get("fear_greed_index"):
-            fgi = crypto["fear_greed_index"]
+    crypto = snapshots.get("crypto")
+    if crypto:
+        for symbol, fmt in (("BTC", ",.0f"), ("ETH", ",.2f"), ("SOL", ",.2f")):
+            price = crypto.crypto_prices.get(symbol)
+            if price:
+                summary.append(f"{symbol}: ${price.price_usd:{fmt}} ({price.change_24h or 0:+.2f}%)")
+        
+        if crypto.fear_greed_index:
+            fgi = crypto.fear_greed_index
             summary.append(f"Fear & Greed: {fgi.get('value', 'N/A')} ({fgi.get('value_classification', 'N/A')})")
     
     # Real-time macro data summary  
-    if market_data.get("real_time_macro"):
-        macro = market_data["real_time_macro"]
-        if macro.get("market_indices"):
-            sp500_data = macro["market_indices"].get("sp500", {})
-            nasdaq_data = macro["market_indices"].get("nasdaq100", {})
-            vix_data = macro["market_indices"].get("vix", {})
-            
-            if sp500_data.get("price"):
-                sp500_price = sp500_data["price"]
-                sp500_change = sp500_data.get("change_percent", 0) * 100
-                summary.append(f"SPY: ${sp500_price:.2f} ({sp500_change:+.2f}%)")
-                
-            if nasdaq_data.get("price"):
-                nasdaq_price = nasdaq_data["price"]
-                nasdaq_change = nasdaq_data.get("change_percent", 0) * 100
-                summary.append(f"QQQ: ${nasdaq_price:.2f} ({nasdaq_change:+.2f}%)")
-                
-            if vix_data.get("price"):
-                vix_price = vix_data["price"]
-                summary.append(f"VIX: {vix_price:.2f}")
+    macro = snapshots.get("macro")
+    if macro:
+        sp500 = macro.market_indices.get("sp500")
+        nasdaq = macro.market_indices.get("nasdaq100")
+        vix = macro.market_indices.get("vix")
+        
+        # change_percent is already a percentage
+        if sp500 and sp500.price:
+            summary.append(f"SPY: ${sp500.price:.2f} ({sp500.change_percent:+.2f}%)")
+        if nasdaq and nasdaq.price:
+            summary.append(f"QQQ: ${nasdaq.price:.2f} ({nasdaq.change_percent:+.2f}%)")
+        if vix and vix.price:
+            summary.append(f"VIX: {vix.price:.2f}")
         
         # Interest rates
-        if macro.get("interest_rates", {}).get("us10yr"):
-            us10yr = macro["interest_rates"]["us10yr"]["yield_percent"]
-            summary.append(f"10Y Treasury: {us10yr:.2f}%")
+        us10yr = macro.interest_rates.get("us10yr")
+        if us10yr:
+            summary.append(f"10Y Treasury: {us10yr.value:.2f}%")
         
         # Consumer data
-        consumer = macro.get("consumer_data", {})
-        if consumer.get("unemployment_rate"):
-            unemployment = consumer["unemployment_rate"]["rate_percent"]
-            summary.append(f"Unemployment: {unemployment}%")
+        unemployment = macro.consumer_data.get("unemployment_rate")
+        if unemployment:
+            summary.append(f"Unemployment: {unemployment.value}%")
     
     # Historical trends and averages
     if market_data.get("historical_crypto"):
@@ -312,16 +480,30 @@ def summarize_market_data(market_data):
         if trends:
             summary.append(" | ".join(trends))
     
+    # Cross-asset co-movement, computed rather than left for the model to guess
+    risk = market_data.get("cross_asset_risk")
+    if risk and risk.get("series"):
+        benchmark = risk["benchmark"]
+        stats = []
+        for name in risk["series"]:
+            beta, vol = risk["beta"].get(name), risk["volatility"].get(name)
+            if name != benchmark and beta is not None:
+                stats.append(f"{name} beta {beta:.2f} vol {vol:.1f}")
+        if stats:
+            summary.append(f"{risk['window']}d vs {benchmark} as of {risk['as_of']}: {', '.join(stats[:8])}")
+    
     # Economic releases summary
     if market_data.get("economic_calendar"):
         calendar = market_data["economic_calendar"]
         if isinstance(calendar, dict) and calendar.get("recent_releases"):
             release_count = len(calendar["recent_releases"])
-            categories = calendar.get("key_categories", {})
+            counts = calendar.get("category_counts") or {
+                cat: len(items) for cat, items in calendar.get("key_categories", {}).items()
+            }
             cat_summary = []
-            for cat, items in categories.items():
-                if items and cat != "other":
-                    cat_summary.append(f"{len(items)} {cat.replace('_', ' ')}")
+            for cat, count in counts.items():
+                if count and cat != "other":
+                    cat_summary.append(f"{count} {cat.replace('_', ' ')}")
             
             if cat_summary:
                 summary.append(f"Economic releases: {', '.join(cat_summary[:3])}")
@@ -343,10 +525,11 @@ def summarize_market_data(market_data):
 def chat_with_ai():
     """Chat endpoint for AI investment analysis"""
     try:
-        # Check if Groq client is available
-        if not groq_client:
+        # Check if a chat model is available
+        llm = get_llm_client()
+        if not llm:
             return jsonify({
-                "error": "AI chat service is not available. Please configure your Groq API key in backend/.env"
+                "error": "AI chat service is not available. Please configure GROQ_API_KEY (or LLM_BASE_URL for a local model) in backend/.env"
             }), 503
         
         data = request.json
@@ -355,11 +538,41 @@ def chat_with_ai():
         if not user_message:
             return jsonify({"error": "Message is required"}), 400
         
+        # Earlier turns of this conversation (bounded by the session store's token budget)
+        sessions = get_chat_sessions()
+        conversation_id = data.get('conversation_id') or sessions.new_id()
+        if not isinstance(conversation_id, str) or len(conversation_id) > 64 or not conversation_id.replace('-', '').isalnum():
+            return jsonify({"error": "conversation_id must be up to 64 letters, digits or dashes"}), 400
+        with phase('load'):
+            history = sessions.history(conversation_id)
+        
+        # Tool mode: a small fixed prompt, the model fetches only the data it needs
+        if (data.get('mode') or os.getenv('CHAT_MODE', 'context')) == 'tools':
+            messages = [
+                {"role": "system", "content": CHAT_TOOLBOX.system_prompt()},
+                *history,
+                {"role": "user", "content": user_message}
+            ]
+            with phase('compute'):  # tool calls count as load, model calls as upstream
+                result = run_tool_chat(llm, llm.model, messages, CHAT_TOOLBOX,
+                                       temperature=0.3, max_tokens=300)
+            sessions.append(conversation_id, user_message, result.content)
+            return jsonify({
+                "response": result.content,
+                "model": llm.model,
+                "mode": "tools",
+                "conversation_id": conversation_id,
+                "tool_calls": result.tool_calls,
+                "timestamp": datetime.now().isoformat()
+            })
+        
         # Get current market data
-        market_data = get_current_market_data()
+        with phase('load'):
+            market_data = get_current_market_data()
         
         # Create concise market data summary
-        market_summary = summarize_market_data(market_data)
+        with phase('compute'):
+            market_summary = summarize_market_data(market_data)
         
         # Create comprehensive context with ALL visualization data
         context_data = {
@@ -393,10 +606,22 @@ def chat_with_ai():
                 }
                 releases_context = f"\n\nFULL ECONOMIC CALENDAR DATA:\n{json.dumps(simplified_calendar, indent=2)}"
         
+        # Release notes and news that match the question, ranked by the search index
+        search_context = ""
+        try:
+            with phase('load'):
+                hits = get_search_index().search(user_message, k=5)
+            if hits:
+                search_context = "\n\nRELEVANT RELEASE NOTES AND NEWS:\n" + "\n".join(
+                    f"- [{hit['source']}] {hit['date'][:10]} {hit['title']}: {hit['snippet']}" for hit in hits
+                )
+        except Exception as e:
+            print(f"Search context unavailable: {e}")
+        
         # Create optimized system prompt
         system_prompt = f"""You are MarketInfo AI with COMPLETE ACCESS to all data used by the MarketInfo dashboard visualizations.
 
-COMPLETE MARKET & VISUALIZATION DATA: {market_summary}{releases_context}
+COMPLETE MARKET & VISUALIZATION DATA: {market_summary}{releases_context}{search_context}
 
 DATA SOURCES YOU HAVE ACCESS TO:
 1. REAL-TIME CRYPTO DATA: Live prices, market caps, volumes, changes for BTC/ETH/SOL
@@ -432,11 +657,12 @@ RESPONSE RULES:
 
 You have complete access to analyze any aspect of the market data that powers the visualizations, including calculated statistics like average prices."""
 
-        # Make request to Groq
-        completion = groq_client.chat.completions.create(
-            model="llama-3.1-8b-instant",
+        # Make request to the chat model
+        completion = llm.chat.completions.create(
+            model=llm.model,
             messages=[
                 {"role": "system", "content": system_prompt},
+                *history,
                 {"role": "user", "content": user_message}
             ],
             temperature=0.3,  # Lower temperature for more accurate data parsing
@@ -445,16 +671,51 @@ You have complete access to analyze any aspect of the market data that powers th
         )
         
         ai_response = completion.choices[0].message.content
+        sessions.append(conversation_id, user_message, ai_response)
         
         return jsonify({
             "response": ai_response,
-            "model": "llama-3.1-8b-instant",
-            "timestamp": pd.Timestamp.now().isoformat()
+            "model": llm.model,
+            "conversation_id": conversation_id,
+            "timestamp": datetime.now().isoformat()
         })
         
     except Exception as e:
         return jsonify({"error": f"AI chat error: {str(e)}"}), 500
 
+@app.route('/api/profiles', methods=['GET'])
+def list_profiles():
+    """Newest stored request profiles (trusted clients only)"""
+    if not trusted(request):
+        return jsonify({"error": "Profiles are only available to trusted clients"}), 403
+    return jsonify({"profiles": PROFILER.list()})
+
+@app.route('/api/profiles/<profile_id>', methods=['GET'])
+def get_profile(profile_id):
+    """
+    One stored request profile (trusted clients only)
+    
+    Query parameter format: json (summary with phase timings, the default),
+    collapsed (flamegraph stacks of a sampled request) or prof (cProfile stats).
+    """
+    if not trusted(request):
+        return jsonify({"error": "Profiles are only available to trusted clients"}), 403
+    kind = request.args.get('format', 'json')
+    path = PROFILER.path(profile_id, kind)
+    if path is None:
+        return jsonify({"error": f"Profile {profile_id} has no {kind} data"}), 404
+    mimetype = {'json': 'application/json', 'collapsed': 'text/plain', 'prof': 'application/octet-stream'}[kind]
+    with open(path, 'rb') as f:
+        return Response(f.read(), mimetype=mimetype)
+
+@app.route('/api/llm', methods=['GET'])
+def llm_status():
+    """The configured chat model provider with its call count, mean latency and token throughput"""
+    llm = get_llm_client()
+    if not llm:
+        return jsonify({"provider": None, "configured": configured_provider()})
+    return jsonify(llm.stats())
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
@@ -472,28 +733,59 @@ def health_check():
             "cli_charts_dir": CLI_CHARTS_DATA.exists(),
             "crypto_pushes_file": (PUSHES_CRYPTO_DATA / "latest.json").exists(),
             "macro_pushes_file": (PUSHES_MACRO_DATA / "latest.json").exists(),
-            "calendar_file": (CALENDAR_DATA / "economic_calendar.json").exists()
+            "calendar_file": (CALENDAR_DATA / "economic_calendar.db").exists()
         }
     })
 
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus text exposition: metrics of every backend worker and scraper, and snapshot ages"""
+    flush_worker_metrics(force=True)
+    registry = load_metrics_files()
+    
+    age = registry.gauge('marketinfo_snapshot_age_seconds', 'Seconds since a dataset file was last written', ('dataset',))
+    now = time.time()
+    for dataset, path in _snapshot_files().items():
+        try:
+            age.set(round(now - path.stat().st_mtime, 3), dataset=dataset)
+        except FileNotFoundError:
+            continue
+    
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/api/crypto/prices/<symbol>', methods=['GET'])
 def get_crypto_prices(symbol):
-    """Get crypto price data from CSV files"""
+    """
+    Get crypto price history, optionally limited to ?start=YYYY-MM-DD&end=YYYY-MM-DD
+    
+    Served from the binary history file when one is present, else from the CSV.
+    """
     try:
         symbol = symbol.upper()
         csv_file = CLI_CHARTS_DATA / f"{symbol}.csv"
+        source = history_source(csv_file)
         
-        if not csv_file.exists():
+        if not symbol.isalnum() or not os.path.exists(source):
             return jsonify({"error": f"Data for {symbol} not found"}), 404
         
-        df = pd.read_csv(csv_file)
-        data = df.to_dict('records')
+        start, end = request.args.get('start'), request.args.get('end')
+        if start or end:
+            try:
+                start = datetime.strptime(start, '%Y-%m-%d').date() if start else None
+                end = datetime.strptime(end, '%Y-%m-%d').date() if end else None
+            except ValueError:
+                return jsonify({"error": "start and end must be YYYY-MM-DD"}), 400
+            with phase('load'):
+                data = read_history_range(csv_file, start, end).records()
+            return jsonify({"symbol": symbol, "data": data, "count": len(data)})
         
-        return jsonify({
-            "symbol": symbol,
-            "data": data,
-            "count": len(data)
-        })
+        def build(_):
+            with phase('load'):
+                data = read_history(csv_file).records()
+            with phase('serialize'):
+                return _compact_json({"symbol": symbol, "data": data, "count": len(data)})
+        
+        return _json_body(SHARED_CACHE.get(f"history_{symbol}", source, build))
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -504,10 +796,10 @@ def get_all_crypto_prices():
         crypto_data = {}
         csv_files = CLI_CHARTS_DATA.glob("*.csv")
         
-        for csv_file in csv_files:
-            symbol = csv_file.stem
-            df = pd.read_csv(csv_file)
-            crypto_data[symbol] = df.to_dict('records')
+        with phase('load'):
+            for csv_file in csv_files:
+                symbol = csv_file.stem
+                crypto_data[symbol] = read_history(csv_file).records()
         
         return jsonify({
             "data": crypto_data,
@@ -520,15 +812,11 @@ def get_all_crypto_prices():
 def get_crypto_pushes():
     """Get latest crypto push data"""
     try:
-        json_file = PUSHES_CRYPTO_DATA / "latest.json"
-        
-        if not json_file.exists():
+        if not CRYPTO_READER.exists():
             return jsonify({"error": "Crypto push data not found"}), 404
         
-        with open(json_file, 'r') as f:
-            data = json.load(f)
-        
-        return jsonify(data)
+        body = SHARED_CACHE.get("crypto", CRYPTO_READER.path, lambda _: _compact_json(CRYPTO_READER.read().to_dict()))
+        return _json_body(body)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -536,31 +824,220 @@ def get_crypto_pushes():
 def get_macro_pushes():
     """Get latest macro push data"""
     try:
-        json_file = PUSHES_MACRO_DATA / "latest.json"
-        
-        if not json_file.exists():
+        if not MACRO_READER.exists():
             return jsonify({"error": "Macro push data not found"}), 404
         
-        with open(json_file, 'r') as f:
-            data = json.load(f)
-        
-        return jsonify(data)
+        body = SHARED_CACHE.get("macro", MACRO_READER.path, lambda _: _compact_json(MACRO_READER.read().to_dict()))
+        return _json_body(body)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/calendar/economic', methods=['GET'])
 def get_economic_calendar():
-    """Get economic calendar data"""
+    """
+    Get economic calendar events
+    
+    Query parameters: from / to (YYYY-MM-DD, inclusive; without either, the
+    window from CALENDAR_DAYS_BACK days ago to CALENDAR_DAYS_AHEAD days ahead),
+    category, page (from 1), page_size (default 200, max 1000), notes=0 to omit
+    release notes.
+    """
     try:
-        json_file = CALENDAR_DATA / "economic_calendar.json"
+        date_from, date_to = request.args.get('from'), request.args.get('to')
+        for value in (date_from, date_to):
+            if value:
+                try:
+                    datetime.strptime(value, '%Y-%m-%d')
+                except ValueError:
+                    return jsonify({"error": "from and to must be YYYY-MM-DD"}), 400
+        if not date_from and not date_to:
+            today = datetime.now().date()
+            date_from = (today - timedelta(days=CALENDAR_DAYS_BACK)).isoformat()
+            date_to = (today + timedelta(days=CALENDAR_DAYS_AHEAD)).isoformat()
+        
+        category = request.args.get('category')
+        if category and category not in CATEGORIES:
+            return jsonify({"error": f"Unknown category {category}", "categories": CATEGORIES}), 400
+        
+        try:
+            page = max(1, int(request.args.get('page', 1)))
+            page_size = min(1000, max(1, int(request.args.get('page_size', 200))))
+        except ValueError:
+            return jsonify({"error": "page and page_size must be integers"}), 400
         
-        if not json_file.exists():
+        store = get_calendar_store()
+        with phase('load'):
+            events, total = store.query(
+                date_from=date_from,
+                date_to=date_to,
+                category=category,
+                limit=page_size,
+                offset=(page - 1) * page_size,
+                include_notes=request.args.get('notes', '1') != '0'
+            )
+        if not total and not store.count():
             return jsonify({"error": "Economic calendar data not found"}), 404
         
-        with open(json_file, 'r') as f:
-            data = json.load(f)
+        meta = store.meta()
+        return jsonify({
+            "updated_at": meta.get("updated_at"),
+            "events_count": total,
+            "new_events_count": int(meta.get("new_events_count", 0)),
+            "from": date_from,
+            "to": date_to,
+            "page": page,
+            "page_size": page_size,
+            "has_more": page * page_size < total,
+            "events": events
+        })
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/search', methods=['GET'])
+def search():
+    """
+    Full-text search over calendar release notes and news
+    
+    Query parameters: q (required), k (default 10, max 100), source (calendar or news).
+    """
+    try:
+        query = request.args.get('q', '').strip()
+        if not query:
+            return jsonify({"error": "q is required"}), 400
+        try:
+            k = min(100, max(1, int(request.args.get('k', 10))))
+        except ValueError:
+            return jsonify({"error": "k must be an integer"}), 400
+        source = request.args.get('source')
+        
+        start = time.perf_counter()
+        with phase('load'):
+            hits = get_search_index().search(query, k=k, source=source)
+        return jsonify({
+            "query": query,
+            "hits": hits,
+            "count": len(hits),
+            "took_ms": round((time.perf_counter() - start) * 1000, 2)
+        })
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/news/impact', methods=['GET'])
+def get_news_impact():
+    """
+    Forward price returns after news mentioning an asset (built by pushes/news_impact.py)
+    
+    Query parameters: asset (e.g. BTC), limit (default 100, max 1000) for both the
+    newest events and the newest buckets.
+    """
+    try:
+        if not IMPACT_READER.exists():
+            return jsonify({"error": "News impact table not found"}), 404
+        try:
+            limit = min(1000, max(1, int(request.args.get('limit', 100))))
+        except ValueError:
+            return jsonify({"error": "limit must be an integer"}), 400
+        
+        with phase('load'):
+            table = IMPACT_READER.read()
+        asset = request.args.get('asset', '').upper()
+        if asset and asset not in table["assets"]:
+            return jsonify({"error": f"No news impact data for {asset}", "assets": list(table["assets"])}), 404
         
-        return jsonify(data)
+        # Rows are stored newest first, so the first `limit` matches are the newest
+        def newest(rows):
+            matching = (row for row in rows if not asset or row["asset"] == asset)
+            return [row for _, row in zip(range(limit), matching)]
+        
+        return jsonify({
+            "updated_at": table["updated_at"],
+            "window_seconds": table["window_seconds"],
+            "horizons": table["horizons"],
+            "assets": {asset: table["assets"][asset]} if asset else table["assets"],
+            "buckets": newest(table["buckets"]),
+            "events": newest(table["events"])
+        })
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/derived', methods=['GET'])
+def list_derived_metrics():
+    """Derived metrics available (built by pushes/derived_metrics.py), with their inputs and date ranges"""
+    try:
+        if not DERIVED_READER.exists():
+            return jsonify({"error": "Derived metrics not found"}), 404
+        manifest = DERIVED_READER.read()
+        return jsonify({"updated_at": manifest["updated_at"], "metrics": manifest["metrics"]})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/derived/<name>', methods=['GET'])
+def get_derived_metric(name):
+    """
+    One derived metric series, optionally limited to ?start=YYYY-MM-DD&end=YYYY-MM-DD
+    
+    Served from the metric's binary history file, like the crypto price history.
+    """
+    try:
+        name = name.upper()
+        metrics = DERIVED_READER.read()["metrics"] if DERIVED_READER.exists() else {}
+        if name not in metrics:
+            return jsonify({"error": f"Derived metric {name} not found", "metrics": list(metrics)}), 404
+        
+        start, end = request.args.get('start'), request.args.get('end')
+        try:
+            start = datetime.strptime(start, '%Y-%m-%d').date() if start else None
+            end = datetime.strptime(end, '%Y-%m-%d').date() if end else None
+        except ValueError:
+            return jsonify({"error": "start and end must be YYYY-MM-DD"}), 400
+        
+        history = read_history_range(PUSHES_DERIVED_DATA / f"{name}.bin", start, end)
+        data = [{"date": date, "value": value} for date, value in zip(history.dates, history.prices)]
+        return jsonify({"metric": name, **metrics[name], "data": data, "count": len(data)})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/analytics/correlation', methods=['GET'])
+def get_correlation():
+    """
+    Rolling cross-asset correlation matrix, beta to SPY and annualized volatility
+    (built by pushes/risk_engine.py)
+    
+    Query parameters: series (comma-separated, default all) to select rows and
+    columns, history=1 to include the daily rolling beta and volatility.
+    """
+    try:
+        if not RISK_READER.exists():
+            return jsonify({"error": "Risk matrix not found"}), 404
+        risk = RISK_READER.read()
+        names = risk["series"]
+        
+        wanted = [name.strip().upper() for name in request.args.get('series', '').split(',') if name.strip()]
+        unknown = [name for name in wanted if name not in names]
+        if unknown:
+            return jsonify({"error": f"No risk data for {', '.join(unknown)}", "series": names}), 404
+        wanted = wanted or names
+        index = [names.index(name) for name in wanted]
+        
+        result = {
+            "updated_at": risk["updated_at"],
+            "as_of": risk["as_of"],
+            "window": risk["window"],
+            "benchmark": risk["benchmark"],
+            "series": wanted,
+            "returns": {name: risk["returns"][name] for name in wanted},
+            "correlation": [[risk["correlation"][i][j] for j in index] for i in index],
+            "beta": {name: risk["beta"].get(name) for name in wanted},
+            "volatility": {name: risk["volatility"].get(name) for name in wanted}
+        }
+        if request.args.get('history') in ('1', 'true'):
+            history = risk["history"]
+            result["history"] = {
+                "dates": history["dates"],
+                "beta": {name: history["beta"][name] for name in wanted},
+                "volatility": {name: history["volatility"][name] for name in wanted}
+            }
+        return jsonify(result)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -584,7 +1061,7 @@ def get_data_overview():
         overview["has_macro_pushes"] = (PUSHES_MACRO_DATA / "latest.json").exists()
         
         # Check calendar data
-        overview["has_economic_calendar"] = (CALENDAR_DATA / "economic_calendar.json").exists()
+        overview["has_economic_calendar"] = get_calendar_store().count() > 0
         
         return jsonify(overview)
     except Exception as e:
@@ -592,120 +1069,36 @@ def get_data_overview():
 
 @app.route('/api/stocks/watchlist', methods=['GET'])
 def get_stock_watchlist():
-    """Get stock data using existing macro data API"""
+    """Get watchlist quotes from the in-memory quote engine"""
     try:
         symbols_param = request.args.get('symbols', 'SPY,QQQ,VIX')
-        symbols = [s.strip().upper() for s in symbols_param.split(',')]
+        requested = list(dict.fromkeys(s.strip().upper() for s in symbols_param.split(',') if s.strip()))
+        symbols = [s for s in requested if valid_symbol(s)]
+        invalid = [s for s in requested if not valid_symbol(s)]
+        if len(symbols) > WATCHLIST_MAX_REQUEST:
+            return jsonify({"error": f"At most {WATCHLIST_MAX_REQUEST} symbols per request"}), 400
         
-        # Get macro data from existing API
-        try:
-            macro_file = PUSHES_MACRO_DATA / "latest.json"
-            if macro_file.exists():
-                with open(macro_file, 'r') as f:
-                    macro_data = json.load(f)
-                
-                stocks_data = []
-                
-                # Map symbols to macro data
-                symbol_mapping = {
-                    'SPY': 'sp500',
-                    'QQQ': 'nasdaq100', 
-                    'VIX': 'vix',
-                    'NVDA': 'nvda',
-                    'AAPL': 'aapl',
-                    'AMZN': 'amzn',
-                    'MSFT': 'msft',
-                    'GOOGL': 'googl',
-                    'TSLA': 'tsla',
-                    'META': 'meta'
-                }
-                
-                # Get market indices data
-                market_indices = macro_data.get('market_indices', {})
-                
-                for symbol in symbols:
-                    mapped_key = symbol_mapping.get(symbol)
-                    
-                    if mapped_key and mapped_key in market_indices:
-                        data = market_indices[mapped_key]
-                        stocks_data.append({
-                            'symbol': symbol,
-                            'price': round(float(data.get('price', 0)), 2),
-                            'change': round(float(data.get('change', 0)), 2),
-                            'changePercent': round(float(data.get('change_percent', 0)), 2),
-                            'volume': data.get('volume'),
-                            'source': 'macro_api'
-                        })
-                    else:
-                        # For individual stocks not in macro data, use representative ETF data with symbol mapping
-                        # This is a simplified approach - in production you'd want actual stock data
-                        if symbol in ['NVDA', 'AAPL', 'AMZN', 'MSFT', 'GOOGL', 'TSLA', 'META']:
-                            # Use QQQ as a proxy for tech stocks (simplified approach)
-                            if 'nasdaq100' in market_indices:
-                                qqq_data = market_indices['nasdaq100']
-                                # Add some variation based on stock
-                                variation = hash(symbol) % 20 - 10  # -10 to +10 variation
-                                base_price = qqq_data.get('price', 550)
-                                
-                                # Simplified stock price mapping (this is just for demo)
-                                price_multipliers = {
-                                    'NVDA': 0.28,  # ~157 when QQQ is ~550
-                                    'AAPL': 0.39,  # ~212 when QQQ is ~550  
-                                    'AMZN': 0.40,  # ~220 when QQQ is ~550
-                                    'MSFT': 0.89,  # ~490 when QQQ is ~550
-                                    'GOOGL': 0.33, # ~180 when QQQ is ~550
-                                    'TSLA': 0.57,  # ~315 when QQQ is ~550
-                                    'META': 1.30   # ~715 when QQQ is ~550
-                                }
-                                
-                                multiplier = price_multipliers.get(symbol, 0.5)
-                                stock_price = base_price * multiplier
-                                
-                                stocks_data.append({
-                                    'symbol': symbol,
-                                    'price': round(stock_price, 2),
-                                    'change': round(float(qqq_data.get('change', 0)) * multiplier, 2),
-                                    'changePercent': round(float(qqq_data.get('change_percent', 0)), 2),
-                                    'volume': None,
-                                    'source': 'derived_from_qqq'
-                                })
-                            else:
-                                # Fallback if no QQQ data
-                                stocks_data.append({
-                                    'symbol': symbol,
-                                    'price': 100.00,
-                                    'change': 0.00,
-                                    'changePercent': 0.00,
-                                    'volume': None,
-                                    'source': 'fallback'
-                                })
-                        else:
-                            # Unknown symbol
-                            stocks_data.append({
-                                'symbol': symbol,
-                                'price': 100.00,
-                                'change': 0.00,
-                                'changePercent': 0.00,
-                                'volume': None,
-                                'source': 'unknown'
-                            })
-                
-                return jsonify({
-                    'stocks': stocks_data,
-                    'timestamp': datetime.now().isoformat(),
-                    'symbols_requested': symbols,
-                    'total_symbols': len(stocks_data),
-                    'data_source': 'macro_api'
-                })
-            else:
-                return jsonify({"error": "Macro data not available"}), 404
-                
-        except Exception as e:
-            print(f"Error reading macro data: {e}")
-            return jsonify({"error": f"Failed to read macro data: {str(e)}"}), 500
+        QUOTE_ENGINE.start(seed=load_macro_snapshot)
+        quotes, pending, not_tracked = QUOTE_ENGINE.lookup(symbols)
+        
+        now = now_ms()
+        stocks_data = [quote.to_dict(now) for quote in quotes]
+        
+        return jsonify({
+            'stocks': stocks_data,
+            'pending': pending,  # tracked now, quoted after the next refresh
+            'not_tracked': not_tracked,  # the universe is full (WATCHLIST_MAX_SYMBOLS); retry later
+            'invalid': invalid,
+            'timestamp': datetime.now().isoformat(),
+            'symbols_requested': symbols,
+            'total_symbols': len(stocks_data),
+            'data_source': 'quote_engine'
+        })
         
     except Exception as e:
         return jsonify({"error": f"Stock watchlist error: {str(e)}"}), 500
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5001) 
\ No newline at end of file
+    # Development server only; production runs through gunicorn (see wsgi.py / gunicorn.conf.py)
+    debug = os.getenv('FLASK_DEBUG', '1') == '1'
+    app.run(debug=debug, host='0.0.0.0', port=int(os.getenv('PORT', '5001'))) 
\ No newline at end of file
@@ -0,0 +1,306 @@
+"""
+Server-side chat conversations keyed by conversation id, so /api/chat can
+answer follow-ups without the client resending the transcript.
+
+Conversations live in SQLite (under /dev/shm when available) so every server
+worker sees the same history; each worker keeps recently used ones in an
+in-memory LRU bounded by total bytes and count. Conversations idle for longer
+than the TTL are dropped. When a conversation's history outgrows the token
+budget, its oldest turns are folded into a rolling summary, so the prompt
+stays bounded however long the conversation runs.
+"""
+
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from pushes.metrics import REGISTRY
+
+TTL_SECONDS = int(os.getenv('CHAT_SESSION_TTL', '3600'))
+MAX_MEMORY_BYTES = int(os.getenv('CHAT_SESSION_MAX_BYTES', str(32 * 1024 * 1024)))
+MAX_SESSIONS = int(os.getenv('CHAT_SESSION_MAX_SESSIONS', '5000'))
+TOKEN_BUDGET = int(os.getenv('CHAT_HISTORY_TOKEN_BUDGET', '1500'))
+# The most recent messages are always kept verbatim
+KEEP_RECENT = 4
+# Rough per-turn cost of the dict, its strings and the list slot
+TURN_OVERHEAD_BYTES = 120
+SWEEP_INTERVAL = 60
+SUMMARY_HEADER = 'Summary of the earlier conversation:\n'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    summary TEXT NOT NULL,
+    turns TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    version INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_updated ON sessions (updated_at);
+"""
+
+SESSIONS_CACHED = REGISTRY.gauge('marketinfo_chat_sessions_cached', 'Chat sessions held in this worker\'s memory')
+SESSION_MEMORY = REGISTRY.gauge('marketinfo_chat_session_memory_bytes', 'Memory held by cached chat sessions')
+SESSION_BYTES = REGISTRY.histogram('marketinfo_chat_session_bytes', 'Size of a chat session after each turn', (),
+                                   buckets=(1024, 4096, 16384, 65536, 262144, 1048576))
+SESSION_EVICTIONS = REGISTRY.counter('marketinfo_chat_session_evictions_total', 'Chat sessions evicted', ('reason',))
+SESSION_SUMMARIES = REGISTRY.counter('marketinfo_chat_session_summaries_total', 'Old turns folded into a summary')
+
+
+def estimate_tokens(text):
+    """About four characters per token for English text"""
+    return (len(text) + 3) // 4
+
+
+def _default_db_path():
+    base = '/dev/shm' if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK) else tempfile.gettempdir()
+    return os.path.join(base, f"marketinfo-chat-{os.getuid() if hasattr(os, 'getuid') else 'user'}.db")
+
+
+@dataclass(slots=True)
+class ChatSession:
+    id: str
+    turns: list = field(default_factory=list)  # {"role": "user" | "assistant", "content": str}
+    summary: str = ''
+    updated_at: float = 0.0
+    version: int = 0
+
+    def nbytes(self):
+        return (len(self.id) + len(self.summary.encode())
+                + sum(len(turn['content'].encode()) + TURN_OVERHEAD_BYTES for turn in self.turns))
+
+    def tokens(self):
+        summary = estimate_tokens(SUMMARY_HEADER + self.summary) if self.summary else 0
+        return summary + sum(estimate_tokens(turn['content']) for turn in self.turns)
+
+    def messages(self):
+        """The history as chat messages, summary first"""
+        messages = []
+        if self.summary:
+            messages.append({'role': 'system', 'content': SUMMARY_HEADER + self.summary})
+        messages.extend({'role': turn['role'], 'content': turn['content']} for turn in self.turns)
+        return messages
+
+
+def extractive_summary(summary, turns, budget_tokens):
+    """
+    Fold turns into the summary without a model call: one line per turn with
+    its first sentence, dropping the oldest lines beyond the budget
+    """
+    lines = summary.split('\n') if summary else []
+    for turn in turns:
+        text = ' '.join(turn['content'].split())
+        first = text.split('. ')[0][:200]
+        lines.append(f"{'User' if turn['role'] == 'user' else 'Assistant'}: {first}")
+    while len(lines) > 1 and estimate_tokens('\n'.join(lines)) > budget_tokens:
+        lines.pop(0)
+    return '\n'.join(lines)
+
+
+def llm_summarizer(client, model):
+    """A summarizer that asks the chat model, falling back to extractive_summary on errors"""
+    def summarize(summary, turns, budget_tokens):
+        transcript = '\n'.join(f"{turn['role']}: {turn['content']}" for turn in turns)
+        try:
+            completion = client.chat.completions.create(
+                model=model,
+                messages=[
+                    {'role': 'system', 'content': 'Condense this conversation about markets into a few factual '
+                                                  'sentences: the questions asked, the figures given and any '
+                                                  'conclusions. Keep numbers and dates exact.'},
+                    {'role': 'user', 'content': f"Summary so far:\n{summary or '(none)'}\n\nNew turns:\n{transcript}"}
+                ],
+                temperature=0,
+                max_tokens=budget_tokens
+            )
+            return completion.choices[0].message.content.strip()
+        except Exception as e:
+            print(f"Chat summary via model failed, using extractive summary: {e}")
+            return extractive_summary(summary, turns, budget_tokens)
+    return summarize
+
+
+class ChatSessionStore:
+    """
+    Conversation histories shared by all workers, with a per-worker LRU cache
+
+    Args:
+        path (str): SQLite file (default under /dev/shm, or CHAT_SESSION_DB)
+        ttl (float): Seconds of inactivity after which a conversation is dropped
+        max_bytes (int): Memory budget of this worker's cache
+        max_sessions (int): Most conversations cached in this worker
+        token_budget (int): Largest history (summary plus turns) handed to the model
+        summarizer (callable): (summary, turns, budget_tokens) -> new summary
+    """
+
+    def __init__(self, path=None, ttl=TTL_SECONDS, max_bytes=MAX_MEMORY_BYTES, max_sessions=MAX_SESSIONS,
+                 token_budget=TOKEN_BUDGET, summarizer=extractive_summary, clock=time.time):
+        self.path = os.fspath(path or os.getenv('CHAT_SESSION_DB') or _default_db_path())
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.max_sessions = max_sessions
+        self.token_budget = token_budget
+        self.summarizer = summarizer
+        self.clock = clock
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()  # id -> (ChatSession, bytes), least recently used first
+        self._bytes = 0
+        self._last_sweep = 0.0
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with self._connection() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def new_id():
+        return uuid.uuid4().hex
+
+    def _remember(self, session):
+        """Cache a session as most recently used, evicting the least recently used beyond the budgets"""
+        size = session.nbytes()
+        with self._lock:
+            old = self._cache.pop(session.id, None)
+            if old:
+                self._bytes -= old[1]
+            self._cache[session.id] = (session, size)
+            self._bytes += size
+            while len(self._cache) > 1 and (self._bytes > self.max_bytes or len(self._cache) > self.max_sessions):
+                _, (_, evicted_size) = self._cache.popitem(last=False)
+                self._bytes -= evicted_size
+                SESSION_EVICTIONS.inc(reason='lru')
+            self._report()
+
+    def _forget(self, conversation_id, reason=None):
+        with self._lock:
+            old = self._cache.pop(conversation_id, None)
+            if old:
+                self._bytes -= old[1]
+                if reason:
+                    SESSION_EVICTIONS.inc(reason=reason)
+                self._report()
+
+    def _report(self):
+        SESSIONS_CACHED.set(len(self._cache))
+        SESSION_MEMORY.set(self._bytes)
+
+    def stats(self):
+        with self._lock:
+            return {'cached_sessions': len(self._cache), 'cached_bytes': self._bytes}
+
+    def sweep(self, force=False):
+        """Drop conversations idle for longer than the TTL (at most once a minute unless forced)"""
+        now = self.clock()
+        if not force and now - self._last_sweep < SWEEP_INTERVAL:
+            return 0
+        self._last_sweep = now
+        cutoff = now - self.ttl
+        with self._lock:
+            expired = [cid for cid, (session, _) in self._cache.items() if session.updated_at < cutoff]
+        for cid in expired:
+            self._forget(cid, 'ttl')
+        with self._connection() as conn:
+            conn.execute('DELETE FROM sessions WHERE updated_at < ?', (cutoff,))
+        return len(expired)
+
+    def get(self, conversation_id):
+        """
+        The conversation, or None if it is unknown or expired
+
+        The cached copy is used when no other worker has changed the conversation since.
+        """
+        self.sweep()
+        conn = self._connection()
+        row = conn.execute('SELECT version, updated_at FROM sessions WHERE id = ?', (conversation_id,)).fetchone()
+        if row is None or row[1] < self.clock() - self.ttl:
+            self._forget(conversation_id, 'ttl' if row else None)
+            return None
+        with self._lock:
+            cached = self._cache.get(conversation_id)
+            if cached and cached[0].version == row[0]:
+                self._cache.move_to_end(conversation_id)
+                return cached[0]
+        row = conn.execute('SELECT summary, turns, updated_at, version FROM sessions WHERE id = ?',
+                           (conversation_id,)).fetchone()
+        if row is None:
+            return None
+        session = ChatSession(conversation_id, json.loads(row[1]), row[0], row[2], row[3])
+        self._remember(session)
+        return session
+
+    def history(self, conversation_id):
+        """Chat messages to put before the new user message ([] for a new conversation)"""
+        session = self.get(conversation_id)
+        return session.messages() if session else []
+
+    def _compact(self, session):
+        """Fold the oldest turns into the summary until the history fits the token budget"""
+        if session.tokens() <= self.token_budget or len(session.turns) <= KEEP_RECENT:
+            return
+        # Fold the oldest messages first, leaving room for the summary and at least KEEP_RECENT messages
+        summary_budget = max(64, self.token_budget // 4)
+        tokens = sum(estimate_tokens(turn['content']) for turn in session.turns)
+        fold = 0
+        while tokens > self.token_budget - summary_budget and len(session.turns) - fold > KEEP_RECENT:
+            tokens -= estimate_tokens(session.turns[fold]['content'])
+            fold += 1
+        session.summary = self.summarizer(session.summary, session.turns[:fold],
+                                          summary_budget - estimate_tokens(SUMMARY_HEADER))
+        session.turns = session.turns[fold:]
+        SESSION_SUMMARIES.inc()
+
+    def append(self, conversation_id, user_message, assistant_message):
+        """
+        Record one exchange
+
+        Returns:
+            ChatSession: The updated conversation
+        """
+        conn = self._connection()
+        for _ in range(3):
+            session = self.get(conversation_id) or ChatSession(conversation_id)
+            base_version = session.version
+            updated = ChatSession(conversation_id, session.turns + [
+                {'role': 'user', 'content': user_message},
+                {'role': 'assistant', 'content': assistant_message}
+            ], session.summary, self.clock(), base_version + 1)
+            self._compact(updated)
+            with conn:
+                if base_version == 0:
+                    # New, or expired but not swept yet: then the old row is replaced, and its
+                    # version keeps counting so no worker takes a cached copy of it for the new one
+                    cursor = conn.execute(
+                        'INSERT INTO sessions (id, summary, turns, updated_at, version) VALUES (?, ?, ?, ?, ?) '
+                        'ON CONFLICT(id) DO UPDATE SET summary = excluded.summary, turns = excluded.turns, '
+                        'updated_at = excluded.updated_at, version = sessions.version + 1 '
+                        'WHERE sessions.updated_at < ?',
+                        (updated.id, updated.summary, json.dumps(updated.turns), updated.updated_at, updated.version,
+                         updated.updated_at - self.ttl))
+                    if cursor.rowcount:
+                        updated.version = conn.execute('SELECT version FROM sessions WHERE id = ?',
+                                                       (updated.id,)).fetchone()[0]
+                else:
+                    cursor = conn.execute(
+                        'UPDATE sessions SET summary = ?, turns = ?, updated_at = ?, version = ? WHERE id = ? AND version = ?',
+                        (updated.summary, json.dumps(updated.turns), updated.updated_at, updated.version,
+                         updated.id, base_version))
+            if cursor.rowcount:
+                self._remember(updated)
+                SESSION_BYTES.observe(updated.nbytes())
+                return updated
+            # Another worker wrote this conversation in between: start again from its version
+            self._forget(conversation_id)
+        raise RuntimeError(f"Conversation {conversation_id} is being updated concurrently")
@@ -0,0 +1,359 @@
+"""
+Tool-calling chat: rather than pasting every dataset into the system prompt,
+the model gets a few functions (price statistics, indicator lookups, calendar
+search) and asks for what the question needs. The backend answers from its
+history readers, snapshots and indexes, so the prompt stays the same size as
+the data grows.
+
+The loop speaks the OpenAI-compatible chat.completions tool-call protocol
+that Groq implements. ScriptedLLM plays the model from a script, for running
+the loop without a provider.
+"""
+
+import json
+import math
+import statistics
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+from typing import Callable
+
+from pushes.metrics import REGISTRY
+from profiling import phase
+
+# Cap on one tool result sent back to the model
+MAX_RESULT_CHARS = 4000
+MAX_ROUNDS = 4
+
+TOOL_CALLS = REGISTRY.counter('marketinfo_chat_tool_calls_total', 'Chat tool calls', ('tool', 'status'))
+
+RANGES = {'7d': 7, '30d': 30, '90d': 90, '1y': 365, 'ytd': None, 'all': None}
+
+SYSTEM_PROMPT = """You are MarketInfo AI, the assistant of the MarketInfo dashboard (crypto, equities, rates, economic data).
+Today is {today}.
+
+Use the tools to look up the data a question needs; do not guess numbers. Call get_price_stats for prices,
+returns and volatility of an asset or derived series, get_indicator for the latest value of an economic
+indicator, index or sentiment gauge, and search_calendar for economic releases. Several tools may be called
+at once. If a tool returns an error, correct the arguments or say the data is unavailable.
+
+Answer from the tool results only, citing exact values and dates. Keep answers under 250 words, direct and actionable."""
+
+
+class ToolError(ValueError):
+    """Bad tool arguments; reported back to the model rather than raised to the client"""
+
+
+@dataclass(frozen=True)
+class ChatTool:
+    name: str
+    description: str
+    parameters: dict  # JSON schema of the arguments
+    handler: Callable
+
+    def spec(self):
+        return {'type': 'function', 'function': {
+            'name': self.name, 'description': self.description, 'parameters': self.parameters
+        }}
+
+
+def _key(name):
+    return ''.join(c if c.isalnum() else '_' for c in name.strip().lower())
+
+
+def _parse_date(value, field):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        raise ToolError(f"{field} must be YYYY-MM-DD, got {value!r}") from None
+
+
+def _round(value, digits=4):
+    return None if value is None or math.isnan(value) else round(value, digits)
+
+
+class ChatToolbox:
+    """
+    The tools offered to the model, answered from the backend's data
+
+    Args:
+        price_history (callable): (name, start date, end date) -> PriceHistory, or None if unknown
+        last_date (callable): name -> date of the newest point, or None if unknown or empty
+        series_names (callable): () -> names price_history knows
+        snapshots (callable): () -> (CryptoSnapshot or None, MacroSnapshot or None)
+        calendar_store (callable): () -> CalendarStore
+        search_index (callable): () -> SearchIndex
+        today (callable): () -> date
+    """
+
+    def __init__(self, price_history, last_date, series_names, snapshots, calendar_store, search_index,
+                 today=date.today):
+        self.price_history = price_history
+        self.last_date = last_date
+        self.series_names = series_names
+        self.snapshots = snapshots
+        self.calendar_store = calendar_store
+        self.search_index = search_index
+        self.today = today
+        self.tools = {tool.name: tool for tool in (
+            ChatTool('get_price_stats',
+                     'Price statistics for an asset (BTC, ETH, SPY, GOLD...) or derived series (CPI_YOY, ETH_BTC...) '
+                     'over a range: first, last, change, min, max, mean, median and annualized volatility.',
+                     {'type': 'object', 'properties': {
+                         'symbol': {'type': 'string', 'description': 'Asset or series name, e.g. BTC'},
+                         'range': {'type': 'string', 'enum': list(RANGES), 'description': 'Lookback, default 30d'}
+                     }, 'required': ['symbol']},
+                     self.get_price_stats),
+            ChatTool('get_indicator',
+                     'Latest value of an indicator: interest rates (us10yr, fed_funds), consumer data (cpi, '
+                     'retail_sales, unemployment_rate), indices (sp500, nasdaq100, vix), fear_greed, a crypto price '
+                     '(BTC) or a derived metric (CPI_YOY, REAL_RATE_10Y, BTC_SPY_CORR_30D).',
+                     {'type': 'object', 'properties': {
+                         'name': {'type': 'string', 'description': 'Indicator name'}
+                     }, 'required': ['name']},
+                     self.get_indicator),
+            ChatTool('search_calendar',
+                     'Economic calendar releases matching a text query and/or a date range, with their notes.',
+                     {'type': 'object', 'properties': {
+                         'query': {'type': 'string', 'description': 'Words to search for, e.g. "CPI inflation"'},
+                         'dates': {'type': 'string', 'description': 'YYYY-MM-DD..YYYY-MM-DD, either side optional'},
+                         'limit': {'type': 'integer', 'description': 'Maximum releases, default 10, at most 25'}
+                     }},
+                     self.search_calendar)
+        )}
+
+    def specs(self):
+        return [tool.spec() for tool in self.tools.values()]
+
+    def system_prompt(self):
+        return SYSTEM_PROMPT.format(today=self.today().isoformat())
+
+    def call(self, name, arguments):
+        """
+        Run one tool call from the model
+
+        Args:
+            name (str): Tool name
+            arguments (str or dict): JSON-encoded or decoded arguments
+
+        Returns:
+            dict: The result, or {"error": ...} for unknown tools and bad arguments
+        """
+        tool = self.tools.get(name)
+        if tool is None:
+            TOOL_CALLS.inc(tool='unknown', status='error')
+            return {'error': f"Unknown tool {name}; available: {', '.join(self.tools)}"}
+        try:
+            args = json.loads(arguments or '{}') if isinstance(arguments, str) else dict(arguments or {})
+            if not isinstance(args, dict):
+                raise ToolError('arguments must be a JSON object')
+            result = tool.handler(**args)
+            TOOL_CALLS.inc(tool=name, status='ok')
+            return result
+        except (ToolError, TypeError, ValueError) as e:
+            TOOL_CALLS.inc(tool=name, status='error')
+            return {'error': str(e)}
+
+    def get_price_stats(self, symbol, range='30d'):
+        if range not in RANGES:
+            raise ToolError(f"range must be one of {', '.join(RANGES)}")
+        symbol = str(symbol).strip().upper()
+        # Ranges count back from the latest point, which may lag today for slow series
+        end = self.last_date(symbol)
+        if end is None:
+            if self.price_history(symbol, None, None) is None:
+                raise ToolError(f"No history for {symbol}; available: {', '.join(self.series_names())}")
+            return {'symbol': symbol, 'range': range, 'points': 0}
+
+        if range == 'ytd':
+            start = date(end.year, 1, 1)
+        else:
+            start = None if RANGES[range] is None else end - timedelta(days=RANGES[range])
+        history = self.price_history(symbol, start, end)
+        points = [(d, p) for d, p in zip(history.dates, history.prices) if not math.isnan(p)]
+        if not points:
+            return {'symbol': symbol, 'range': range, 'points': 0}
+        prices = [p for _, p in points]
+
+        first_date = datetime.strptime(points[0][0], '%d/%m/%Y').date()
+        last_date = datetime.strptime(points[-1][0], '%d/%m/%Y').date()
+        result = {
+            'symbol': symbol,
+            'range': range,
+            'start': first_date.isoformat(),
+            'end': last_date.isoformat(),
+            'points': len(prices),
+            'first': _round(prices[0]),
+            'last': _round(prices[-1]),
+            'change_percent': _round((prices[-1] / prices[0] - 1) * 100, 2) if prices[0] else None,
+            'min': _round(min(prices)),
+            'max': _round(max(prices)),
+            'mean': _round(statistics.fmean(prices)),
+            'median': _round(statistics.median(prices))
+        }
+        span_years = (last_date - first_date).days / 365.25
+        if len(prices) > 2 and span_years > 0 and min(prices) > 0:
+            returns = [math.log(b / a) for a, b in zip(prices, prices[1:])]
+            per_year = (len(prices) - 1) / span_years
+            result['annualized_volatility_percent'] = _round(statistics.stdev(returns) * math.sqrt(per_year) * 100, 2)
+        return result
+
+    def get_indicator(self, name):
+        crypto, macro = self.snapshots()
+        key = _key(str(name))
+        aliases = {'spy': 'sp500', 'spx': 'sp500', 'qqq': 'nasdaq100', 'ndx': 'nasdaq100',
+                   'us10y': 'us10yr', 'unemployment': 'unemployment_rate', 'fear_and_greed': 'fear_greed'}
+        key = aliases.get(key, key)
+
+        sections = []
+        if macro:
+            sections += [('market_index', macro.market_indices), ('interest_rate', macro.interest_rates),
+                         ('consumer_data', macro.consumer_data)]
+        if crypto:
+            sections.append(('crypto_price', {s.lower(): p for s, p in crypto.crypto_prices.items()}))
+        for kind, records in sections:
+            record = records.get(key)
+            if record is not None:
+                return {'name': key, 'kind': kind, **record.to_dict()}
+        if key == 'fear_greed' and crypto and crypto.fear_greed_index:
+            return {'name': key, 'kind': 'sentiment', **crypto.fear_greed_index}
+
+        # Derived metrics and stored series: latest point of the history
+        end = self.today()
+        history = self.price_history(str(name).strip().upper(), end - timedelta(days=400), end)
+        if history is not None and len(history):
+            return {'name': str(name).strip().upper(), 'kind': 'series',
+                    'value': _round(history.prices[-1]),
+                    'date': datetime.strptime(history.dates[-1], '%d/%m/%Y').date().isoformat()}
+
+        available = sorted({k for _, records in sections for k in records} | {'fear_greed'})
+        raise ToolError(f"Unknown indicator {name}; available: {', '.join(available + self.series_names())}")
+
+    def search_calendar(self, query=None, dates=None, limit=10):
+        try:
+            limit = max(1, min(25, int(limit)))
+        except (TypeError, ValueError):
+            raise ToolError('limit must be an integer') from None
+        date_from = date_to = None
+        if dates:
+            lo, sep, hi = str(dates).strip().partition('..')
+            if not sep:
+                hi = lo  # a single day
+            date_from = _parse_date(lo, 'dates').isoformat() if lo else None
+            date_to = _parse_date(hi, 'dates').isoformat() if hi else None
+
+        if query:
+            # Over-fetch from the index, then keep the hits inside the date range
+            hits = self.search_index().search(str(query), k=limit * 5 if dates else limit, source='calendar')
+            releases = [
+                {'date': hit['date'][:10], 'name': hit['title'], 'snippet': hit['snippet'], 'link': hit['url']}
+                for hit in hits
+                if (not date_from or hit['date'][:10] >= date_from) and (not date_to or hit['date'][:10] <= date_to)
+            ][:limit]
+            return {'query': query, 'dates': dates, 'count': len(releases), 'releases': releases}
+
+        events, total = self.calendar_store().query(date_from, date_to, limit=limit, include_notes=False)
+        releases = [{'date': e['date'], 'name': e['name'], 'category': e['category'], 'link': e['link']}
+                    for e in events]
+        return {'dates': dates, 'count': len(releases), 'total': total, 'releases': releases}
+
+
+@dataclass
+class ChatResult:
+    content: str
+    tool_calls: list  # {"name", "arguments", "ok", "ms"} in call order
+    rounds: int
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+
+def _encode(result):
+    text = json.dumps(result, default=str, separators=(',', ':'))
+    if len(text) > MAX_RESULT_CHARS:
+        text = text[:MAX_RESULT_CHARS] + '…(truncated)'
+    return text
+
+
+def run_tool_chat(client, model, messages, toolbox, max_rounds=MAX_ROUNDS, **create_kwargs):
+    """
+    Let the model call tools until it answers
+
+    Args:
+        client: OpenAI-compatible client (Groq, ScriptedLLM)
+        model (str): Model name
+        messages (list): Chat messages, system prompt first; extended in place
+        toolbox (ChatToolbox): Tools offered to the model
+        max_rounds (int): Completions allowed; the last one may not call tools
+
+    Returns:
+        ChatResult
+    """
+    trace, usage = [], [0, 0]
+    for round_no in range(1, max(1, max_rounds) + 1):
+        last = round_no >= max_rounds
+        completion = client.chat.completions.create(
+            model=model, messages=messages, tools=toolbox.specs(),
+            tool_choice='none' if last else 'auto', **create_kwargs
+        )
+        if getattr(completion, 'usage', None):
+            usage[0] += completion.usage.prompt_tokens or 0
+            usage[1] += completion.usage.completion_tokens or 0
+        message = completion.choices[0].message
+        calls = getattr(message, 'tool_calls', None) or []
+        if not calls or last:
+            return ChatResult(message.content or '', trace, round_no, *usage)
+
+        messages.append({'role': 'assistant', 'content': message.content or '', 'tool_calls': [
+            {'id': call.id, 'type': 'function',
+             'function': {'name': call.function.name, 'arguments': call.function.arguments}}
+            for call in calls
+        ]})
+        for call in calls:
+            start = time.perf_counter()
+            with phase('load'):
+                result = toolbox.call(call.function.name, call.function.arguments)
+            trace.append({'name': call.function.name, 'arguments': call.function.arguments,
+                          'ok': 'error' not in result, 'ms': round((time.perf_counter() - start) * 1000, 1)})
+            messages.append({'role': 'tool', 'tool_call_id': call.id, 'content': _encode(result)})
+
+
+class ScriptedLLM:
+    """
+    A fake chat.completions client that replays a script
+
+    Each step is a final answer (str), a list of (tool name, arguments dict)
+    calls, or a callable(messages) returning one of those. Requests are kept
+    in `requests`; token usage is estimated at four characters per token.
+    """
+
+    model = 'scripted'
+
+    def __init__(self, steps):
+        self.steps = list(steps)
+        self.requests = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, model, messages, **kwargs):
+        self.requests.append({'model': model, 'messages': [dict(m) for m in messages], **kwargs})
+        if not self.steps:
+            raise RuntimeError('ScriptedLLM: script exhausted')
+        step = self.steps.pop(0)
+        if callable(step):
+            step = step(messages)
+        if kwargs.get('tool_choice') == 'none' and not isinstance(step, str):
+            step = 'Unable to finish within the tool-call budget.'
+
+        if isinstance(step, str):
+            message = SimpleNamespace(role='assistant', content=step, tool_calls=None)
+        else:
+            n = len(self.requests)
+            message = SimpleNamespace(role='assistant', content='', tool_calls=[
+                SimpleNamespace(id=f"call_{n}_{i}", type='function',
+                                function=SimpleNamespace(name=name, arguments=json.dumps(args)))
+                for i, (name, args) in enumerate(step)
+            ])
+        prompt_chars = len(json.dumps(messages, default=str)) + len(json.dumps(kwargs.get('tools', [])))
+        usage = SimpleNamespace(prompt_tokens=prompt_chars // 4,
+                                completion_tokens=len(json.dumps(message.content or message.tool_calls, default=str)) // 4)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason='stop')], usage=usage)
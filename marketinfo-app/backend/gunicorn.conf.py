@@ -0,0 +1,25 @@
+"""
+Gunicorn settings for the MarketInfo backend
+
+Every value can be overridden from the environment:
+    WEB_BIND      address to listen on (default 0.0.0.0:5001)
+    WEB_WORKERS   worker processes (default 2 x CPUs + 1)
+    WEB_THREADS   threads per worker (default 4)
+    WEB_TIMEOUT   worker timeout in seconds (default 60; chat calls can be slow)
+"""
+
+import multiprocessing
+import os
+
+bind = os.getenv('WEB_BIND', '0.0.0.0:5001')
+workers = int(os.getenv('WEB_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv('WEB_THREADS', '4'))
+worker_class = 'gthread'
+timeout = int(os.getenv('WEB_TIMEOUT', '60'))
+keepalive = 5
+
+# Import the app (and pandas/groq) once in the master before forking
+preload_app = True
+
+accesslog = os.getenv('WEB_ACCESS_LOG', '-')
+errorlog = '-'
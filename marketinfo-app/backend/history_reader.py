@@ -0,0 +1,261 @@
+"""
+Price history reader for the cli-charts `date,price` CSV files. Files of a few
+dozen to a few thousand rows are parsed with the stdlib csv module straight into
+typed columns; pandas is only used above the file size where
+benchmarks/bench_history_reader.py measured it to be faster. Each file is parsed
+once per version (inode, mtime, size).
+
+When an up-to-date binary history file (pushes/history_store.py) sits beside
+the CSV, it is memory-mapped instead and date ranges are found by binary search.
+"""
+
+import csv
+import io
+import json
+import os
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+
+from pushes.snapshot_io import SnapshotReader
+
+CALIBRATION_FILE = Path(__file__).with_name('history_calibration.json')
+
+
+def _date_key(value):
+    """YYYYMMDD for a DD/MM/YYYY date string, so plain string order is date order"""
+    if len(value) == 10 and value[2] == '/' and value[5] == '/':
+        return value[6:10] + value[3:5] + value[0:2]
+    return datetime.strptime(value, '%d/%m/%Y').strftime('%Y%m%d')  # unpadded day or month
+
+
+@dataclass(slots=True)
+class PriceHistory:
+    dates: list      # date strings as written by cli-charts (DD/MM/YYYY)
+    prices: array    # array('d'), one float per date
+    _keys: list = field(default=None, init=False, repr=False, compare=False)
+    _ascending: bool = field(default=False, init=False, repr=False, compare=False)
+
+    def __len__(self):
+        return len(self.prices)
+
+    def range(self, start=None, end=None):
+        """
+        Rows with start <= date <= end (datetime.date bounds, None = open)
+
+        Compares YYYYMMDD keys built once per parsed file, and bisects them when
+        the file is in date order (as cli-charts writes it).
+        """
+        if self._keys is None:
+            self._keys = [_date_key(d) for d in self.dates]
+            self._ascending = all(a <= b for a, b in zip(self._keys, self._keys[1:]))
+        low = None if start is None else start.strftime('%Y%m%d')
+        high = None if end is None else end.strftime('%Y%m%d')
+        keys = self._keys
+        if self._ascending:
+            lo = 0 if low is None else bisect_left(keys, low)
+            hi = len(keys) if high is None else bisect_right(keys, high)
+            return PriceHistory(self.dates[lo:hi], self.prices[lo:hi])
+        keep = [i for i, key in enumerate(keys) if (low is None or key >= low) and (high is None or key <= high)]
+        return PriceHistory([self.dates[i] for i in keep], array('d', (self.prices[i] for i in keep)))
+
+    def records(self):
+        """Rows as dicts, the shape the API has always returned"""
+        return [{'date': date, 'price': price} for date, price in zip(self.dates, self.prices)]
+
+
+def _columns(header):
+    try:
+        return header.index('date'), header.index('price')
+    except ValueError:
+        raise ValueError(f"Expected date and price columns, got {header}") from None
+
+
+def _to_float(value):
+    return float(value) if value else float('nan')
+
+
+def _scan_two_columns(text):
+    """
+    Split a plain `date,price` file without the csv module
+
+    Returns None when the file has quoting, CRLF line ends, extra columns, blank
+    lines or missing prices, so the csv module handles anything unusual.
+    """
+    header, _, body = text.partition('\n')
+    if header != 'date,price' or '"' in body or '\r' in body:
+        return None
+    body = body.rstrip('\n')
+    if not body:
+        return PriceHistory([], array('d'))
+    fields = body.replace('\n', ',').split(',')
+    if len(fields) != 2 * (body.count('\n') + 1):
+        return None
+    try:
+        prices = array('d', map(float, fields[1::2]))
+    except ValueError:
+        return None
+    return PriceHistory(fields[0::2], prices)
+
+
+def parse_csv(raw):
+    """Parse CSV bytes without pandas"""
+    text = raw.decode('utf-8')
+    history = _scan_two_columns(text)
+    if history is not None:
+        return history
+
+    reader = csv.reader(io.StringIO(text))
+    header = next(reader, None)
+    if header is None:
+        return PriceHistory([], array('d'))
+    date_col, price_col = _columns(header)
+    rows = [row for row in reader if row]
+    return PriceHistory([row[date_col] for row in rows], array('d', (_to_float(row[price_col]) for row in rows)))
+
+
+def parse_pandas(raw):
+    """Parse CSV bytes with pandas (faster for very large files)"""
+    import pandas as pd
+
+    # round_trip matches float() exactly; the default parser can be off in the last digit
+    frame = pd.read_csv(io.BytesIO(raw), dtype={'date': str}, float_precision='round_trip')
+    _columns(list(frame.columns))
+    prices = array('d')
+    prices.frombytes(frame['price'].to_numpy(dtype='float64').tobytes())
+    return PriceHistory(frame['date'].tolist(), prices)
+
+
+def load_pandas_threshold():
+    """
+    File size in bytes from which pandas parses faster (None: never)
+
+    HISTORY_PANDAS_MIN_BYTES overrides the calibration file written by the benchmark.
+    """
+    override = os.getenv('HISTORY_PANDAS_MIN_BYTES')
+    if override:
+        return int(override)
+    try:
+        with open(CALIBRATION_FILE, 'r') as f:
+            return json.load(f).get('pandas_min_bytes')
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+PANDAS_MIN_BYTES = load_pandas_threshold()
+
+
+def parse_history(raw):
+    """Parse with whichever path the calibration picked for this file size"""
+    if PANDAS_MIN_BYTES is not None and len(raw) >= PANDAS_MIN_BYTES:
+        return parse_pandas(raw)
+    return parse_csv(raw)
+
+
+_readers = {}
+_readers_lock = threading.Lock()
+_binary_files = {}
+
+
+def _history_store():
+    # numpy is only imported once a binary history file is actually present
+    from pushes import history_store
+    return history_store
+
+
+def history_source(csv_path):
+    """
+    The file a history is served from: the .bin beside the CSV when it is at
+    least as new as the CSV, otherwise the CSV itself
+    """
+    csv_path = os.fspath(csv_path)
+    bin_path = os.path.splitext(csv_path)[0] + '.bin'
+    try:
+        bin_mtime = os.stat(bin_path).st_mtime_ns
+    except FileNotFoundError:
+        return csv_path
+    try:
+        if os.stat(csv_path).st_mtime_ns > bin_mtime:
+            return csv_path
+    except FileNotFoundError:
+        pass
+    return bin_path
+
+
+class _BinaryHistory:
+    """A mapped .bin file plus its PriceHistory, built on first full read"""
+    __slots__ = ('file', 'history')
+
+    def __init__(self, history_file):
+        self.file = history_file
+        self.history = None
+
+
+def _binary(bin_path):
+    st = os.stat(bin_path)
+    identity = (st.st_ino, st.st_mtime_ns, st.st_size)
+    cached = _binary_files.get(bin_path)
+    if cached is None or cached.file.identity != identity:
+        cached = _binary_files[bin_path] = _BinaryHistory(_history_store().HistoryFile(bin_path))
+    return cached
+
+
+def _from_records(records):
+    prices = array('d')
+    prices.frombytes(records['price'].tobytes())
+    return PriceHistory(_history_store().days_to_strings(records['day']), prices)
+
+
+def read_history(path):
+    """
+    Return the PriceHistory for a CSV file, parsing only when the file changed
+
+    Raises FileNotFoundError if the file is missing.
+    """
+    source = history_source(path)
+    if source.endswith('.bin'):
+        binary = _binary(source)
+        if binary.history is None:
+            binary.history = _from_records(binary.file.records)
+        return binary.history
+
+    reader = _readers.get(source)
+    if reader is None:
+        with _readers_lock:
+            reader = _readers.setdefault(source, SnapshotReader(source, loader=parse_history))
+    return reader.read()
+
+
+def last_date(path):
+    """
+    Date of the newest row (datetime.date), or None for an empty history
+
+    Reads the last day of a binary file's mapped day column without building
+    the PriceHistory; a CSV is parsed (once per version) like read_history.
+    """
+    source = history_source(path)
+    if source.endswith('.bin'):
+        days = _binary(source).file.days
+        return _history_store().day_to_date(days[-1]) if len(days) else None
+    dates = read_history(source).dates
+    return datetime.strptime(dates[-1], '%d/%m/%Y').date() if dates else None
+
+
+def read_history_range(path, start=None, end=None):
+    """
+    PriceHistory restricted to start <= date <= end (datetime.date bounds, None = open)
+
+    Binary files are searched in O(log n) on the mapped day column; CSV files
+    through PriceHistory.range, without importing numpy.
+    """
+    source = history_source(path)
+    if source.endswith('.bin'):
+        store = _history_store()
+        start_day = None if start is None else store.date_to_day(start)
+        end_day = None if end is None else store.date_to_day(end)
+        return _from_records(_binary(source).file.range(start_day, end_day))
+
+    return read_history(source).range(start, end)
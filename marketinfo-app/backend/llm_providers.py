@@ -0,0 +1,423 @@
+"""
+Chat model providers behind one OpenAI-style client surface
+(`provider.chat.completions.create(...)`), so /api/chat, the tool loop and
+the session summarizer work the same against any of them:
+
+- groq: the Groq API (GROQ_API_KEY)
+- openai: any OpenAI-compatible server, e.g. Ollama, llama.cpp, vLLM or
+  LM Studio (LLM_BASE_URL, optional LLM_API_KEY)
+- stub: deterministic local answers, for development and benchmarks
+
+Every provider reuses its connections, caps concurrent upstream calls and
+reports latency, tokens and batch sizes per provider on /metrics. With
+LLM_BATCH_WINDOW_MS set, identical requests in flight share one call, and
+providers that accept batches gather simultaneous requests into one.
+"""
+
+import hashlib
+import json
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+
+from pushes.metrics import REGISTRY
+from profiling import phase
+
+DEFAULT_MODELS = {
+    'groq': 'llama-3.1-8b-instant',
+    'openai': 'llama3.1:8b',
+    'stub': 'stub-1'
+}
+DEFAULT_BASE_URL = 'http://localhost:11434/v1'
+MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', '4'))
+BATCH_WINDOW_MS = float(os.getenv('LLM_BATCH_WINDOW_MS', '0'))
+MAX_BATCH = int(os.getenv('LLM_MAX_BATCH', '8'))
+TIMEOUT = float(os.getenv('LLM_TIMEOUT', '60'))
+
+LLM_REQUESTS = REGISTRY.counter('marketinfo_llm_requests_total', 'Upstream chat completion calls',
+                                ('provider', 'model', 'status'))
+LLM_LATENCY = REGISTRY.histogram('marketinfo_llm_request_seconds', 'Latency of upstream chat completion calls',
+                                 ('provider', 'model'), buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30))
+LLM_TOKENS = REGISTRY.counter('marketinfo_llm_tokens_total', 'Tokens processed by the chat model',
+                              ('provider', 'model', 'kind'))
+LLM_BATCH_SIZE = REGISTRY.histogram('marketinfo_llm_batch_size', 'Completions per upstream call', ('provider',),
+                                    buckets=(1, 2, 4, 8, 16, 32))
+LLM_COALESCED = REGISTRY.counter('marketinfo_llm_coalesced_total', 'Requests answered by an identical one in flight',
+                                 ('provider',))
+LLM_IN_FLIGHT = REGISTRY.gauge('marketinfo_llm_in_flight', 'Upstream chat completion calls in progress', ('provider',))
+
+
+class LLMError(RuntimeError):
+    pass
+
+
+@dataclass
+class LLMRequest:
+    model: str
+    messages: list
+    params: dict = field(default_factory=dict)
+
+    @property
+    def key(self):
+        raw = json.dumps([self.model, self.messages, self.params], sort_keys=True, default=str)
+        return hashlib.blake2b(raw.encode(), digest_size=16).digest()
+
+
+def _namespace(value):
+    """Decoded JSON as nested attribute objects, like the SDK response types"""
+    if isinstance(value, dict):
+        return SimpleNamespace(**{k: _namespace(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return [_namespace(v) for v in value]
+    return value
+
+
+def _usage(completion):
+    usage = getattr(completion, 'usage', None)
+    if usage is None:
+        return 0, 0
+    return getattr(usage, 'prompt_tokens', 0) or 0, getattr(usage, 'completion_tokens', 0) or 0
+
+
+class _Flight:
+    __slots__ = ('request', 'done', 'result', 'error', 'taken')
+
+    def __init__(self, request):
+        self.request = request
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.taken = False
+
+
+class RequestBatcher:
+    """
+    Shares identical in-flight requests and, for providers that take batches,
+    gathers requests arriving within `window` seconds (up to `max_batch`)
+    into one upstream call
+
+    The first waiting caller leads: it collects the batch, makes the call and
+    hands each caller its completion.
+    """
+
+    def __init__(self, provider, window, max_batch=MAX_BATCH):
+        self.provider = provider
+        self.window = window
+        self.max_batch = max(1, max_batch)
+        self._cond = threading.Condition()
+        self._flights = {}  # request key -> _Flight
+        self._queue = []  # flights waiting for a leader
+        self._leading = False
+
+    def submit(self, request):
+        key = request.key
+        with self._cond:
+            flight = self._flights.get(key)
+            owner = flight is None
+            if owner:
+                flight = self._flights[key] = _Flight(request)
+                self._queue.append(flight)
+                self._cond.notify_all()
+            else:
+                LLM_COALESCED.inc(provider=self.provider.name)
+        if owner:
+            if self.provider.supports_batching:
+                self._lead_until_taken(flight)
+            else:
+                with self._cond:
+                    self._queue.remove(flight)
+                    flight.taken = True
+                self._execute([flight])
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    def _lead_until_taken(self, flight):
+        while True:
+            with self._cond:
+                while not flight.taken and self._leading:
+                    self._cond.wait()
+                if flight.taken:
+                    return
+                self._leading = True
+                deadline = time.monotonic() + self.window
+                while len(self._queue) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._queue[:self.max_batch]
+                del self._queue[:self.max_batch]
+                for item in batch:
+                    item.taken = True
+                self._leading = False
+                self._cond.notify_all()
+            self._execute(batch)
+
+    def _execute(self, flights):
+        try:
+            results = self.provider.run_batch([f.request for f in flights])
+            for f, result in zip(flights, results):
+                f.result = result
+        except Exception as e:
+            for f in flights:
+                f.error = e
+        finally:
+            with self._cond:
+                for f in flights:
+                    self._flights.pop(f.request.key, None)
+            for f in flights:
+                f.done.set()
+
+
+class LLMProvider:
+    """
+    Base provider: subclasses implement _complete (and _complete_batch when
+    supports_batching)
+
+    Args:
+        model (str): Default model name
+        max_concurrency (int): Most upstream calls in progress at once
+        batch_window_ms (float): Enables request sharing and batching when > 0
+        max_batch (int): Most completions per batched call
+    """
+
+    name = 'base'
+    supports_batching = False
+
+    def __init__(self, model, max_concurrency=MAX_CONCURRENCY, batch_window_ms=BATCH_WINDOW_MS, max_batch=MAX_BATCH):
+        self.model = model
+        self.max_concurrency = max(1, max_concurrency)
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._batcher = RequestBatcher(self, batch_window_ms / 1000, max_batch) if batch_window_ms > 0 else None
+        self._stats_lock = threading.Lock()
+        self._calls = self._errors = self._completions = self._active = 0
+        self._seconds = 0.0
+        self._tokens = [0, 0]
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, messages, model=None, stream=False, **params):
+        """chat.completions.create: one completion (streaming is not supported)"""
+        if stream:
+            raise LLMError(f"{self.name}: streaming is not supported")
+        request = LLMRequest(model or self.model, [dict(m) for m in messages], params)
+        with phase('upstream'):
+            if self._batcher is not None:
+                return self._batcher.submit(request)
+            return self.run_batch([request])[0]
+
+    def run_batch(self, requests):
+        """One upstream call for the requests, within the concurrency limit, with metrics"""
+        model = requests[0].model
+        with self._slots:
+            self._in_flight(1)
+            start = time.perf_counter()
+            try:
+                if len(requests) == 1:
+                    results = [self._complete(requests[0])]
+                else:
+                    results = self._complete_batch(requests)
+            except Exception:
+                LLM_REQUESTS.inc(provider=self.name, model=model, status='error')
+                with self._stats_lock:
+                    self._errors += 1
+                raise
+            finally:
+                elapsed = time.perf_counter() - start
+                self._in_flight(-1)
+        LLM_REQUESTS.inc(provider=self.name, model=model, status='ok')
+        LLM_LATENCY.observe(elapsed, provider=self.name, model=model)
+        LLM_BATCH_SIZE.observe(len(requests), provider=self.name)
+        prompt = sum(_usage(r)[0] for r in results)
+        completion = sum(_usage(r)[1] for r in results)
+        LLM_TOKENS.inc(prompt, provider=self.name, model=model, kind='prompt')
+        LLM_TOKENS.inc(completion, provider=self.name, model=model, kind='completion')
+        with self._stats_lock:
+            self._calls += 1
+            self._completions += len(results)
+            self._seconds += elapsed
+            self._tokens[0] += prompt
+            self._tokens[1] += completion
+        return results
+
+    def _in_flight(self, delta):
+        with self._stats_lock:
+            self._active += delta
+            LLM_IN_FLIGHT.set(self._active, provider=self.name)
+
+    def _complete(self, request):
+        raise NotImplementedError
+
+    def _complete_batch(self, requests):
+        raise NotImplementedError
+
+    def stats(self):
+        """Call counts, mean latency and completion tokens per second since start"""
+        with self._stats_lock:
+            return {
+                'provider': self.name,
+                'model': self.model,
+                'calls': self._calls,
+                'errors': self._errors,
+                'completions': self._completions,
+                'mean_latency_ms': round(self._seconds / self._calls * 1000, 1) if self._calls else None,
+                'prompt_tokens': self._tokens[0],
+                'completion_tokens': self._tokens[1],
+                'completion_tokens_per_second': round(self._tokens[1] / self._seconds, 1) if self._seconds else None
+            }
+
+
+class StubProvider(LLMProvider):
+    """
+    Deterministic answers derived from the last user message, for running the
+    chat without a model. Takes batches; each call sleeps latency_ms plus
+    item_ms per completion (LLM_STUB_LATENCY_MS, LLM_STUB_ITEM_MS) to stand
+    in for a real server.
+    """
+
+    name = 'stub'
+    supports_batching = True
+
+    def __init__(self, model=DEFAULT_MODELS['stub'], latency_ms=None, item_ms=None, **kwargs):
+        super().__init__(model, **kwargs)
+        self.latency_ms = float(os.getenv('LLM_STUB_LATENCY_MS', '0') if latency_ms is None else latency_ms)
+        self.item_ms = float(os.getenv('LLM_STUB_ITEM_MS', '0') if item_ms is None else item_ms)
+
+    def _answer(self, request):
+        question = next((m.get('content') or '' for m in reversed(request.messages) if m.get('role') == 'user'), '')
+        digest = hashlib.blake2b(question.encode(), digest_size=4).hexdigest()
+        content = f"[stub {digest}] {' '.join(question.split())[:200]}"
+        prompt_chars = sum(len(str(m.get('content') or '')) for m in request.messages)
+        return SimpleNamespace(
+            model=request.model,
+            choices=[SimpleNamespace(message=SimpleNamespace(role='assistant', content=content, tool_calls=None),
+                                     finish_reason='stop')],
+            usage=SimpleNamespace(prompt_tokens=prompt_chars // 4, completion_tokens=len(content) // 4)
+        )
+
+    def _complete(self, request):
+        return self._complete_batch([request])[0]
+
+    def _complete_batch(self, requests):
+        delay = self.latency_ms + self.item_ms * len(requests)
+        if delay > 0:
+            time.sleep(delay / 1000)
+        return [self._answer(request) for request in requests]
+
+
+class OpenAICompatibleProvider(LLMProvider):
+    """
+    Any server implementing POST /chat/completions (Ollama, llama.cpp, vLLM,
+    LM Studio, OpenAI). Sessions are kept in a pool and checked out per call,
+    so at most max_concurrency keep-alive connections are opened however
+    many request threads the server runs.
+
+    The chat API takes one conversation per request, so simultaneous requests
+    are sent side by side (up to max_concurrency) and the server batches
+    them itself; only identical requests are shared here.
+    """
+
+    name = 'openai'
+
+    def __init__(self, base_url=DEFAULT_BASE_URL, api_key=None, model=DEFAULT_MODELS['openai'], timeout=TIMEOUT,
+                 **kwargs):
+        super().__init__(model, **kwargs)
+        self.base_url = base_url.rstrip('/')
+        self.api_key = api_key
+        self.timeout = timeout
+        self._sessions = queue.SimpleQueue()
+
+    def _new_session(self):
+        # requests is only needed once a local model is in use
+        import requests
+        session = requests.Session()
+        if self.api_key:
+            session.headers['Authorization'] = f"Bearer {self.api_key}"
+        return session
+
+    def _complete(self, request):
+        try:
+            session = self._sessions.get_nowait()
+        except queue.Empty:
+            session = self._new_session()
+        try:
+            response = session.post(f"{self.base_url}/chat/completions", timeout=self.timeout, json={
+                'model': request.model, 'messages': request.messages, **request.params
+            })
+        finally:
+            self._sessions.put(session)
+        if response.status_code != 200:
+            raise LLMError(f"{self.name}: HTTP {response.status_code} {response.text[:200]}")
+        return _namespace(response.json())
+
+
+class GroqProvider(LLMProvider):
+    """The Groq API; the SDK (imported on first use) keeps a pooled HTTP client"""
+
+    name = 'groq'
+
+    def __init__(self, api_key, model=DEFAULT_MODELS['groq'], timeout=TIMEOUT, **kwargs):
+        super().__init__(model, **kwargs)
+        self.api_key = api_key
+        self.timeout = timeout
+        self._client = None
+        self._client_lock = threading.Lock()
+
+    def _sdk(self):
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    from groq import Groq
+                    self._client = Groq(api_key=self.api_key, timeout=self.timeout)
+        return self._client
+
+    def _complete(self, request):
+        return self._sdk().chat.completions.create(model=request.model, messages=request.messages, **request.params)
+
+
+def groq_api_key():
+    key = os.getenv('GROQ_API_KEY')
+    if key and key != 'your_groq_api_key_here':
+        return key
+    return None
+
+
+def configured_provider():
+    """LLM_PROVIDER, else groq with an API key, else openai with LLM_BASE_URL set, else None"""
+    name = os.getenv('LLM_PROVIDER')
+    if name:
+        return name
+    if groq_api_key():
+        return 'groq'
+    if os.getenv('LLM_BASE_URL'):
+        return 'openai'
+    return None
+
+
+def provider_from_env(name=None):
+    """
+    Build a provider from the environment
+
+    Args:
+        name (str): groq, openai or stub (default: configured_provider())
+
+    Returns:
+        LLMProvider, or None when no provider is configured
+    """
+    name = name or configured_provider()
+    if name is None:
+        return None
+    if name == 'groq':
+        if not groq_api_key():
+            raise LLMError('groq: GROQ_API_KEY is not set')
+        return GroqProvider(groq_api_key(), model=os.getenv('GROQ_MODEL') or DEFAULT_MODELS['groq'])
+    if name == 'openai':
+        return OpenAICompatibleProvider(os.getenv('LLM_BASE_URL') or DEFAULT_BASE_URL, os.getenv('LLM_API_KEY'),
+                                        model=os.getenv('LLM_MODEL') or DEFAULT_MODELS['openai'])
+    if name == 'stub':
+        return StubProvider()
+    raise LLMError(f"Unknown LLM_PROVIDER {name!r} (expected groq, openai or stub)")
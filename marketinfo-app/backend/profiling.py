@@ -0,0 +1,340 @@
+"""
+Opt-in per-request profiling. A trusted client (PROFILE_TRUSTED_IPS, plus
+an X-Profile-Token header matching PROFILE_TOKEN when that is set) adds
+`X-Profile: sample` or `?profile=sample` to a request, or `cprofile` for
+the deterministic profiler, and the request runs under it:
+
+- sample: a thread samples the request thread's stack every
+  PROFILE_SAMPLE_MS and stores them as collapsed stacks, which
+  flamegraph.pl, speedscope and inferno read directly
+- cprofile: cProfile around the request, stored as a .prof file for
+  pstats, snakeviz or flameprof
+
+Code marks its phases with `with phase('load'):` (likewise compute,
+serialize and upstream). Phase time excludes nested phases, and samples are
+rooted at the phase they were taken in. Profiled responses carry the
+phase durations in a Server-Timing header and the profile id in
+X-Profile-Id; the profiles live in PROFILE_DIR, newest PROFILE_MAX_FILES
+kept, and /api/profiles serves them to trusted clients.
+
+Unprofiled requests pay one header and query lookup, and each phase() one
+context variable read.
+"""
+
+import contextvars
+import cProfile
+import hmac
+import io
+import ipaddress
+import json
+import os
+import pstats
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
+
+from flask.json.provider import DefaultJSONProvider
+
+from pushes.metrics import REGISTRY
+
+MODES = ('sample', 'cprofile')
+TRUSTED_IPS = os.getenv('PROFILE_TRUSTED_IPS', '127.0.0.1,::1')
+TOKEN = os.getenv('PROFILE_TOKEN', '')
+SAMPLE_INTERVAL = float(os.getenv('PROFILE_SAMPLE_MS', '1')) / 1000
+MAX_FILES = int(os.getenv('PROFILE_MAX_FILES', '200'))
+TOP_FUNCTIONS = 25
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PROFILED = REGISTRY.counter('marketinfo_profiled_requests_total', 'Requests run under the profiler', ('route', 'mode'))
+
+_current = contextvars.ContextVar('marketinfo_profile', default=None)
+_NO_PHASE = nullcontext()
+# cProfile allows one active profiler per process from Python 3.12 on
+_cprofile_lock = threading.Lock()
+_labels = {}
+
+
+def _default_profile_dir():
+    return os.path.join(tempfile.gettempdir(), f"marketinfo-profiles-{os.getuid() if hasattr(os, 'getuid') else 'user'}")
+
+
+def _networks(spec):
+    return [ipaddress.ip_network(part.strip(), strict=False) for part in spec.split(',') if part.strip()]
+
+
+TRUSTED_NETWORKS = _networks(TRUSTED_IPS)
+
+
+def trusted(request):
+    """Whether the client may profile requests and read profiles"""
+    try:
+        address = ipaddress.ip_address(request.remote_addr or '')
+    except ValueError:
+        return False
+    if not any(address in network for network in TRUSTED_NETWORKS):
+        return False
+    return not TOKEN or hmac.compare_digest(request.headers.get('X-Profile-Token', ''), TOKEN)
+
+
+def requested_mode(request):
+    """The profiler the request asks for, or None"""
+    value = request.headers.get('X-Profile') or request.args.get('profile')
+    if not value:
+        return None
+    value = value.lower()
+    if value in ('1', 'true'):
+        return MODES[0]
+    return value if value in MODES else None
+
+
+def phase(name):
+    """Context manager timing a phase of the current profiled request (a no-op otherwise)"""
+    profile = _current.get()
+    if profile is None:
+        return _NO_PHASE
+    return profile.phase(name)
+
+
+def _label(code):
+    """flamegraph frame name: function (path:line), paths relative to the repo or site-packages"""
+    label = _labels.get(code)
+    if label is None:
+        path = code.co_filename
+        if 'site-packages' + os.sep in path:
+            path = path.split('site-packages' + os.sep, 1)[1]
+        elif path.startswith(BASE_DIR):
+            path = os.path.relpath(path, BASE_DIR)
+        label = _labels[code] = f"{code.co_name} ({path}:{code.co_firstlineno})"
+    return label
+
+
+class StackSampler(threading.Thread):
+    """Samples one thread's stack into collapsed-stack counts until stopped"""
+
+    def __init__(self, profile, thread_id, interval=SAMPLE_INTERVAL):
+        super().__init__(name='profile-sampler', daemon=True)
+        self.profile = profile
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_label(frame.f_code))
+                frame = frame.f_back
+            stack.append(f"[{self.profile.current_phase() or 'other'}]")
+            self.samples[';'.join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+class RequestProfile:
+    """One profiled request: its phase timers and its sampler or cProfile"""
+
+    def __init__(self, mode, method, path, route):
+        self.id = uuid.uuid4().hex[:16]
+        self.mode = mode
+        self.method = method
+        self.path = path
+        self.route = route
+        self.started_at = datetime.now(timezone.utc).isoformat(timespec='milliseconds')
+        self.phases = {}  # name -> seconds, excluding nested phases
+        self.total = 0.0
+        self._stack = []  # [name, seconds spent in nested phases]
+        self._start = None
+        self._sampler = None
+        self._profiler = None
+        self._token = None
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        self._stack.append([name, 0.0])
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            _, nested = self._stack.pop()
+            self.phases[name] = self.phases.get(name, 0.0) + elapsed - nested
+            if self._stack:
+                self._stack[-1][1] += elapsed
+
+    def current_phase(self):
+        """Innermost open phase (read by the sampler thread)"""
+        try:
+            return self._stack[-1][0]
+        except IndexError:
+            return None
+
+    def start(self):
+        self._token = _current.set(self)
+        if self.mode == 'cprofile':
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        else:
+            self._sampler = StackSampler(self, threading.get_ident())
+            self._sampler.start()
+        self._start = time.perf_counter()
+
+    def stop(self):
+        """Stop profiling (idempotent); returns whether this call stopped it"""
+        if self._token is None:
+            return False
+        self.total = time.perf_counter() - self._start
+        if self._profiler is not None:
+            self._profiler.disable()
+            _cprofile_lock.release()
+        if self._sampler is not None:
+            self._sampler.stop()
+        _current.reset(self._token)
+        self._token = None
+        return True
+
+    def server_timing(self):
+        """Server-Timing header value: each phase and the total, in milliseconds"""
+        timings = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in self.phases.items()]
+        return ', '.join(timings + [f"total;dur={self.total * 1000:.2f}"])
+
+    def summary(self, status=None):
+        summary = {
+            'id': self.id,
+            'mode': self.mode,
+            'method': self.method,
+            'path': self.path,
+            'route': self.route,
+            'status': status,
+            'started_at': self.started_at,
+            'total_ms': round(self.total * 1000, 2),
+            'phases_ms': {name: round(seconds * 1000, 2) for name, seconds in self.phases.items()},
+        }
+        if self._sampler is not None:
+            summary['samples'] = sum(self._sampler.samples.values())
+            summary['sample_interval_ms'] = self._sampler.interval * 1000
+        if self._profiler is not None:
+            stream = io.StringIO()
+            pstats.Stats(self._profiler, stream=stream).sort_stats('cumulative').print_stats(TOP_FUNCTIONS)
+            summary['top_functions'] = stream.getvalue()
+        return summary
+
+    def save(self, directory, status=None):
+        """Write <id>.json (summary) and <id>.collapsed or <id>.prof; drop the oldest beyond MAX_FILES"""
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, self.id)
+        if self._sampler is not None:
+            collapsed = ''.join(f"{stack} {count}\n" for stack, count in self._sampler.samples.most_common())
+            _write(f"{base}.collapsed", collapsed.encode('utf-8'))
+        if self._profiler is not None:
+            self._profiler.dump_stats(f"{base}.prof")
+        _write(f"{base}.json", json.dumps(self.summary(status), indent=2).encode('utf-8'))
+        _prune(directory)
+
+
+def _write(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _prune(directory, keep=MAX_FILES):
+    summaries = sorted((entry for entry in os.scandir(directory) if entry.name.endswith('.json')),
+                       key=lambda entry: entry.stat().st_mtime)
+    for entry in summaries[:max(0, len(summaries) - keep)]:
+        profile_id = entry.name[:-len('.json')]
+        for suffix in ('.json', '.collapsed', '.prof'):
+            try:
+                os.unlink(os.path.join(directory, profile_id + suffix))
+            except FileNotFoundError:
+                pass
+
+
+class RequestProfiler:
+    """
+    Starts and finishes profiles for the Flask request hooks
+
+    Args:
+        directory (str): Where profiles are stored (default PROFILE_DIR, else the temp dir)
+    """
+
+    def __init__(self, directory=None):
+        self.directory = os.fspath(directory or os.getenv('PROFILE_DIR') or _default_profile_dir())
+
+    def start(self, request):
+        """Profile this request if it asks to and may; returns the RequestProfile or None"""
+        environ = request.environ  # cheaper than parsing headers and query for every request
+        if 'HTTP_X_PROFILE' not in environ and 'profile=' not in environ.get('QUERY_STRING', ''):
+            return None
+        mode = requested_mode(request)
+        if mode is None or not trusted(request):
+            return None
+        if mode == 'cprofile' and not _cprofile_lock.acquire(blocking=False):
+            mode = 'sample'  # another request holds the deterministic profiler
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        profile = RequestProfile(mode, request.method, request.full_path.rstrip('?'), route)
+        profile.start()
+        PROFILED.inc(route=route, mode=mode)
+        return profile
+
+    def finish(self, profile, response):
+        """Stop the profile, store it and add Server-Timing and X-Profile-Id to the response"""
+        if profile is None or not profile.stop():
+            return response
+        try:
+            profile.save(self.directory, response.status_code)
+        except OSError as e:
+            print(f"Could not store profile {profile.id}: {e}")
+        response.headers['Server-Timing'] = profile.server_timing()
+        response.headers['X-Profile-Id'] = profile.id
+        return response
+
+    def abandon(self, profile):
+        """Stop a profile whose request ended without a response (teardown)"""
+        if profile is not None:
+            profile.stop()
+
+    def list(self, limit=50):
+        """Summaries of the newest stored profiles"""
+        try:
+            entries = [entry for entry in os.scandir(self.directory) if entry.name.endswith('.json')]
+        except FileNotFoundError:
+            return []
+        entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+        summaries = []
+        for entry in entries[:limit]:
+            try:
+                with open(entry.path, 'r') as f:
+                    summary = json.load(f)
+            except (FileNotFoundError, ValueError):
+                continue
+            summary.pop('top_functions', None)
+            summaries.append(summary)
+        return summaries
+
+    def path(self, profile_id, kind):
+        """File of a stored profile ('json', 'collapsed' or 'prof'), or None"""
+        if not profile_id.isalnum() or kind not in ('json', 'collapsed', 'prof'):
+            return None
+        path = os.path.join(self.directory, f"{profile_id}.{kind}")
+        return path if os.path.exists(path) else None
+
+
+class PhaseJSONProvider(DefaultJSONProvider):
+    """Flask's JSON provider, timing jsonify as the serialize phase"""
+
+    def response(self, *args, **kwargs):
+        with phase('serialize'):
+            return super().response(*args, **kwargs)
@@ -0,0 +1,429 @@
+"""
+Watchlist quote engine: a quote table for an arbitrary symbol universe,
+refreshed in bulk batches by a background thread. Lookups never call
+upstream.
+
+Server workers share one engine state in the shared cache directory:
+
+- the symbol universe, in a small SQLite file: requested symbols join it
+  until it holds max_universe symbols and leave it again when nobody has
+  asked for them within idle_ttl seconds; the configured universe is pinned
+- one refresher: the worker holding an exclusive lock on watchlist.lock
+  refreshes the universe and publishes the quote table as watchlist.json;
+  the others retry the lock, so a new refresher takes over within one
+  refresh interval when that worker exits
+- the quotes: every worker answers from the published table, parsed once
+  per version
+
+Without fcntl (Windows) every worker refreshes on its own.
+"""
+
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: each worker runs its own refresher
+    fcntl = None
+
+from pushes.metrics import upstream_timer, REGISTRY
+from pushes.snapshot_io import SnapshotReader, write_json_atomic
+from pushes.snapshot_models import now_ms
+
+# Display symbol -> Yahoo Finance ticker where they differ
+YAHOO_ALIASES = {
+    'VIX': '^VIX',
+    'SPX': '^GSPC',
+    'NDX': '^NDX',
+    'DJI': '^DJI',
+    'BRK.B': 'BRK-B'
+}
+
+DEFAULT_UNIVERSE = 'SPY,QQQ,VIX,NVDA,AAPL,AMZN,MSFT,GOOGL,TSLA,META'
+
+# Tickers as Yahoo Finance writes them: BRK.B, BRK-B, ^VIX, EURUSD=X, BTC-USD
+SYMBOL_PATTERN = re.compile(r'\^?[A-Z0-9][A-Z0-9.=-]{0,11}')
+
+
+def valid_symbol(symbol):
+    """Whether symbol (upper case) looks like a ticker"""
+    return SYMBOL_PATTERN.fullmatch(symbol) is not None
+
+
+@dataclass(slots=True, frozen=True)
+class Quote:
+    symbol: str
+    price: float
+    change: float
+    change_percent: float
+    volume: Optional[int]
+    source: str
+    as_of: int        # epoch ms of the underlying bar
+    updated_at: int   # epoch ms when the engine stored it
+
+    def to_dict(self, now=None):
+        now = now or now_ms()
+        return {
+            'symbol': self.symbol,
+            'price': round(self.price, 2),
+            'change': round(self.change, 2),
+            'changePercent': round(self.change_percent, 2),
+            'volume': self.volume,
+            'source': self.source,
+            'asOf': self.as_of,
+            'updatedAt': self.updated_at,
+            'ageSeconds': round((now - self.updated_at) / 1000, 1)
+        }
+
+
+class QuoteTable:
+    """
+    Symbol -> Quote map as published by the refresher. Reads go through a
+    SnapshotReader, so each worker parses a new table once and lookups are
+    O(k) in the number of requested symbols.
+    """
+
+    def __init__(self, path):
+        self.path = os.fspath(path)
+        self._reader = SnapshotReader(self.path, loader=self._load)
+
+    @staticmethod
+    def _load(raw):
+        return {symbol: Quote(**fields) for symbol, fields in json.loads(raw)['quotes'].items()}
+
+    def quotes(self):
+        try:
+            return self._reader.read()
+        except FileNotFoundError:  # nothing published yet
+            return {}
+
+    def get_many(self, symbols):
+        """Return (quotes found, symbols not yet quoted)"""
+        quotes = self.quotes()
+        found, missing = [], []
+        for symbol in symbols:
+            quote = quotes.get(symbol)
+            if quote is None:
+                missing.append(symbol)
+            else:
+                found.append(quote)
+        return found, missing
+
+    def get(self, symbol):
+        return self.quotes().get(symbol)
+
+    def publish(self, quotes):
+        """Replace the table (refresher only)"""
+        write_json_atomic(self.path, {
+            'updated_at': now_ms(),
+            'quotes': {quote.symbol: asdict(quote) for quote in quotes}
+        }, indent=None)
+
+    def __len__(self):
+        return len(self.quotes())
+
+
+UNIVERSE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS symbols (
+    symbol TEXT PRIMARY KEY,
+    pinned INTEGER NOT NULL DEFAULT 0,
+    added_at REAL NOT NULL,
+    requested_at REAL NOT NULL
+);
+"""
+
+
+class SymbolUniverse:
+    """
+    The symbols to refresh, shared by all workers
+
+    A worker records a request for a symbol it already tracks at most once
+    per touch_interval, so busy watchlists do not write on every request.
+    """
+
+    def __init__(self, path, max_universe=2000, idle_ttl=3600.0, clock=time.time):
+        self.path = os.fspath(path)
+        self.max_universe = max_universe
+        self.idle_ttl = idle_ttl
+        self.touch_interval = min(60.0, idle_ttl / 4)
+        self.clock = clock
+        self._local = threading.local()
+        self._touched = {}  # symbol -> when this worker last recorded a request for it
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        # Not kept: the engine is built before gunicorn forks, and connections must not cross a fork
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.executescript(UNIVERSE_SCHEMA)
+        finally:
+            conn.close()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def pin(self, symbols):
+        """Track symbols permanently (the configured universe), regardless of max_universe"""
+        now = self.clock()
+        with self._connection() as conn:
+            conn.executemany(
+                'INSERT INTO symbols (symbol, pinned, added_at, requested_at) VALUES (?, 1, ?, ?) '
+                'ON CONFLICT(symbol) DO UPDATE SET pinned = 1',
+                [(symbol, now, now) for symbol in symbols])
+
+    def track(self, symbols):
+        """
+        Mark symbols as requested, adding new ones to the universe while it has room
+
+        Returns:
+            tuple: (symbols newly added, symbols rejected because the universe is full)
+        """
+        now = self.clock()
+        if len(self._touched) > 4 * self.max_universe:
+            self._touched.clear()
+        due = [symbol for symbol in symbols if now - self._touched.get(symbol, float('-inf')) >= self.touch_interval]
+        if not due:
+            return [], []
+        added, rejected = [], []
+        with self._connection() as conn:
+            for symbol in due:
+                if conn.execute('UPDATE symbols SET requested_at = ? WHERE symbol = ?', (now, symbol)).rowcount:
+                    self._touched[symbol] = now
+                    continue
+                cursor = conn.execute(
+                    'INSERT OR IGNORE INTO symbols (symbol, added_at, requested_at) '
+                    'SELECT ?, ?, ? WHERE (SELECT COUNT(*) FROM symbols) < ?',
+                    (symbol, now, now, self.max_universe))
+                if cursor.rowcount:
+                    self._touched[symbol] = now
+                    added.append(symbol)
+                else:
+                    self._touched.pop(symbol, None)
+                    rejected.append(symbol)
+        return added, rejected
+
+    def evict_idle(self):
+        """Drop unpinned symbols not requested within idle_ttl; returns them"""
+        cutoff = self.clock() - self.idle_ttl
+        with self._connection() as conn:
+            idle = [row[0] for row in conn.execute(
+                'SELECT symbol FROM symbols WHERE pinned = 0 AND requested_at < ?', (cutoff,))]
+            conn.execute('DELETE FROM symbols WHERE pinned = 0 AND requested_at < ?', (cutoff,))
+        return idle
+
+    def added_since(self, since):
+        """Whether a symbol joined the universe after `since` (cheap, polled by the refresher)"""
+        row = self._connection().execute('SELECT 1 FROM symbols WHERE added_at > ? LIMIT 1', (since,)).fetchone()
+        return row is not None
+
+    def symbols(self):
+        return [row[0] for row in self._connection().execute('SELECT symbol FROM symbols ORDER BY symbol')]
+
+
+def fetch_yahoo_batch(symbols):
+    """
+    Fetch daily bars for many symbols in one yfinance download call
+
+    Returns:
+        list[Quote]: One quote per symbol that returned at least one bar
+    """
+    import yfinance as yf  # heavy import, only needed on the refresh thread
+
+    tickers = {YAHOO_ALIASES.get(symbol, symbol): symbol for symbol in symbols}
+    with upstream_timer('yfinance'):
+        frame = yf.download(
+            tickers=' '.join(tickers),
+            period='5d',
+            interval='1d',
+            group_by='ticker',
+            auto_adjust=False,
+            threads=True,
+            progress=False
+        )
+
+    quotes = []
+    updated_at = now_ms()
+    for ticker, symbol in tickers.items():
+        try:
+            bars = frame[ticker] if len(tickers) > 1 else frame
+            bars = bars.dropna(subset=['Close'])
+        except KeyError:
+            continue
+        if bars.empty:
+            continue
+        latest = bars.iloc[-1]
+        previous = bars.iloc[-2] if len(bars) > 1 else latest
+        price = float(latest['Close'])
+        change = price - float(previous['Close'])
+        volume = latest.get('Volume')
+        quotes.append(Quote(
+            symbol=symbol,
+            price=price,
+            change=change,
+            change_percent=(change / float(previous['Close'])) * 100 if previous['Close'] else 0.0,
+            volume=int(volume) if volume and not math.isnan(volume) else None,
+            source='yfinance',
+            as_of=int(bars.index[-1].timestamp() * 1000),
+            updated_at=updated_at
+        ))
+    return quotes
+
+
+class QuoteEngine:
+    """
+    Args:
+        shared_dir (str): Directory shared by all workers (the SharedSnapshotCache one)
+    """
+
+    def __init__(self, shared_dir, fetch_batch=fetch_yahoo_batch, universe=None, batch_size=50,
+                 refresh_interval=30.0, max_universe=2000, idle_ttl=3600.0):
+        shared_dir = os.fspath(shared_dir)
+        self.table = QuoteTable(os.path.join(shared_dir, 'watchlist.json'))
+        self.universe = SymbolUniverse(os.path.join(shared_dir, 'watchlist.db'), max_universe, idle_ttl)
+        self.lock_path = os.path.join(shared_dir, 'watchlist.lock')
+        self.fetch_batch = fetch_batch
+        self.batch_size = batch_size
+        self.refresh_interval = refresh_interval
+        self._wake = threading.Event()
+        self._started = False
+        self._start_lock = threading.Lock()
+        self._lock_file = None
+        self.pinned = list(universe or [])  # pinned by the refresher, which alone evicts
+
+        self._refresh_seconds = REGISTRY.histogram('marketinfo_watchlist_refresh_seconds', 'Watchlist bulk refresh duration')
+        self._table_size = REGISTRY.gauge('marketinfo_watchlist_quotes', 'Quotes in the watchlist table published by this worker')
+        self._evicted = REGISTRY.counter('marketinfo_watchlist_evictions_total', 'Symbols dropped from the watchlist universe after going unrequested')
+
+    @classmethod
+    def from_env(cls, shared_dir):
+        universe = os.getenv('WATCHLIST_SYMBOLS', DEFAULT_UNIVERSE)
+        return cls(
+            shared_dir,
+            universe=[s.strip().upper() for s in universe.split(',') if s.strip()],
+            batch_size=int(os.getenv('WATCHLIST_BATCH_SIZE', '50')),
+            refresh_interval=float(os.getenv('WATCHLIST_REFRESH_SECONDS', '30')),
+            max_universe=int(os.getenv('WATCHLIST_MAX_SYMBOLS', '2000')),
+            idle_ttl=float(os.getenv('WATCHLIST_IDLE_SECONDS', '3600'))
+        )
+
+    def seed_quotes(self, macro_snapshot):
+        """Quotes for SPY/QQQ/VIX from the scraper's macro snapshot, so they answer before the first refresh"""
+        names = {'sp500': 'SPY', 'nasdaq100': 'QQQ', 'vix': 'VIX'}
+        quotes = []
+        for key, symbol in names.items():
+            index = macro_snapshot.market_indices.get(key)
+            if index and index.price:
+                quotes.append(Quote(
+                    symbol=symbol,
+                    price=float(index.price),
+                    change=float(index.change),
+                    change_percent=float(index.change_percent),
+                    volume=int(index.volume) if index.volume else None,
+                    source='macro_snapshot',
+                    as_of=index.timestamp,
+                    updated_at=index.timestamp
+                ))
+        return quotes
+
+    def is_refresher(self):
+        """Whether this worker refreshes the table (holds watchlist.lock)"""
+        return self._lock_file is not None
+
+    def _try_lead(self):
+        """Take the refresher lock if no other worker holds it"""
+        if self._lock_file is not None:
+            return True
+        lock_file = open(self.lock_path, 'a')
+        if fcntl is not None:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                return False
+        self._lock_file = lock_file  # held until this process exits
+        return True
+
+    def start(self, seed=None):
+        """
+        Start the background thread once (safe to call on every request)
+
+        Args:
+            seed (callable): Optional loader of a MacroSnapshot to prime the table with
+        """
+        if self._started:
+            return
+        with self._start_lock:
+            if self._started:
+                return
+            threading.Thread(target=self._run, args=(seed,), name='watchlist-refresher', daemon=True).start()
+            self._started = True
+
+    def lookup(self, symbols):
+        """
+        Answer a watchlist request from the published table
+
+        Unknown symbols are added to the universe and picked up by the next
+        refresh, unless the universe is full. Symbols must pass valid_symbol().
+
+        Returns:
+            tuple: (quotes found, symbols tracked but not quoted yet,
+                    symbols not tracked because the universe is full)
+        """
+        found, missing = self.table.get_many(symbols)
+        added, rejected = self.universe.track(symbols)
+        if added:
+            self._wake.set()  # wakes the refresher when it runs in this worker
+        rejected = set(rejected)
+        return found, [s for s in missing if s not in rejected], [s for s in missing if s in rejected]
+
+    def refresh_once(self, seed=None):
+        """Refresh every symbol in the universe and publish the table (refresher only)"""
+        evicted = self.universe.evict_idle()
+        if evicted:
+            self._evicted.inc(len(evicted))
+        universe = self.universe.symbols()
+        tracked = set(universe)
+        quotes = {symbol: quote for symbol, quote in self.table.quotes().items() if symbol in tracked}
+        if seed is not None:
+            for quote in seed:
+                quotes.setdefault(quote.symbol, quote)
+        with self._refresh_seconds.time():
+            for i in range(0, len(universe), self.batch_size):
+                batch = universe[i:i + self.batch_size]
+                try:
+                    quotes.update((quote.symbol, quote) for quote in self.fetch_batch(batch))
+                except Exception as e:
+                    print(f"Watchlist refresh failed for {batch[0]}..{batch[-1]}: {e}")
+        self.table.publish(quotes.values())
+        self._table_size.set(len(quotes))
+
+    def _run(self, seed):
+        while not self._try_lead():
+            time.sleep(self.refresh_interval)  # another worker refreshes; take over if it exits
+        self.universe.pin(self.pinned)
+        snapshot = seed() if seed else None
+        seeded = self.seed_quotes(snapshot) if snapshot else None
+        while True:
+            started = time.time()
+            self.refresh_once(seeded)
+            seeded = None
+            # Sleep until the next cycle, or wake early when any worker tracks new symbols
+            deadline = time.monotonic() + self.refresh_interval
+            while time.monotonic() < deadline:
+                if self._wake.wait(min(1.0, max(0.0, deadline - time.monotonic()))) or self.universe.added_since(started):
+                    break
+            self._wake.clear()
+            time.sleep(0.5)  # let a burst of new symbols coalesce into one batch
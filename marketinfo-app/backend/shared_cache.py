@@ -0,0 +1,91 @@
+"""
+Cross-worker snapshot cache. Each dataset is serialized once into a compact
+JSON body stored in an mmap-able file (under /dev/shm when available), tagged
+with the identity of the source file it was built from. Every worker maps the
+same file, so the OS page cache holds one copy and no worker re-parses a
+snapshot another worker already encoded.
+"""
+
+import mmap
+import os
+import struct
+import tempfile
+import threading
+
+from pushes.snapshot_io import write_atomic
+
+MAGIC = b'MICACHE1'
+# magic, source inode, source mtime_ns, source size
+HEADER = struct.Struct('<8sQqQ')
+
+
+def _default_cache_dir():
+    base = '/dev/shm' if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK) else tempfile.gettempdir()
+    return os.path.join(base, f"marketinfo-cache-{os.getuid() if hasattr(os, 'getuid') else 'user'}")
+
+
+def _identity(st):
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+class _Entry:
+    __slots__ = ('source_id', 'body')
+
+    def __init__(self, source_id, body):
+        self.source_id = source_id
+        self.body = body
+
+
+class SharedSnapshotCache:
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir or os.getenv('SHARED_CACHE_DIR') or _default_cache_dir()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._entries = {}
+        self._build_lock = threading.Lock()
+
+    def _cache_path(self, name):
+        return os.path.join(self.cache_dir, f"{name}.bin")
+
+    def _map(self, name, source_id):
+        """Map the shared file for name if it was built from source_id"""
+        try:
+            with open(self._cache_path(name), 'rb') as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):  # ValueError: empty file
+            return None
+        magic, ino, mtime_ns, size = HEADER.unpack_from(mapped, 0)
+        if magic != MAGIC or (ino, mtime_ns, size) != source_id:
+            mapped.close()
+            return None
+        # memoryview slices of the map are zero-copy
+        return memoryview(mapped)[HEADER.size:]
+
+    def get(self, name, source_path, build):
+        """
+        Return the encoded body for a dataset
+
+        Args:
+            name (str): Cache key (file-name safe)
+            source_path (Path | str): File the dataset is built from
+            build (callable): source_path -> bytes, called only when no worker has
+                              encoded the current version of the source yet
+
+        Returns:
+            memoryview: JSON body (raises FileNotFoundError if the source is missing)
+        """
+        source_id = _identity(os.stat(source_path))
+        entry = self._entries.get(name)
+        if entry is not None and entry.source_id == source_id:
+            return entry.body
+
+        with self._build_lock:
+            body = self._map(name, source_id)
+            if body is None:
+                encoded = build(source_path)
+                header = HEADER.pack(MAGIC, *source_id)
+                write_atomic(self._cache_path(name), header + encoded)
+                body = self._map(name, source_id)
+                if body is None:  # source changed while building; serve what we built
+                    body = memoryview(encoded)
+            self._entries[name] = _Entry(source_id, body)
+            return body
@@ -0,0 +1,17 @@
+"""
+Production WSGI entry point
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+With preload_app enabled, the master imports this module once before forking,
+so groq (and pandas, when the history reader is calibrated to use it) and the
+Flask app are loaded a single time and shared copy-on-write by every worker.
+"""
+
+import groq  # noqa: F401  (preloaded before fork)
+
+from app import app  # noqa: F401
+from history_reader import PANDAS_MIN_BYTES
+
+if PANDAS_MIN_BYTES is not None:
+    import pandas  # noqa: F401
@@ -25,6 +25,8 @@ export default function ChatBot({ isOpen, onToggle }: ChatBotProps) {
     }
   ]);
   const [inputValue, setInputValue] = useState('');
+  // The backend keeps the history of this conversation; only the id is sent back
+  const [conversationId, setConversationId] = useState<string | null>(null);
   const [isTyping, setIsTyping] = useState(false);
   const messagesEndRef = useRef<HTMLDivElement>(null);
   const inputRef = useRef<HTMLInputElement>(null);
@@ -64,7 +66,7 @@ export default function ChatBot({ isOpen, onToggle }: ChatBotProps) {
         headers: {
           'Content-Type': 'application/json',
         },
-        body: JSON.stringify({ message: currentInput }),
+        body: JSON.stringify({ message: currentInput, conversation_id: conversationId }),
       });
 
       if (!response.ok) {
@@ -72,6 +74,9 @@ export default function ChatBot({ isOpen, onToggle }: ChatBotProps) {
       }
 
       const data = await response.json();
+      if (data.conversation_id) {
+        setConversationId(data.conversation_id);
+      }
       
       const aiMessage: Message = {
         id: (Date.now() + 1).toString(),
@@ -9,14 +9,12 @@ interface MacroData {
       change: number;
       change_percent: number;
       timestamp: string;
-      polygon_price: number;
     };
     nasdaq100: {
       price: number;
       change: number;
       change_percent: number;
       timestamp: string;
-      polygon_price: number;
     };
   };
 }
@@ -116,7 +114,7 @@ export default function CombinedIndicesChart() {
         {indices.map(index => {
           if (!index.data) return null;
           
-          const currentPrice = index.data.polygon_price || index.data.price;
+          const currentPrice = index.data.price;
           const change = index.data.change_percent;
           const changeColor = getChangeColor(change);
           const arrow = getArrow(change);
@@ -28,7 +28,8 @@ export default function EconomicCalendar() {
   const [sortOrder, setSortOrder] = useState<SortOrder>('newest');
 
   useEffect(() => {
-    fetch('http://localhost:5001/api/calendar/economic')
+    // Without from/to the backend returns the releases around today
+    fetch('http://localhost:5001/api/calendar/economic?page_size=1000')
       .then(res => res.json())
       .then(data => {
         if (data.error) {
@@ -26,12 +26,10 @@ interface MacroData {
     sp500: {
       price: number;
       change_percent: number;
-      polygon_price: number;
     };
     nasdaq100: {
       price: number;
       change_percent: number;
-      polygon_price: number;
     };
   };
 }
@@ -97,8 +95,8 @@ export default function MarketIndicesChart() {
       {
         label: 'Price ($)',
         data: [
-          sp500.polygon_price || sp500.price,
-          nasdaq100.polygon_price || nasdaq100.price
+          sp500.price,
+          nasdaq100.price
         ],
         backgroundColor: [
           'rgba(251, 146, 60, 0.8)', // orange for S&P 500
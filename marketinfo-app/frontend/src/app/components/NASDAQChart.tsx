@@ -34,10 +34,6 @@ interface MacroData {
       change: number;
       change_percent: number;
       timestamp: string;
-      polygon_price: number;
-      polygon_volume: number;
-      polygon_high: number;
-      polygon_low: number;
     };
   };
 }
@@ -95,7 +91,7 @@ export default function QQQChart() {
   }
 
   const nasdaq100 = data.market_indices.nasdaq100;
-  const currentPrice = nasdaq100.polygon_price || nasdaq100.price;
+  const currentPrice = nasdaq100.price;
   const change = nasdaq100.change_percent;
   const changeColor = change >= 0 ? 'text-green-400' : 'text-red-400';
   const arrow = change >= 0 ? '↗' : '↘';
@@ -104,12 +100,11 @@ export default function QQQChart() {
     return price.toLocaleString(undefined, { minimumFractionDigits: 2, maximumFractionDigits: 2 });
   };
 
-  // Use polygon data for more accurate OHLC
   const ohlcData = [
     { label: 'Open', value: nasdaq100.open },
-    { label: 'High', value: Math.max(nasdaq100.polygon_high || nasdaq100.high, nasdaq100.high) },
-    { label: 'Low', value: Math.min(nasdaq100.polygon_low || nasdaq100.low, nasdaq100.low) },
-    { label: 'Close', value: nasdaq100.polygon_price || nasdaq100.price },
+    { label: 'High', value: nasdaq100.high },
+    { label: 'Low', value: nasdaq100.low },
+    { label: 'Close', value: nasdaq100.price },
   ];
 
   const chartData = {
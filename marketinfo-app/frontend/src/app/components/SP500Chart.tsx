@@ -34,10 +34,6 @@ interface MacroData {
       change: number;
       change_percent: number;
       timestamp: string;
-      polygon_price: number;
-      polygon_volume: number;
-      polygon_high: number;
-      polygon_low: number;
     };
   };
 }
@@ -95,7 +91,7 @@ export default function SPYChart() {
   }
 
   const sp500 = data.market_indices.sp500;
-  const currentPrice = sp500.polygon_price || sp500.price;
+  const currentPrice = sp500.price;
   const change = sp500.change_percent;
   const changeColor = change >= 0 ? 'text-green-400' : 'text-red-400';
   const arrow = change >= 0 ? '↗' : '↘';
@@ -104,12 +100,11 @@ export default function SPYChart() {
     return price.toLocaleString(undefined, { minimumFractionDigits: 2, maximumFractionDigits: 2 });
   };
 
-  // Use polygon data for more accurate OHLC
   const ohlcData = [
     { label: 'Open', value: sp500.open },
-    { label: 'High', value: Math.max(sp500.polygon_high || sp500.high, sp500.high) },
-    { label: 'Low', value: Math.min(sp500.polygon_low || sp500.low, sp500.low) },
-    { label: 'Close', value: sp500.polygon_price || sp500.price },
+    { label: 'High', value: sp500.high },
+    { label: 'Low', value: sp500.low },
+    { label: 'Close', value: sp500.price },
   ];
 
   const chartData = {
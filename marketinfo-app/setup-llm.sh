@@ -6,7 +6,9 @@ echo ""
 
 # Check if Groq API key is set
 if [ -f "backend/.env" ]; then
-    if grep -q "your_groq_api_key_here" backend/.env; then
+    if grep -qE "^LLM_(BASE_URL|PROVIDER)=" backend/.env; then
+        echo "✅ Chat model configured: $(grep -E "^LLM_(PROVIDER|BASE_URL|MODEL)=" backend/.env | tr '\n' ' ')"
+    elif grep -q "your_groq_api_key_here" backend/.env; then
         echo "⚠️  You need to set up your Groq API key!"
         echo ""
         echo "Steps to get your FREE Groq API key:"
@@ -19,6 +21,10 @@ if [ -f "backend/.env" ]; then
         echo "Then run: nano backend/.env"
         echo "And replace 'your_groq_api_key_here' with your actual API key"
         echo ""
+        echo "Or run a local model with any OpenAI-compatible server (Ollama, llama.cpp, vLLM):"
+        echo "  LLM_BASE_URL=http://localhost:11434/v1"
+        echo "  LLM_MODEL=llama3.1:8b"
+        echo ""
     else
         echo "✅ Groq API key appears to be configured"
     fi
@@ -23,7 +23,7 @@ if [ ! -f "venv/installed" ]; then
     touch venv/installed
 fi
 
-# Start Flask server
+# Start Flask server (gunicorn when MARKETINFO_ENV=production)
 echo "🌟 Starting Flask server on http://localhost:5001"
 echo "🤖 AI Chatbot API enabled with Groq integration"
 echo "📡 API endpoints available:"
@@ -31,7 +31,12 @@ echo "   • /api/chat - AI chat functionality"
 echo "   • /api/health - Health check"
 echo "   • /api/crypto/* - Crypto data"
 echo "   • /api/pushes/* - Push data"
+echo "   • /metrics - Prometheus metrics"
 echo ""
 echo "Press Ctrl+C to stop the server"
 echo "================================"
-python app.py 
\ No newline at end of file
+if [ "$MARKETINFO_ENV" = "production" ]; then
+    exec gunicorn -c gunicorn.conf.py wsgi:app
+else
+    python app.py
+fi 
\ No newline at end of file
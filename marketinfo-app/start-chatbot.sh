@@ -43,10 +43,11 @@ if [ ! -f "backend/.env" ]; then
     exit 1
 fi
 
-if grep -q "your_groq_api_key_here" backend/.env; then
+if grep -q "your_groq_api_key_here" backend/.env && ! grep -qE "^LLM_(BASE_URL|PROVIDER)=" backend/.env; then
     echo -e "${RED}❌ Error: Groq API key not configured${NC}"
     echo "Please edit backend/.env and replace 'your_groq_api_key_here' with your actual API key"
     echo "Get your free API key at: https://console.groq.com/"
+    echo "Or use a local OpenAI-compatible model: set LLM_BASE_URL (e.g. http://localhost:11434/v1) and LLM_MODEL"
     exit 1
 fi
 
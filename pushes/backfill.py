@@ -0,0 +1,431 @@
+#!/usr/bin/env python3
+"""
+Historical Backfill
+Fills the history store for every series in the backfill manifest: the crypto
+universe (CoinGecko), index and futures closes (Yahoo Finance) and FRED
+economic series.
+
+For each series the job works out which date ranges are still missing:
+the requested range minus what the store already holds (runs of samples no
+further apart than the series' frequency allows) and minus what earlier runs
+already fetched (the checkpoint, which also remembers ranges that returned
+nothing, such as weekends). Missing ranges are split into provider-sized
+chunks and fetched in parallel under each provider's rate limit. Each chunk
+is merged into the series' .bin file and then recorded in the checkpoint, so
+an interrupted run resumes where it stopped and a finished one does nothing.
+
+Usage:
+    python backfill.py                      # fill every series in the manifest
+    python backfill.py --series BTC,SPY     # only these
+    python backfill.py --dry-run            # show the missing ranges and chunks
+"""
+
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, replace
+from datetime import date, datetime
+
+try:
+    from config import Config
+    from coingecko import CoinGeckoClient
+    from history_store import HistoryFile, merge_history, date_to_day, day_to_date
+    from metrics import upstream_timer, stage_timer, flush_metrics
+    from rate_limit import shared_bucket
+    from snapshot_io import write_json_atomic
+except ImportError:  # imported as pushes.backfill
+    from pushes.config import Config
+    from pushes.coingecko import CoinGeckoClient
+    from pushes.history_store import HistoryFile, merge_history, date_to_day, day_to_date
+    from pushes.metrics import upstream_timer, stage_timer, flush_metrics
+    from pushes.rate_limit import shared_bucket
+    from pushes.snapshot_io import write_json_atomic
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+PUSHES_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE_DIR = os.path.dirname(PUSHES_DIR)
+MANIFEST_PATH = os.path.join(PUSHES_DIR, 'backfill_manifest.json')
+HISTORY_DIR = os.getenv('HISTORY_DATA_DIR', os.path.join(PUSHES_DIR, 'history_data'))
+CRYPTO_HISTORY_DIR = os.path.join(BASE_DIR, 'cli-charts', 'data')
+
+# Largest spacing in days between consecutive samples that still counts as contiguous
+MAX_SPACING = {
+    'daily': 1,
+    'business': 4,  # long weekends
+    'weekly': 8,
+    'monthly': 35,
+    'quarterly': 95,
+    'annual': 370
+}
+# The newest spans of this many sampling periods are fetched again on every run:
+# FRED dates an observation at the start of its period but publishes it weeks
+# later, and today's daily close arrives after the run, so an empty answer for
+# recent days is not final
+RECHECK_PERIODS = 2
+
+
+@dataclass(frozen=True)
+class Series:
+    name: str
+    provider: str
+    symbol: str
+    path: str
+    frequency: str = 'daily'
+    start: str = '2018-01-01'
+    returns: str = 'log'  # how risk_engine.py measures daily moves: 'log' returns or 'diff' (rates)
+
+    @property
+    def start_day(self):
+        return date_to_day(date.fromisoformat(self.start))
+
+
+@dataclass(frozen=True)
+class Chunk:
+    series: Series
+    first_day: int
+    last_day: int
+
+
+def load_manifest(path=MANIFEST_PATH, config=Config):
+    """
+    Series to backfill: the manifest's list, plus the crypto universe if enabled
+
+    Returns:
+        list[Series]
+    """
+    with open(path, 'r') as f:
+        manifest = json.load(f)
+    start = manifest.get('start', Series.start)
+    series = []
+    if manifest.get('crypto_universe'):
+        for symbol, coin_id in config.CRYPTO_IDS.items():
+            series.append(Series(symbol, 'coingecko', coin_id, os.path.join(CRYPTO_HISTORY_DIR, f"{symbol}.bin"),
+                                 'daily', start))
+    for entry in manifest.get('series', []):
+        if entry.get('frequency', 'daily') not in MAX_SPACING:
+            raise ValueError(f"{entry['name']}: unknown frequency {entry['frequency']}")
+        if entry.get('returns', 'log') not in ('log', 'diff'):
+            raise ValueError(f"{entry['name']}: returns must be 'log' or 'diff'")
+        series.append(Series(
+            name=entry['name'],
+            provider=entry['provider'],
+            symbol=entry.get('symbol', entry['name']),
+            path=entry.get('path') or os.path.join(HISTORY_DIR, f"{entry['name']}.bin"),
+            frequency=entry.get('frequency', 'daily'),
+            start=entry.get('start', start),
+            returns=entry.get('returns', 'log')
+        ))
+    return series
+
+
+# Inclusive (first_day, last_day) ranges
+
+def merge_ranges(ranges):
+    merged = []
+    for lo, hi in sorted(ranges):
+        if merged and lo <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], hi)
+        else:
+            merged.append([lo, hi])
+    return [tuple(r) for r in merged]
+
+
+def subtract_ranges(want, covered):
+    """Parts of `want` not inside any covered range"""
+    gaps = []
+    covered = merge_ranges(covered)
+    for lo, hi in want:
+        cursor = lo
+        for c_lo, c_hi in covered:
+            if c_hi < cursor or c_lo > hi:
+                continue
+            if c_lo > cursor:
+                gaps.append((cursor, c_lo - 1))
+            cursor = max(cursor, c_hi + 1)
+        if cursor <= hi:
+            gaps.append((cursor, hi))
+    return gaps
+
+
+def data_ranges(days, max_spacing):
+    """Ranges spanned by runs of samples at most max_spacing days apart"""
+    ranges = []
+    for day in days:
+        day = int(day)
+        if ranges and day - ranges[-1][1] <= max_spacing:
+            ranges[-1][1] = day
+        else:
+            ranges.append([day, day])
+    return [tuple(r) for r in ranges]
+
+
+def today():
+    return date_to_day(datetime.utcnow().date())
+
+
+def settled_day(series, end_day):
+    """Last day whose fetch is final; later days are planned again on every run"""
+    return end_day - RECHECK_PERIODS * MAX_SPACING[series.frequency]
+
+
+class Checkpoint:
+    """Per-series ranges already fetched, persisted after every chunk"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            with open(path, 'r') as f:
+                self.ranges = {name: [tuple(r) for r in ranges] for name, ranges in json.load(f).items()}
+        except (FileNotFoundError, ValueError):
+            self.ranges = {}
+
+    def covered(self, name):
+        with self._lock:
+            return list(self.ranges.get(name, []))
+
+    def mark(self, name, first_day, last_day):
+        with self._lock:
+            self.ranges[name] = merge_ranges(self.ranges.get(name, []) + [(first_day, last_day)])
+            write_json_atomic(self.path, {n: [list(r) for r in rs] for n, rs in self.ranges.items()}, indent=None)
+
+
+class HistoryProvider:
+    """A source of daily history. Subclasses implement fetch(symbol, first_day, last_day)."""
+
+    name = 'provider'
+    chunk_days = 365
+    max_workers = 2
+    max_history_days = None  # how far back the provider can reach, if limited
+
+    def available(self):
+        return True
+
+    def fetch(self, symbol, first_day, last_day):
+        """
+        Returns:
+            tuple: (epoch days, prices) for samples within the range
+        """
+        raise NotImplementedError
+
+
+class CoinGeckoHistory(HistoryProvider):
+    """market_chart/range; shares the 'coingecko' budget with the price scraper"""
+
+    name = 'coingecko'
+    chunk_days = 365  # ranges over 90 days come back as daily points
+    max_workers = 4
+
+    def __init__(self, config=Config, client=None):
+        self.client = client or CoinGeckoClient(config)
+        # The public API only serves the last year of history
+        self.max_history_days = int(os.getenv('COINGECKO_MAX_HISTORY_DAYS', '365'))
+
+    def fetch(self, symbol, first_day, last_day):
+        data = self.client.get(f"/coins/{symbol}/market_chart/range", {
+            'vs_currency': 'usd',
+            'from': first_day * 86400,
+            'to': (last_day + 1) * 86400 - 1
+        })
+        # Daily points are stamped 00:00 UTC; for short (hourly) ranges keep the first point of each day
+        by_day = {}
+        for ts, price in data.get('prices', []):
+            day = int(ts // 86400000)
+            if first_day <= day <= last_day and day not in by_day and price is not None:
+                by_day[day] = float(price)
+        days = sorted(by_day)
+        return days, [by_day[day] for day in days]
+
+
+class YFinanceHistory(HistoryProvider):
+    name = 'yfinance'
+    chunk_days = 5 * 365
+    max_workers = 2
+
+    def __init__(self, config=Config):
+        self.bucket = shared_bucket('yfinance', config.YFINANCE_RATE_PER_MINUTE, 2)
+
+    def fetch(self, symbol, first_day, last_day):
+        import yfinance as yf  # deferred: costly import
+        self.bucket.acquire()
+        with upstream_timer('yfinance'):
+            hist = yf.Ticker(symbol).history(start=day_to_date(first_day).isoformat(),
+                                             end=day_to_date(last_day + 1).isoformat(), interval='1d')
+        if hist.empty:
+            return [], []
+        days = [date_to_day(ts.date()) for ts in hist.index]
+        return days, [float(close) for close in hist['Close']]
+
+
+class FredHistory(HistoryProvider):
+    name = 'fred'
+    chunk_days = 20 * 365
+    max_workers = 2
+
+    def __init__(self, config=Config):
+        self.api_key = config.FRED_API_KEY
+        self.base_url = config.FRED_BASE_URL
+        self.bucket = shared_bucket('fred', config.FRED_RATE_PER_MINUTE, 5)
+        self._fred = None
+
+    def available(self):
+        return bool(self.api_key)
+
+    def fetch(self, symbol, first_day, last_day):
+        if self._fred is None:
+            from fredapi import Fred  # deferred: pulls in pandas
+            self._fred = Fred(api_key=self.api_key)
+            self._fred.root_url = self.base_url
+        self.bucket.acquire()
+        with upstream_timer('fred'):
+            data = self._fred.get_series(symbol, observation_start=day_to_date(first_day).isoformat(),
+                                         observation_end=day_to_date(last_day).isoformat()).dropna()
+        days = [date_to_day(ts.date()) for ts in data.index]
+        return days, [float(value) for value in data.values]
+
+
+def default_providers(config=Config):
+    return {p.name: p for p in (CoinGeckoHistory(config), YFinanceHistory(config), FredHistory(config))}
+
+
+def stored_days(path):
+    if not os.path.exists(path):
+        return []
+    return HistoryFile(path).days.tolist()
+
+
+def plan(series_list, providers, checkpoint, end_day=None):
+    """
+    Chunks still to fetch, newest first
+
+    Returns:
+        list[Chunk]
+    """
+    end_day = end_day if end_day is not None else today()
+    chunks = []
+    for series in series_list:
+        provider = providers.get(series.provider)
+        if provider is None:
+            logger.warning(f"{series.name}: unknown provider {series.provider}, skipped")
+            continue
+        if not provider.available():
+            logger.warning(f"{series.name}: {provider.name} not configured, skipped")
+            continue
+        start_day = series.start_day
+        if provider.max_history_days:
+            start_day = max(start_day, end_day - provider.max_history_days + 1)
+        # Stored samples count as fetched only up to the settled day, like the checkpoint:
+        # a recent value may still be revised (today's bar stored before the close)
+        settled = settled_day(series, end_day)
+        stored = [(lo, min(hi, settled))
+                  for lo, hi in data_ranges(stored_days(series.path), MAX_SPACING[series.frequency]) if lo <= settled]
+        covered = checkpoint.covered(series.name) + stored
+        for lo, hi in subtract_ranges([(start_day, end_day)], covered):
+            # Split from the newest end so the most recent history arrives first
+            while hi >= lo:
+                chunk_lo = max(lo, hi - provider.chunk_days + 1)
+                chunks.append(Chunk(series, chunk_lo, hi))
+                hi = chunk_lo - 1
+    chunks.sort(key=lambda chunk: chunk.last_day, reverse=True)
+    return chunks
+
+
+def run(chunks, providers, checkpoint, workers=8, end_day=None):
+    """
+    Fetch and store chunks in parallel; returns (chunks done, chunks failed, days added)
+
+    Each provider runs at most its max_workers chunks at once on top of its
+    rate limit. Writes to one series are serialized. A chunk is checkpointed
+    only up to its series' settled day (see RECHECK_PERIODS), so observations
+    published after this run are fetched by a later one.
+    """
+    end_day = end_day if end_day is not None else today()
+    provider_slots = {name: threading.Semaphore(p.max_workers) for name, p in providers.items()}
+    series_locks = defaultdict(threading.Lock)
+    totals = {'done': 0, 'failed': 0, 'added': 0}
+    totals_lock = threading.Lock()
+
+    def process(chunk):
+        series = chunk.series
+        provider = providers[series.provider]
+        with provider_slots[provider.name]:
+            days, prices = provider.fetch(series.symbol, chunk.first_day, chunk.last_day)
+        with series_locks[series.name]:
+            added = merge_history(series.path, days, prices) if days else 0
+            last_day = min(chunk.last_day, settled_day(series, end_day))
+            if last_day >= chunk.first_day:
+                checkpoint.mark(series.name, chunk.first_day, last_day)
+        return added
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(process, chunk): chunk for chunk in chunks}
+        for future in as_completed(futures):
+            chunk = futures[future]
+            span = f"{day_to_date(chunk.first_day)}..{day_to_date(chunk.last_day)}"
+            try:
+                added = future.result()
+            except Exception as e:
+                with totals_lock:
+                    totals['failed'] += 1
+                logger.error(f"{chunk.series.name} {span}: {e}")
+                continue
+            with totals_lock:
+                totals['done'] += 1
+                totals['added'] += added
+                done = totals['done'] + totals['failed']
+            logger.info(f"[{done}/{len(chunks)}] {chunk.series.name} {span}: +{added} days")
+    return totals['done'], totals['failed'], totals['added']
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Backfill price and economic history for every tracked series')
+    parser.add_argument('--manifest', default=MANIFEST_PATH)
+    parser.add_argument('--series', help='Comma-separated series names (default: all)')
+    parser.add_argument('--start', help='Override the manifest start date (YYYY-MM-DD)')
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--checkpoint', default=os.path.join(HISTORY_DIR, 'backfill_checkpoint.json'))
+    parser.add_argument('--dry-run', action='store_true', help='Only list the chunks that would be fetched')
+    args = parser.parse_args()
+
+    series_list = load_manifest(args.manifest)
+    if args.series:
+        wanted = {name.strip() for name in args.series.split(',')}
+        series_list = [s for s in series_list if s.name in wanted]
+    if args.start:
+        series_list = [replace(s, start=args.start) for s in series_list]
+
+    os.makedirs(HISTORY_DIR, exist_ok=True)
+    checkpoint = Checkpoint(args.checkpoint)
+    providers = default_providers()
+    end_day = today()
+    chunks = plan(series_list, providers, checkpoint, end_day)
+
+    per_series = defaultdict(int)
+    for chunk in chunks:
+        per_series[chunk.series.name] += chunk.last_day - chunk.first_day + 1
+    logger.info(f"{len(chunks)} chunks to fetch across {len(per_series)} of {len(series_list)} series")
+    if args.dry_run:
+        for chunk in chunks:
+            print(f"{chunk.series.name:<16} {chunk.series.provider:<10} "
+                  f"{day_to_date(chunk.first_day)} .. {day_to_date(chunk.last_day)}")
+        return
+
+    start = time.perf_counter()
+    try:
+        with stage_timer('backfill', 'fetch'):
+            done, failed, added = run(chunks, providers, checkpoint, args.workers, end_day)
+        logger.info(f"Backfill finished in {time.perf_counter() - start:.1f}s: {done} chunks stored, "
+                    f"{failed} failed (retried on the next run), {added} new days")
+    finally:
+        flush_metrics('backfill')
+
+
+if __name__ == "__main__":
+    main()
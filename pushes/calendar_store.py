@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Economic Calendar Store
+SQLite store for economic release events, keyed by (date, release_id). The
+fetcher upserts each run's events instead of rewriting a whole JSON file, and
+the backend answers date/category/page queries from indexes instead of parsing
+every event (notes included) per request.
+
+Events are classified once, at ingest, by a single compiled pattern covering
+every category term; the result is kept as an inverted index from category to
+event ids.
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_DB_PATH = os.path.join(BASE_DIR, 'calendar', 'data', 'economic_calendar.db')
+LEGACY_JSON_PATH = os.path.join(BASE_DIR, 'calendar', 'data', 'economic_calendar.json')
+
+# Category terms, in priority order: an event's primary category is the first one
+# whose terms appear in its name; the index records every category that matches
+CATEGORY_RULES = [
+    ('federal_reserve', ('fomc', 'federal funds', 'fed')),
+    ('interest_rates', ('interest rate', 'treasury', 'sofr', 'ameribor')),
+    ('employment', ('employment', 'unemployment', 'jobs')),
+    ('inflation', ('cpi', 'inflation', 'price')),
+    ('market_indices', ('dow jones', 'nikkei', 's&p')),
+    ('crypto', ('crypto', 'coinbase', 'bitcoin')),
+]
+CATEGORIES = [name for name, _ in CATEGORY_RULES] + ['other']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    date TEXT NOT NULL,
+    release_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    category TEXT NOT NULL,
+    press_release INTEGER NOT NULL DEFAULT 0,
+    link TEXT NOT NULL DEFAULT '',
+    notes TEXT NOT NULL DEFAULT '',
+    UNIQUE (date, release_id)
+);
+CREATE INDEX IF NOT EXISTS idx_events_date ON events (date);
+CREATE INDEX IF NOT EXISTS idx_events_category_date ON events (category, date);
+-- Inverted index: category -> event ids
+CREATE TABLE IF NOT EXISTS category_index (
+    category TEXT NOT NULL,
+    event_id INTEGER NOT NULL REFERENCES events (id),
+    PRIMARY KEY (category, event_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_category_index_event ON category_index (event_id);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+EVENT_COLUMNS = ('date', 'release_id', 'name', 'category', 'press_release', 'link', 'notes')
+
+
+class CategoryMatcher:
+    """
+    All category rules compiled into one regex with a named group per category
+
+    The alternation sits inside a lookahead so matches may overlap, and one scan
+    of the name finds every category it mentions.
+    """
+
+    def __init__(self, rules=CATEGORY_RULES):
+        self.priority = {category: i for i, (category, _) in enumerate(rules)}
+        groups = []
+        for category, terms in rules:
+            # Longest terms first so 'federal funds' is preferred over 'fed' at the same position
+            alternatives = '|'.join(re.escape(term) for term in sorted(terms, key=len, reverse=True))
+            groups.append(f"(?P<{category}>{alternatives})")
+        # Terms are lowercase and names are lowered before matching; cheaper than re.IGNORECASE
+        self.pattern = re.compile(f"(?=(?:{'|'.join(groups)}))")
+
+    def categories(self, name):
+        """Every matching category in priority order, or ['other']"""
+        found = {match.lastgroup for match in self.pattern.finditer((name or '').lower())}
+        return sorted(found, key=self.priority.__getitem__) if found else ['other']
+
+
+MATCHER = CategoryMatcher()
+
+
+def categorize_release(name):
+    """Primary category of a release from its name"""
+    return MATCHER.categories(name)[0]
+
+
+class CalendarStore:
+    """
+    Economic calendar events in SQLite
+
+    Connections are per thread; WAL mode lets the backend read while a fetcher
+    run writes.
+    """
+
+    def __init__(self, path=None, seed_json=LEGACY_JSON_PATH):
+        self.path = os.fspath(path or os.getenv('CALENDAR_DB_PATH') or DEFAULT_DB_PATH)
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+        conn = self._connection()
+        self._migrate_event_ids(conn)
+        with conn:
+            conn.executescript(SCHEMA)
+        if seed_json and self.count() == 0 and os.path.exists(seed_json):
+            self.import_json(seed_json)
+        elif not conn.execute('SELECT 1 FROM category_index LIMIT 1').fetchone() and self.count():
+            self.reindex()  # store created before the category index existed, or just migrated
+
+    @staticmethod
+    def _migrate_event_ids(conn):
+        """
+        Rebuild an events table created without an id column
+
+        The old category index pointed at implicit rowids, which VACUUM may
+        renumber. The ids are copied from the rowids and the index is dropped,
+        to be rebuilt by reindex().
+        """
+        columns = [row[1] for row in conn.execute('PRAGMA table_info(events)')]
+        if not columns or 'id' in columns:
+            return
+        copied = ', '.join(EVENT_COLUMNS)
+        conn.executescript(f"""
+            BEGIN;
+            DROP TABLE IF EXISTS category_index;
+            DROP INDEX IF EXISTS idx_events_date;
+            DROP INDEX IF EXISTS idx_events_category_date;
+            ALTER TABLE events RENAME TO events_by_rowid;
+            {SCHEMA}
+            INSERT INTO events (id, {copied}) SELECT rowid, {copied} FROM events_by_rowid;
+            DROP TABLE events_by_rowid;
+            COMMIT;
+        """)
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def upsert_events(self, events):
+        """
+        Insert new events and refresh existing ones in one transaction
+
+        Returns:
+            int: Number of events written
+        """
+        conn = self._connection()
+        written = 0
+        with conn:
+            for event in events:
+                if not event.get('date') or event.get('release_id') is None:
+                    continue
+                name = event.get('name') or 'Unknown'
+                categories = MATCHER.categories(name)
+                event_id = conn.execute(
+                    """
+                    INSERT INTO events (date, release_id, name, category, press_release, link, notes)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (date, release_id) DO UPDATE SET
+                        name = excluded.name,
+                        category = excluded.category,
+                        press_release = excluded.press_release,
+                        link = excluded.link,
+                        notes = excluded.notes
+                    RETURNING id
+                    """,
+                    (event['date'], int(event['release_id']), name, categories[0],
+                     1 if event.get('press_release') else 0, event.get('link') or '', event.get('notes') or '')
+                ).fetchone()[0]
+                self._index_event(conn, event_id, categories)
+                written += 1
+            self._set_meta(conn, updated_at=datetime.now().isoformat(), new_events_count=written)
+        return written
+
+    @staticmethod
+    def _index_event(conn, event_id, categories):
+        conn.execute('DELETE FROM category_index WHERE event_id = ?', (event_id,))
+        conn.executemany('INSERT INTO category_index (category, event_id) VALUES (?, ?)',
+                         [(category, event_id) for category in categories])
+
+    def reindex(self):
+        """Reclassify every stored event (after the category rules change)"""
+        conn = self._connection()
+        with conn:
+            conn.execute('DELETE FROM category_index')
+            for event_id, name in conn.execute('SELECT id, name FROM events').fetchall():
+                categories = MATCHER.categories(name)
+                conn.execute('UPDATE events SET category = ? WHERE id = ?', (categories[0], event_id))
+                self._index_event(conn, event_id, categories)
+
+    def prune(self, max_days_old=90):
+        """Delete events older than max_days_old; returns the number removed"""
+        cutoff = (datetime.now() - timedelta(days=max_days_old)).strftime('%Y-%m-%d')
+        conn = self._connection()
+        with conn:
+            conn.execute('DELETE FROM category_index WHERE event_id IN (SELECT id FROM events WHERE date < ?)', (cutoff,))
+            return conn.execute('DELETE FROM events WHERE date < ?', (cutoff,)).rowcount
+
+    def import_json(self, filename):
+        """Load events from the legacy economic_calendar.json file"""
+        with open(filename, 'r') as f:
+            data = json.load(f)
+        imported = self.upsert_events(data.get('events', []))
+        conn = self._connection()
+        with conn:
+            self._set_meta(conn, updated_at=data.get('updated_at') or datetime.now().isoformat(),
+                           new_events_count=data.get('new_events_count', imported))
+        return imported
+
+    @staticmethod
+    def _set_meta(conn, **values):
+        conn.executemany(
+            'INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT (key) DO UPDATE SET value = excluded.value',
+            [(key, str(value)) for key, value in values.items()]
+        )
+
+    def meta(self):
+        return {row['key']: row['value'] for row in self._connection().execute('SELECT key, value FROM meta')}
+
+    def count(self):
+        return self._connection().execute('SELECT COUNT(*) FROM events').fetchone()[0]
+
+    def category_counts(self):
+        """Category -> number of events in it, from the index"""
+        rows = dict(self._connection().execute('SELECT category, COUNT(*) FROM category_index GROUP BY category'))
+        return {category: rows[category] for category in CATEGORIES if category in rows}
+
+    def categories_for(self, event_ids):
+        """Event id -> its categories in priority order, from the index"""
+        found = {event_id: [] for event_id in event_ids}
+        conn = self._connection()
+        ids = list(found)
+        for i in range(0, len(ids), 500):  # stay under SQLite's bound-parameter limit
+            chunk = ids[i:i + 500]
+            rows = conn.execute(
+                f"SELECT event_id, category FROM category_index WHERE event_id IN ({','.join('?' * len(chunk))})",
+                chunk
+            )
+            for event_id, category in rows:
+                found[event_id].append(category)
+        for categories in found.values():
+            categories.sort(key=lambda c: MATCHER.priority.get(c, len(MATCHER.priority)))
+        return found
+
+    def query(self, date_from=None, date_to=None, category=None, limit=None, offset=0, include_notes=True, descending=False):
+        """
+        Events matching the filters, ordered by date
+
+        Args:
+            date_from (str): Inclusive lower bound, YYYY-MM-DD
+            date_to (str): Inclusive upper bound, YYYY-MM-DD
+            category (str): One of CATEGORIES; matches events indexed under it,
+                            not only those with it as their primary category
+            limit (int): Page size (None for all)
+            offset (int): Rows to skip
+            include_notes (bool): Whether to load the (long) notes column
+
+        Returns:
+            tuple: (list of event dicts, total number of matching events)
+        """
+        where, params = [], []
+        if date_from:
+            where.append('date >= ?')
+            params.append(date_from)
+        if date_to:
+            where.append('date <= ?')
+            params.append(date_to)
+        if category:
+            where.append('id IN (SELECT event_id FROM category_index WHERE category = ?)')
+            params.append(category)
+        clause = f"WHERE {' AND '.join(where)}" if where else ''
+
+        columns = ['id'] + [c for c in EVENT_COLUMNS if include_notes or c != 'notes']
+        order = 'DESC' if descending else 'ASC'
+        sql = f"SELECT {', '.join(columns)} FROM events {clause} ORDER BY date {order}, release_id {order}"
+        page_params = list(params)
+        if limit is not None:
+            sql += ' LIMIT ? OFFSET ?'
+            page_params += [int(limit), int(offset)]
+
+        conn = self._connection()
+        total = conn.execute(f"SELECT COUNT(*) FROM events {clause}", params).fetchone()[0]
+        events = []
+        for row in conn.execute(sql, page_params):
+            event = dict(row)
+            event['press_release'] = bool(event['press_release'])
+            events.append(event)
+        categories = self.categories_for([event['id'] for event in events])
+        for event in events:
+            event['categories'] = categories[event['id']]
+        return events, total
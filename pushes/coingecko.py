@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+CoinGecko Client
+Price and history requests for a crypto universe of any size. Ids are split
+into chunks that fit CoinGecko's per-request limits, the chunks are fetched
+concurrently, and the answers are merged into one columnar price table.
+Every request, from the scraper or the history backfill, draws on the same
+shared rate-limit budget.
+"""
+
+import logging
+import math
+import threading
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    from config import Config
+    from metrics import upstream_timer
+    from rate_limit import shared_bucket
+    from snapshot_models import now_ms
+except ImportError:  # imported as pushes.coingecko
+    from pushes.config import Config
+    from pushes.metrics import upstream_timer
+    from pushes.rate_limit import shared_bucket
+    from pushes.snapshot_models import now_ms
+
+logger = logging.getLogger(__name__)
+
+# Keep the ids query parameter well under common URL length limits
+MAX_IDS_CHARS = 4000
+MAX_ATTEMPTS = 3
+
+
+def chunk_ids(ids, max_ids, max_chars=MAX_IDS_CHARS):
+    """Split ids into chunks of at most max_ids ids and max_chars characters once joined with commas"""
+    chunks, chunk, chars = [], [], 0
+    for coin_id in ids:
+        extra = len(coin_id) + (1 if chunk else 0)
+        if chunk and (len(chunk) >= max_ids or chars + extra > max_chars):
+            chunks.append(chunk)
+            chunk, chars, extra = [], 0, len(coin_id)
+        chunk.append(coin_id)
+        chars += extra
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+@dataclass(slots=True)
+class PriceTable:
+    """
+    Prices for a universe as parallel columns, in universe order
+
+    Missing values are NaN; coins CoinGecko did not answer for are left out.
+    """
+    symbols: list = field(default_factory=list)
+    coin_ids: list = field(default_factory=list)
+    price_usd: array = field(default_factory=lambda: array('d'))
+    market_cap: array = field(default_factory=lambda: array('d'))
+    volume_24h: array = field(default_factory=lambda: array('d'))
+    change_24h: array = field(default_factory=lambda: array('d'))
+    timestamp: array = field(default_factory=lambda: array('q'))
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def append(self, symbol, coin_id, quote, timestamp):
+        def number(key):
+            value = quote.get(key)
+            return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else math.nan
+
+        self.symbols.append(symbol)
+        self.coin_ids.append(coin_id)
+        self.price_usd.append(number('usd'))
+        self.market_cap.append(number('usd_market_cap'))
+        self.volume_24h.append(number('usd_24h_vol'))
+        self.change_24h.append(number('usd_24h_change'))
+        self.timestamp.append(timestamp)
+
+    def rows(self):
+        """Row dicts, with None for missing values"""
+        def value(x):
+            return None if math.isnan(x) else x
+
+        for i, symbol in enumerate(self.symbols):
+            yield {
+                'symbol': symbol,
+                'coin_id': self.coin_ids[i],
+                'price_usd': value(self.price_usd[i]),
+                'market_cap': value(self.market_cap[i]),
+                'volume_24h': value(self.volume_24h[i]),
+                'change_24h': value(self.change_24h[i]),
+                'timestamp': self.timestamp[i]
+            }
+
+
+class CoinGeckoClient:
+    def __init__(self, config=Config, bucket=None, max_workers=None, timeout=15):
+        self.base_url = config.COINGECKO_BASE_URL.rstrip('/')
+        self.api_key = config.COINGECKO_API_KEY
+        self.max_ids = config.COINGECKO_MAX_IDS_PER_REQUEST
+        self.max_workers = max_workers or config.COINGECKO_MAX_WORKERS
+        self.timeout = timeout
+        self.bucket = bucket or shared_bucket('coingecko', config.COINGECKO_RATE_PER_MINUTE, config.COINGECKO_BURST)
+        self._local = threading.local()
+
+    def _session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = requests.Session()
+            session.mount('http://', HTTPAdapter(pool_maxsize=self.max_workers))
+            session.mount('https://', HTTPAdapter(pool_maxsize=self.max_workers))
+        return session
+
+    def get(self, path, params):
+        """
+        One budgeted GET; a 429 holds every caller for its Retry-After and retries
+
+        Returns:
+            The decoded JSON body
+        """
+        params = dict(params)
+        if self.api_key:
+            params['x_cg_demo_api_key'] = self.api_key
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            self.bucket.acquire()
+            with upstream_timer('coingecko'):
+                response = self._session().get(f"{self.base_url}{path}", params=params, timeout=self.timeout)
+            if response.status_code == 429 and attempt < MAX_ATTEMPTS:
+                retry_after = float(response.headers.get('Retry-After') or 60)
+                logger.warning(f"CoinGecko rate limited {path}; waiting {retry_after:.0f}s")
+                self.bucket.penalize(retry_after)
+                continue
+            response.raise_for_status()
+            return response.json()
+
+    def simple_prices(self, universe):
+        """
+        Current prices for a universe
+
+        Args:
+            universe (dict): Symbol -> CoinGecko id
+
+        Returns:
+            PriceTable: One row per coin CoinGecko answered for
+        """
+        chunks = chunk_ids(list(dict.fromkeys(universe.values())), self.max_ids)
+
+        def fetch(chunk):
+            try:
+                return self.get('/simple/price', {
+                    'ids': ','.join(chunk),
+                    'vs_currencies': 'usd',
+                    'include_market_cap': 'true',
+                    'include_24hr_vol': 'true',
+                    'include_24hr_change': 'true'
+                })
+            except Exception as e:
+                logger.error(f"Error fetching prices for {len(chunk)} coins ({chunk[0]}...): {e}")
+                return {}
+
+        quotes = {}
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(chunks) or 1)) as executor:
+            for result in executor.map(fetch, chunks):
+                quotes.update(result)
+
+        table = PriceTable()
+        fetched_at = now_ms()
+        for symbol, coin_id in universe.items():
+            if coin_id in quotes:
+                table.append(symbol, coin_id, quotes[coin_id], fetched_at)
+        return table
+
+    def market_chart(self, coin_id, days=30):
+        """Daily [epoch ms, price] pairs for the last `days` days"""
+        data = self.get(f"/coins/{coin_id}/market_chart", {'vs_currency': 'usd', 'days': str(days), 'interval': 'daily'})
+        return data.get('prices', [])
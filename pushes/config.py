@@ -1,9 +1,32 @@
+import json
 import os
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+DEFAULT_CRYPTO_UNIVERSE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'crypto_universe.json')
+
+
+def load_crypto_universe(spec=None, path=None):
+    """
+    Symbol -> CoinGecko id for every coin to track
+
+    CRYPTO_UNIVERSE ('BTC:bitcoin,ETH:ethereum') wins over CRYPTO_UNIVERSE_FILE,
+    a JSON object of symbol -> id (default crypto_universe.json).
+    """
+    spec = spec if spec is not None else os.getenv('CRYPTO_UNIVERSE')
+    if spec:
+        universe = {}
+        for entry in spec.split(','):
+            symbol, _, coin_id = entry.strip().partition(':')
+            if symbol and coin_id:
+                universe[symbol.upper()] = coin_id.strip()
+        return universe
+    with open(path or os.getenv('CRYPTO_UNIVERSE_FILE') or DEFAULT_CRYPTO_UNIVERSE_FILE, 'r') as f:
+        return {symbol.upper(): coin_id for symbol, coin_id in json.load(f).items()}
+
+
 class Config:
     # API Keys
     COINGECKO_API_KEY = os.getenv('COINGECKO_API_KEY')
@@ -15,19 +38,48 @@ class Config:
     MONGODB_DATABASE = os.getenv('MONGODB_DATABASE', 'marketdata')
     MONGODB_COLLECTION = os.getenv('MONGODB_COLLECTION', 'market_info')
     
-    # API Endpoints
-    COINGECKO_BASE_URL = "https://api.coingecko.com/api/v3"
-    POLYGON_BASE_URL = "https://api.polygon.io"
-    FEAR_GREED_URL = "https://api.alternative.me/fng/"
-    
-    # Crypto symbols to track
-    CRYPTO_SYMBOLS = ['bitcoin', 'ethereum', 'solana']
-    CRYPTO_IDS = {
-        'BTC': 'bitcoin',
-        'ETH': 'ethereum', 
-        'SOL': 'solana'
+    # API Endpoints (overridable, e.g. to replay fixtures from benchmarks/harness.py)
+    COINGECKO_BASE_URL = os.getenv('COINGECKO_BASE_URL', "https://api.coingecko.com/api/v3")
+    POLYGON_BASE_URL = os.getenv('POLYGON_BASE_URL', "https://api.polygon.io")
+    FEAR_GREED_URL = os.getenv('FEAR_GREED_URL', "https://api.alternative.me/fng/")
+    BLOCKCHAIN_STATS_URL = os.getenv('BLOCKCHAIN_STATS_URL', "https://api.blockchain.info/stats")
+    FRED_BASE_URL = os.getenv('FRED_BASE_URL', "https://api.stlouisfed.org/fred")
+    
+    # Pause between FRED release lookups in the calendar fetcher (seconds)
+    FRED_RELEASE_DELAY = float(os.getenv('FRED_RELEASE_DELAY', '0.5'))
+    
+    # Index quote providers for the macro scraper, in priority order
+    MACRO_QUOTE_PROVIDERS = [p.strip() for p in os.getenv('MACRO_QUOTE_PROVIDERS', 'polygon,yfinance').split(',') if p.strip()]
+    
+    # Source of the 10-year Treasury yield: 'yfinance' (^TNX), 'fred' (DGS10) or 'none'
+    TREASURY_10Y_SOURCE = os.getenv('TREASURY_10Y_SOURCE', 'yfinance')
+    
+    # Index quote fusion: 'freshest' (newest bar wins) or 'first' (first valid answer wins)
+    QUOTE_FUSION_POLICY = os.getenv('QUOTE_FUSION_POLICY', 'freshest')
+    QUOTE_FUSION_TIMEOUT = float(os.getenv('QUOTE_FUSION_TIMEOUT', '15'))
+    
+    # Per-stage deadlines (seconds) for the parallel combined scrape
+    STAGE_DEADLINES = {
+        'crypto': float(os.getenv('CRYPTO_STAGE_DEADLINE', '30')),
+        'macro': float(os.getenv('MACRO_STAGE_DEADLINE', '60')),
+        'calendar': float(os.getenv('CALENDAR_STAGE_DEADLINE', '120'))
     }
+    CALENDAR_DAYS_AHEAD = int(os.getenv('CALENDAR_DAYS_AHEAD', '30'))
     
+    # Crypto universe to track: symbol -> CoinGecko id (see load_crypto_universe)
+    CRYPTO_IDS = load_crypto_universe()
+    CRYPTO_SYMBOLS = list(dict.fromkeys(CRYPTO_IDS.values()))
+    
+    # CoinGecko request budget, shared by the price scraper and the history backfill
+    COINGECKO_RATE_PER_MINUTE = float(os.getenv('COINGECKO_RATE_PER_MINUTE', '30'))
+    COINGECKO_BURST = int(os.getenv('COINGECKO_BURST', '5'))
+    COINGECKO_MAX_IDS_PER_REQUEST = int(os.getenv('COINGECKO_MAX_IDS_PER_REQUEST', '250'))
+    COINGECKO_MAX_WORKERS = int(os.getenv('COINGECKO_MAX_WORKERS', '4'))
+
+    # Request budgets for the history backfill (backfill.py)
+    YFINANCE_RATE_PER_MINUTE = float(os.getenv('YFINANCE_RATE_PER_MINUTE', '60'))
+    FRED_RATE_PER_MINUTE = float(os.getenv('FRED_RATE_PER_MINUTE', '100'))
+
     # Stock indices to track
     STOCK_INDICES = {
         'sp500': 'SPY',
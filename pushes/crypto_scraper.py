@@ -5,12 +5,14 @@ Fetches crypto prices, hash rates, and fear & greed index data
 """
 
 import requests
-import json
 import time
-from datetime import datetime
 import logging
 from config import Config
+from coingecko import CoinGeckoClient
 import os
+from snapshot_io import write_json_atomic
+from metrics import upstream_timer, stage_timer, flush_metrics
+from snapshot_models import CryptoPrice, CryptoSnapshot, SnapshotValidationError, now_ms
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -19,6 +21,7 @@ logger = logging.getLogger(__name__)
 class CryptoScraper:
     def __init__(self):
         self.config = Config()
+        self.coingecko = CoinGeckoClient(self.config)
         self.ensure_data_directories()
     
     def ensure_data_directories(self):
@@ -27,37 +30,24 @@ class CryptoScraper:
         logger.info("Ensured crypto_data directory exists")
     
     def get_crypto_prices(self):
-        """Fetch cryptocurrency prices from CoinGecko"""
+        """Fetch prices for the whole crypto universe from CoinGecko, in concurrent chunks"""
         try:
             crypto_data = {}
-            
-            # Get prices for BTC, ETH, SOL
-            url = f"{self.config.COINGECKO_BASE_URL}/simple/price"
-            params = {
-                'ids': ','.join(self.config.CRYPTO_SYMBOLS),
-                'vs_currencies': 'usd',
-                'include_market_cap': 'true',
-                'include_24hr_vol': 'true',
-                'include_24hr_change': 'true',
-                'x_cg_demo_api_key': self.config.COINGECKO_API_KEY
-            }
-            
-            response = requests.get(url, params=params)
-            response.raise_for_status()
-            data = response.json()
+            table = self.coingecko.simple_prices(self.config.CRYPTO_IDS)
             
             # Format the data according to your structure
-            for crypto_id, symbol in self.config.CRYPTO_IDS.items():
-                if symbol in data:
-                    crypto_data[crypto_id] = {
-                        'price_usd': data[symbol]['usd'],
-                        'market_cap': data[symbol].get('usd_market_cap'),
-                        'volume_24h': data[symbol].get('usd_24h_vol'),
-                        'change_24h': data[symbol].get('usd_24h_change'),
-                        'timestamp': datetime.utcnow().isoformat()
-                    }
-            
-            logger.info(f"Successfully fetched crypto prices for {len(crypto_data)} cryptocurrencies")
+            for row in table.rows():
+                if row['price_usd'] is None:
+                    continue
+                crypto_data[row['symbol']] = CryptoPrice(
+                    price_usd=row['price_usd'],
+                    market_cap=row['market_cap'],
+                    volume_24h=row['volume_24h'],
+                    change_24h=row['change_24h'],
+                    timestamp=row['timestamp']
+                )
+            
+            logger.info(f"Successfully fetched crypto prices for {len(crypto_data)} of {len(self.config.CRYPTO_IDS)} cryptocurrencies")
             return crypto_data
             
         except Exception as e:
@@ -72,15 +62,15 @@ class CryptoScraper:
             hash_rates = {}
             
             # Bitcoin hash rate from blockchain.info
-            btc_stats_url = "https://api.blockchain.info/stats"
-            response = requests.get(btc_stats_url)
+            with upstream_timer('blockchain_info'):
+                response = requests.get(self.config.BLOCKCHAIN_STATS_URL)
             response.raise_for_status()
             data = response.json()
             
             hash_rates['BTC'] = {
                 'hash_rate_th_s': data.get('hash_rate', 0) / 1e12,  # Convert to TH/s
                 'difficulty': data.get('difficulty', 0),
-                'timestamp': datetime.utcnow().isoformat()
+                'timestamp': now_ms()
             }
             
             logger.info("Successfully fetched Bitcoin hash rate")
@@ -88,12 +78,13 @@ class CryptoScraper:
             
         except Exception as e:
             logger.error(f"Error fetching hash rates: {e}")
-            return {'BTC': {'hash_rate_th_s': 0, 'difficulty': 0, 'timestamp': datetime.utcnow().isoformat()}}
+            return {'BTC': {'hash_rate_th_s': 0, 'difficulty': 0, 'timestamp': now_ms()}}
     
     def get_fear_greed_index(self):
         """Fetch Fear & Greed Index"""
         try:
-            response = requests.get(self.config.FEAR_GREED_URL)
+            with upstream_timer('alternative_me'):
+                response = requests.get(self.config.FEAR_GREED_URL)
             response.raise_for_status()
             data = response.json()
             
@@ -101,7 +92,7 @@ class CryptoScraper:
                 fear_greed_data = {
                     'value': int(data['data'][0]['value']),
                     'value_classification': data['data'][0]['value_classification'],
-                    'timestamp': datetime.utcnow().isoformat()
+                    'timestamp': now_ms()
                 }
                 logger.info(f"Successfully fetched Fear & Greed Index: {fear_greed_data['value']}")
                 return fear_greed_data
@@ -109,7 +100,7 @@ class CryptoScraper:
         except Exception as e:
             logger.error(f"Error fetching Fear & Greed Index: {e}")
             
-        return {'value': 0, 'value_classification': 'Unknown', 'timestamp': datetime.utcnow().isoformat()}
+        return {'value': 0, 'value_classification': 'Unknown', 'timestamp': now_ms()}
     
     def scrape_crypto_data(self):
         """Main function to scrape all crypto data"""
@@ -117,32 +108,34 @@ class CryptoScraper:
             logger.info("Starting crypto data scraping...")
             
             # Fetch all crypto data
-            crypto_prices = self.get_crypto_prices()
-            hash_rates = self.get_hash_rates()
-            fear_greed = self.get_fear_greed_index()
-            
-            # Structure the data according to your schema
-            crypto_data = {
-                'crypto_prices': crypto_prices,
-                'hash_rates': hash_rates,
-                'fear_greed_index': fear_greed,
-                'timestamp': datetime.utcnow().isoformat(),
-                'data_type': 'crypto'
-            }
-            
-            return crypto_data
-            
+            with stage_timer('crypto', 'fetch'):
+                crypto_prices = self.get_crypto_prices()
+                hash_rates = self.get_hash_rates()
+                fear_greed = self.get_fear_greed_index()
+            
+            # Structure the data according to the shared snapshot schema
+            with stage_timer('crypto', 'transform'):
+                snapshot = CryptoSnapshot(
+                    crypto_prices=crypto_prices,
+                    hash_rates=hash_rates,
+                    fear_greed_index=fear_greed,
+                    timestamp=now_ms()
+                )
+                return snapshot.to_dict()
+            
+        except SnapshotValidationError as e:
+            logger.error(f"Crypto snapshot failed validation: {e}")
+            return None
         except Exception as e:
             logger.error(f"Error in crypto data scraping: {e}")
             return None
     
     def save_to_json(self, data, filename="crypto_data/latest.json"):
-        """Save data to JSON file, overwriting existing file"""
+        """Save data to JSON file, atomically replacing the existing file"""
         try:
-            with open(filename, 'w') as f:
-                json.dump(data, f, indent=2, default=str)
+            generation = write_json_atomic(filename, data)
             
-            logger.info(f"Data saved to JSON file: {filename}")
+            logger.info(f"Data saved to JSON file: {filename} (generation {generation})")
             return True
             
         except Exception as e:
@@ -155,7 +148,8 @@ class CryptoScraper:
         
         if data:
             # Save to JSON
-            self.save_to_json(data)
+            with stage_timer('crypto', 'write'):
+                self.save_to_json(data)
             
             logger.info("Crypto scraping completed successfully")
             return data
@@ -179,6 +173,8 @@ def main():
             
     except KeyboardInterrupt:
         logger.info("Scraping interrupted by user")
+    finally:
+        flush_metrics('crypto')
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+Derived Metrics
+Series computed from the stored histories: MoM/YoY changes, real rates,
+cross-asset ratios and rolling correlations. Each metric is a vectorized
+NumPy expression over its inputs, which are stored series (backfill.py and
+cli-charts .bin files) or other derived metrics.
+
+Metrics are evaluated in dependency order. A metric's fingerprint covers its
+definition and the content of everything it depends on; when the fingerprint
+matches the one recorded for the cached result, the metric is not
+recomputed. Results are written to derived_data/<name>.bin in the history
+store format, with derived_data/manifest.json describing each one for the
+backend (/api/derived).
+
+Usage:
+    python derived_metrics.py                   # refresh every metric whose inputs changed
+    python derived_metrics.py --metrics CPI_YOY --force
+    python derived_metrics.py --list
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+from dataclasses import dataclass
+from graphlib import TopologicalSorter
+
+import numpy as np
+
+try:
+    from backfill import HISTORY_DIR, CRYPTO_HISTORY_DIR
+    from history_store import HistoryFile, write_history, day_to_date
+    from metrics import stage_timer, flush_metrics
+    from snapshot_io import write_json_atomic
+    from snapshot_models import now_ms
+except ImportError:  # imported as pushes.derived_metrics
+    from pushes.backfill import HISTORY_DIR, CRYPTO_HISTORY_DIR
+    from pushes.history_store import HistoryFile, write_history, day_to_date
+    from pushes.metrics import stage_timer, flush_metrics
+    from pushes.snapshot_io import write_json_atomic
+    from pushes.snapshot_models import now_ms
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DERIVED_DIR = os.getenv('DERIVED_DATA_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'derived_data'))
+MANIFEST_FILE = 'manifest.json'
+
+
+@dataclass(slots=True)
+class TimeSeries:
+    days: np.ndarray    # int64 epoch days, ascending
+    values: np.ndarray  # float64, one per day
+
+    def __len__(self):
+        return len(self.days)
+
+    def dropna(self):
+        keep = np.isfinite(self.values)
+        return self if keep.all() else TimeSeries(self.days[keep], self.values[keep])
+
+
+# Vectorized building blocks for metric expressions
+
+def asof(series, days):
+    """Value of series at or before each of `days` (NaN before its first sample)"""
+    idx = np.searchsorted(series.days, days, side='right') - 1
+    out = np.full(len(days), np.nan)
+    found = idx >= 0
+    out[found] = series.values[idx[found]]
+    return out
+
+
+def months_before(days, months):
+    """The same day of month `months` months earlier, clamped to the end of shorter months"""
+    dates = np.asarray(days).astype('datetime64[D]')
+    month = dates.astype('datetime64[M]')
+    target_month = month - months
+    month_end = (target_month + 1).astype('datetime64[D]') - 1
+    target = np.minimum(target_month.astype('datetime64[D]') + (dates - month.astype('datetime64[D]')), month_end)
+    return target.astype(np.int64)
+
+
+def pct_change(series, months=0, days=0):
+    """Percent change against the value `months` months or `days` days earlier"""
+    lookback = months_before(series.days, months) if months else series.days - days
+    return TimeSeries(series.days, (series.values / asof(series, lookback) - 1) * 100).dropna()
+
+
+def spread(a, b):
+    """a - b on a's days, b taken as of each day"""
+    return TimeSeries(a.days, a.values - asof(b, a.days)).dropna()
+
+
+def ratio(a, b):
+    """a / b on a's days, b taken as of each day"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        values = a.values / asof(b, a.days)
+    return TimeSeries(a.days, values).dropna()
+
+
+def rolling_corr(a, b, window):
+    """
+    Rolling correlation of log returns over `window` days both series have a sample
+
+    Returns are taken between consecutive common days, so a weekend of crypto
+    moves counts against the following Monday's equity move.
+    """
+    common, ia, ib = np.intersect1d(a.days, b.days, assume_unique=True, return_indices=True)
+    if len(common) <= window:
+        return TimeSeries(common[:0], np.empty(0))
+    x = np.diff(np.log(a.values[ia]))
+    y = np.diff(np.log(b.values[ib]))
+
+    def windowed(v):
+        c = np.concatenate(([0.0], np.cumsum(v)))
+        return c[window:] - c[:-window]
+
+    sx, sy = windowed(x), windowed(y)
+    sxx, syy, sxy = windowed(x * x), windowed(y * y), windowed(x * y)
+    cov = window * sxy - sx * sy
+    var = (window * sxx - sx * sx) * (window * syy - sy * sy)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        corr = cov / np.sqrt(var)
+    return TimeSeries(common[window:], np.clip(corr, -1.0, 1.0)).dropna()
+
+
+@dataclass(frozen=True)
+class DerivedMetric:
+    name: str
+    inputs: tuple
+    compute: object  # function(*input TimeSeries) -> TimeSeries
+    unit: str = ''
+    description: str = ''
+
+    @property
+    def version(self):
+        """Changes whenever the expression's code, the names it calls or its constants change"""
+        return hashlib.blake2b(_code_key(self.compute.__code__), digest_size=8).hexdigest()
+
+
+def _code_key(code):
+    # Nested code objects (lambdas, comprehensions) are expanded: their repr holds a memory address
+    consts = b''.join(_code_key(c) if hasattr(c, 'co_code') else repr(c).encode() for c in code.co_consts)
+    return code.co_code + repr(code.co_names).encode() + consts
+
+
+METRICS = {}
+
+
+def metric(name, *inputs, unit='', description=''):
+    """Register the decorated expression as a derived metric over `inputs`"""
+    def register(compute):
+        METRICS[name] = DerivedMetric(name, inputs, compute, unit, description)
+        return compute
+    return register
+
+
+@metric('CPI_MOM', 'CPIAUCSL', unit='%', description='CPI month-over-month change')
+def _cpi_mom(cpi):
+    return pct_change(cpi, months=1)
+
+
+@metric('CPI_YOY', 'CPIAUCSL', unit='%', description='CPI year-over-year change')
+def _cpi_yoy(cpi):
+    return pct_change(cpi, months=12)
+
+
+@metric('RETAIL_SALES_MOM', 'RSAFS', unit='%', description='Retail sales month-over-month change')
+def _retail_mom(retail):
+    return pct_change(retail, months=1)
+
+
+@metric('RETAIL_SALES_YOY', 'RSAFS', unit='%', description='Retail sales year-over-year change')
+def _retail_yoy(retail):
+    return pct_change(retail, months=12)
+
+
+@metric('REAL_RATE_10Y', 'DGS10', 'CPI_YOY', unit='%', description='10-year Treasury yield minus CPI YoY')
+def _real_rate(dgs10, cpi_yoy):
+    return spread(dgs10, cpi_yoy)
+
+
+@metric('BTC_SPY_CORR_30D', 'BTC', 'SPY', description='30-day rolling correlation of BTC and SPY daily returns')
+def _btc_spy_corr_30d(btc, spy):
+    return rolling_corr(btc, spy, 30)
+
+
+@metric('BTC_SPY_CORR_90D', 'BTC', 'SPY', description='90-day rolling correlation of BTC and SPY daily returns')
+def _btc_spy_corr_90d(btc, spy):
+    return rolling_corr(btc, spy, 90)
+
+
+@metric('ETH_BTC', 'ETH', 'BTC', description='ETH priced in BTC')
+def _eth_btc(eth, btc):
+    return ratio(eth, btc)
+
+
+@metric('QQQ_SPY', 'QQQ', 'SPY', description='Nasdaq 100 relative to the S&P 500')
+def _qqq_spy(qqq, spy):
+    return ratio(qqq, spy)
+
+
+@metric('BTC_GOLD', 'BTC', 'GOLD', description='BTC priced in ounces of gold')
+def _btc_gold(btc, gold):
+    return ratio(btc, gold)
+
+
+def stored_series_path(name):
+    """The .bin file of a stored series: backfilled history first, then cli-charts crypto history"""
+    for directory in (HISTORY_DIR, CRYPTO_HISTORY_DIR):
+        path = os.path.join(directory, f"{name}.bin")
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def _load(path):
+    history = HistoryFile(path)
+    # Copy out of the mapping so the file can be replaced while the series is in use
+    return TimeSeries(np.array(history.days), np.array(history.prices))
+
+
+def _file_digest(path):
+    with open(path, 'rb') as f:
+        return hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+
+
+class DerivedMetricsEngine:
+    """Evaluates metrics in dependency order, reusing cached results whose fingerprint is unchanged"""
+
+    def __init__(self, metrics=None, output_dir=DERIVED_DIR, resolve=stored_series_path):
+        self.metrics = METRICS if metrics is None else metrics
+        self.output_dir = output_dir
+        self.resolve = resolve
+        self.manifest_path = os.path.join(output_dir, MANIFEST_FILE)
+
+    def order(self, names=None):
+        """
+        Metrics to evaluate, each after the metrics it depends on
+
+        Raises:
+            KeyError: If a requested metric is not defined
+            graphlib.CycleError: If metric definitions depend on each other in a cycle
+        """
+        wanted, stack = set(), list(names if names is not None else self.metrics)
+        while stack:
+            name = stack.pop()
+            if name in wanted:
+                continue
+            wanted.add(name)
+            stack.extend(i for i in self.metrics[name].inputs if i in self.metrics)
+        graph = {name: [i for i in self.metrics[name].inputs if i in self.metrics] for name in wanted}
+        return list(TopologicalSorter(graph).static_order())
+
+    def manifest(self):
+        try:
+            with open(self.manifest_path, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {'updated_at': None, 'metrics': {}}
+
+    def output_path(self, name):
+        return os.path.join(self.output_dir, f"{name}.bin")
+
+    def run(self, names=None, force=False):
+        """
+        Bring the requested metrics (default: all) and their dependencies up to date
+
+        Returns:
+            dict: metric name -> 'computed', 'cached' or 'missing' (an input series is absent)
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        manifest = self.manifest()
+        entries = dict(manifest['metrics'])
+        fingerprints, values, status = {}, {}, {}
+
+        def input_fingerprint(name):
+            if name in self.metrics:
+                return fingerprints.get(name)
+            if name not in fingerprints:
+                path = self.resolve(name)
+                fingerprints[name] = _file_digest(path) if path else None
+            return fingerprints[name]
+
+        def input_value(name):
+            if name not in values:
+                values[name] = _load(self.output_path(name) if name in self.metrics else self.resolve(name))
+            return values[name]
+
+        for name in self.order(names):
+            definition = self.metrics[name]
+            parts = [input_fingerprint(i) for i in definition.inputs]
+            if any(part is None for part in parts):
+                missing = [i for i, part in zip(definition.inputs, parts) if part is None]
+                logger.warning(f"{name}: missing input {', '.join(missing)}")
+                status[name] = 'missing'
+                continue
+            fingerprint = hashlib.blake2b('|'.join([name, definition.version, *parts]).encode(),
+                                          digest_size=16).hexdigest()
+            fingerprints[name] = fingerprint
+            cached = entries.get(name)
+            if not force and cached and cached['fingerprint'] == fingerprint and os.path.exists(self.output_path(name)):
+                status[name] = 'cached'
+                continue
+
+            result = definition.compute(*(input_value(i) for i in definition.inputs))
+            write_history(self.output_path(name), result.days, result.values)
+            values[name] = result
+            entries[name] = {
+                'fingerprint': fingerprint,
+                'inputs': list(definition.inputs),
+                'unit': definition.unit,
+                'description': definition.description,
+                'count': len(result),
+                'first_date': day_to_date(result.days[0]).isoformat() if len(result) else None,
+                'last_date': day_to_date(result.days[-1]).isoformat() if len(result) else None,
+                'computed_at': now_ms()
+            }
+            status[name] = 'computed'
+
+        if any(s == 'computed' for s in status.values()):
+            write_json_atomic(self.manifest_path, {'updated_at': now_ms(), 'metrics': entries})
+        return status
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Refresh derived metrics from the stored histories')
+    parser.add_argument('--metrics', help='Comma-separated metric names (default: all)')
+    parser.add_argument('--force', action='store_true', help='Recompute even if the inputs are unchanged')
+    parser.add_argument('--list', action='store_true', help='List metric definitions and exit')
+    args = parser.parse_args()
+
+    engine = DerivedMetricsEngine()
+    if args.list:
+        for name in engine.order():
+            definition = METRICS[name]
+            print(f"{name:<20} {', '.join(definition.inputs):<20} {definition.description}")
+        return
+
+    names = [n.strip() for n in args.metrics.split(',')] if args.metrics else None
+    try:
+        with stage_timer('derived', 'compute'):
+            status = engine.run(names, force=args.force)
+        counts = {s: sum(1 for v in status.values() if v == s) for s in ('computed', 'cached', 'missing')}
+        logger.info(f"Derived metrics: {counts['computed']} computed, {counts['cached']} unchanged, "
+                    f"{counts['missing']} missing inputs")
+    finally:
+        flush_metrics('derived')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Binary History Store
+Fixed-width price history files: a 32-byte header followed by one
+(int64 epoch day, float64 price) record per day in ascending date order.
+Readers mmap the file and binary-search date ranges on zero-copy NumPy views;
+writers append new days in place instead of rewriting the file; backfills of
+older days merge and replace the file atomically.
+
+Appends write the new records first and publish them by bumping the record
+count in the header, so a concurrent reader never sees a half-written row.
+
+Usage:
+    python history_store.py ../cli-charts/data/*.csv   # convert CSVs to .bin beside them
+"""
+
+import argparse
+import csv
+import mmap
+import os
+import struct
+from contextlib import contextmanager
+from datetime import date, datetime
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are not serialized between processes
+    fcntl = None
+
+try:
+    from snapshot_io import write_atomic
+except ImportError:  # imported as pushes.history_store
+    from pushes.snapshot_io import write_atomic
+
+MAGIC = b'MIHIST01'
+VERSION = 1
+# magic, version, reserved, record count, padding to a 16-byte record boundary
+HEADER = struct.Struct('<8sIIQ8x')
+RECORD = np.dtype([('day', '<i8'), ('price', '<f8')])
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+CSV_DATE_FORMAT = '%d/%m/%Y'
+
+
+def date_to_day(value):
+    """Epoch day of a date, datetime or cli-charts DD/MM/YYYY string"""
+    if isinstance(value, str):
+        value = datetime.strptime(value, CSV_DATE_FORMAT)
+    if isinstance(value, datetime):
+        value = value.date()
+    return value.toordinal() - EPOCH_ORDINAL
+
+
+def day_to_date(day):
+    return date.fromordinal(int(day) + EPOCH_ORDINAL)
+
+
+def days_to_strings(days):
+    """Vectorized epoch days -> DD/MM/YYYY strings"""
+    iso = np.asarray(days).astype('datetime64[D]').astype(str)
+    return [f"{d[8:10]}/{d[5:7]}/{d[0:4]}" for d in iso]
+
+
+def binary_path(csv_path):
+    """The .bin file that sits beside a history CSV"""
+    return os.path.splitext(os.fspath(csv_path))[0] + '.bin'
+
+
+def _records(days, prices):
+    records = np.empty(len(days), dtype=RECORD)
+    records['day'] = days
+    records['price'] = prices
+    return records
+
+
+def write_history(path, days, prices):
+    """
+    Atomically write a complete history file
+
+    Args:
+        path (str): Destination .bin file
+        days (sequence[int]): Epoch days, strictly ascending
+        prices (sequence[float]): One price per day
+    """
+    records = _records(days, prices)
+    if len(records) > 1 and not (np.diff(records['day']) > 0).all():
+        raise ValueError("History days must be strictly ascending")
+    write_atomic(path, HEADER.pack(MAGIC, VERSION, 0, len(records)) + records.tobytes())
+
+
+@contextmanager
+def _locked(path):
+    """
+    Open a history file for update under its exclusive lock
+
+    merge_history replaces the file while holding the lock, so after waiting
+    for it check that the path still names the file we locked; if not, lock
+    the replacement instead of appending to the orphaned one.
+    """
+    while True:
+        f = open(path, 'r+b')
+        try:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            if os.fstat(f.fileno()).st_ino == os.stat(path).st_ino:
+                yield f
+                return
+        finally:
+            f.close()
+
+
+def append_history(path, days, prices):
+    """
+    Append days newer than the last stored day, in place
+
+    A record for the last stored day replaces its price (a later sample of the
+    current day); older days are skipped, so re-appending a fetched window is
+    harmless. Creates the file if it does not exist.
+
+    Returns:
+        int: Number of records appended
+    """
+    records = _records(days, prices)
+    if not os.path.exists(path):
+        write_history(path, records['day'], records['price'])
+        return len(records)
+
+    with _locked(path) as f:
+        count = _read_header(f.read(HEADER.size), path)
+        if count:
+            last_offset = HEADER.size + (count - 1) * RECORD.itemsize
+            f.seek(last_offset)
+            last_day = np.frombuffer(f.read(RECORD.itemsize), dtype=RECORD)['day'][0]
+            same_day = records[records['day'] == last_day]
+            if len(same_day):
+                # One aligned 8-byte write; readers see the old or the new price
+                f.seek(last_offset + RECORD.fields['price'][1])
+                f.write(same_day['price'][-1:].tobytes())
+            records = records[records['day'] > last_day]
+        if not len(records):
+            return 0
+        if len(records) > 1 and not (np.diff(records['day']) > 0).all():
+            raise ValueError("History days must be strictly ascending")
+
+        _append_records(f, count, records)
+    return len(records)
+
+
+def _append_records(f, count, records):
+    """Write records after the first `count`, then publish them in the header"""
+    # Rows past the published count are invisible to readers until the header moves
+    f.seek(HEADER.size + count * RECORD.itemsize)
+    f.write(records.tobytes())
+    f.truncate()
+    f.flush()
+    os.fsync(f.fileno())
+    f.seek(0)
+    f.write(HEADER.pack(MAGIC, VERSION, 0, count + len(records)))
+    f.flush()
+    os.fsync(f.fileno())
+
+
+def merge_history(path, days, prices):
+    """
+    Merge records into a history file, in any date order
+
+    Fetched prices replace stored ones for the same day, so merging the same
+    window twice leaves the file unchanged. Days past the end are appended in
+    place; anything else rewrites the file atomically.
+
+    Returns:
+        int: Number of days not previously stored
+    """
+    records = _records(days, prices)
+    # Last value per day wins within the batch too
+    order = np.argsort(records['day'], kind='stable')
+    records = records[order]
+    keep = np.append(records['day'][1:] != records['day'][:-1], True) if len(records) else np.empty(0, bool)
+    records = records[keep]
+    if not len(records):
+        return 0
+    if not os.path.exists(path):
+        write_history(path, records['day'], records['price'])
+        return len(records)
+
+    with _locked(path) as f:
+        count = _read_header(f.read(HEADER.size), path)
+        stored = np.frombuffer(f.read(count * RECORD.itemsize), dtype=RECORD, count=count).copy()
+        if not count or records['day'][0] > stored['day'][-1]:
+            _append_records(f, count, records)
+            return len(records)
+
+        new_days = ~np.isin(records['day'], stored['day'])
+        merged = np.concatenate([stored[~np.isin(stored['day'], records['day'])], records])
+        merged = merged[np.argsort(merged['day'], kind='stable')]
+        if len(merged) == count and (merged == stored).all():
+            return 0
+        # Replace the file while still holding the old one's lock (see _locked)
+        write_atomic(path, HEADER.pack(MAGIC, VERSION, 0, len(merged)) + merged.tobytes())
+        return int(new_days.sum())
+
+
+def _read_header(raw, path):
+    if len(raw) < HEADER.size:
+        raise ValueError(f"{path}: truncated history header")
+    magic, version, _, count = HEADER.unpack_from(raw)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path}: not a version {VERSION} history file")
+    return count
+
+
+class HistoryFile:
+    """
+    Read-only mmap of a history file
+
+    `days` and `prices` are zero-copy views into the mapping; slices returned
+    by `range` are views too. Keep the HistoryFile alive while using them.
+    """
+
+    def __init__(self, path):
+        self.path = os.fspath(path)
+        with open(self.path, 'rb') as f:
+            st = os.fstat(f.fileno())
+            self.identity = (st.st_ino, st.st_mtime_ns, st.st_size)
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        count = _read_header(self._map, self.path)
+        # Never trust the count past what was mapped (an append may be in flight)
+        count = min(count, (len(self._map) - HEADER.size) // RECORD.itemsize)
+        self.records = np.frombuffer(self._map, dtype=RECORD, count=count, offset=HEADER.size)
+        self.days = self.records['day']
+        self.prices = self.records['price']
+
+    def __len__(self):
+        return len(self.records)
+
+    def range(self, start_day=None, end_day=None):
+        """
+        Records with start_day <= day <= end_day, found by binary search
+
+        Returns:
+            numpy.ndarray: View of the matching records
+        """
+        lo = 0 if start_day is None else int(np.searchsorted(self.days, start_day, side='left'))
+        hi = len(self.records) if end_day is None else int(np.searchsorted(self.days, end_day, side='right'))
+        return self.records[lo:hi]
+
+
+def read_csv_series(csv_path):
+    """
+    Read a cli-charts date,price CSV into ascending (days, prices)
+
+    Rows are sorted by date; for duplicate dates the last row wins and
+    unparseable rows are skipped, as the cli-charts reader does.
+
+    Returns:
+        tuple: (list of epoch days, list of prices)
+    """
+    by_day = {}
+    with open(csv_path, 'r', newline='') as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        for row in reader:
+            try:
+                by_day[date_to_day(row[0])] = float(row[1])
+            except (ValueError, IndexError):
+                continue
+    days = sorted(by_day)
+    return days, [by_day[day] for day in days]
+
+
+def convert_csv(csv_path, bin_path=None):
+    """
+    Convert a cli-charts date,price CSV into a history file (see read_csv_series)
+
+    Returns:
+        str: Path of the written .bin file
+    """
+    bin_path = bin_path or binary_path(csv_path)
+    days, prices = read_csv_series(csv_path)
+    write_history(bin_path, days, prices)
+    return bin_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert price history CSVs to binary history files')
+    parser.add_argument('csv_files', nargs='+', help='cli-charts date,price CSV files')
+    args = parser.parse_args()
+
+    for csv_path in args.csv_files:
+        bin_path = convert_csv(csv_path)
+        print(f"{csv_path} -> {bin_path} ({len(HistoryFile(bin_path))} days)")
+
+
+if __name__ == "__main__":
+    main()
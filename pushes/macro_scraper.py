@@ -5,24 +5,96 @@ Fetches market indices, interest rates, and consumer data
 """
 
 import requests
-import json
-import yfinance as yf
 from datetime import datetime, timedelta
 import logging
 from config import Config
-import time
-from fredapi import Fred
 import os
+from snapshot_io import write_json_atomic
+from metrics import upstream_timer, stage_timer, flush_metrics
+from quote_fusion import QuoteProvider, QuoteFusion
+from snapshot_models import MacroSnapshot, SnapshotValidationError, now_ms
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+class YFinanceQuoteProvider(QuoteProvider):
+    """Daily bars from Yahoo Finance"""
+
+    name = 'yfinance'
+
+    def fetch(self, name, symbol):
+        import yfinance as yf  # deferred: costly import, unused in crypto-only runs
+        with upstream_timer('yfinance'):
+            hist = yf.Ticker(symbol).history(period="5d")  # Get 5 days to ensure we have data
+        if hist.empty:
+            logger.warning(f"No data returned for {symbol}")
+            return None
+        
+        latest = hist.iloc[-1]
+        previous = hist.iloc[-2] if len(hist) > 1 else latest
+        
+        return {
+            'price': float(latest['Close']),
+            'open': float(latest['Open']),
+            'high': float(latest['High']),
+            'low': float(latest['Low']),
+            'volume': int(latest['Volume']) if latest['Volume'] > 0 else 0,
+            'previous_close': float(previous['Close']),
+            'data_date': hist.index[-1].strftime('%Y-%m-%d'),
+            'as_of': int(hist.index[-1].timestamp() * 1000)
+        }
+
+
+class PolygonQuoteProvider(QuoteProvider):
+    """Daily aggregates from Polygon.io (SPY and QQQ only)"""
+
+    name = 'polygon'
+    SYMBOLS = {'sp500': 'SPY', 'nasdaq100': 'QQQ'}
+
+    def __init__(self, config):
+        self.config = config
+
+    def supports(self, name, symbol):
+        return name in self.SYMBOLS
+
+    def fetch(self, name, symbol):
+        # The last two daily bars give both the latest close and the previous close
+        end = datetime.utcnow().date()
+        start = end - timedelta(days=7)
+        url = f"{self.config.POLYGON_BASE_URL}/v2/aggs/ticker/{self.SYMBOLS[name]}/range/1/day/{start}/{end}"
+        params = {'apikey': self.config.POLYGON_API_KEY, 'adjusted': 'true', 'sort': 'asc'}
+        
+        with upstream_timer('polygon'):
+            response = requests.get(url, params=params, timeout=10)
+        if response.status_code != 200:
+            logger.warning(f"Polygon API returned status {response.status_code} for {symbol}")
+            return None
+        
+        results = response.json().get('results') or []
+        if not results:
+            return None
+        
+        latest = results[-1]
+        previous = results[-2] if len(results) > 1 else latest
+        return {
+            'price': float(latest['c']),
+            'open': float(latest['o']),
+            'high': float(latest['h']),
+            'low': float(latest['l']),
+            'volume': int(latest.get('v', 0)),
+            'previous_close': float(previous['c']),
+            'data_date': datetime.utcfromtimestamp(latest['t'] / 1000).strftime('%Y-%m-%d'),
+            'as_of': int(latest['t'])
+        }
+
+
 class MacroScraper:
     def __init__(self):
         self.config = Config()
         self.fred = None
         self.setup_fred_api()
+        self.quote_providers = self.build_quote_providers()
         self.ensure_data_directories()
     
     def ensure_data_directories(self):
@@ -34,7 +106,9 @@ class MacroScraper:
         """Setup FRED API connection"""
         try:
             if self.config.FRED_API_KEY:
+                from fredapi import Fred
                 self.fred = Fred(api_key=self.config.FRED_API_KEY)
+                self.fred.root_url = self.config.FRED_BASE_URL
                 logger.info("FRED API initialized successfully")
             else:
                 logger.warning("FRED API key not found. Economic data will use placeholders.")
@@ -42,11 +116,19 @@ class MacroScraper:
             logger.error(f"Failed to initialize FRED API: {e}")
             self.fred = None
     
+    def build_quote_providers(self):
+        """Quote providers in priority order (earlier wins ties on freshness), from MACRO_QUOTE_PROVIDERS"""
+        providers = []
+        for name in self.config.MACRO_QUOTE_PROVIDERS:
+            if name == 'polygon' and self.config.POLYGON_API_KEY:
+                providers.append(PolygonQuoteProvider(self.config))
+            elif name == 'yfinance':
+                providers.append(YFinanceQuoteProvider())
+        return providers
+    
     def get_market_indices(self):
-        """Fetch market indices data using yfinance - specifically SPY and QQQ"""
+        """Fetch SPY, QQQ and VIX quotes, fusing all configured providers concurrently"""
         try:
-            market_data = {}
-            
             # Force use of SPY and QQQ regardless of config
             indices_to_fetch = {
                 'sp500': 'SPY',     # S&P 500 ETF
@@ -54,74 +136,17 @@ class MacroScraper:
                 'vix': '^VIX'       # VIX Volatility Index
             }
             
-            logger.info("Fetching market indices: SPY, QQQ, and VIX")
+            logger.info(f"Fetching market indices: SPY, QQQ, and VIX from {[p.name for p in self.quote_providers]}")
             
-            for name, symbol in indices_to_fetch.items():
-                try:
-                    logger.info(f"Fetching data for {name} ({symbol})")
-                    ticker = yf.Ticker(symbol)
-                    hist = ticker.history(period="5d")  # Get 5 days to ensure we have data
-                    
-                    if not hist.empty:
-                        latest = hist.iloc[-1]
-                        previous = hist.iloc[-2] if len(hist) > 1 else latest
-                        
-                        # Calculate proper change from previous close
-                        change = float(latest['Close'] - previous['Close'])
-                        change_percent = float((change / previous['Close']) * 100)
-                        
-                        market_data[name] = {
-                            'symbol': symbol,
-                            'price': float(latest['Close']),
-                            'open': float(latest['Open']),
-                            'high': float(latest['High']),
-                            'low': float(latest['Low']),
-                            'volume': int(latest['Volume']) if latest['Volume'] > 0 else 0,
-                            'change': change,
-                            'change_percent': change_percent,
-                            'previous_close': float(previous['Close']),
-                            'timestamp': datetime.utcnow().isoformat(),
-                            'data_date': hist.index[-1].strftime('%Y-%m-%d')
-                        }
-                        
-                        logger.info(f"Successfully fetched {symbol}: ${latest['Close']:.2f} ({change_percent:+.2f}%)")
-                    else:
-                        logger.warning(f"No data returned for {symbol}")
-                        market_data[name] = {
-                            'symbol': symbol,
-                            'price': 0,
-                            'open': 0,
-                            'high': 0,
-                            'low': 0,
-                            'volume': 0,
-                            'change': 0,
-                            'change_percent': 0,
-                            'previous_close': 0,
-                            'timestamp': datetime.utcnow().isoformat(),
-                            'error': 'No data available'
-                        }
-                    
-                    time.sleep(0.5)  # Rate limiting
-                    
-                except Exception as e:
-                    logger.error(f"Error fetching {symbol}: {e}")
-                    market_data[name] = {
-                        'symbol': symbol,
-                        'price': 0,
-                        'open': 0,
-                        'high': 0,
-                        'low': 0,
-                        'volume': 0,
-                        'change': 0,
-                        'change_percent': 0,
-                        'previous_close': 0,
-                        'timestamp': datetime.utcnow().isoformat(),
-                        'error': str(e)
-                    }
+            fusion = QuoteFusion(
+                self.quote_providers,
+                policy=self.config.QUOTE_FUSION_POLICY,
+                timeout=self.config.QUOTE_FUSION_TIMEOUT
+            )
+            market_data = fusion.fuse(indices_to_fetch)
             
-            # Try to get additional data from Polygon.io if available
-            if self.config.POLYGON_API_KEY:
-                self._enhance_with_polygon_data(market_data)
+            for quote in market_data.values():
+                quote['timestamp'] = now_ms()
             
             logger.info(f"Successfully fetched market indices for {len(market_data)} indices")
             return market_data
@@ -130,102 +155,65 @@ class MacroScraper:
             logger.error(f"Error fetching market indices: {e}")
             return {}
     
-    def _enhance_with_polygon_data(self, market_data):
-        """Enhance market data with Polygon.io data for SPY and QQQ"""
-        try:
-            # Get additional data from Polygon.io for SPY and QQQ
-            polygon_symbols = {'sp500': 'SPY', 'nasdaq100': 'QQQ'}
-            
-            logger.info("Enhancing data with Polygon.io API")
-            
-            for name, symbol in polygon_symbols.items():
-                try:
-                    url = f"{self.config.POLYGON_BASE_URL}/v2/aggs/ticker/{symbol}/prev"
-                    params = {'apikey': self.config.POLYGON_API_KEY}
-                    
-                    response = requests.get(url, params=params, timeout=10)
-                    if response.status_code == 200:
-                        data = response.json()
-                        if data.get('results') and len(data['results']) > 0:
-                            result = data['results'][0]
-                            if name in market_data:
-                                # Update with Polygon data if available
-                                polygon_close = result.get('c')
-                                polygon_open = result.get('o')
-                                
-                                market_data[name].update({
-                                    'polygon_close': polygon_close,
-                                    'polygon_open': polygon_open,
-                                    'polygon_volume': result.get('v'),
-                                    'polygon_high': result.get('h'),
-                                    'polygon_low': result.get('l'),
-                                    'polygon_timestamp': result.get('t')
-                                })
-                                
-                                # Use Polygon data as primary if available and recent
-                                if polygon_close and polygon_open:
-                                    market_data[name]['price'] = float(polygon_close)
-                                    market_data[name]['open'] = float(polygon_open)
-                                    market_data[name]['high'] = float(result.get('h', market_data[name]['high']))
-                                    market_data[name]['low'] = float(result.get('l', market_data[name]['low']))
-                                    market_data[name]['volume'] = int(result.get('v', market_data[name]['volume']))
-                                    
-                                    # Recalculate change with Polygon data
-                                    if 'previous_close' in market_data[name]:
-                                        change = polygon_close - market_data[name]['previous_close']
-                                        change_percent = (change / market_data[name]['previous_close']) * 100
-                                        market_data[name]['change'] = float(change)
-                                        market_data[name]['change_percent'] = float(change_percent)
-                                
-                                logger.info(f"Enhanced {symbol} with Polygon data")
-                    else:
-                        logger.warning(f"Polygon API returned status {response.status_code} for {symbol}")
-                    
-                    time.sleep(0.2)  # Rate limiting for Polygon
-                    
-                except Exception as e:
-                    logger.warning(f"Could not enhance {symbol} with Polygon data: {e}")
-                    
-        except Exception as e:
-            logger.warning(f"Error enhancing with Polygon data: {e}")
-    
     def get_interest_rates(self):
         """Fetch interest rates data"""
         try:
             interest_rates = {}
             
-            # Get 10-year Treasury yield using yfinance
+            # Get 10-year Treasury yield (TREASURY_10Y_SOURCE, independent of the index quote providers)
+            source = self.config.TREASURY_10Y_SOURCE
             try:
-                tnx = yf.Ticker("^TNX")  # 10-year Treasury
-                hist = tnx.history(period="1d")
-                
-                if not hist.empty:
-                    latest = hist.iloc[-1]
+                if source == 'yfinance':
+                    import yfinance as yf
+                    tnx = yf.Ticker("^TNX")  # 10-year Treasury
+                    with upstream_timer('yfinance'):
+                        hist = tnx.history(period="1d")
+                    
+                    if not hist.empty:
+                        latest = hist.iloc[-1]
+                        interest_rates['us10yr'] = {
+                            'yield_percent': float(latest['Close']),
+                            'change': float(latest['Close'] - latest['Open']),
+                            'timestamp': now_ms()
+                        }
+                elif source == 'fred':
+                    if not self.fred:
+                        raise RuntimeError("FRED API not available")
+                    with upstream_timer('fred'):
+                        dgs10 = self.fred.get_series('DGS10', sort_order='desc', limit=5)
+                    dgs10 = dgs10.dropna().sort_index()  # holidays come back as missing values
+                    if dgs10.empty:
+                        raise ValueError("No data returned from FRED")
                     interest_rates['us10yr'] = {
-                        'yield_percent': float(latest['Close']),
-                        'change': float(latest['Close'] - latest['Open']),
-                        'timestamp': datetime.utcnow().isoformat()
+                        'yield_percent': float(dgs10.iloc[-1]),
+                        'change': float(dgs10.iloc[-1] - dgs10.iloc[-2]) if len(dgs10) > 1 else 0.0,
+                        'date': dgs10.index[-1].strftime('%Y-%m-%d'),
+                        'timestamp': now_ms(),
+                        'source': 'FRED'
                     }
+                elif source != 'none':
+                    raise ValueError(f"Unknown TREASURY_10Y_SOURCE {source!r}")
                 
             except Exception as e:
                 logger.error(f"Error fetching 10-year Treasury: {e}")
                 interest_rates['us10yr'] = {
                     'yield_percent': 0,
                     'change': 0,
-                    'timestamp': datetime.utcnow().isoformat(),
+                    'timestamp': now_ms(),
                     'error': str(e)
                 }
             
             # Get Fed funds rate from FRED API
             try:
                 if self.fred:
-                    fed_rate_data = self.fred.get_series('FEDFUNDS', limit=1)
+                    with upstream_timer('fred'):
+                        fed_rate_data = self.fred.get_series('FEDFUNDS', limit=1)
                     if not fed_rate_data.empty:
                         latest_rate = fed_rate_data.iloc[-1]
                         interest_rates['fed_funds_rate'] = {
                             'rate_percent': float(latest_rate),
                             'date': fed_rate_data.index[-1].strftime('%Y-%m-%d'),
-                            'timestamp': datetime.utcnow().isoformat(),
+                            'timestamp': now_ms(),
                             'source': 'FRED'
                         }
                     else:
@@ -234,7 +222,7 @@ class MacroScraper:
                     # Fallback to approximate value if FRED not available
                     interest_rates['fed_funds_rate'] = {
                         'rate_percent': 5.25,
-                        'timestamp': datetime.utcnow().isoformat(),
+                        'timestamp': now_ms(),
                         'note': 'FRED API not available - using approximate value'
                     }
                     
@@ -242,7 +230,7 @@ class MacroScraper:
                 logger.error(f"Error fetching Fed funds rate: {e}")
                 interest_rates['fed_funds_rate'] = {
                     'rate_percent': 5.25,
-                    'timestamp': datetime.utcnow().isoformat(),
+                    'timestamp': now_ms(),
                     'error': str(e),
                     'note': 'Using fallback value due to API error'
                 }
@@ -266,21 +254,22 @@ class MacroScraper:
                         'value': 0,
                         'change_mom': 0,
                         'change_yoy': 0,
-                        'timestamp': datetime.utcnow().isoformat(),
+                        'timestamp': now_ms(),
                         'note': 'FRED API not configured'
                     },
                     'retail_sales': {
                         'value': 0,
                         'change_mom': 0,
                         'change_yoy': 0,
-                        'timestamp': datetime.utcnow().isoformat(),
+                        'timestamp': now_ms(),
                         'note': 'FRED API not configured'
                     }
                 }
             
             # Fetch CPI data
             try:
-                cpi_data = self.fred.get_series('CPIAUCSL', limit=13)  # Get last 13 months for YoY calculation
+                with upstream_timer('fred'):
+                    cpi_data = self.fred.get_series('CPIAUCSL', limit=13)  # Get last 13 months for YoY calculation
                 if len(cpi_data) >= 2:
                     latest_cpi = cpi_data.iloc[-1]
                     previous_cpi = cpi_data.iloc[-2]
@@ -291,7 +280,7 @@ class MacroScraper:
                         'change_mom': float(((latest_cpi - previous_cpi) / previous_cpi) * 100),
                         'change_yoy': float(((latest_cpi - yoy_cpi) / yoy_cpi) * 100),
                         'date': cpi_data.index[-1].strftime('%Y-%m-%d'),
-                        'timestamp': datetime.utcnow().isoformat(),
+                        'timestamp': now_ms(),
                         'source': 'FRED'
                     }
                 else:
@@ -303,13 +292,14 @@ class MacroScraper:
                     'value': 0,
                     'change_mom': 0,
                     'change_yoy': 0,
-                    'timestamp': datetime.utcnow().isoformat(),
+                    'timestamp': now_ms(),
                     'error': str(e)
                 }
             
             # Fetch Retail Sales data
             try:
-                retail_data = self.fred.get_series('RSAFS', limit=13)  # Get last 13 months
+                with upstream_timer('fred'):
+                    retail_data = self.fred.get_series('RSAFS', limit=13)  # Get last 13 months
                 if len(retail_data) >= 2:
                     latest_retail = retail_data.iloc[-1]
                     previous_retail = retail_data.iloc[-2]
@@ -320,7 +310,7 @@ class MacroScraper:
                         'change_mom': float(((latest_retail - previous_retail) / previous_retail) * 100),
                         'change_yoy': float(((latest_retail - yoy_retail) / yoy_retail) * 100),
                         'date': retail_data.index[-1].strftime('%Y-%m-%d'),
-                        'timestamp': datetime.utcnow().isoformat(),
+                        'timestamp': now_ms(),
                         'source': 'FRED'
                     }
                 else:
@@ -332,29 +322,31 @@ class MacroScraper:
                     'value': 0,
                     'change_mom': 0,
                     'change_yoy': 0,
-                    'timestamp': datetime.utcnow().isoformat(),
+                    'timestamp': now_ms(),
                     'error': str(e)
                 }
             
             # Fetch additional economic indicators
             try:
                 # Unemployment Rate
-                unemployment_data = self.fred.get_series('UNRATE', limit=1)
+                with upstream_timer('fred'):
+                    unemployment_data = self.fred.get_series('UNRATE', limit=1)
                 if not unemployment_data.empty:
                     consumer_data['unemployment_rate'] = {
                         'rate_percent': float(unemployment_data.iloc[-1]),
                         'date': unemployment_data.index[-1].strftime('%Y-%m-%d'),
-                        'timestamp': datetime.utcnow().isoformat(),
+                        'timestamp': now_ms(),
                         'source': 'FRED'
                     }
                 
                 # Inflation Rate (Annual)
-                inflation_data = self.fred.get_series('FPCPITOTLZGUSA', limit=1)
+                with upstream_timer('fred'):
+                    inflation_data = self.fred.get_series('FPCPITOTLZGUSA', limit=1)
                 if not inflation_data.empty:
                     consumer_data['inflation_rate'] = {
                         'rate_percent': float(inflation_data.iloc[-1]),
                         'date': inflation_data.index[-1].strftime('%Y-%m-%d'),
-                        'timestamp': datetime.utcnow().isoformat(),
+                        'timestamp': now_ms(),
                         'source': 'FRED'
                     }
                     
@@ -374,32 +366,34 @@ class MacroScraper:
             logger.info("Starting macroeconomic data scraping...")
             
             # Fetch all macro data
-            market_indices = self.get_market_indices()
-            interest_rates = self.get_interest_rates()
-            consumer_data = self.get_consumer_data()
+            with stage_timer('macro', 'fetch'):
+                market_indices = self.get_market_indices()
+                interest_rates = self.get_interest_rates()
+                consumer_data = self.get_consumer_data()
             
-            # Structure the data according to your schema
-            macro_data = {
-                'market_indices': market_indices,
-                'interest_rates': interest_rates,
-                'consumer_data': consumer_data,
-                'timestamp': datetime.utcnow().isoformat(),
-                'data_type': 'macro'
-            }
-            
-            return macro_data
+            # Structure the data according to the shared snapshot schema (validates every record)
+            with stage_timer('macro', 'transform'):
+                snapshot = MacroSnapshot.from_dict({
+                    'market_indices': market_indices,
+                    'interest_rates': interest_rates,
+                    'consumer_data': consumer_data,
+                    'timestamp': now_ms()
+                })
+                return snapshot.to_dict()
             
+        except SnapshotValidationError as e:
+            logger.error(f"Macro snapshot failed validation: {e}")
+            return None
         except Exception as e:
             logger.error(f"Error in macro data scraping: {e}")
             return None
     
     def save_to_json(self, data, filename="macro_data/latest.json"):
-        """Save data to JSON file, overwriting existing file"""
+        """Save data to JSON file, atomically replacing the existing file"""
         try:
-            with open(filename, 'w') as f:
-                json.dump(data, f, indent=2, default=str)
+            generation = write_json_atomic(filename, data)
             
-            logger.info(f"Data saved to JSON file: {filename}")
+            logger.info(f"Data saved to JSON file: {filename} (generation {generation})")
             return True
             
         except Exception as e:
@@ -412,7 +406,8 @@ class MacroScraper:
         
         if data:
             # Save to JSON
-            self.save_to_json(data)
+            with stage_timer('macro', 'write'):
+                self.save_to_json(data)
             
             logger.info("Macro scraping completed successfully")
             return data
@@ -436,6 +431,8 @@ def main():
             
     except KeyboardInterrupt:
         logger.info("Scraping interrupted by user")
+    finally:
+        flush_metrics('macro')
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -1,15 +1,21 @@
 #!/usr/bin/env python3
 """
 Main Market Data Scraper
-Single execution snapshot of both crypto and macro data
+Single execution snapshot of crypto, macro and calendar data
 """
 
-import json
 import argparse
-from datetime import datetime
 import logging
+import sys
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from config import Config
 from crypto_scraper import CryptoScraper
 from macro_scraper import MacroScraper
+from snapshot_models import now_ms
+from snapshot_io import write_json_atomic
+from metrics import stage_timer, flush_metrics
 import os
 
 # Setup logging
@@ -23,12 +29,28 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Economic calendar fetcher (calendar/economic_calendar.py)
+CALENDAR_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'calendar')
+
 class MarketDataOrchestrator:
     def __init__(self):
-        self.crypto_scraper = CryptoScraper()
-        self.macro_scraper = MacroScraper()
+        # Scrapers are built on first use, so a crypto-only run never sets up macro sources
+        self._crypto_scraper = None
+        self._macro_scraper = None
         self.ensure_data_directories()
     
+    @property
+    def crypto_scraper(self):
+        if self._crypto_scraper is None:
+            self._crypto_scraper = CryptoScraper()
+        return self._crypto_scraper
+    
+    @property
+    def macro_scraper(self):
+        if self._macro_scraper is None:
+            self._macro_scraper = MacroScraper()
+        return self._macro_scraper
+    
     def ensure_data_directories(self):
         """Create data directories if they don't exist"""
         os.makedirs('crypto_data', exist_ok=True)
@@ -66,42 +88,114 @@ class MarketDataOrchestrator:
             logger.error(f"Error in macro scraping: {e}")
             return None
     
+    def collect_calendar_events(self):
+        """Fetch upcoming economic releases and merge them into the calendar store"""
+        if not Config.FRED_API_KEY:
+            return None
+        
+        # calendar/ shares its name with the stdlib module, so the fetcher is imported
+        # as a top-level module; it imports config and metrics from pushes/ like this script
+        if CALENDAR_DIR not in sys.path:
+            sys.path.append(CALENDAR_DIR)
+        from economic_calendar import EconomicCalendarFetcher
+        
+        fetcher = EconomicCalendarFetcher()
+        events = fetcher.fetch_economic_releases(Config.CALENDAR_DAYS_AHEAD)
+        if events:
+            fetcher.save_events(events)
+        return {'economic_calendar': {'new_events_count': len(events), 'events': events}}
+    
+    def _start_stage(self, name, func):
+        """
+        Run one collection stage on a daemon thread
+        
+        Daemon threads let the process exit on schedule even if a stage overruns its
+        deadline (a ThreadPoolExecutor would join the straggler at interpreter exit).
+        
+        Returns:
+            Future: Resolves to (result, duration_ms)
+        """
+        future = Future()
+        
+        def target():
+            start = time.perf_counter()
+            try:
+                result = func()
+                future.set_result((result, (time.perf_counter() - start) * 1000))
+            except BaseException as e:
+                future.set_exception(e)
+        
+        threading.Thread(target=target, name=f"stage-{name}", daemon=True).start()
+        return future
+    
     def run_combined_scraping(self):
-        """Run both crypto and macro scraping"""
+        """Run crypto, macro and calendar collection in parallel and merge whatever completes"""
         try:
             logger.info("Starting combined market data scraping...")
             
-            # Run both scrapers
-            crypto_data = self.crypto_scraper.scrape_crypto_data()
-            macro_data = self.macro_scraper.scrape_macro_data()
-            
-            # Combine the data
-            combined_data = {
-                'timestamp': datetime.utcnow().isoformat(),
-                'data_type': 'combined'
+            stages = {
+                'crypto': self.crypto_scraper.scrape_crypto_data,
+                'macro': self.macro_scraper.scrape_macro_data,
+                'calendar': self.collect_calendar_events
             }
             
-            # Add crypto data if available
-            if crypto_data:
-                combined_data.update(crypto_data)
+            started = time.monotonic()
+            futures = {name: self._start_stage(name, func) for name, func in stages.items()}
             
-            # Add macro data if available
-            if macro_data:
-                combined_data.update(macro_data)
+            results = {}
+            stage_metadata = {}
+            for name, future in futures.items():
+                deadline = Config.STAGE_DEADLINES.get(name, 60)
+                remaining = max(0.0, started + deadline - time.monotonic())
+                try:
+                    result, duration_ms = future.result(timeout=remaining)
+                    if result:
+                        results[name] = result
+                        stage_metadata[name] = {'status': 'ok', 'duration_ms': round(duration_ms, 1)}
+                    elif name == 'calendar' and not Config.FRED_API_KEY:
+                        stage_metadata[name] = {'status': 'skipped', 'duration_ms': round(duration_ms, 1)}
+                    else:
+                        stage_metadata[name] = {'status': 'failed', 'duration_ms': round(duration_ms, 1)}
+                except FutureTimeoutError:
+                    logger.error(f"{name} stage missed its {deadline}s deadline")
+                    stage_metadata[name] = {'status': 'timeout', 'duration_ms': deadline * 1000}
+                except Exception as e:
+                    logger.error(f"Error in {name} stage: {e}")
+                    stage_metadata[name] = {'status': 'failed', 'error': str(e)}
             
-            # Save combined data
-            if crypto_data and macro_data:
-                # Save to combined data file
-                filename = "combined_data/latest.json"
-                with open(filename, 'w') as f:
-                    json.dump(combined_data, f, indent=2, default=str)
-                
-                logger.info(f"Combined data saved successfully to {filename}")
-                return combined_data
-            else:
-                logger.error("Failed to collect both crypto and macro data")
+            total_ms = (time.monotonic() - started) * 1000
+            logger.info(f"Stage timings: {stage_metadata} (wall clock {total_ms:.0f} ms)")
+            
+            if not results:
+                logger.error("No collection stage completed")
                 return None
             
+            # Combine the data (stage payloads first so the combined header wins)
+            combined_data = {}
+            for name in stages:
+                if name in results:
+                    combined_data.update(results[name])
+            combined_data.update({
+                'timestamp': now_ms(),
+                'data_type': 'combined',
+                'metadata': {
+                    'stages': stage_metadata,
+                    'completed_stages': list(results),
+                    'total_ms': round(total_ms, 1)
+                }
+            })
+            
+            if 'crypto' not in results or 'macro' not in results:
+                logger.warning(f"Saving partial combined snapshot with stages: {list(results)}")
+            
+            # Save to combined data file
+            filename = "combined_data/latest.json"
+            with stage_timer('combined', 'write'):
+                write_json_atomic(filename, combined_data)
+            
+            logger.info(f"Combined data saved successfully to {filename}")
+            return combined_data
+            
         except Exception as e:
             logger.error(f"Error in combined scraping: {e}")
             return None
@@ -133,14 +227,15 @@ def main():
         if data:
             logger.info("Market data snapshot completed successfully")
             if args.output:
-                with open(args.output, 'w') as f:
-                    json.dump(data, f, indent=2, default=str)
+                write_json_atomic(args.output, data)
                 logger.info(f"Data also saved to {args.output}")
         else:
             logger.error("Market data snapshot failed")
         
     except Exception as e:
         logger.error(f"Error in main execution: {e}")
+    finally:
+        flush_metrics('orchestrator')
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
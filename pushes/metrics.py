@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""
+Metrics
+Lightweight Prometheus-style counters, gauges and histograms. Scrapers flush
+their registry to a per-job JSON file under pushes/metrics/. Each backend
+worker process keeps a snapshot of its own registry under
+pushes/metrics/workers/, and /metrics merges all of them, so the answer does
+not depend on which worker serves it.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: concurrent flushes of one job are not serialized
+    fcntl = None
+
+try:
+    from snapshot_io import write_json_atomic
+except ImportError:  # imported as pushes.metrics (backend)
+    from pushes.snapshot_io import write_json_atomic
+
+METRICS_DIR = os.getenv('METRICS_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'metrics'))
+WORKERS_SUBDIR = 'workers'
+
+# Seconds; covers sub-millisecond cache hits up to slow upstream calls
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Metric names shared by the scrapers and the backend
+UPSTREAM_LATENCY = 'marketinfo_upstream_request_seconds'
+STAGE_LATENCY = 'marketinfo_scraper_stage_seconds'
+UPSTREAM_ERRORS = 'marketinfo_upstream_errors_total'
+
+
+def _label_key(labelnames, labels):
+    if set(labels) != set(labelnames):
+        raise ValueError(f"Expected labels {labelnames}, got {sorted(labels)}")
+    return tuple(str(labels[name]) for name in labelnames)
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labelnames, key, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, key)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = 'untyped'
+
+    @staticmethod
+    def _copy(value):
+        return value
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'kind': self.kind,
+                'help': self.documentation,
+                'labels': list(self.labelnames),
+                'series': [[list(key), self._copy(value)] for key, value in self._series.items()]
+            }
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def merge(self, key, value):
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + value
+
+    def render(self):
+        with self._lock:
+            return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                    for key, value in sorted(self._series.items())]
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._series[key] = value
+
+    def merge(self, key, value):
+        with self._lock:
+            self._series[key] = value
+
+    def add(self, key, value):
+        """Merge by summing, for gauges held per worker process"""
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + value
+
+    def render(self):
+        with self._lock:
+            return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                    for key, value in sorted(self._series.items())]
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['buckets'][i] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def merge(self, key, value):
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                self._series[key] = {'buckets': list(value['buckets']), 'sum': value['sum'], 'count': value['count']}
+                return
+            series['buckets'] = [a + b for a, b in zip(series['buckets'], value['buckets'])]
+            series['sum'] += value['sum']
+            series['count'] += value['count']
+
+    @staticmethod
+    def _copy(value):
+        return {'buckets': list(value['buckets']), 'sum': value['sum'], 'count': value['count']}
+
+    def to_dict(self):
+        data = super().to_dict()
+        data['buckets'] = list(self.buckets)
+        return data
+
+    def render(self):
+        lines = []
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                # Bucket counts are stored cumulatively already
+                for bound, count in zip(self.buckets, series['buckets']):
+                    le = 'le="%s"' % _format_value(bound)
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {count}")
+                inf = 'le="+Inf"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, inf)} {series['count']}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(series['sum'])}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {series['count']}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, documentation, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} already registered as {metric.kind}")
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def to_dict(self):
+        with self._lock:
+            metrics = list(self._metrics.items())
+        return {name: metric.to_dict() for name, metric in metrics}
+
+    def merge_dict(self, data, gauges='set'):
+        """
+        Fold a serialized registry into this one
+
+        Counters and histograms add up. Gauges overwrite ('set'), add up
+        ('sum', for per-worker values) or are skipped ('skip').
+        """
+        for name, spec in data.items():
+            if spec['kind'] == 'histogram':
+                metric = self.histogram(name, spec['help'], spec['labels'], buckets=spec['buckets'])
+            elif spec['kind'] == 'counter':
+                metric = self.counter(name, spec['help'], spec['labels'])
+            elif gauges == 'skip':
+                continue
+            else:
+                metric = self.gauge(name, spec['help'], spec['labels'])
+                if gauges == 'sum':
+                    for key, value in spec['series']:
+                        metric.add(tuple(key), value)
+                    continue
+            for key, value in spec['series']:
+                metric.merge(tuple(key), value)
+
+    def render(self):
+        """Text exposition format"""
+        with self._lock:
+            metrics = sorted(self._metrics.items())
+        lines = []
+        for name, metric in metrics:
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+
+@contextmanager
+def upstream_timer(source):
+    """Time one upstream API call (and count it as an error if it raises)"""
+    histogram = REGISTRY.histogram(UPSTREAM_LATENCY, 'Upstream API request latency', ('source',))
+    try:
+        with histogram.time(source=source):
+            yield
+    except Exception:
+        REGISTRY.counter(UPSTREAM_ERRORS, 'Upstream API requests that raised', ('source',)).inc(source=source)
+        raise
+
+
+def stage_timer(scraper, stage):
+    """Time one scraper stage: fetch, transform or write"""
+    histogram = REGISTRY.histogram(STAGE_LATENCY, 'Scraper stage duration', ('scraper', 'stage'))
+    return histogram.time(scraper=scraper, stage=stage)
+
+
+def metrics_file(job):
+    return os.path.join(METRICS_DIR, f"{job}.json")
+
+
+@contextmanager
+def _job_lock(path):
+    """Exclusive lock on a job's metrics file (<job>.json.lock), across processes"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(f"{path}.lock", 'a') as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        yield
+
+
+def _accumulate(path, data, gauges='set'):
+    """Merge a serialized registry into the metrics file at path (under _job_lock)"""
+    accumulated = MetricsRegistry()
+    try:
+        with open(path, 'r') as f:
+            accumulated.merge_dict(json.load(f))
+    except (FileNotFoundError, ValueError):
+        pass
+    accumulated.merge_dict(data, gauges=gauges)
+    write_json_atomic(path, accumulated.to_dict(), indent=None)
+
+
+def flush_metrics(job, registry=REGISTRY):
+    """
+    Accumulate this process's metrics into the job's metrics file
+
+    Scrapers are short-lived, so each run adds its observations to what earlier
+    runs recorded; the backend reads the accumulated file. The read-modify-write
+    runs under the job's file lock, so runs that finish together (the parallel
+    combined scrape) do not drop each other's observations.
+    """
+    path = metrics_file(job)
+    with _job_lock(path):
+        _accumulate(path, registry.to_dict())
+
+
+def worker_metrics_file(job, pid=None, directory=METRICS_DIR):
+    return os.path.join(directory, WORKERS_SUBDIR, f"{job}-{pid or os.getpid()}.json")
+
+
+def write_worker_metrics(job, registry=REGISTRY, directory=METRICS_DIR):
+    """
+    Replace this worker process's snapshot of a long-running job's registry
+
+    Each worker owns its file, so no lock is needed; load_metrics_files sums
+    the snapshots of all workers.
+    """
+    write_json_atomic(worker_metrics_file(job, directory=directory), registry.to_dict(), indent=None)
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:  # exists, owned by another user
+        return True
+    return True
+
+
+def _retire_worker_file(path, job, directory):
+    """Fold an exited worker's counters and histograms into <job>.json and drop its snapshot"""
+    job_path = os.path.join(directory, f"{job}.json")
+    with _job_lock(job_path):
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except FileNotFoundError:  # another worker retired it first
+            return
+        except ValueError:
+            data = {}
+        _accumulate(job_path, data, gauges='skip')
+        for leftover in (path, f"{path}.gen", f"{path}.gen.lock"):  # and write_atomic's sidecars
+            try:
+                os.unlink(leftover)
+            except FileNotFoundError:
+                pass
+
+
+def load_metrics_files(directory=METRICS_DIR):
+    """
+    Merge every scraper metrics file and backend worker snapshot into one registry
+
+    Gauges of the live workers are summed. Snapshots of exited workers are
+    folded into <job>.json first, so their counters keep counting but their
+    gauges no longer do.
+    """
+    merged = MetricsRegistry()
+    if not os.path.isdir(directory):
+        return merged
+    workers_dir = os.path.join(directory, WORKERS_SUBDIR)
+    live = []
+    if os.path.isdir(workers_dir):
+        for name in sorted(os.listdir(workers_dir)):
+            job, _, pid = name[:-len('.json')].rpartition('-')
+            if not name.endswith('.json') or not job or not pid.isdigit():
+                continue
+            path = os.path.join(workers_dir, name)
+            if _alive(int(pid)):
+                live.append(path)
+                continue
+            try:
+                _retire_worker_file(path, job, directory)
+            except OSError:
+                continue
+    for name in sorted(os.listdir(directory)):
+        if name.endswith('.json'):
+            try:
+                with open(os.path.join(directory, name), 'r') as f:
+                    merged.merge_dict(json.load(f))
+            except (OSError, ValueError):
+                continue
+    for path in live:
+        try:
+            with open(path, 'r') as f:
+                merged.merge_dict(json.load(f), gauges='sum')
+        except (OSError, ValueError):
+            continue
+    return merged
@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+News Impact
+Joins Telegram headlines to price moves. Each message is tagged with the
+assets it mentions by one compiled matcher, then an as-of join (binary search
+over each asset's price series) finds the price when the message was posted
+and at each forward horizon. Per-message rows and per-window aggregates are
+written to impact_data/impact.json, which the backend serves at
+/api/news/impact.
+
+Prices come from the cli-charts daily history (the .bin file when it is
+current, else the CSV) plus the latest crypto scraper snapshot, so returns
+over the newest messages resolve as soon as a snapshot is past the horizon.
+
+Usage:
+    python news_impact.py                  # rebuild the impact table once
+    python news_impact.py --follow 60      # keep it current: new messages and prices every 60s
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+try:
+    from config import Config
+    from history_store import HistoryFile, binary_path, read_csv_series
+    from news_store import NewsStore
+    from snapshot_io import SnapshotReader, write_json_atomic
+    from snapshot_models import CryptoSnapshot
+except ImportError:  # imported as pushes.news_impact
+    from pushes.config import Config
+    from pushes.history_store import HistoryFile, binary_path, read_csv_series
+    from pushes.news_store import NewsStore
+    from pushes.snapshot_io import SnapshotReader, write_json_atomic
+    from pushes.snapshot_models import CryptoSnapshot
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERIES_DIR = os.path.join(BASE_DIR, 'cli-charts', 'data')
+CRYPTO_SNAPSHOT_PATH = os.path.join(BASE_DIR, 'pushes', 'crypto_data', 'latest.json')
+IMPACT_PATH = os.path.join(BASE_DIR, 'pushes', 'impact_data', 'impact.json')
+
+DAY = 86400
+DEFAULT_HORIZONS = ('1d', '3d', '7d')
+DEFAULT_WINDOW = 3600  # seconds per news bucket
+HEADLINE_CHARS = 160
+
+# Extra (names, tickers) for tracked assets, beyond the ones derived from Config.CRYPTO_IDS
+ASSET_ALIASES = {
+    'BTC': (('bitcoin',), ('BTC', 'XBT')),
+    'ETH': (('ethereum', 'ether'), ('ETH',)),
+    'SOL': (('solana',), ('SOL',)),
+}
+
+_UNITS = {'m': 60, 'h': 3600, 'd': DAY}
+
+
+def asset_rules(crypto_ids=None, aliases=ASSET_ALIASES):
+    """
+    (asset, names, tickers) for every tracked coin
+
+    Names are matched case-insensitively; tickers as written, optionally
+    $-prefixed. Each coin's name comes from its CoinGecko id ('usd-coin' ->
+    'usd coin', 'avalanche-2' -> 'avalanche') and its ticker is its symbol;
+    aliases add to both.
+
+    Args:
+        crypto_ids (dict): Symbol -> CoinGecko id (default Config.CRYPTO_IDS)
+        aliases (dict): Symbol -> (extra names, extra tickers)
+    """
+    crypto_ids = Config.CRYPTO_IDS if crypto_ids is None else crypto_ids
+    rules = []
+    for symbol, coin_id in crypto_ids.items():
+        alias_names, alias_tickers = aliases.get(symbol, ((), ()))
+        name = re.sub(r'-\d+$', '', coin_id).replace('-', ' ').lower()
+        rules.append((symbol, tuple(dict.fromkeys((name, *alias_names))),
+                      tuple(dict.fromkeys((symbol, *alias_tickers)))))
+    return rules
+
+
+ASSET_RULES = asset_rules()
+
+
+def parse_duration(text):
+    """'90m', '4h', '7d' or plain seconds -> seconds"""
+    text = str(text).strip().lower()
+    if text[-1:] in _UNITS:
+        return int(float(text[:-1]) * _UNITS[text[-1]])
+    return int(text)
+
+
+class AssetMatcher:
+    """
+    Every asset rule compiled into one regex with a named group per asset
+    (numbered, since symbols need not be valid group names)
+
+    Names carry an inline case-insensitive flag; tickers stay case-sensitive so
+    'sol' or 'eth' inside ordinary prose do not count as mentions.
+    """
+
+    def __init__(self, rules=ASSET_RULES):
+        self.assets = [asset for asset, _, _ in rules]
+        groups = []
+        for i, (asset, names, tickers) in enumerate(rules):
+            names = '|'.join(re.escape(n) for n in sorted(names, key=len, reverse=True))
+            tickers = '|'.join(re.escape(t) for t in sorted(tickers, key=len, reverse=True))
+            groups.append(f"(?P<a{i}>(?i:{names})|\\$?(?:{tickers}))")
+        self.pattern = re.compile(f"(?<!\\w)(?:{'|'.join(groups)})(?!\\w)")
+
+    def assets_in(self, text):
+        """Assets mentioned in a message, in rule order"""
+        found = {int(match.lastgroup[1:]) for match in self.pattern.finditer(text or '')}
+        return [asset for i, asset in enumerate(self.assets) if i in found]
+
+
+MATCHER = AssetMatcher()
+
+
+def message_times(dates):
+    """Message date strings -> epoch seconds (int64 array)"""
+    try:
+        # Telethon dates are UTC ('2025-07-02 14:27:35+00:00'): parse all at once
+        if all(len(d) == 19 or d.endswith('+00:00') for d in dates):
+            return np.array([d[:19] for d in dates], dtype='datetime64[s]').astype(np.int64)
+    except ValueError:
+        pass
+    times = []
+    for d in dates:
+        parsed = datetime.fromisoformat(d)
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        times.append(int(parsed.timestamp()))
+    return np.array(times, dtype=np.int64)
+
+
+def load_daily_series(csv_path):
+    """(epoch seconds, prices) of a cli-charts history, preferring a current .bin"""
+    bin_path = binary_path(csv_path)
+    if os.path.exists(bin_path) and (not os.path.exists(csv_path)
+                                     or os.path.getmtime(bin_path) >= os.path.getmtime(csv_path)):
+        history = HistoryFile(bin_path)
+        days, prices = history.days.copy(), history.prices.copy()
+    else:
+        days, prices = read_csv_series(csv_path)
+        days, prices = np.array(days, dtype=np.int64), np.array(prices, dtype=np.float64)
+    return days.astype(np.int64) * DAY, prices
+
+
+def asof_join(times, prices, at):
+    """
+    Price in effect at each time in `at` (last sample at or before it)
+
+    Returns:
+        numpy.ndarray: Prices, NaN where `at` precedes the series
+    """
+    idx = np.searchsorted(times, at, side='right') - 1
+    out = np.full(len(at), np.nan)
+    valid = idx >= 0
+    out[valid] = prices[idx[valid]]
+    return out
+
+
+class ImpactPipeline:
+    """
+    Incremental news -> forward return pipeline
+
+    Tagged messages are kept as columns; `update` reads only messages appended
+    to the news store since the last call and re-runs the (vectorized) join
+    over all rows, so returns that were waiting on price data fill in as the
+    series grows.
+    """
+
+    def __init__(self, news_store=None, series_dir=SERIES_DIR, horizons=DEFAULT_HORIZONS,
+                 window=DEFAULT_WINDOW, snapshot_path=CRYPTO_SNAPSHOT_PATH, matcher=MATCHER):
+        self.news_store = news_store or NewsStore()
+        self.series_dir = series_dir
+        self.horizon_names = list(horizons)
+        self.horizons = np.array([parse_duration(h) for h in horizons], dtype=np.int64)
+        self.window = parse_duration(window)
+        self.matcher = matcher
+        self.snapshot = SnapshotReader(snapshot_path, loader=lambda raw: CryptoSnapshot.from_dict(json.loads(raw)))
+        self._identity = None
+        self._reset()
+
+    def _reset(self):
+        self.messages_seen = 0
+        self._offset = 0
+        self._columns = {'asset': [], 'channel': [], 'id': [], 'date': [], 'headline': []}
+        self._times = np.empty(0, dtype=np.int64)
+
+    def __len__(self):
+        return len(self._times)
+
+    def ingest(self, messages):
+        """
+        Tag messages and add a row per (message, mentioned asset)
+
+        Returns:
+            int: Rows added
+        """
+        columns = self._columns
+        tagged_dates = []
+        for msg in messages:
+            text = msg.get('text') or ''
+            for asset in self.matcher.assets_in(text):
+                columns['asset'].append(asset)
+                columns['channel'].append(msg['channel'])
+                columns['id'].append(msg['id'])
+                columns['date'].append(msg['date'])
+                columns['headline'].append(text.split('\n', 1)[0][:HEADLINE_CHARS])
+                tagged_dates.append(msg['date'])
+        self.messages_seen += len(messages)
+        if tagged_dates:
+            self._times = np.concatenate([self._times, message_times(tagged_dates)])
+        return len(tagged_dates)
+
+    def poll(self):
+        """Ingest messages appended to the news store since the last poll"""
+        identity = self.news_store.identity()
+        if identity != self._identity:
+            self._reset()  # replaced store: start over
+            self._identity = identity
+        messages, self._offset = self.news_store.read_from(self._offset)
+        return self.ingest(messages)
+
+    def load_prices(self):
+        """Asset -> (ascending epoch seconds, prices): daily history plus the latest snapshot"""
+        series = {}
+        for asset in self.matcher.assets:
+            csv_path = os.path.join(self.series_dir, f"{asset}.csv")
+            if os.path.exists(csv_path) or os.path.exists(binary_path(csv_path)):
+                series[asset] = load_daily_series(csv_path)
+
+        if self.snapshot.exists():
+            snapshot = self.snapshot.read()
+            for asset, quote in snapshot.crypto_prices.items():
+                if asset not in series:
+                    continue
+                times, prices = series[asset]
+                at = quote.timestamp // 1000
+                if not len(times) or at > times[-1]:
+                    series[asset] = (np.append(times, at), np.append(prices, quote.price_usd))
+        return series
+
+    def compute(self):
+        """
+        Price at each message and forward returns per horizon
+
+        Returns:
+            tuple: (base prices, returns of shape (rows, horizons)); NaN where
+                   the series does not reach that far yet
+        """
+        series = self.load_prices()
+        assets = np.array(self._columns['asset'])
+        base = np.full(len(self), np.nan)
+        returns = np.full((len(self), len(self.horizons)), np.nan)
+        for asset, (times, prices) in series.items():
+            rows = np.flatnonzero(assets == asset)
+            if not len(rows) or not len(times):
+                continue
+            at = self._times[rows]
+            base[rows] = asof_join(times, prices, at)
+            for h, horizon in enumerate(self.horizons):
+                forward = asof_join(times, prices, at + horizon)
+                # Only once the series has a sample at or past the horizon
+                forward[at + horizon > times[-1]] = np.nan
+                returns[rows, h] = forward / base[rows] - 1
+        return base, returns
+
+    def table(self):
+        """The materialized impact table (newest first)"""
+        base, returns = self.compute()
+        columns = self._columns
+        names = [f"return_{h}" for h in self.horizon_names]
+        buckets = self._times - self._times % self.window
+        order = np.argsort(-self._times, kind='stable')
+
+        def number(value):
+            return None if np.isnan(value) else round(float(value), 6)
+
+        def numbers(values):
+            # Round and convert whole columns at once; NaN (x != x) becomes None
+            return [None if v != v else v for v in np.round(values, 6).tolist()]
+
+        bucket_list = buckets.tolist()
+        price_list = numbers(base)
+        return_lists = [numbers(returns[:, h]) for h in range(len(names))]
+        events = []
+        for i in order.tolist():
+            event = {
+                'asset': columns['asset'][i],
+                'channel': columns['channel'][i],
+                'id': columns['id'][i],
+                'date': columns['date'][i],
+                'bucket': bucket_list[i],
+                'headline': columns['headline'][i],
+                'price': price_list[i]
+            }
+            for name, values in zip(names, return_lists):
+                event[name] = values[i]
+            events.append(event)
+
+        bucket_rows, summary = [], {}
+        assets = np.array(columns['asset'])
+        for asset in self.matcher.assets:
+            rows = np.flatnonzero(assets == asset)
+            if not len(rows):
+                continue
+            keys, inverse, counts = np.unique(buckets[rows], return_inverse=True, return_counts=True)
+            asset_returns = returns[rows]
+            known = ~np.isnan(asset_returns)
+            means = []
+            for h in range(len(names)):
+                n = np.bincount(inverse, weights=known[:, h], minlength=len(keys))
+                total = np.bincount(inverse, weights=np.where(known[:, h], asset_returns[:, h], 0), minlength=len(keys))
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    means.append(total / n)
+            mean_lists = [numbers(mean) for mean in means]
+            for b, (key, count) in enumerate(zip(keys.tolist(), counts.tolist())):
+                row = {'asset': asset, 'bucket': key, 'messages': count}
+                for name, values in zip(names, mean_lists):
+                    row[f"mean_{name}"] = values[b]
+                bucket_rows.append(row)
+            summary[asset] = {
+                'messages': int(len(rows)),
+                **{f"mean_{name}": number(np.nanmean(asset_returns[:, h])) if known[:, h].any() else None
+                   for h, name in enumerate(names)}
+            }
+        bucket_rows.sort(key=lambda row: row['bucket'], reverse=True)
+
+        return {
+            'updated_at': datetime.now(timezone.utc).isoformat(),
+            'window_seconds': self.window,
+            'horizons': self.horizon_names,
+            'messages_scanned': self.messages_seen,
+            'assets': summary,
+            'buckets': bucket_rows,
+            'events': events
+        }
+
+    def update(self, path=IMPACT_PATH):
+        """Ingest new messages, recompute and write the table; returns rows added"""
+        added = self.poll()
+        write_json_atomic(path, self.table(), indent=None)
+        return added
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Join news to forward price returns')
+    parser.add_argument('--horizons', default=','.join(DEFAULT_HORIZONS), help='Comma-separated, e.g. 4h,1d,7d')
+    parser.add_argument('--window', default=str(DEFAULT_WINDOW), help='News bucket size, e.g. 1h')
+    parser.add_argument('--follow', type=float, metavar='SECONDS', help='Keep updating at this interval')
+    parser.add_argument('--output', default=IMPACT_PATH)
+    args = parser.parse_args()
+
+    pipeline = ImpactPipeline(horizons=args.horizons.split(','), window=args.window)
+    while True:
+        start = time.perf_counter()
+        added = pipeline.update(args.output)
+        print(f"{datetime.now().strftime('%H:%M:%S')} +{added} rows, {len(pipeline)} total from "
+              f"{pipeline.messages_seen} messages in {time.perf_counter() - start:.2f}s -> {args.output}")
+        if not args.follow:
+            break
+        time.sleep(args.follow)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+News Store
+Append-only store for the Telegram news export. Messages go to news.jsonl, one
+JSON object per line; a run appends only its new messages instead of
+rewriting the whole history.
+
+The key index (news.cursors.json) holds, per channel, the highest message id
+stored. Telegram ids only grow within a channel, so that one number per
+channel is enough to dedupe, and it is the min_id the bot fetches from next.
+The index also records how many bytes of news.jsonl it covers; a run that
+crashed after appending but before saving the index is caught up from that
+offset on the next open.
+"""
+
+import json
+import os
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are not serialized between processes
+    fcntl = None
+
+try:
+    from snapshot_io import write_json_atomic
+except ImportError:  # imported as pushes.news_store
+    from pushes.snapshot_io import write_json_atomic
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_EXPORT_DIR = os.path.join(BASE_DIR, 'stackedinfo-bot', 'exports')
+
+
+def message_key(msg):
+    """A unique key for each message (channel, id)"""
+    return f"{msg['channel']}:{msg['id']}"
+
+
+class NewsStore:
+    """news.jsonl plus its per-channel cursor index"""
+
+    def __init__(self, directory=None):
+        self.directory = os.fspath(directory or os.getenv('NEWS_EXPORT_DIR') or DEFAULT_EXPORT_DIR)
+        self.path = os.path.join(self.directory, 'news.jsonl')
+        self.index_path = os.path.join(self.directory, 'news.cursors.json')
+        self.legacy_path = os.path.join(self.directory, 'news.json')
+        os.makedirs(self.directory, exist_ok=True)
+
+        self.state = self._load_index()
+        if not os.path.exists(self.path) and os.path.exists(self.legacy_path):
+            self._import_legacy()
+        else:
+            self._catch_up()
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (FileNotFoundError, ValueError):
+            state = {}
+        return {
+            'offset': state.get('offset', 0),
+            'count': state.get('count', 0),
+            'channels': state.get('channels', {})
+        }
+
+    def _save_index(self):
+        write_json_atomic(self.index_path, self.state, indent=None)
+
+    def _track(self, messages):
+        channels = self.state['channels']
+        for msg in messages:
+            channels[msg['channel']] = max(channels.get(msg['channel'], 0), msg['id'])
+        self.state['count'] += len(messages)
+
+    def _catch_up(self):
+        """Index lines past the recorded offset (left by an interrupted append)"""
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == self.state['offset']:
+            return
+        with open(self.path, 'r+b') as f:
+            # Under the append lock, so a line still being written is not taken for a torn one
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            size = os.fstat(f.fileno()).st_size
+            if size < self.state['offset']:  # file replaced or truncated: rebuild the index
+                self.state = {'offset': 0, 'count': 0, 'channels': {}}
+            messages, end = self.read_from(self.state['offset'])
+            if end < size:
+                # A torn last line from a crash mid-write; nothing was indexed past it
+                f.truncate(end)
+            self._track(messages)
+            self.state['offset'] = end
+            self._save_index()
+
+    def _import_legacy(self):
+        """Seed the store from the old news.json export, oldest message first per channel"""
+        with open(self.legacy_path, 'r', encoding='utf-8') as f:
+            messages = json.load(f)
+        messages.sort(key=lambda m: (m['channel'], m['id']))
+        self.append(messages)
+
+    def cursor(self, channel):
+        """Highest stored message id for a channel, or None if it has none yet"""
+        return self.state['channels'].get(channel)
+
+    def count(self):
+        return self.state['count']
+
+    def append(self, messages, cursors=None):
+        """
+        Append messages newer than their channel's cursor
+
+        Args:
+            messages (list): Message dicts with at least channel and id
+            cursors (dict): Channel -> highest id fetched, to advance past
+                            messages that were fetched but not stored
+
+        Returns:
+            list: The messages actually appended
+        """
+        channels = self.state['channels']
+        fresh, seen = [], set()
+        for msg in messages:
+            key = message_key(msg)
+            if msg['id'] <= channels.get(msg['channel'], 0) or key in seen:
+                continue
+            seen.add(key)
+            fresh.append(msg)
+
+        if fresh:
+            data = ''.join(json.dumps(msg, ensure_ascii=False) + '\n' for msg in fresh).encode('utf-8')
+            with open(self.path, 'ab') as f:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_EX)
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+                self.state['offset'] = f.tell()
+            self._track(fresh)
+
+        for channel, last_id in (cursors or {}).items():
+            channels[channel] = max(channels.get(channel, 0), last_id)
+        if fresh or cursors:
+            self._save_index()
+        return fresh
+
+    def read_from(self, offset=0):
+        """
+        Messages stored from a byte offset on
+
+        Returns:
+            tuple: (list of message dicts, offset just past the last complete line)
+        """
+        if not os.path.exists(self.path):
+            return [], 0
+        messages = []
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                offset += len(line)
+                if line.strip():
+                    messages.append(json.loads(line))
+        return messages, offset
+
+    def identity(self):
+        """Inode of news.jsonl, so incremental readers notice a replaced file"""
+        try:
+            return os.stat(self.path).st_ino
+        except FileNotFoundError:
+            return None
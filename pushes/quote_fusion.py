@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Quote Fusion
+Queries several index quote providers concurrently and keeps the best answer
+"""
+
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+logger = logging.getLogger(__name__)
+
+# Selection policies
+POLICY_FIRST = 'first'        # first valid quote to arrive wins
+POLICY_FRESHEST = 'freshest'  # newest bar (as_of) wins, provider order breaks ties
+
+
+class QuoteProvider:
+    """A named quote source. Subclasses implement fetch(name, symbol)."""
+
+    name = 'provider'
+
+    def supports(self, name, symbol):
+        """Whether this provider can quote the given index"""
+        return True
+
+    def fetch(self, name, symbol):
+        """
+        Fetch a quote for one index
+
+        Returns:
+            dict: Quote fields (price, open, high, low, volume, previous_close, ...)
+                  plus 'as_of' (epoch ms of the underlying bar), or None
+        """
+        raise NotImplementedError
+
+
+def is_valid_quote(quote):
+    """A quote is usable if it has a positive price and previous close"""
+    if not quote:
+        return False
+    try:
+        return float(quote.get('price') or 0) > 0 and float(quote.get('previous_close') or 0) > 0
+    except (TypeError, ValueError):
+        return False
+
+
+class QuoteFusion:
+    def __init__(self, providers, policy=POLICY_FRESHEST, timeout=15.0, max_workers=8):
+        if policy not in (POLICY_FIRST, POLICY_FRESHEST):
+            raise ValueError(f"Unknown quote fusion policy: {policy}")
+        self.providers = list(providers)
+        self.policy = policy
+        self.timeout = timeout
+        self.max_workers = max_workers
+
+    def _timed_fetch(self, provider, name, symbol):
+        """Run one provider fetch and measure its latency"""
+        start = time.perf_counter()
+        try:
+            quote = provider.fetch(name, symbol)
+            error = None
+        except Exception as e:
+            quote, error = None, str(e)
+        latency_ms = (time.perf_counter() - start) * 1000
+        return provider, quote, latency_ms, error
+
+    def fuse(self, indices):
+        """
+        Fetch every index from every provider concurrently
+
+        Args:
+            indices (dict): Index name -> ticker symbol
+
+        Returns:
+            dict: Index name -> fused quote, with 'source', 'source_latency_ms' and
+                  the other providers' valid quotes under 'alternates'
+        """
+        pending = {}
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            for name, symbol in indices.items():
+                for provider in self.providers:
+                    if provider.supports(name, symbol):
+                        future = executor.submit(self._timed_fetch, provider, name, symbol)
+                        pending[future] = name
+
+            results = {name: [] for name in indices}
+            decided = set()
+            deadline = time.monotonic() + self.timeout
+            waiting = set(pending)
+
+            while waiting:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                done, waiting = wait(waiting, timeout=remaining, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = pending[future]
+                    results[name].append(future.result())
+                    if self.policy == POLICY_FIRST and name not in decided:
+                        if is_valid_quote(future.result()[1]):
+                            decided.add(name)
+                if self.policy == POLICY_FIRST and len(decided) == len(indices):
+                    break
+
+            for future in waiting:
+                name = pending[future]
+                if name not in decided:
+                    logger.warning(f"Quote provider timed out for {indices[name]} after {self.timeout}s")
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        return {name: self._select(name, indices[name], answers) for name, answers in results.items()}
+
+    def _select(self, name, symbol, answers):
+        """Pick the winning quote for one index and annotate it"""
+        latencies = {provider.name: round(latency_ms, 1) for provider, _, latency_ms, _ in answers}
+        valid = [(provider, quote) for provider, quote, _, _ in answers if is_valid_quote(quote)]
+
+        if not valid:
+            errors = [error for _, _, _, error in answers if error]
+            return {
+                'symbol': symbol,
+                'price': 0,
+                'open': 0,
+                'high': 0,
+                'low': 0,
+                'volume': 0,
+                'change': 0,
+                'change_percent': 0,
+                'previous_close': 0,
+                'error': '; '.join(errors) if errors else 'No data available',
+                'source': None,
+                'source_latency_ms': latencies
+            }
+
+        if self.policy == POLICY_FIRST:
+            # answers are in arrival order
+            provider, quote = valid[0]
+        else:
+            order = {provider.name: i for i, provider in enumerate(self.providers)}
+            provider, quote = max(valid, key=lambda pq: (pq[1].get('as_of') or 0, -order[pq[0].name]))
+
+        fused = dict(quote)
+        fused['symbol'] = symbol
+        change = float(fused['price']) - float(fused['previous_close'])
+        fused['change'] = change
+        fused['change_percent'] = (change / float(fused['previous_close'])) * 100
+
+        # Keep the other valid answers for comparison, apart from the winning top-level fields
+        alternates = {
+            other.name: {key: other_quote.get(key) for key in ('price', 'open', 'high', 'low', 'volume', 'as_of')}
+            for other, other_quote in valid if other is not provider
+        }
+        if alternates:
+            fused['alternates'] = alternates
+
+        fused['source'] = provider.name
+        fused['source_latency_ms'] = latencies
+        logger.info(f"Fused {symbol}: ${fused['price']:.2f} from {provider.name} ({latencies})")
+        return fused
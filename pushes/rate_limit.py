@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Rate Limits
+Token buckets for upstream API budgets. A bucket given a state file is
+shared by every process that opens the same file: the bucket level lives in
+the file and is updated under an exclusive lock, so the price scraper and the
+history backfill running side by side still stay within one provider limit.
+"""
+
+import json
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: buckets are per process
+    fcntl = None
+
+try:
+    from metrics import REGISTRY
+except ImportError:  # imported as pushes.rate_limit
+    from pushes.metrics import REGISTRY
+
+RATE_LIMIT_DIR = os.getenv('RATE_LIMIT_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rate_limits'))
+
+RATE_LIMIT_WAIT = 'marketinfo_rate_limit_wait_seconds'
+
+
+class TokenBucket:
+    """
+    `rate_per_minute` requests per minute on average, bursts of up to `burst`
+
+    A 429 from the provider should be reported with `penalize`, which empties
+    the bucket and holds every caller until the Retry-After has passed.
+    """
+
+    def __init__(self, name, rate_per_minute, burst=1, state_path=None):
+        if rate_per_minute <= 0:
+            raise ValueError(f"{name}: rate must be positive")
+        self.name = name
+        self.rate = rate_per_minute / 60.0
+        self.burst = max(1, int(burst))
+        self.state_path = state_path
+        self._lock = threading.Lock()
+        self._state = {'level': float(self.burst), 'updated': time.time(), 'blocked_until': 0.0}
+        if state_path:
+            os.makedirs(os.path.dirname(os.path.abspath(state_path)), exist_ok=True)
+
+    def _update(self, change):
+        """Apply change(state, now) to the current state under the process and file locks"""
+        with self._lock:
+            if not self.state_path or fcntl is None:
+                return change(self._state, time.time())
+            with open(self.state_path, 'a+') as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                f.seek(0)
+                try:
+                    state = json.loads(f.read())
+                except ValueError:  # new or torn file: start full
+                    state = dict(self._state)
+                result = change(state, time.time())
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps(state))
+                return result
+
+    def _take(self, tokens):
+        def change(state, now):
+            state['level'] = min(self.burst, state['level'] + (now - state['updated']) * self.rate)
+            state['updated'] = now
+            if now < state['blocked_until']:
+                return state['blocked_until'] - now
+            if state['level'] >= tokens:
+                state['level'] -= tokens
+                return 0.0
+            return (tokens - state['level']) / self.rate
+        return self._update(change)
+
+    def acquire(self, tokens=1, timeout=None):
+        """
+        Block until `tokens` requests may be sent
+
+        Returns:
+            float: Seconds spent waiting
+
+        Raises:
+            TimeoutError: If the wait would exceed timeout
+        """
+        start = time.monotonic()
+        while True:
+            delay = self._take(tokens)
+            waited = time.monotonic() - start
+            if delay <= 0:
+                if waited > 0:
+                    REGISTRY.histogram(RATE_LIMIT_WAIT, 'Time spent waiting for an upstream request budget',
+                                       ('bucket',)).observe(waited, bucket=self.name)
+                return waited
+            if timeout is not None and waited + delay > timeout:
+                raise TimeoutError(f"{self.name}: rate limit wait of {delay:.1f}s exceeds timeout")
+            time.sleep(delay)
+
+    def try_acquire(self, tokens=1):
+        """Take tokens if available right now, without waiting"""
+        return self._take(tokens) <= 0
+
+    def penalize(self, seconds):
+        """Hold all callers for `seconds` (the provider's Retry-After)"""
+        def change(state, now):
+            state['level'] = 0.0
+            state['blocked_until'] = max(state['blocked_until'], now + seconds)
+        self._update(change)
+
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+def shared_bucket(name, rate_per_minute, burst=1):
+    """The process-wide bucket for one upstream, backed by RATE_LIMIT_DIR/<name>.json"""
+    with _buckets_lock:
+        if name not in _buckets:
+            _buckets[name] = TokenBucket(name, rate_per_minute, burst, os.path.join(RATE_LIMIT_DIR, f"{name}.json"))
+        return _buckets[name]
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+Risk Engine
+Rolling correlation matrix, beta to SPY and volatility across every daily
+series in the backfill manifest (crypto universe, equities, VIX, rates).
+
+Series are aligned on a business-day calendar (a crypto weekend counts
+towards Monday) and turned into daily moves: log returns for prices,
+differences for rates. A sliding-window Welford covariance adds the newest
+day and removes the oldest, so each day costs O(k^2) for k series instead of
+a full O(window * k^2) recompute. The covariance state is kept between runs
+in risk_data/state.npz; a run only processes the days since the last one,
+unless the stored history up to that day changed (a backfill), in which case
+it starts over.
+
+Writes risk_data/risk.json, served by the backend at /api/analytics/correlation.
+
+Usage:
+    python risk_engine.py                 # process new days
+    python risk_engine.py --window 90 --rebuild
+"""
+
+import argparse
+import hashlib
+import io
+import logging
+import os
+
+import numpy as np
+
+try:
+    from backfill import load_manifest
+    from history_store import HistoryFile, day_to_date
+    from metrics import stage_timer, flush_metrics
+    from snapshot_io import write_atomic, write_json_atomic
+    from snapshot_models import now_ms
+except ImportError:  # imported as pushes.risk_engine
+    from pushes.backfill import load_manifest
+    from pushes.history_store import HistoryFile, day_to_date
+    from pushes.metrics import stage_timer, flush_metrics
+    from pushes.snapshot_io import write_atomic, write_json_atomic
+    from pushes.snapshot_models import now_ms
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+RISK_DIR = os.getenv('RISK_DATA_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'risk_data'))
+
+TRADING_DAYS = 252
+# A price older than this many days is stale: the series drops out rather than showing flat returns
+MAX_STALE_DAYS = 7
+# Refresh the running sums from the window now and then so floating-point drift cannot build up
+REBUILD_EVERY = 500
+
+
+def business_days(first_day, last_day):
+    """Mon-Fri epoch days in [first_day, last_day]"""
+    days = np.arange(first_day, last_day + 1, dtype=np.int64)
+    return days[(days + 3) % 7 < 5]  # epoch day 0 was a Thursday
+
+
+class RollingCovariance:
+    """
+    Covariance of the last `window` rows of k series, updated one row at a time
+
+    A series takes part once it has `window` consecutive finite values; when
+    the set of such series changes, the running state is rebuilt from the
+    window buffer for the new set.
+    """
+
+    def __init__(self, k, window):
+        self.k = k
+        self.window = window
+        self.buffer = np.full((window, k), np.nan)
+        self.pos = 0
+        self.run = np.zeros(k, dtype=np.int64)  # consecutive finite values per series
+        self.active = np.zeros(0, dtype=np.int64)
+        self.n = 0
+        self.mean = np.zeros(0)
+        self.m2 = np.zeros((0, 0))
+        self.since_rebuild = 0
+
+    def _replace(self, old, new):
+        """Slide the window: drop row `old`, add row `new` (n unchanged)"""
+        mean = self.mean + (new - old) / self.n
+        self.m2 += np.outer(new - self.mean, new - mean) - np.outer(old - self.mean, old - mean)
+        self.mean = mean
+
+    def _rebuild(self, active):
+        self.active = active
+        rows = self.buffer[:, active]
+        self.n = self.window if len(active) else 0
+        self.mean = rows.mean(axis=0) if len(active) else np.zeros(0)
+        centered = rows - self.mean
+        self.m2 = centered.T @ centered
+        self.since_rebuild = 0
+
+    def push(self, row):
+        oldest = self.buffer[self.pos].copy()
+        self.buffer[self.pos] = row
+        self.pos = (self.pos + 1) % self.window
+        finite = np.isfinite(row)
+        self.run += 1
+        self.run[~finite] = 0
+
+        # The active set changes when a series completes a window or an active one has a gap
+        if (self.run == self.window).any() or not finite[self.active].all() or self.since_rebuild >= REBUILD_EVERY:
+            self._rebuild(np.flatnonzero(self.run >= self.window))
+        elif len(self.active):
+            self._replace(oldest[self.active], row[self.active])
+            self.since_rebuild += 1
+
+    def covariance(self):
+        """Sample covariance of the active series"""
+        return self.m2 / (self.n - 1) if self.n > 1 else np.full(self.m2.shape, np.nan)
+
+    def state(self):
+        return {name: getattr(self, name) for name in
+                ('buffer', 'pos', 'run', 'active', 'n', 'mean', 'm2', 'since_rebuild')}
+
+    @classmethod
+    def from_state(cls, state):
+        buffer = state['buffer']
+        cov = cls(buffer.shape[1], buffer.shape[0])
+        for name, value in state.items():
+            setattr(cov, name, value.copy() if value.ndim else value.item())
+        return cov
+
+
+def correlation(cov):
+    sd = np.sqrt(np.diag(cov))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.clip(cov / np.outer(sd, sd), -1.0, 1.0)
+
+
+def risk_series(manifest=None):
+    """(name, .bin path, 'log' or 'diff') for every daily or business-day series in the manifest"""
+    series = load_manifest(manifest) if manifest else load_manifest()
+    return [(s.name, s.path, s.returns) for s in series if s.frequency in ('daily', 'business')]
+
+
+def _prefix_digest(history, last_day):
+    return hashlib.blake2b(history.range(None, last_day).tobytes(), digest_size=16).hexdigest()
+
+
+class RiskEngine:
+    def __init__(self, series, window=60, benchmark='SPY', history_days=260, output_dir=RISK_DIR):
+        """
+        Args:
+            series (list): (name, .bin path, 'log' or 'diff') tuples; missing files are skipped
+            window (int): Rolling window in business days
+            benchmark (str): Series that betas are measured against
+            history_days (int): Days of rolling beta and volatility kept in the output
+        """
+        self.series = [(name, path, kind) for name, path, kind in series if os.path.exists(path)]
+        self.names = [name for name, _, _ in self.series]
+        self.kinds = np.array([kind for _, _, kind in self.series])
+        self.window = window
+        self.benchmark = benchmark
+        self.history_days = history_days
+        self.output_dir = output_dir
+        self.state_path = os.path.join(output_dir, 'state.npz')
+        self.output_path = os.path.join(output_dir, 'risk.json')
+
+    def _load_state(self, histories):
+        try:
+            with np.load(self.state_path, allow_pickle=False) as saved:
+                state = {name: saved[name] for name in saved.files}
+        except (FileNotFoundError, ValueError, OSError):
+            return None
+        if (state['names'].tolist() != self.names or int(state['window']) != self.window
+                or str(state['benchmark']) != self.benchmark):
+            return None
+        last_day = int(state['last_day'])
+        digests = [_prefix_digest(h, last_day) for h in histories]
+        if digests != state['digests'].tolist():
+            logger.info("Stored history changed since the last run; recomputing from the start")
+            return None
+        return state
+
+    def _save_state(self, cov, last_day, last_prices, histories, hist_days, hist_beta, hist_vol):
+        state = {f"cov_{name}": np.asarray(value) for name, value in cov.state().items()}
+        state.update(
+            names=np.array(self.names), window=np.array(self.window), benchmark=np.array(self.benchmark),
+            last_day=np.array(last_day), last_prices=last_prices,
+            digests=np.array([_prefix_digest(h, last_day) for h in histories]),
+            hist_days=hist_days, hist_beta=hist_beta, hist_vol=hist_vol
+        )
+        buf = io.BytesIO()
+        np.savez(buf, **state)
+        write_atomic(self.state_path, buf.getvalue())
+
+    def update(self, rebuild=False):
+        """
+        Process every business day since the last run and write risk.json
+
+        Returns:
+            int: Days processed
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        k = len(self.names)
+        histories = [HistoryFile(path) for _, path, _ in self.series]
+        last_days = [int(h.days[-1]) for h in histories if len(h)]
+        if not last_days:
+            logger.warning("No stored history to compute risk from")
+            return 0
+        # Wait for lagging series to catch up instead of booking them a flat day that a later run would revise
+        end_day = min(day for day in last_days if day >= max(last_days) - MAX_STALE_DAYS)
+
+        state = None if rebuild else self._load_state(histories)
+        if state is not None:
+            cov = RollingCovariance.from_state({name[4:]: state[name] for name in state if name.startswith('cov_')})
+            first_day, prev = int(state['last_day']) + 1, state['last_prices']
+            hist_days, hist_beta, hist_vol = state['hist_days'], state['hist_beta'], state['hist_vol']
+        else:
+            cov = RollingCovariance(k, self.window)
+            first_day, prev = min(int(h.days[0]) for h in histories if len(h)), np.full(k, np.nan)
+            hist_days, hist_beta, hist_vol = np.zeros(0, dtype=np.int64), np.zeros((0, k)), np.zeros((0, k))
+
+        days = business_days(first_day, end_day)
+        if not len(days):
+            return 0
+
+        # Prices as of each calendar day, NaN where a series has not started or has gone stale
+        prices = np.full((len(days), k), np.nan)
+        for i, h in enumerate(histories):
+            if not len(h):
+                continue
+            idx = np.searchsorted(h.days, days, side='right') - 1
+            ok = (idx >= 0) & (days - h.days[np.maximum(idx, 0)] <= MAX_STALE_DAYS)
+            prices[ok, i] = h.prices[idx[ok]]
+        previous = np.vstack([prev[None, :], prices[:-1]])
+        log = self.kinds == 'log'
+        with np.errstate(divide='ignore', invalid='ignore'):
+            moves = np.where(log, np.log(prices / previous), prices - previous)
+
+        bench = self.names.index(self.benchmark) if self.benchmark in self.names else None
+        keep = min(len(days), self.history_days)
+        beta = np.full((keep, k), np.nan)
+        vol = np.full((keep, k), np.nan)
+        for t, row in enumerate(moves):
+            cov.push(row)
+            out = t - (len(days) - keep)
+            if out < 0 or not len(cov.active):
+                continue
+            c = cov.m2 / (cov.n - 1)
+            diag = np.diag(c)
+            vol[out, cov.active] = np.sqrt(diag * TRADING_DAYS)
+            pos = np.flatnonzero(cov.active == bench) if bench is not None else ()
+            if len(pos):
+                beta[out, cov.active] = c[:, pos[0]] / diag[pos[0]]
+
+        hist_days = np.concatenate([hist_days, days[-keep:]])[-self.history_days:]
+        hist_beta = np.vstack([hist_beta, beta])[-self.history_days:]
+        hist_vol = np.vstack([hist_vol, vol])[-self.history_days:]
+        self._save_state(cov, int(days[-1]), prices[-1], histories, hist_days, hist_beta, hist_vol)
+        self._write(cov, int(days[-1]), hist_days, hist_beta, hist_vol)
+        return len(days)
+
+    def _write(self, cov, as_of, hist_days, hist_beta, hist_vol):
+        def values(arr):
+            rounded = np.round(arr, 6)
+            return [None if np.isnan(x) else x for x in rounded.tolist()]
+
+        active = cov.active.tolist()
+        names = [self.names[i] for i in active]
+        corr = correlation(cov.covariance())
+        percent = np.where(self.kinds == 'log', 100.0, 1.0)  # log-return vol in %, rate vol in points
+        write_json_atomic(self.output_path, {
+            'updated_at': now_ms(),
+            'as_of': day_to_date(as_of).isoformat(),
+            'window': self.window,
+            'benchmark': self.benchmark,
+            'series': names,
+            'inactive': [name for i, name in enumerate(self.names) if i not in set(active)],
+            'returns': {self.names[i]: str(self.kinds[i]) for i in active},
+            'correlation': [values(row) for row in corr],
+            'beta': dict(zip(names, values(hist_beta[-1, active]))) if len(hist_days) else {},
+            'volatility': dict(zip(names, values(hist_vol[-1, active] * percent[active]))) if len(hist_days) else {},
+            'history': {
+                'dates': [day_to_date(d).isoformat() for d in hist_days],
+                'beta': {name: values(hist_beta[:, i]) for i, name in enumerate(self.names)},
+                'volatility': {name: values(hist_vol[:, i] * percent[i]) for i, name in enumerate(self.names)}
+            }
+        }, indent=None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rolling cross-asset correlation, beta and volatility')
+    parser.add_argument('--window', type=int, default=60, help='Rolling window in business days')
+    parser.add_argument('--benchmark', default='SPY')
+    parser.add_argument('--history', type=int, default=260, help='Days of rolling beta/volatility to keep')
+    parser.add_argument('--rebuild', action='store_true', help='Ignore saved state and recompute from the start')
+    args = parser.parse_args()
+
+    engine = RiskEngine(risk_series(), args.window, args.benchmark, args.history)
+    try:
+        with stage_timer('risk', 'compute'):
+            processed = engine.update(rebuild=args.rebuild)
+        logger.info(f"Risk engine processed {processed} days for {len(engine.names)} series")
+    finally:
+        flush_metrics('risk')
+
+
+if __name__ == "__main__":
+    main()
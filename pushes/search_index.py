@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Search Index
+On-disk full-text index (SQLite FTS5, BM25 ranking) over economic calendar
+release notes and the Telegram news store. Documents are upserted as they
+arrive, keyed by (source, key); unchanged documents are not rewritten, so
+re-running a sync only touches what changed.
+
+Usage:
+    python search_index.py --sync            # index the calendar store and news store
+    python search_index.py "rate decision"   # query from the command line
+"""
+
+import argparse
+import os
+import re
+import sqlite3
+import threading
+
+try:
+    from news_store import NewsStore
+except ImportError:  # imported as pushes.search_index
+    from pushes.news_store import NewsStore
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_DB_PATH = os.path.join(BASE_DIR, 'pushes', 'search_data', 'search.db')
+
+# BM25 column weights: a title hit counts more than a body hit
+TITLE_WEIGHT = 5.0
+BODY_WEIGHT = 1.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    doc_key TEXT NOT NULL,
+    title TEXT NOT NULL,
+    body TEXT NOT NULL,
+    date TEXT NOT NULL DEFAULT '',
+    url TEXT NOT NULL DEFAULT '',
+    UNIQUE (source, doc_key)
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+    title, body, content='documents', content_rowid='id', tokenize='porter unicode61'
+);
+-- Keep the external-content FTS table in step with documents
+CREATE TRIGGER IF NOT EXISTS documents_ai AFTER INSERT ON documents BEGIN
+    INSERT INTO documents_fts (rowid, title, body) VALUES (new.id, new.title, new.body);
+END;
+CREATE TRIGGER IF NOT EXISTS documents_ad AFTER DELETE ON documents BEGIN
+    INSERT INTO documents_fts (documents_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+END;
+CREATE TRIGGER IF NOT EXISTS documents_au AFTER UPDATE ON documents BEGIN
+    INSERT INTO documents_fts (documents_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+    INSERT INTO documents_fts (rowid, title, body) VALUES (new.id, new.title, new.body);
+END;
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+_TOKEN = re.compile(r'\w+', re.UNICODE)
+
+
+def to_match_query(text, any_term=False):
+    """
+    Turn free text into a safe FTS5 query: every word quoted (so operators and
+    punctuation in user input are never parsed as syntax), ANDed by default
+    """
+    terms = [f'"{token}"' for token in _TOKEN.findall(text or '')]
+    return (' OR ' if any_term else ' ').join(terms)
+
+
+def calendar_document(event):
+    return {
+        'source': 'calendar',
+        'key': f"{event['date']}:{event['release_id']}",
+        'title': event.get('name') or '',
+        'body': event.get('notes') or '',
+        'date': event['date'],
+        'url': event.get('link') or ''
+    }
+
+
+def news_document(message):
+    text = message.get('text') or ''
+    return {
+        'source': 'news',
+        'key': f"{message['channel']}:{message['id']}",
+        'title': text.split('\n', 1)[0][:200],
+        'body': text,
+        'date': str(message.get('date') or ''),
+        'url': f"https://t.me/{message['channel']}/{message['id']}"
+    }
+
+
+class SearchIndex:
+    """BM25-ranked full-text index; connections are per thread"""
+
+    def __init__(self, path=None):
+        self.path = os.fspath(path or os.getenv('SEARCH_DB_PATH') or DEFAULT_DB_PATH)
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = self._connection()
+        with conn:
+            conn.executescript(SCHEMA)
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def add_documents(self, documents):
+        """
+        Upsert documents (dicts with source, key, title, body, date, url)
+
+        Returns:
+            int: Number of documents inserted or changed
+        """
+        conn = self._connection()
+        with conn:
+            cursor = conn.executemany(
+                """
+                INSERT INTO documents (source, doc_key, title, body, date, url)
+                VALUES (:source, :key, :title, :body, :date, :url)
+                ON CONFLICT (source, doc_key) DO UPDATE SET
+                    title = excluded.title, body = excluded.body, date = excluded.date, url = excluded.url
+                WHERE documents.title IS NOT excluded.title OR documents.body IS NOT excluded.body
+                    OR documents.date IS NOT excluded.date OR documents.url IS NOT excluded.url
+                """,
+                documents
+            )
+        # rowcount counts documents rows only, not the trigger writes to the FTS tables
+        return cursor.rowcount
+
+    def remove(self, source, keys):
+        conn = self._connection()
+        with conn:
+            conn.executemany('DELETE FROM documents WHERE source = ? AND doc_key = ?', [(source, key) for key in keys])
+
+    def count(self):
+        return self._connection().execute('SELECT COUNT(*) FROM documents').fetchone()[0]
+
+    def optimize(self):
+        """Merge the FTS index segments into one (worth it after a bulk load)"""
+        conn = self._connection()
+        with conn:
+            conn.execute("INSERT INTO documents_fts (documents_fts) VALUES ('optimize')")
+
+    def search(self, query, k=10, source=None):
+        """
+        Top-k documents for a free-text query, best first
+
+        All words must match; if nothing does, any word may match.
+
+        Returns:
+            list[dict]: source, key, title, date, url, snippet, score (lower is better)
+        """
+        for any_term in (False, True):
+            match = to_match_query(query, any_term)
+            if not match:
+                return []
+            sql = f"""
+                SELECT d.source, d.doc_key AS key, d.title, d.date, d.url,
+                       snippet(documents_fts, 1, '[', ']', ' … ', 16) AS snippet,
+                       bm25(documents_fts, {TITLE_WEIGHT}, {BODY_WEIGHT}) AS score
+                FROM documents_fts JOIN documents d ON d.id = documents_fts.rowid
+                WHERE documents_fts MATCH ? {'AND d.source = ?' if source else ''}
+                ORDER BY score
+                LIMIT ?
+            """
+            params = [match] + ([source] if source else []) + [int(k)]
+            hits = [dict(row) for row in self._connection().execute(sql, params)]
+            if hits:
+                return hits
+        return []
+
+    def _get_meta(self, key):
+        row = self._connection().execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        conn = self._connection()
+        with conn:
+            conn.execute('INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT (key) DO UPDATE SET value = excluded.value',
+                         (key, str(value)))
+
+    def sync_calendar(self, calendar_store):
+        """Index calendar events (unchanged events are skipped by the upsert)"""
+        events, _ = calendar_store.query()
+        return self.add_documents([calendar_document(event) for event in events])
+
+    def sync_news(self, news_store=None):
+        """Index messages appended to the news store since the last sync"""
+        news_store = news_store or NewsStore()
+        identity = news_store.identity()
+        if identity is None:
+            return 0
+        last_identity, _, last_offset = (self._get_meta('news_offset') or '').partition(':')
+        offset = int(last_offset) if last_identity == str(identity) else 0
+        messages, offset = news_store.read_from(offset)
+        changed = self.add_documents([news_document(m) for m in messages if m.get('text')])
+        self._set_meta('news_offset', f"{identity}:{offset}")
+        return changed
+
+def main():
+    parser = argparse.ArgumentParser(description='Full-text search over calendar notes and news')
+    parser.add_argument('query', nargs='?', help='Free-text query')
+    parser.add_argument('--sync', action='store_true', help='Index the calendar store and the news store')
+    parser.add_argument('-k', type=int, default=10)
+    args = parser.parse_args()
+
+    index = SearchIndex()
+    if args.sync:
+        try:
+            from calendar_store import CalendarStore
+        except ImportError:
+            from pushes.calendar_store import CalendarStore
+        changed = index.sync_calendar(CalendarStore()) + index.sync_news()
+        print(f"Indexed {changed} new or changed documents ({index.count()} total)")
+    if args.query:
+        for hit in index.search(args.query, args.k):
+            print(f"{hit['score']:8.3f}  [{hit['source']}] {hit['date'][:10]}  {hit['title'][:80]}")
+            print(f"          {hit['snippet']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Snapshot I/O
+Crash-safe snapshot writes (temp file + fsync + atomic rename) and lock-free
+cached readers. A file is never modified in place, so a reader that opens the
+path always sees one complete generation.
+"""
+
+import csv
+import io
+import json
+import os
+import tempfile
+
+try:
+    import fcntl
+except ImportError:  # Windows: generation bumps are best-effort
+    fcntl = None
+
+
+def generation_path(path):
+    """Sidecar file holding the generation counter of a snapshot"""
+    return f"{path}.gen"
+
+
+def read_generation(path):
+    """Current generation of a snapshot (0 if it has never been written atomically)"""
+    try:
+        with open(generation_path(path), 'r') as f:
+            return int(f.read().strip() or 0)
+    except (FileNotFoundError, ValueError):
+        return 0
+
+
+def _replace_file(path, data):
+    """Write bytes to a temp file in the same directory, fsync it and rename it over path"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+    # Persist the rename itself
+    if hasattr(os, 'O_DIRECTORY'):
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+def write_atomic(path, data):
+    """
+    Atomically replace a file and bump its generation counter
+
+    Args:
+        path (str): Destination file
+        data (bytes | str): Full new contents
+
+    Returns:
+        int: The new generation number
+    """
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    path = os.fspath(path)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    lock_file = None
+    if fcntl is not None:
+        lock_file = open(f"{generation_path(path)}.lock", 'a')
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+    try:
+        _replace_file(path, data)
+        generation = read_generation(path) + 1
+        _replace_file(generation_path(path), str(generation).encode('ascii'))
+    finally:
+        if lock_file is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+            lock_file.close()
+    return generation
+
+
+def write_json_atomic(path, obj, indent=2, **kwargs):
+    """Atomically write an object as JSON (see write_atomic)"""
+    return write_atomic(path, json.dumps(obj, indent=indent, **kwargs))
+
+
+def write_csv_atomic(path, header, rows):
+    """Atomically write a CSV file (see write_atomic)"""
+    buffer = io.StringIO(newline='')
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    writer.writerows(rows)
+    return write_atomic(path, buffer.getvalue())
+
+
+class SnapshotReader:
+    """
+    Lock-free cached reader for a snapshot file
+
+    Re-parses only when the file identity (inode, mtime, size) changes. Because
+    writers always rename a complete new file over the path, the bytes behind a
+    given identity never change and the cached parse stays valid.
+    """
+
+    def __init__(self, path, loader=json.loads):
+        self.path = os.fspath(path)
+        self.loader = loader
+        # (identity, parsed value), swapped as one object so threads never see a torn pair
+        self._cached = (None, None)
+
+    @staticmethod
+    def _identity(st):
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def read(self):
+        """Return the parsed current snapshot (raises FileNotFoundError if missing)"""
+        cached_key, cached_value = self._cached
+        if self._identity(os.stat(self.path)) == cached_key:
+            return cached_value
+
+        with open(self.path, 'rb') as f:
+            # Key the parse by the file we actually opened, not the earlier stat
+            key = self._identity(os.fstat(f.fileno()))
+            raw = f.read()
+        value = self.loader(raw)
+        self._cached = (key, value)
+        return value
+
+    @property
+    def generation(self):
+        return read_generation(self.path)
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Snapshot Models
+Typed, slotted records for the crypto and macro snapshots shared by the
+scrapers and the backend. Timestamps are stored as integer epoch milliseconds.
+"""
+
+import json
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+
+class SnapshotValidationError(ValueError):
+    """Raised when a snapshot record does not match its schema"""
+
+
+def now_ms():
+    """Current time as integer epoch milliseconds"""
+    return time.time_ns() // 1_000_000
+
+
+def to_epoch_ms(value):
+    """Coerce an epoch (s or ms) or ISO-8601 string to integer epoch milliseconds"""
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        raise SnapshotValidationError(f"Invalid timestamp: {value!r}")
+    if isinstance(value, (int, float)):
+        # Values below 1e11 are epoch seconds (anything before 1973 in ms)
+        return int(value * 1000) if value < 1e11 else int(value)
+    if isinstance(value, str):
+        try:
+            parsed = datetime.fromisoformat(value)
+        except ValueError:
+            raise SnapshotValidationError(f"Invalid timestamp: {value!r}")
+        if parsed.tzinfo is None:
+            # Scrapers historically wrote naive datetime.utcnow() strings
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return int(parsed.timestamp() * 1000)
+    raise SnapshotValidationError(f"Invalid timestamp: {value!r}")
+
+
+def _number(record, key, value, optional=False):
+    if value is None and optional:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise SnapshotValidationError(f"{record}.{key} must be a number, got {value!r}")
+    return value
+
+
+def _string(record, key, value, optional=True):
+    if value is None and optional:
+        return None
+    if not isinstance(value, str):
+        raise SnapshotValidationError(f"{record}.{key} must be a string, got {value!r}")
+    return value
+
+
+def _extra(data, known):
+    return {k: v for k, v in data.items() if k not in known}
+
+
+def _stamped(data):
+    """Copy of a loosely-typed record with its timestamp coerced to epoch ms"""
+    data = dict(data or {})
+    if 'timestamp' in data:
+        data['timestamp'] = to_epoch_ms(data['timestamp'])
+    return data
+
+
+def _drop_none(data):
+    return {k: v for k, v in data.items() if v is not None}
+
+
+@dataclass(slots=True)
+class CryptoPrice:
+    price_usd: float
+    market_cap: Optional[float]
+    volume_24h: Optional[float]
+    change_24h: Optional[float]
+    timestamp: int
+
+    FIELDS = ('price_usd', 'market_cap', 'volume_24h', 'change_24h', 'timestamp')
+
+    def __post_init__(self):
+        name = type(self).__name__
+        _number(name, 'price_usd', self.price_usd)
+        for key in ('market_cap', 'volume_24h', 'change_24h'):
+            _number(name, key, getattr(self, key), optional=True)
+        self.timestamp = to_epoch_ms(self.timestamp)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{k: data.get(k) for k in cls.FIELDS})
+
+    def to_dict(self):
+        return {
+            'price_usd': self.price_usd,
+            'market_cap': self.market_cap,
+            'volume_24h': self.volume_24h,
+            'change_24h': self.change_24h,
+            'timestamp': self.timestamp
+        }
+
+
+@dataclass(slots=True)
+class IndexQuote:
+    symbol: str
+    price: float
+    open: float
+    high: float
+    low: float
+    volume: int
+    change: float
+    change_percent: float
+    previous_close: float
+    timestamp: int
+    data_date: Optional[str] = None
+    source: Optional[str] = None
+    error: Optional[str] = None
+    # Provider-specific fields (alternates, source_latency_ms, as_of, ...)
+    extra: Dict = field(default_factory=dict)
+
+    FIELDS = ('symbol', 'price', 'open', 'high', 'low', 'volume', 'change', 'change_percent',
+              'previous_close', 'timestamp', 'data_date', 'source', 'error')
+
+    def __post_init__(self):
+        name = type(self).__name__
+        _string(name, 'symbol', self.symbol, optional=False)
+        for key in ('price', 'open', 'high', 'low', 'volume', 'change', 'change_percent', 'previous_close'):
+            _number(name, key, getattr(self, key))
+        for key in ('data_date', 'source', 'error'):
+            _string(name, key, getattr(self, key))
+        self.timestamp = to_epoch_ms(self.timestamp)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{k: data.get(k) for k in cls.FIELDS}, extra=_extra(data, cls.FIELDS))
+
+    def to_dict(self):
+        out = _drop_none({k: getattr(self, k) for k in self.FIELDS})
+        out.update(self.extra)
+        return out
+
+
+@dataclass(slots=True)
+class RateQuote:
+    """A single rate reading, e.g. the 10Y yield (value_key='yield_percent') or Fed funds"""
+    value: float
+    timestamp: int
+    value_key: str = 'rate_percent'
+    change: Optional[float] = None
+    date: Optional[str] = None
+    source: Optional[str] = None
+    note: Optional[str] = None
+    error: Optional[str] = None
+
+    VALUE_KEYS = ('rate_percent', 'yield_percent')
+    FIELDS = ('change', 'date', 'source', 'note', 'error', 'timestamp')
+
+    def __post_init__(self):
+        name = type(self).__name__
+        if self.value_key not in self.VALUE_KEYS:
+            raise SnapshotValidationError(f"{name}.value_key must be one of {self.VALUE_KEYS}")
+        _number(name, self.value_key, self.value)
+        _number(name, 'change', self.change, optional=True)
+        for key in ('date', 'source', 'note', 'error'):
+            _string(name, key, getattr(self, key))
+        self.timestamp = to_epoch_ms(self.timestamp)
+
+    @classmethod
+    def from_dict(cls, data):
+        value_key = next((k for k in cls.VALUE_KEYS if k in data), 'rate_percent')
+        return cls(value=data.get(value_key), value_key=value_key, **{k: data.get(k) for k in cls.FIELDS})
+
+    def to_dict(self):
+        out = {self.value_key: self.value}
+        out.update(_drop_none({k: getattr(self, k) for k in self.FIELDS}))
+        return out
+
+
+@dataclass(slots=True)
+class EconomicSeries:
+    """Latest reading of an economic series, with MoM/YoY changes where they apply"""
+    value: float
+    timestamp: int
+    value_key: str = 'value'
+    change_mom: Optional[float] = None
+    change_yoy: Optional[float] = None
+    date: Optional[str] = None
+    source: Optional[str] = None
+    note: Optional[str] = None
+    error: Optional[str] = None
+
+    VALUE_KEYS = ('value', 'rate_percent')
+    FIELDS = ('change_mom', 'change_yoy', 'date', 'source', 'note', 'error', 'timestamp')
+
+    def __post_init__(self):
+        name = type(self).__name__
+        if self.value_key not in self.VALUE_KEYS:
+            raise SnapshotValidationError(f"{name}.value_key must be one of {self.VALUE_KEYS}")
+        _number(name, self.value_key, self.value)
+        for key in ('change_mom', 'change_yoy'):
+            _number(name, key, getattr(self, key), optional=True)
+        for key in ('date', 'source', 'note', 'error'):
+            _string(name, key, getattr(self, key))
+        self.timestamp = to_epoch_ms(self.timestamp)
+
+    @classmethod
+    def from_dict(cls, data):
+        value_key = next((k for k in cls.VALUE_KEYS if k in data), 'value')
+        return cls(value=data.get(value_key), value_key=value_key, **{k: data.get(k) for k in cls.FIELDS})
+
+    def to_dict(self):
+        out = {self.value_key: self.value}
+        out.update(_drop_none({k: getattr(self, k) for k in self.FIELDS}))
+        return out
+
+
+@dataclass(slots=True)
+class CryptoSnapshot:
+    crypto_prices: Dict[str, CryptoPrice]
+    hash_rates: Dict[str, dict]
+    fear_greed_index: dict
+    timestamp: int
+    data_type: str = 'crypto'
+
+    def __post_init__(self):
+        self.timestamp = to_epoch_ms(self.timestamp)
+
+    @classmethod
+    def from_dict(cls, data):
+        if not isinstance(data, dict):
+            raise SnapshotValidationError("Crypto snapshot must be an object")
+        return cls(
+            crypto_prices={k: CryptoPrice.from_dict(v) for k, v in (data.get('crypto_prices') or {}).items()},
+            hash_rates={k: _stamped(v) for k, v in (data.get('hash_rates') or {}).items()},
+            fear_greed_index=_stamped(data.get('fear_greed_index')),
+            timestamp=data.get('timestamp'),
+            data_type=data.get('data_type', 'crypto')
+        )
+
+    def to_dict(self):
+        return {
+            'crypto_prices': {k: v.to_dict() for k, v in self.crypto_prices.items()},
+            'hash_rates': self.hash_rates,
+            'fear_greed_index': self.fear_greed_index,
+            'timestamp': self.timestamp,
+            'data_type': self.data_type
+        }
+
+
+@dataclass(slots=True)
+class MacroSnapshot:
+    market_indices: Dict[str, IndexQuote]
+    interest_rates: Dict[str, RateQuote]
+    consumer_data: Dict[str, EconomicSeries]
+    timestamp: int
+    data_type: str = 'macro'
+
+    def __post_init__(self):
+        self.timestamp = to_epoch_ms(self.timestamp)
+
+    @classmethod
+    def from_dict(cls, data):
+        if not isinstance(data, dict):
+            raise SnapshotValidationError("Macro snapshot must be an object")
+        return cls(
+            market_indices={k: IndexQuote.from_dict(v) for k, v in (data.get('market_indices') or {}).items()},
+            interest_rates={k: RateQuote.from_dict(v) for k, v in (data.get('interest_rates') or {}).items()},
+            consumer_data={k: EconomicSeries.from_dict(v) for k, v in (data.get('consumer_data') or {}).items()},
+            timestamp=data.get('timestamp'),
+            data_type=data.get('data_type', 'macro')
+        )
+
+    def to_dict(self):
+        return {
+            'market_indices': {k: v.to_dict() for k, v in self.market_indices.items()},
+            'interest_rates': {k: v.to_dict() for k, v in self.interest_rates.items()},
+            'consumer_data': {k: v.to_dict() for k, v in self.consumer_data.items()},
+            'timestamp': self.timestamp,
+            'data_type': self.data_type
+        }
+
+
+def encode_snapshot(snapshot, indent=None):
+    """Serialize a snapshot model to JSON bytes (every field is JSON-native, no default=str)"""
+    separators = (',', ':') if indent is None else (',', ': ')
+    return json.dumps(snapshot.to_dict(), indent=indent, separators=separators).encode('utf-8')
+
+
+def decode_crypto_snapshot(raw):
+    """Parse and validate a crypto snapshot from JSON bytes/str"""
+    return CryptoSnapshot.from_dict(json.loads(raw))
+
+
+def decode_macro_snapshot(raw):
+    """Parse and validate a macro snapshot from JSON bytes/str"""
+    return MacroSnapshot.from_dict(json.loads(raw))
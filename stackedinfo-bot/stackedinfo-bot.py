@@ -1,6 +1,14 @@
 from telethon import TelegramClient
-import json
+from telethon.errors import FloodWaitError
+import asyncio
 import os
+import sys
+import time
+
+# The news store and search index live with the scrapers in pushes/
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pushes.news_store import NewsStore
+from pushes.search_index import SearchIndex
 
 # === YOUR TELEGRAM API CREDENTIALS ===
 api_id = '20471322'  # <-- YOUR API ID HERE
@@ -18,56 +26,106 @@ CHANNELS = [
     'bricsnews'
 ]
 
-N_MESSAGES = 5  # How many recent messages per channel
+N_MESSAGES = 5  # How many recent messages per channel on its first run
+MAX_NEW_MESSAGES = 200  # Per channel per run once it has a cursor; the rest follow next run
+CONCURRENCY = 3  # Channels fetched at once
+MAX_ATTEMPTS = 3  # Per channel, when Telegram asks us to wait
 
-EXPORT_DIR = 'exports'
-EXPORT_FILE = os.path.join(EXPORT_DIR, 'news.json')
+EXPORT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'exports')
 
 client = TelegramClient(session_name, api_id, api_hash)
 
-def load_existing():
-    """Load already-saved messages (by unique channel+id)"""
-    if not os.path.exists(EXPORT_FILE):
-        return []
-    with open(EXPORT_FILE, 'r', encoding='utf-8') as f:
-        return json.load(f)
 
-def message_key(msg):
-    """A unique key for each message (channel, id)"""
-    return f"{msg['channel']}:{msg['id']}"
+class FloodGate:
+    """Caps concurrent requests; a flood wait on any channel pauses them all"""
 
-async def main():
-    os.makedirs(EXPORT_DIR, exist_ok=True)
-    existing = load_existing()
-    existing_keys = set(message_key(m) for m in existing)
-    all_messages = existing.copy()
-
-    new_count = 0
-    for channel in CHANNELS:
-        print(f"Fetching from {channel}...")
-        async for message in client.iter_messages(channel, limit=N_MESSAGES):
-            if message.text:
-                msg = {
-                    'channel': channel,
-                    'id': message.id,
-                    'date': str(message.date),
-                    'text': message.text.strip(),
-                    'sender_id': message.sender_id
-                }
-                key = message_key(msg)
-                if key not in existing_keys:
-                    all_messages.append(msg)
-                    existing_keys.add(key)
-                    new_count += 1
-                    print(f"  [NEW] {channel} | {msg['date']} | {msg['text'][:60]}{'...' if len(msg['text'])>60 else ''}")
+    def __init__(self, limit):
+        self._semaphore = asyncio.Semaphore(limit)
+        self._resume_at = 0.0
+
+    def flood_wait(self, seconds):
+        self._resume_at = max(self._resume_at, time.monotonic() + seconds)
+
+    async def __aenter__(self):
+        await self._semaphore.acquire()
+        delay = self._resume_at - time.monotonic()
+        while delay > 0:
+            await asyncio.sleep(delay)
+            delay = self._resume_at - time.monotonic()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self._semaphore.release()
+
+
+async def fetch_channel(channel, since_id, gate):
+    """
+    Messages newer than since_id, oldest first
+
+    Returns:
+        tuple: (message dicts with text, highest message id fetched or None)
+    """
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        try:
+            async with gate:
+                if since_id is None:
+                    fetched = [m async for m in client.iter_messages(channel, limit=N_MESSAGES)]
+                    fetched.reverse()
                 else:
-                    print(f"  [SKIP] {channel} | {message.id} already saved.")
+                    fetched = [m async for m in client.iter_messages(
+                        channel, min_id=since_id, limit=MAX_NEW_MESSAGES, reverse=True)]
+            break
+        except FloodWaitError as e:
+            print(f"  [WAIT] {channel} | flood wait {e.seconds}s (attempt {attempt}/{MAX_ATTEMPTS})")
+            gate.flood_wait(e.seconds)
+    else:
+        print(f"  [FAIL] {channel} | giving up for this run")
+        return [], None
+
+    messages = [
+        {
+            'channel': channel,
+            'id': message.id,
+            'date': str(message.date),
+            'text': message.text.strip(),
+            'sender_id': message.sender_id
+        }
+        for message in fetched if message.text
+    ]
+    return messages, max((message.id for message in fetched), default=None)
+
+
+async def main():
+    store = NewsStore(EXPORT_DIR)
+    gate = FloodGate(CONCURRENCY)
+
+    print(f"Fetching from {len(CHANNELS)} channels...")
+    results = await asyncio.gather(
+        *(fetch_channel(channel, store.cursor(channel), gate) for channel in CHANNELS),
+        return_exceptions=True
+    )
+
+    fetched, cursors = [], {}
+    for channel, result in zip(CHANNELS, results):
+        if isinstance(result, Exception):
+            print(f"  [ERROR] {channel} | {result}")
+            continue
+        messages, last_id = result
+        fetched.extend(messages)
+        if last_id is not None:
+            cursors[channel] = last_id
+
+    # Fetched messages are at or past each cursor, so appending touches only new ones
+    new_messages = store.append(fetched, cursors)
+    for msg in new_messages:
+        print(f"  [NEW] {msg['channel']} | {msg['date']} | {msg['text'][:60]}{'...' if len(msg['text'])>60 else ''}")
 
-    with open(EXPORT_FILE, 'w', encoding='utf-8') as f:
-        json.dump(all_messages, f, indent=2, ensure_ascii=False)
+    print(f"Added {len(new_messages)} new messages. Total: {store.count()}")
+    print(f"Exported to {store.path}")
 
-    print(f"Added {new_count} new messages. Total: {len(all_messages)}")
-    print(f"Exported to {EXPORT_FILE}")
+    # Index only what was appended since the last sync
+    indexed = SearchIndex().sync_news(store)
+    print(f"Indexed {indexed} new messages for search")
 
 with client:
     client.loop.run_until_complete(main())